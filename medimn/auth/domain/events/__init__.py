@@ -16,6 +16,8 @@ from shared.domain.events import DomainEvent
 class UserRegisteredEvent(DomainEvent):
     """Evento que se dispara cuando un usuario se registra"""
     
+    __slots__ = ("user_id", "username", "email")
+    
     def __init__(self, user_id: str, username: str, email: str):
         super().__init__()
         self.user_id = user_id
@@ -34,6 +36,8 @@ class UserRegisteredEvent(DomainEvent):
 class UserLoggedInEvent(DomainEvent):
     """Evento que se dispara cuando un usuario inicia sesión"""
     
+    __slots__ = ("user_id", "username")
+    
     def __init__(self, user_id: str, username: str):
         super().__init__()
         self.user_id = user_id
@@ -50,6 +54,8 @@ class UserLoggedInEvent(DomainEvent):
 class TokenRefreshedEvent(DomainEvent):
     """Evento que se dispara cuando se refresca un token"""
     
+    __slots__ = ("user_id",)
+    
     def __init__(self, user_id: str):
         super().__init__()
         self.user_id = user_id
@@ -64,6 +70,8 @@ class TokenRefreshedEvent(DomainEvent):
 class UserDeactivatedEvent(DomainEvent):
     """Evento que se dispara cuando un usuario es desactivado"""
     
+    __slots__ = ("user_id",)
+    
     def __init__(self, user_id: str):
         super().__init__()
         self.user_id = user_id
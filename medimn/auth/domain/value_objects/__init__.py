@@ -3,8 +3,10 @@ Value Objects del dominio de autenticación
 """
 from dataclasses import dataclass
 
+from shared.domain.value_objects import InternedValueObject
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class Username:
     """Value Object para nombre de usuario"""
     value: str
@@ -19,7 +21,7 @@ class Username:
         return self.value
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class HashedPassword:
     """Value Object para contraseña hasheada"""
     value: str
@@ -32,7 +34,7 @@ class HashedPassword:
         return self.value
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FullName:
     """Value Object para nombre completo"""
     value: str
@@ -45,7 +47,7 @@ class FullName:
         return self.value or ""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PhoneNumber:
     """Value Object para número de teléfono"""
     value: str
@@ -64,8 +66,8 @@ class PhoneNumber:
         return self.value
 
 
-@dataclass(frozen=True)
-class UserRole:
+@dataclass(frozen=True, slots=True)
+class UserRole(InternedValueObject):
     """Value Object para rol de usuario"""
     value: str
     
@@ -78,7 +80,7 @@ class UserRole:
         return self.value
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Address:
     """Value Object para dirección"""
     value: str
@@ -91,7 +93,7 @@ class Address:
         return self.value or ""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class InstitutionName:
     """Value Object para nombre de institución"""
     value: str
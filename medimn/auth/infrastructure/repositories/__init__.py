@@ -86,7 +86,7 @@ class SQLAlchemyUserRepository(IUserRepository):
             hashed_password=HashedPassword(model.hashed_password),
             full_name=FullName(model.full_name) if model.full_name else None,
             phone_number=PhoneNumber(model.phone_number) if model.phone_number else None,
-            role=UserRole(model.role) if model.role else None,
+            role=UserRole.of(model.role) if model.role else None,
             address=Address(model.address) if model.address else None,
             institution_name=InstitutionName(model.institution_name) if model.institution_name else None,
             is_active=model.is_active,
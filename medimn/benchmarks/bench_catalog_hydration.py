@@ -0,0 +1,105 @@
+"""
+Benchmark: hidratar un catálogo grande con value objects compartidos por valor
+
+Convierte filas de productos a entidades con `_to_domain` del repositorio
+(categorías, bodegas, proveedores, vendedores y precios con `.of`) y lo
+compara con construir un value object nuevo por fila. Mide tiempo y
+memoria retenida con tracemalloc.
+
+Uso:
+    python benchmarks/bench_catalog_hydration.py --rows 50000
+"""
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+# Agregar path del monolito
+monolith_path = Path(__file__).parent.parent
+if str(monolith_path) not in sys.path:
+    sys.path.insert(0, str(monolith_path))
+
+from product.infrastructure.repositories import ProductModel, SQLAlchemyProductRepository
+from shared.domain.value_objects import InternedValueObject
+
+CATEGORIES = ["Analgésicos", "Antibióticos", "Vacunas", "Insumos", "Equipos", "Antisépticos"]
+WAREHOUSES = [f"Bodega {index}" for index in range(12)]
+SUPPLIERS = [f"Proveedor {index}" for index in range(40)]
+VENDORS = [f"vendor-{index}" for index in range(25)]
+PRICES = [150 * index for index in range(1, 200)]  # Centavos
+
+
+def build_rows(count: int, seed: int = 7):
+    """Filas de catálogo con valores repetidos como en producción"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    return [
+        ProductModel(
+            id=f"SKU-{index:06d}",
+            name=f"Producto {index}",
+            price_minor=rng.choice(PRICES),
+            stock=rng.randint(0, 500),
+            category=rng.choice(CATEGORIES),
+            warehouse=rng.choice(WAREHOUSES),
+            supplier=rng.choice(SUPPLIERS),
+            vendor_id=rng.choice(VENDORS),
+            batches=None,
+            is_active=True,
+            created_at=now,
+            updated_at=now
+        )
+        for index in range(count)
+    ]
+
+
+def _hydrate(rows, interned: bool):
+    repo = SQLAlchemyProductRepository(db=None)
+    if interned:
+        return [repo._to_domain(row) for row in rows]
+    # Línea base: cada .of construye y valida un objeto nuevo
+    with mock.patch.object(InternedValueObject, "of", classmethod(lambda cls, *args: cls(*args))):
+        return [repo._to_domain(row) for row in rows]
+
+
+def measure(name: str, rows, interned: bool, repeat: int = 3):
+    """Mejor tiempo de varias pasadas (sin tracemalloc) y memoria retenida de una"""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        products = _hydrate(rows, interned)
+        timings.append(time.perf_counter() - start)
+        del products
+    elapsed = min(timings)
+    
+    gc.collect()
+    tracemalloc.start()
+    products = _hydrate(rows, interned)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    print(f"{name}:")
+    print(f"  {len(products):,} productos en {elapsed * 1000:,.0f} ms "
+          f"({len(products) / elapsed:,.0f}/s), {current / 2**20:,.1f} MiB retenidos "
+          f"({current / len(products):,.0f} bytes por producto)")
+    return elapsed, current
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50000, help="Productos en el catálogo")
+    args = parser.parse_args()
+    
+    rows = build_rows(args.rows)
+    base_time, base_memory = measure("Un value object nuevo por fila", rows, interned=False)
+    time_, memory = measure("Value objects compartidos (.of)", rows, interned=True)
+    print(f"Tiempo {time_ / base_time:.0%} y memoria {memory / base_memory:.0%} de la línea base")
+
+
+if __name__ == "__main__":
+    main()
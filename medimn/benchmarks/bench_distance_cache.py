@@ -0,0 +1,96 @@
+"""
+Benchmark: caché de distancias en disco vs. recalcular la matriz
+
+Simula días de planificación que repiten la mayoría de las clínicas: cada
+día toma un subconjunto de un universo fijo de ubicaciones más algunas
+nuevas. Compara haversine vectorizado directo, la caché en frío y la caché
+caliente, y repite con un proveedor costoso (simula un motor de ruteo por
+calles con un costo fijo por fila) donde la caché evita casi todo el cálculo.
+
+Uso:
+    python benchmarks/bench_distance_cache.py --locations 600 --per-day 500 --days 5 --row-cost-ms 0.5
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Agregar path del monolito
+monolith_path = Path(__file__).parent.parent
+if str(monolith_path) not in sys.path:
+    sys.path.insert(0, str(monolith_path))
+
+import numpy as np
+
+from logistics.infrastructure.optimization import MemmapDistanceMatrix, haversine_distances
+
+NEW_LOCATIONS_PER_DAY = 0.05
+
+
+def planning_days(locations: int, per_day: int, days: int, seed: int = 21):
+    """Subconjuntos diarios de un universo de clínicas más un 5% de ubicaciones nuevas"""
+    rng = np.random.default_rng(seed)
+    lat = 4.5 + rng.random(locations) * 0.3
+    lon = -74.2 + rng.random(locations) * 0.3
+    result = []
+    for _ in range(days):
+        known = rng.choice(locations, size=per_day - int(per_day * NEW_LOCATIONS_PER_DAY), replace=False)
+        new = int(per_day * NEW_LOCATIONS_PER_DAY)
+        result.append((
+            np.concatenate((lat[known], 4.5 + rng.random(new) * 0.3)),
+            np.concatenate((lon[known], -74.2 + rng.random(new) * 0.3))
+        ))
+    return result
+
+
+def costly(row_cost_ms: float):
+    """Proveedor que tarda `row_cost_ms` por fila (p. ej. consultas a un motor de ruteo)"""
+    def _distances(lat_a, lon_a, lat_b, lon_b):
+        time.sleep(len(lat_a) * row_cost_ms / 1000)
+        return haversine_distances(lat_a, lon_a, lat_b, lon_b)
+    return _distances
+
+
+def run(name: str, days, distance_function, locations: int):
+    with tempfile.TemporaryDirectory() as directory:
+        # Primer día en frío para llenar las clínicas conocidas
+        warm_up = MemmapDistanceMatrix(directory, max_locations=locations * 2, distance_function=distance_function)
+        start = time.perf_counter()
+        for lat, lon in days[:1]:
+            warm_up.matrix(lat, lon)
+        cold = time.perf_counter() - start
+        warm_up.close()
+        
+        # Otro proceso (nueva instancia) en los días siguientes
+        cache = MemmapDistanceMatrix(directory, distance_function=distance_function)
+        start = time.perf_counter()
+        for lat, lon in days[1:]:
+            cache.matrix(lat, lon)
+        cached = (time.perf_counter() - start) / max(len(days) - 1, 1)
+        
+        start = time.perf_counter()
+        for lat, lon in days[1:]:
+            distance_function(lat, lon, lat, lon)
+        direct = (time.perf_counter() - start) / max(len(days) - 1, 1)
+        print(f"{name:<22} {direct * 1000:>12,.1f} {cold * 1000:>10,.1f} {cached * 1000:>12,.1f} "
+              f"{cache.hit_rate:>10.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--locations", type=int, default=600, help="Universo de clínicas")
+    parser.add_argument("--per-day", type=int, default=500, help="Ubicaciones por día")
+    parser.add_argument("--days", type=int, default=5, help="Días simulados")
+    parser.add_argument("--row-cost-ms", type=float, default=0.5, help="Costo por fila del proveedor costoso")
+    args = parser.parse_args()
+    
+    days = planning_days(args.locations, args.per_day, args.days)
+    print(f"{args.per_day} ubicaciones por día, {args.days} días (ms por día)")
+    print(f"{'proveedor':<22} {'directo':>12} {'frío':>10} {'caché':>12} {'aciertos':>10}")
+    run("haversine NumPy", days, haversine_distances, args.locations)
+    run(f"costoso ({args.row_cost_ms} ms/fila)", days, costly(args.row_cost_ms), args.locations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark: memoria y asignaciones al hidratar listas grandes de entidades
+
+Construye órdenes con sus artículos, rutas con sus paradas, productos y
+eventos como lo hacen los repositorios al leer filas, y mide con tracemalloc
+los bytes retenidos, el pico y los bloques asignados por entidad.
+
+Uso:
+    python benchmarks/bench_domain_memory.py --rows 10000
+"""
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Agregar path del monolito
+monolith_path = Path(__file__).parent.parent
+if str(monolith_path) not in sys.path:
+    sys.path.insert(0, str(monolith_path))
+
+from shared.domain.value_objects import EntityId, Money
+from order.domain.entities import Order, OrderItem, OrderStatus
+from order.domain.events import OrderConfirmedEvent
+from logistics.domain.entities import Route, Stop
+from product.domain.entities import Product
+from product.domain.value_objects import ProductName, Stock
+
+
+def hydrate_orders(rows: int):
+    return [
+        Order(
+            order_id=EntityId(f"order-{index}"),
+            items=[OrderItem(f"SKU-{index % 500}-{line}", line + 1, 10.0) for line in range(3)],
+            status=OrderStatus.CONFIRMED,
+            order_number=f"ORD-{index}",
+            client_id=f"client-{index % 100}"
+        )
+        for index in range(rows)
+    ]
+
+
+def hydrate_routes(rows: int):
+    return [
+        Route(
+            route_id=EntityId(f"route-{index}"),
+            stops=[Stop(f"order-{index}-{stop}", priority=stop + 1) for stop in range(5)],
+            route_number=f"RUT-{index}"
+        )
+        for index in range(rows)
+    ]
+
+
+def hydrate_products(rows: int):
+    return [
+        Product(
+            product_id=EntityId(f"SKU-{index}"),
+            name=ProductName(f"Producto {index}"),
+            price=Money(10.0),
+            stock=Stock(index % 100)
+        )
+        for index in range(rows)
+    ]
+
+
+def build_events(rows: int):
+    return [OrderConfirmedEvent(order_id=f"order-{index}") for index in range(rows)]
+
+
+def measure(name: str, build, rows: int):
+    """Bytes retenidos, pico y bloques por elemento de la lista"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    items = build(rows)
+    elapsed = time.perf_counter() - start
+    snapshot = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+    
+    print(f"{name}:")
+    print(f"  {rows:,} en {elapsed * 1000:,.0f} ms, {current / 2**20:,.1f} MiB retenidos "
+          f"(pico {peak / 2**20:,.1f} MiB)")
+    print(f"  {current / rows:,.0f} bytes y {blocks / rows:,.1f} bloques por elemento")
+    del items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000, help="Elementos por lista")
+    args = parser.parse_args()
+    
+    measure("Órdenes con 3 artículos", hydrate_orders, args.rows)
+    measure("Rutas con 5 paradas", hydrate_routes, args.rows)
+    measure("Productos", hydrate_products, args.rows)
+    measure("Eventos de orden", build_events, args.rows)
+
+
+if __name__ == "__main__":
+    main()
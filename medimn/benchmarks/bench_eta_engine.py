@@ -0,0 +1,145 @@
+"""
+Benchmark: recálculo incremental de ETAs de las rutas en curso
+
+Simula una flota en ruta que reporta su posición cada pocos segundos y
+compara:
+- EtaEngine: tramos entre paradas calculados una vez por ruta, recálculo
+  agrupado cada `--interval` segundos simulados y escritura solo de las
+  ETAs que se movieron al menos `--min-change` minutos
+- la línea base: en cada posición recalcular la matriz de la ruta completa
+  y escribir la ETA de todas sus paradas pendientes
+Mide el tiempo de CPU y las ETAs que llegarían a las órdenes (escrituras).
+
+Uso:
+    python benchmarks/bench_eta_engine.py --routes 200 --stops 25 --minutes 30
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Agregar path del monolito
+monolith_path = Path(__file__).parent.parent
+if str(monolith_path) not in sys.path:
+    sys.path.insert(0, str(monolith_path))
+
+from logistics.infrastructure.tracking import EtaEngine, PositionRingBuffers
+from logistics.infrastructure.optimization import haversine_distances, haversine_matrix
+from logistics.domain.entities import ETA, ROAD_DETOUR_FACTOR, Coordinates, Route, Stop, vehicle_profile
+
+START = datetime(2026, 3, 2, 8, 0)
+
+
+class CountingSink:
+    """Destino que solo cuenta las ETAs que se escribirían en las órdenes"""
+    
+    def __init__(self):
+        self.written = 0
+        self.calls = 0
+    
+    async def update_etas(self, etas):
+        self.calls += 1
+        self.written += len(etas)
+        return len(etas)
+
+
+def make_routes(routes: int, stops: int, seed: int = 3):
+    rng = random.Random(seed)
+    result = []
+    for index in range(routes):
+        route = Route.create(
+            stops=[
+                Stop(f"r{index}-o{stop}", priority=stop + 1,
+                     location=Coordinates(4.5 + rng.random() * 0.3, -74.2 + rng.random() * 0.3))
+                for stop in range(stops)
+            ],
+            vehicle_type="van"
+        )
+        route.start_route(f"veh-{index:04d}")
+        result.append(route)
+    return result
+
+
+def make_reports(routes, minutes: int, every_seconds: int, seed: int = 5):
+    """Lotes de posiciones (uno por cada `every_seconds`): cada vehículo avanza hacia su primera parada"""
+    rng = random.Random(seed)
+    origins = [(stop.location.lat - 0.02, stop.location.lon) for stop in (route.stops[0] for route in routes)]
+    batches = []
+    for tick in range(minutes * 60 // every_seconds):
+        ts = START + timedelta(seconds=tick * every_seconds)
+        batches.append([
+            (route.vehicle_id, lat + 0.00005 * tick + rng.uniform(-1e-5, 1e-5), lon, ts)
+            for route, (lat, lon) in zip(routes, origins)
+        ])
+    return batches
+
+
+def naive_etas(route, position):
+    """Línea base: matriz completa de las paradas pendientes en cada posición"""
+    remaining = route.remaining_stops
+    lat = [stop.location.lat for stop in remaining]
+    lon = [stop.location.lon for stop in remaining]
+    profile = vehicle_profile(route.vehicle_type)
+    minutes_per_km = ROAD_DETOUR_FACTOR / profile.average_speed_kmh * 60
+    matrix = haversine_matrix(lat, lon)
+    first = haversine_distances([position[1]], [position[2]], lat[:1], lon[:1])[0, 0] * minutes_per_km
+    etas, minutes = {}, first
+    for index, stop in enumerate(remaining):
+        if index:
+            minutes += profile.service_minutes_per_stop + matrix[index - 1, index] * minutes_per_km
+        etas[stop.order_id] = ETA(position[3] + timedelta(minutes=float(minutes)), 0)
+    return etas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--routes", type=int, default=200, help="Rutas en curso (un vehículo por ruta)")
+    parser.add_argument("--stops", type=int, default=25, help="Paradas por ruta")
+    parser.add_argument("--minutes", type=int, default=30, help="Minutos simulados")
+    parser.add_argument("--every", type=int, default=5, help="Segundos entre reportes de cada vehículo")
+    parser.add_argument("--interval", type=int, default=30, help="Segundos simulados entre recálculos del motor")
+    parser.add_argument("--min-change", type=float, default=2.0, help="Minutos de cambio para escribir una ETA")
+    args = parser.parse_args()
+    
+    routes = make_routes(args.routes, args.stops)
+    batches = make_reports(routes, args.minutes, args.every)
+    positions = sum(len(batch) for batch in batches)
+    print(f"{positions:,} posiciones de {args.routes:,} vehículos, {args.stops} paradas por ruta, {args.minutes} minutos")
+    
+    buffers = PositionRingBuffers(max_pending=10 ** 9)
+    sink = CountingSink()
+    engine = EtaEngine(buffers, sink, min_change_minutes=args.min_change)
+    loop = asyncio.new_event_loop()
+    flush_every = max(1, args.interval // args.every)
+    start = time.perf_counter()
+    for route in routes:
+        engine.track_route(route)
+    for tick, batch in enumerate(batches, 1):
+        vehicle_ids, lat, lon, timestamps = (list(column) for column in zip(*batch))
+        buffers.append_many(vehicle_ids, lat, lon, timestamps)
+        engine.positions_updated(vehicle_ids)
+        if tick % flush_every == 0:
+            loop.run_until_complete(engine.flush_once())
+    loop.run_until_complete(engine.flush_once())
+    elapsed = time.perf_counter() - start
+    print(f"  {'EtaEngine (tramos en caché, agrupado)':<42} {elapsed * 1000:>9,.1f} ms  "
+          f"escrituras {sink.calls:>6,}  ETAs escritas {sink.written:>10,}")
+    print(f"    contadores: {engine.metrics()}")
+    loop.close()
+    
+    by_vehicle = {route.vehicle_id: route for route in routes}
+    written = 0
+    start = time.perf_counter()
+    for batch in batches:
+        for position in batch:
+            written += len(naive_etas(by_vehicle[position[0]], position))
+    elapsed = time.perf_counter() - start
+    print(f"  {'línea base: todo en cada posición':<42} {elapsed * 1000:>9,.1f} ms  "
+          f"escrituras {positions:>6,}  ETAs escritas {written:>10,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark: EventBus síncrono vs. cola acotada con pool de workers
+
+Cada evento tiene varios handlers que simulan E/S (asyncio.sleep). Se mide la
+latencia que ve el publicador (lo que suma a la petición) y el throughput
+hasta procesar todos los eventos. Al final compara un handler por evento
+contra un handler en lote que hace una sola escritura por lote.
+
+Uso:
+    python benchmarks/bench_event_bus.py --events 5000 --handler-ms 2
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Agregar path del monolito
+monolith_path = Path(__file__).parent.parent
+if str(monolith_path) not in sys.path:
+    sys.path.insert(0, str(monolith_path))
+
+from shared.domain.events import Backpressure, DomainEvent, EventBus
+
+
+class BenchEvent(DomainEvent):
+    """Evento de benchmark"""
+    
+    def __init__(self, value: int):
+        super().__init__()
+        self.value = value
+
+
+def _build_bus(handlers: int, handler_ms: float):
+    bus = EventBus()
+    processed = []
+    
+    def _make_handler(index):
+        async def _handler(event):
+            await asyncio.sleep(handler_ms / 1000)
+            if index == 0:
+                processed.append(event.value)
+        return _handler
+    
+    for index in range(handlers):
+        bus.subscribe("BenchEvent", _make_handler(index))
+    return bus, processed
+
+
+async def run(args, workers=None, backpressure=Backpressure.BLOCK):
+    """Publicar todos los eventos y esperar a que se procesen"""
+    bus, processed = _build_bus(args.handlers, args.handler_ms)
+    if workers:
+        bus.start(workers=workers, max_queue_size=args.queue_size, backpressure=backpressure)
+    
+    publish_ms = []
+    start = time.perf_counter()
+    for value in range(args.events):
+        published = time.perf_counter()
+        await bus.publish(BenchEvent(value))
+        publish_ms.append((time.perf_counter() - published) * 1000)
+    if workers:
+        await bus.drain()
+    elapsed = time.perf_counter() - start
+    
+    ordered = sorted(publish_ms)
+    return {
+        "elapsed": elapsed,
+        "throughput": len(processed) / elapsed,
+        "processed": len(processed),
+        "publish_p50": statistics.median(ordered),
+        "publish_p99": ordered[int(len(ordered) * 0.99)],
+        "metrics": bus.metrics()
+    }
+
+
+async def run_batched(args, batch_size=None):
+    """Un handler que simula una escritura: por evento o una por lote"""
+    bus = EventBus()
+    writes, processed = [], []
+    
+    async def _per_event(event):
+        await asyncio.sleep(args.handler_ms / 1000)
+        writes.append(1)
+        processed.append(event.value)
+    
+    async def _per_batch(events):
+        await asyncio.sleep(args.handler_ms / 1000)
+        writes.append(1)
+        processed.extend(event.value for event in events)
+    
+    if batch_size:
+        bus.subscribe_batch("BenchEvent", _per_batch, max_batch_size=batch_size, max_wait_seconds=0.05)
+    else:
+        bus.subscribe("BenchEvent", _per_event)
+    bus.start(workers=16, max_queue_size=args.queue_size)
+    
+    start = time.perf_counter()
+    for value in range(args.events):
+        await bus.publish(BenchEvent(value))
+    await bus.drain()
+    elapsed = time.perf_counter() - start
+    return len(processed), len(writes), elapsed
+
+
+def _print(name, result):
+    print(f"{name}:")
+    print(f"  {result['processed']:,} eventos procesados en {result['elapsed']:.2f}s "
+          f"({result['throughput']:,.0f} eventos/s)")
+    print(f"  latencia de publish p50 {result['publish_p50']:.3f} ms / p99 {result['publish_p99']:.3f} ms")
+    metrics = result["metrics"]
+    if metrics["queueWaitMs"]["p95"] is not None:
+        print(f"  espera en cola p95 {metrics['queueWaitMs']['p95']:.1f} ms, "
+              f"descartados {metrics['dropped']:,}, desbordados {metrics['spilled']:,}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=5000, help="Eventos a publicar")
+    parser.add_argument("--handlers", type=int, default=3, help="Handlers por evento")
+    parser.add_argument("--handler-ms", type=float, default=2.0, help="E/S simulada por handler (ms)")
+    parser.add_argument("--queue-size", type=int, default=1000, help="Capacidad de la cola")
+    args = parser.parse_args()
+    
+    print(f"{args.events:,} eventos, {args.handlers} handlers de {args.handler_ms} ms")
+    _print("Síncrono (handlers en la petición)", await run(args))
+    for workers in (4, 16, 64):
+        _print(f"Asíncrono, {workers} workers, block", await run(args, workers=workers))
+    _print("Asíncrono, 16 workers, drop_oldest", await run(args, 16, Backpressure.DROP_OLDEST))
+    _print("Asíncrono, 16 workers, spill", await run(args, 16, Backpressure.SPILL))
+    
+    for batch_size in (None, 50, 200):
+        processed, writes, elapsed = await run_batched(args, batch_size)
+        name = f"lotes de hasta {batch_size}" if batch_size else "un evento por llamada"
+        print(f"Handler de escritura, {name}:")
+        print(f"  {processed:,} eventos con {writes:,} escrituras en {elapsed:.2f}s "
+              f"({processed / elapsed:,.0f} eventos/s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""
+Benchmark: calidad del plan de flota frente al tiempo de cómputo
+
+Genera un día de despacho (entregas con demanda y ventanas de ETA, flota
+mixta) y planifica con distintos presupuestos de reloj, con un proceso y
+con el pool completo. Reporta distancia total, vehículos usados, entregas
+sin asignar y la brecha contra el mejor plan encontrado.
+
+Uso:
+    python benchmarks/bench_fleet_planner.py --orders 300 --vehicles 20 --budgets 0 0.5 1 2 4 --workers 1 4
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Agregar path del monolito
+monolith_path = Path(__file__).parent.parent
+if str(monolith_path) not in sys.path:
+    sys.path.insert(0, str(monolith_path))
+
+from logistics.domain.entities import Coordinates, DeliveryJob, FleetVehicle
+from logistics.infrastructure.optimization import ProcessPoolFleetPlanner
+
+WINDOWS_MINUTES = [60, 120, 240, None]
+
+
+def build_day(orders: int, vehicles: int, seed: int = 11):
+    """Entregas en un área urbana de ~35 km x 35 km y flota mixta"""
+    rng = random.Random(seed)
+    jobs = []
+    for _ in range(orders):
+        window = rng.choice(WINDOWS_MINUTES)
+        start = rng.uniform(0, 420) if window else 0.0
+        jobs.append(DeliveryJob(
+            location=Coordinates(4.5 + rng.random() * 0.3, -74.2 + rng.random() * 0.3),
+            demand=rng.randint(1, 12),
+            earliest_minutes=start,
+            latest_minutes=start + window if window else None
+        ))
+    fleet = [
+        FleetVehicle(f"vehicle-{index}", capacity, vehicle_type)
+        for index, (capacity, vehicle_type) in enumerate(
+            rng.choice([(40, "motorcycle"), (150, "van"), (400, "truck")]) for _ in range(vehicles)
+        )
+    ]
+    return jobs, fleet
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, default=300, help="Entregas del día")
+    parser.add_argument("--vehicles", type=int, default=20, help="Vehículos disponibles")
+    parser.add_argument("--budgets", type=float, nargs="+", default=[0, 0.5, 1, 2, 4], help="Presupuestos en segundos")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4], help="Procesos del pool")
+    args = parser.parse_args()
+    
+    jobs, fleet = build_day(args.orders, args.vehicles)
+    depot = Coordinates(4.65, -74.05)
+    rows = []
+    for workers in args.workers:
+        planner = ProcessPoolFleetPlanner(max_workers=workers)
+        # Arranque del pool fuera de la medición
+        planner.plan(depot, jobs[:5], fleet, time_budget_seconds=0)
+        for budget in args.budgets:
+            start = time.perf_counter()
+            plan = planner.plan(depot, jobs, fleet, time_budget_seconds=budget)
+            rows.append((workers, budget, time.perf_counter() - start, plan))
+        planner.shutdown()
+    
+    best = min(plan.distance_km for *_, plan in rows if len(plan.unassigned) == min(len(p.unassigned) for *_, p in rows))
+    print(f"{args.orders} entregas, {args.vehicles} vehículos")
+    print(f"{'procesos':>8} {'presupuesto s':>14} {'tiempo s':>9} {'km':>9} {'vehículos':>10} {'sin asignar':>12} {'brecha':>7}")
+    for workers, budget, elapsed, plan in rows:
+        print(f"{workers:>8} {budget:>14.2f} {elapsed:>9.2f} {plan.distance_km:>9,.1f} {len(plan.tours):>10} "
+              f"{len(plan.unassigned):>12} {plan.distance_km / best - 1:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark: geocodificación por lotes con caché en tabla vs. por dirección
+
+Genera un gazetteer CSV de direcciones sintéticas y días de planificación
+donde las clínicas se repiten (distribución de Zipf) escritas de distintas
+formas ("Cl 100 # 15-20", "Calle 100 No. 15 - 20"). Mide el tiempo por día
+del geocodificador por lotes (una consulta IN por bloque, un INSERT por
+lote) frente a consultar la tabla dirección por dirección, y la tasa de
+aciertos de la caché a medida que pasan los días.
+
+Uso:
+    python benchmarks/bench_geocoding.py --gazetteer 50000 --per-day 2000 --days 5
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Agregar path del monolito
+monolith_path = Path(__file__).parent.parent
+if str(monolith_path) not in sys.path:
+    sys.path.insert(0, str(monolith_path))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from infrastructure.database import Base
+from logistics.infrastructure.geocoding import CachedGazetteerGeocoder, Gazetteer, GeocodingStats, normalize_address
+from logistics.infrastructure.repositories import GeocodeCacheModel, SQLAlchemyGeocodeCache
+
+STREET_TYPES = [("Calle", "Cl"), ("Carrera", "Cra"), ("Avenida", "Av"), ("Diagonal", "Dg"), ("Transversal", "Tv")]
+
+
+def write_gazetteer(path: str, count: int, seed: int = 4):
+    """Direcciones únicas tipo "Calle 100 # 15-20" con coordenadas en Bogotá"""
+    rng = random.Random(seed)
+    seen = set()
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write("address,lat,lon\n")
+        while len(seen) < count:
+            street = (rng.randrange(len(STREET_TYPES)), rng.randint(1, 200), rng.randint(1, 120), rng.randint(1, 99))
+            if street in seen:
+                continue
+            seen.add(street)
+            kind, number, cross, plate = street
+            handle.write(f"{STREET_TYPES[kind][0]} {number} # {cross}-{plate},"
+                         f"{4.5 + rng.random() * 0.3:.6f},{-74.2 + rng.random() * 0.3:.6f}\n")
+    return sorted(seen)
+
+
+def planning_days(streets, per_day: int, days: int, seed: int = 9):
+    """Días con clínicas repetidas (Zipf) y variantes de escritura"""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(streets))]
+    result = []
+    for _ in range(days):
+        addresses = []
+        for kind, number, cross, plate in rng.choices(streets, weights=weights, k=per_day):
+            full, short = STREET_TYPES[kind]
+            addresses.append(rng.choice([
+                f"{full} {number} # {cross}-{plate}",
+                f"{short} {number} No. {cross} - {plate}, Bogotá",
+                f"{short.upper()} {number}#{cross}-{plate}"
+            ]))
+        result.append(addresses)
+    return result
+
+
+async def per_address(session, gazetteer: Gazetteer, addresses) -> int:
+    """Línea base: una consulta (y un INSERT si falta) por dirección"""
+    found = 0
+    for address in addresses:
+        key = normalize_address(address)
+        row = session.get(GeocodeCacheModel, key)
+        if row is None:
+            entry = gazetteer.resolve(key)
+            if entry is not None:
+                await SQLAlchemyGeocodeCache(session).put_many({key: entry})
+                found += 1
+        else:
+            found += 1
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--gazetteer", type=int, default=50000, help="Direcciones del gazetteer")
+    parser.add_argument("--per-day", type=int, default=2000, help="Direcciones por día de planificación")
+    parser.add_argument("--days", type=int, default=5, help="Días simulados")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        gazetteer_path = os.path.join(tmp, "gazetteer.csv")
+        streets = write_gazetteer(gazetteer_path, args.gazetteer)
+        days = planning_days(streets, args.per_day, args.days)
+        gazetteer = Gazetteer(gazetteer_path)
+        start = time.perf_counter()
+        gazetteer.entries
+        print(f"Gazetteer: {args.gazetteer:,} direcciones cargadas en {(time.perf_counter() - start) * 1000:,.0f} ms")
+        
+        loop = asyncio.new_event_loop()
+        for name in ("por dirección", "por lotes"):
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, name.replace(' ', '_') + '.db')}")
+            Base.metadata.create_all(engine, tables=[GeocodeCacheModel.__table__])
+            session = sessionmaker(bind=engine)()
+            stats = GeocodingStats()
+            print(f"{name}:")
+            for day, addresses in enumerate(days, start=1):
+                start = time.perf_counter()
+                if name == "por lotes":
+                    geocoder = CachedGazetteerGeocoder(SQLAlchemyGeocodeCache(session), gazetteer, stats)
+                    loop.run_until_complete(geocoder.geocode_many(addresses))
+                    rate = f"aciertos acumulados {stats.hit_rate:.1%}"
+                else:
+                    loop.run_until_complete(per_address(session, gazetteer, addresses))
+                    rate = ""
+                print(f"  día {day}: {(time.perf_counter() - start) * 1000:8,.1f} ms  {rate}")
+            session.close()
+            engine.dispose()
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
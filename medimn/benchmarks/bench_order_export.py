@@ -0,0 +1,146 @@
+"""
+Benchmark: exportar órdenes en streaming vs. paginar GET /orders
+
+La línea base pagina con `find_all` (hidrata órdenes con sus artículos) y
+codifica cada página a JSON, como haría hoy un cliente de finanzas. La
+exportación lee con yield_per y codifica CSV por partes. Mide tiempo y pico
+de memoria (tracemalloc) con dos tamaños para mostrar que el pico no crece.
+
+Uso:
+    python benchmarks/bench_order_export.py --orders 20000 200000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Agregar path del monolito
+monolith_path = Path(__file__).parent.parent
+if str(monolith_path) not in sys.path:
+    sys.path.insert(0, str(monolith_path))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from infrastructure.database import Base
+from order.infrastructure.repositories import OrderModel, OrderItemModel, SQLAlchemyOrderRepository
+from order.application.handlers import ExportOrdersQueryHandler
+from order.application.queries import ExportOrdersQuery
+from order.domain.entities import OrderStatus
+
+INSERT_CHUNK = 20000
+PAGE_SIZE = 100
+
+
+def populate(engine, count: int, seed: int = 42):
+    """Órdenes con dos artículos cada una"""
+    rng = random.Random(seed)
+    statuses = [status.value for status in OrderStatus]
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        for start in range(0, count, INSERT_CHUNK):
+            orders, items = [], []
+            for index in range(start, min(start + INSERT_CHUNK, count)):
+                order_id = f"order-{index:08d}"
+                orders.append({
+                    "id": order_id,
+                    "order_number": f"ORD-BENCH-{index:08d}",
+                    "status": rng.choice(statuses),
+                    "client_id": f"client-{rng.randrange(500)}",
+                    "total_minor": rng.randrange(100, 500000),
+                    "currency": "USD",
+                    "created_at": now - timedelta(minutes=index),
+                    "updated_at": now
+                })
+                items.extend(
+                    {"order_id": order_id, "position": position, "sku_id": f"SKU-{position}",
+                     "qty": 1, "price_minor": 100, "subtotal_minor": 100}
+                    for position in range(2)
+                )
+            conn.execute(insert(OrderModel), orders)
+            conn.execute(insert(OrderItemModel), items)
+
+
+def paged_export(session) -> int:
+    """Línea base: páginas de GET /orders hidratadas y codificadas a JSON"""
+    repo = SQLAlchemyOrderRepository(session)
+    loop = asyncio.new_event_loop()
+    written, skip = 0, 0
+    try:
+        while True:
+            orders = loop.run_until_complete(repo.find_all(skip=skip, limit=PAGE_SIZE))
+            if not orders:
+                return written
+            written += len(json.dumps([
+                {
+                    "id": str(order.id),
+                    "orderNumber": order.order_number,
+                    "status": order.status.value,
+                    "items": [item.to_dict() for item in order.items],
+                    "totals": order.totals,
+                    "createdAt": order.created_at.isoformat()
+                }
+                for order in orders
+            ]))
+            skip += PAGE_SIZE
+            session.expunge_all()
+    finally:
+        loop.close()
+
+
+def streamed_export(session_factory) -> int:
+    @contextmanager
+    def _repository():
+        session = session_factory()
+        try:
+            yield SQLAlchemyOrderRepository(session)
+        finally:
+            session.close()
+    
+    handler = ExportOrdersQueryHandler(_repository)
+    return sum(len(chunk) for chunk in handler.handle(ExportOrdersQuery(format="csv")))
+
+
+def measure(name: str, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    written = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {name:<22} {elapsed:7.2f}s  pico {peak / 2**20:7.1f} MiB  ({written / 2**20:,.1f} MiB escritos)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--orders", type=int, nargs="+", default=[20000, 200000], help="Tamaños a exportar")
+    parser.add_argument("--skip-baseline-over", type=int, default=50000,
+                        help="No paginar la línea base por encima de este tamaño (OFFSET es cuadrático)")
+    args = parser.parse_args()
+    
+    for count in args.orders:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            Base.metadata.create_all(engine, tables=[OrderModel.__table__, OrderItemModel.__table__])
+            populate(engine, count)
+            session_factory = sessionmaker(bind=engine)
+            
+            print(f"{count:,} órdenes:")
+            if count <= args.skip_baseline_over:
+                session = session_factory()
+                measure("paginando GET /orders", lambda: paged_export(session))
+                session.close()
+            measure("exportación streaming", lambda: streamed_export(session_factory))
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
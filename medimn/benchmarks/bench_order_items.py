@@ -0,0 +1,161 @@
+"""
+Benchmark: consultas por SKU sobre order_items vs. escaneo de la columna JSON legada
+
+Uso:
+    python benchmarks/bench_order_items.py --items 1000000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Agregar path del monolito
+monolith_path = Path(__file__).parent.parent
+if str(monolith_path) not in sys.path:
+    sys.path.insert(0, str(monolith_path))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from infrastructure.database import Base
+from order.infrastructure.repositories import OrderModel, OrderItemModel, SQLAlchemyOrderRepository
+from order.domain.entities import OrderStatus, OPEN_ORDER_STATUSES, NON_SALE_ORDER_STATUSES
+
+ITEMS_PER_ORDER = 5
+SKU_COUNT = 5000
+INSERT_CHUNK = 20000
+
+
+def _best_of(repeat, fn):
+    """Ejecutar una función varias veces y retornar (mejor tiempo, resultado)"""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def populate(engine, total_items: int, seed: int = 42):
+    """Poblar orders (con JSON legado) y order_items con los mismos datos"""
+    rng = random.Random(seed)
+    statuses = [status.value for status in OrderStatus]
+    now = datetime.utcnow()
+    order_count = total_items // ITEMS_PER_ORDER
+    
+    orders, items = [], []
+    with engine.begin() as conn:
+        for order_index in range(order_count):
+            order_id = f"order-{order_index:08d}"
+            order_items = []
+            for position in range(ITEMS_PER_ORDER):
+                sku_id = f"SKU-{rng.randrange(SKU_COUNT):05d}"
+                qty = rng.randint(1, 20)
+                price = round(rng.uniform(1, 500), 2)
+                order_items.append({"skuId": sku_id, "qty": qty, "price": price})
+                items.append({
+                    "order_id": order_id,
+                    "position": position,
+                    "sku_id": sku_id,
+                    "qty": qty,
+                    "price_minor": round(price * 100),
+                    "subtotal_minor": qty * round(price * 100)
+                })
+            orders.append({
+                "id": order_id,
+                "order_number": f"ORD-BENCH-{order_index:08d}",
+                "items": order_items,
+                "status": rng.choice(statuses),
+                "total_minor": sum(item["qty"] * round(item["price"] * 100) for item in order_items),
+                "created_at": now - timedelta(minutes=rng.randrange(180 * 24 * 60)),
+                "updated_at": now
+            })
+            if len(items) >= INSERT_CHUNK:
+                conn.execute(insert(OrderModel), orders)
+                conn.execute(insert(OrderItemModel), items)
+                orders, items = [], []
+        if orders:
+            conn.execute(insert(OrderModel), orders)
+            conn.execute(insert(OrderItemModel), items)
+    return order_count
+
+
+def legacy_orders_with_sku(session, sku_id):
+    """Línea base: escanear todas las órdenes y parsear el JSON en Python"""
+    open_values = {status.value for status in OPEN_ORDER_STATUSES}
+    found = []
+    for order_id, status, raw_items in session.query(OrderModel.id, OrderModel.status, OrderModel.items):
+        if status not in open_values:
+            continue
+        raw_items = json.loads(raw_items) if isinstance(raw_items, str) else raw_items
+        if any(item["skuId"] == sku_id for item in raw_items):
+            found.append(order_id)
+    return found
+
+
+def legacy_units_by_sku(session, date_from):
+    """Línea base: agregación por SKU en Python sobre el JSON"""
+    excluded = {status.value for status in NON_SALE_ORDER_STATUSES}
+    units = {}
+    query = session.query(OrderModel.status, OrderModel.items).filter(OrderModel.created_at >= date_from)
+    for status, raw_items in query:
+        if status in excluded:
+            continue
+        raw_items = json.loads(raw_items) if isinstance(raw_items, str) else raw_items
+        for item in raw_items:
+            units[item["skuId"]] = units.get(item["skuId"], 0) + item["qty"]
+    return units
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=1_000_000, help="Total de artículos a generar")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por medición")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine, tables=[OrderModel.__table__, OrderItemModel.__table__])
+        
+        start = time.perf_counter()
+        order_count = populate(engine, args.items)
+        print(f"Poblado: {order_count:,} órdenes / {args.items:,} artículos en {time.perf_counter() - start:.1f}s")
+        
+        session = sessionmaker(bind=engine)()
+        repo = SQLAlchemyOrderRepository(session)
+        sku_id = "SKU-00042"
+        date_from = datetime.utcnow() - timedelta(days=30)
+        loop = asyncio.new_event_loop()
+        
+        legacy_time, legacy_ids = _best_of(args.repeat, lambda: legacy_orders_with_sku(session, sku_id))
+        indexed_time, orders = _best_of(args.repeat, lambda: loop.run_until_complete(
+            repo.find_by_sku(sku_id, statuses=list(OPEN_ORDER_STATUSES), limit=len(legacy_ids) or 1)
+        ))
+        assert {str(order.id) for order in orders} == set(legacy_ids)
+        print(f"Órdenes abiertas con {sku_id} ({len(legacy_ids)}):")
+        print(f"  escaneo JSON      {legacy_time * 1000:10.1f} ms")
+        print(f"  índice order_items{indexed_time * 1000:10.1f} ms (incluye hidratación)")
+        
+        legacy_time, legacy_units = _best_of(args.repeat, lambda: legacy_units_by_sku(session, date_from))
+        sql_time, sales = _best_of(args.repeat, lambda: loop.run_until_complete(
+            repo.get_sku_sales(date_from=date_from)
+        ))
+        assert {row["sku_id"]: row["units"] for row in sales} == legacy_units
+        print(f"Unidades por SKU últimos 30 días ({len(sales)} SKUs):")
+        print(f"  agregación Python {legacy_time * 1000:10.1f} ms")
+        print(f"  SUM/GROUP BY SQL  {sql_time * 1000:10.1f} ms")
+        
+        loop.close()
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark: ingesta de posiciones GPS con anillos columnares por vehículo
+
+Simula una flota que reporta por lotes (posiciones de muchos vehículos
+mezcladas, algunas fuera de orden) y mide puntos por segundo de:
+- el request completo: validación del JSON con Pydantic + handler + anillos
+- solo el handler y los anillos (lote ya validado)
+- la línea base: un deque de objetos Position por vehículo, punto a punto
+- el guardado por lotes en vehicle_positions (SQLite en archivo temporal)
+y el costo de leer la última posición de un vehículo.
+
+Uso:
+    python benchmarks/bench_position_ingest.py --vehicles 2000 --batch 1000 --batches 100
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Agregar path del monolito
+monolith_path = Path(__file__).parent.parent
+if str(monolith_path) not in sys.path:
+    sys.path.insert(0, str(monolith_path))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from infrastructure.database import Base
+from logistics.api.routes.routes import IngestPositionsRequest
+from logistics.application.commands import IngestPositionsCommand
+from logistics.application.handlers import IngestPositionsCommandHandler
+from logistics.domain.entities import Position
+from logistics.infrastructure.repositories import VehiclePositionModel
+from logistics.infrastructure.tracking import PositionFlusher, PositionRingBuffers
+
+
+def make_batches(vehicles: int, batch: int, batches: int, seed: int = 7):
+    """Lotes de posiciones de vehículos al azar; ~2% llegan con un ts anterior"""
+    rng = random.Random(seed)
+    start = datetime(2026, 3, 2, 8, 0)
+    result = []
+    for index in range(batches):
+        positions = []
+        for offset in range(batch):
+            delay = rng.randint(30, 120) if rng.random() < 0.02 else 0
+            positions.append({
+                "vehicleId": f"veh-{rng.randrange(vehicles):05d}",
+                "lat": 4.5 + rng.random() * 0.3,
+                "lon": -74.2 + rng.random() * 0.3,
+                "ts": start + timedelta(seconds=index * batch + offset - delay)
+            })
+        result.append(positions)
+    return result
+
+
+def naive_ingest(tracks: dict, positions, capacity: int):
+    """Línea base: un objeto Position por punto en un deque por vehículo"""
+    for position in positions:
+        track = tracks.get(position["vehicleId"])
+        if track is None:
+            track = tracks[position["vehicleId"]] = deque(maxlen=capacity)
+        track.append(Position(position["lat"], position["lon"], position["ts"]))
+
+
+def report(name: str, points: int, seconds: float):
+    print(f"  {name:<42} {points / seconds:>12,.0f} puntos/s  ({seconds * 1000:,.1f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vehicles", type=int, default=2000, help="Vehículos de la flota")
+    parser.add_argument("--batch", type=int, default=1000, help="Posiciones por request")
+    parser.add_argument("--batches", type=int, default=100, help="Requests simulados")
+    parser.add_argument("--capacity", type=int, default=256, help="Posiciones por anillo")
+    args = parser.parse_args()
+    
+    batches = make_batches(args.vehicles, args.batch, args.batches)
+    bodies = [
+        json.dumps({"positions": [dict(position, ts=position["ts"].isoformat()) for position in positions]})
+        for positions in batches
+    ]
+    points = args.batch * args.batches
+    loop = asyncio.new_event_loop()
+    print(f"{points:,} posiciones de {args.vehicles:,} vehículos en lotes de {args.batch:,}")
+    
+    buffers = PositionRingBuffers(capacity=args.capacity, max_pending=points)
+    handler = IngestPositionsCommandHandler(buffers)
+    start = time.perf_counter()
+    for body in bodies:
+        request = IngestPositionsRequest.model_validate_json(body)
+        loop.run_until_complete(handler.handle(IngestPositionsCommand(positions=request.model_dump()["positions"])))
+    report("request (Pydantic + handler + anillos)", points, time.perf_counter() - start)
+    
+    buffers = PositionRingBuffers(capacity=args.capacity, max_pending=points)
+    handler = IngestPositionsCommandHandler(buffers)
+    start = time.perf_counter()
+    for positions in batches:
+        loop.run_until_complete(handler.handle(IngestPositionsCommand(positions=positions)))
+    report("handler + anillos columnares", points, time.perf_counter() - start)
+    
+    tracks = {}
+    start = time.perf_counter()
+    for positions in batches:
+        naive_ingest(tracks, positions, args.capacity)
+    report("línea base: deque de Position por vehículo", points, time.perf_counter() - start)
+    
+    vehicle_ids = list(tracks)
+    start = time.perf_counter()
+    for vehicle_id in vehicle_ids:
+        buffers.latest(vehicle_id)
+    elapsed = time.perf_counter() - start
+    print(f"  última posición por vehículo: {elapsed / len(vehicle_ids) * 1e6:.2f} µs")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'positions.db')}")
+        Base.metadata.create_all(engine, tables=[VehiclePositionModel.__table__])
+        flusher = PositionFlusher(buffers, session_factory=sessionmaker(bind=engine), batch_size=5000)
+        start = time.perf_counter()
+        flushed = loop.run_until_complete(flusher.flush_once())
+        report("guardado por lotes en vehicle_positions", flushed, time.perf_counter() - start)
+        engine.dispose()
+    
+    print(f"  contadores: {buffers.metrics()}")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
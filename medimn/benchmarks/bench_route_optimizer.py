@@ -0,0 +1,82 @@
+"""
+Benchmark: secuenciación de paradas de un vehículo (50 a 500 paradas)
+
+Compara la distancia del orden recibido (comportamiento anterior), del
+vecino más cercano y de vecino más cercano + 2-opt/Or-opt con presupuesto
+de tiempo, y el tiempo de la matriz haversine vectorizada frente a calcularla
+par a par en Python.
+
+Uso:
+    python benchmarks/bench_route_optimizer.py --stops 50 100 200 500 --budget-ms 300
+"""
+import argparse
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+# Agregar path del monolito
+monolith_path = Path(__file__).parent.parent
+if str(monolith_path) not in sys.path:
+    sys.path.insert(0, str(monolith_path))
+
+import numpy as np
+
+from logistics.domain.entities import Coordinates
+from logistics.infrastructure.optimization import EARTH_RADIUS_KM, NumpyRouteOptimizer, haversine_matrix
+
+
+def random_stops(count: int, seed: int):
+    """Paradas en un área urbana de ~35 km x 35 km"""
+    rng = random.Random(seed)
+    return [Coordinates(4.5 + rng.random() * 0.3, -74.2 + rng.random() * 0.3) for _ in range(count)]
+
+
+def python_matrix(points):
+    """Línea base: haversine par a par en Python"""
+    def _distance(a, b):
+        lat1, lon1, lat2, lon2 = map(math.radians, (a.lat, a.lon, b.lat, b.lon))
+        h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))
+    return [[_distance(a, b) for b in points] for a in points]
+
+
+def given_order_km(points, depot):
+    route = [depot] + points + [depot]
+    matrix = haversine_matrix([p.lat for p in route], [p.lon for p in route])
+    return float(sum(matrix[index, index + 1] for index in range(len(route) - 1)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--stops", type=int, nargs="+", default=[50, 100, 200, 500], help="Paradas por ruta")
+    parser.add_argument("--budget-ms", type=int, default=300, help="Presupuesto de mejora local")
+    args = parser.parse_args()
+    
+    optimizer = NumpyRouteOptimizer()
+    depot = Coordinates(4.65, -74.05)
+    print(f"{'paradas':>8} {'recibido km':>12} {'vecino km':>10} {'2-opt km':>9} {'mejora':>7} "
+          f"{'tiempo ms':>10} {'matriz np ms':>13} {'matriz py ms':>13}")
+    for count in args.stops:
+        stops = random_stops(count, seed=count)
+        
+        start = time.perf_counter()
+        haversine_matrix(np.array([s.lat for s in stops]), np.array([s.lon for s in stops]))
+        numpy_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        python_matrix(stops)
+        python_ms = (time.perf_counter() - start) * 1000
+        
+        nearest = optimizer.optimize(stops, depot, time_budget_seconds=0)
+        start = time.perf_counter()
+        improved = optimizer.optimize(stops, depot, time_budget_seconds=args.budget_ms / 1000)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        print(f"{count:>8} {given_order_km(stops, depot):>12,.1f} {nearest.distance_km:>10,.1f} "
+              f"{improved.distance_km:>9,.1f} {1 - improved.distance_km / nearest.distance_km:>7.1%} "
+              f"{elapsed_ms:>10,.0f} {numpy_ms:>13,.2f} {python_ms:>13,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Benchmark: paradas de rutas en route_stops vs. columna JSON legada
+
+Mide la búsqueda de las rutas de una orden (índice order_id vs. recorrer
+todas las rutas parseando su JSON) y la carga de una página de rutas con
+sus paradas (una consulta por bloque vs. una por ruta vs. JSON).
+
+Uso:
+    python benchmarks/bench_route_stops.py --routes 20000 --stops 25
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Agregar path del monolito
+monolith_path = Path(__file__).parent.parent
+if str(monolith_path) not in sys.path:
+    sys.path.insert(0, str(monolith_path))
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from infrastructure.database import Base
+from logistics.infrastructure.repositories import RouteModel, RouteStopModel, SQLAlchemyLogisticsRepository
+from logistics.domain.entities import RouteStatus
+
+INSERT_CHUNK = 20000
+
+
+def _best_of(repeat, fn):
+    """Ejecutar una función varias veces y retornar (mejor tiempo, resultado)"""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def populate(engine, route_count: int, stops_per_route: int, seed: int = 7):
+    """Poblar routes (con JSON legado) y route_stops con los mismos datos"""
+    rng = random.Random(seed)
+    statuses = list(RouteStatus)
+    now = datetime(2026, 3, 2, 8, 0)
+    
+    routes, stops = [], []
+    with engine.begin() as conn:
+        for route_index in range(route_count):
+            route_id = f"route-{route_index:08d}"
+            route_stops = []
+            for sequence in range(stops_per_route):
+                # Cada orden en una sola ruta
+                order_id = f"order-{route_index * stops_per_route + sequence:09d}"
+                eta = now + timedelta(minutes=rng.randrange(12 * 60))
+                lat, lon = 4.45 + rng.random() * 0.4, -74.25 + rng.random() * 0.4
+                route_stops.append({
+                    "orderId": order_id,
+                    "eta": {"date": eta.isoformat(), "windowMinutes": 30},
+                    "priority": sequence + 1,
+                    "location": {"lat": lat, "lon": lon}
+                })
+                stops.append({
+                    "route_id": route_id,
+                    "sequence": sequence,
+                    "order_id": order_id,
+                    "priority": sequence + 1,
+                    "eta_date": eta,
+                    "eta_window_minutes": 30,
+                    "lat": lat,
+                    "lon": lon
+                })
+            routes.append({
+                "id": route_id,
+                "route_number": f"RT-BENCH-{route_index:08d}",
+                "status": rng.choice(statuses),
+                "stops_json": json.dumps(route_stops),
+                "created_at": now - timedelta(minutes=route_index),
+                "updated_at": now
+            })
+            if len(stops) >= INSERT_CHUNK:
+                conn.execute(insert(RouteModel), routes)
+                conn.execute(insert(RouteStopModel), stops)
+                routes, stops = [], []
+        if routes:
+            conn.execute(insert(RouteModel), routes)
+            conn.execute(insert(RouteStopModel), stops)
+
+
+def legacy_routes_with_order(session, order_id):
+    """Línea base: recorrer todas las rutas y parsear el JSON en Python"""
+    return [
+        route_id
+        for route_id, stops_json in session.query(RouteModel.id, RouteModel.stops_json)
+        if any(stop["orderId"] == order_id for stop in json.loads(stops_json))
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--routes", type=int, default=20000, help="Rutas a generar")
+    parser.add_argument("--stops", type=int, default=25, help="Paradas por ruta")
+    parser.add_argument("--page", type=int, default=500, help="Rutas por página al listar")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por medición")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine, tables=[RouteModel.__table__, RouteStopModel.__table__])
+        
+        start = time.perf_counter()
+        populate(engine, args.routes, args.stops)
+        print(f"Poblado: {args.routes:,} rutas / {args.routes * args.stops:,} paradas en {time.perf_counter() - start:.1f}s")
+        
+        session = sessionmaker(bind=engine)()
+        repo = SQLAlchemyLogisticsRepository(session)
+        order_id = f"order-{args.routes * args.stops // 2:09d}"
+        loop = asyncio.new_event_loop()
+        
+        legacy_time, legacy_ids = _best_of(args.repeat, lambda: legacy_routes_with_order(session, order_id))
+        indexed_time, routes = _best_of(args.repeat, lambda: loop.run_until_complete(repo.find_by_order_id(order_id)))
+        assert [str(route.id) for route in routes] == legacy_ids
+        print(f"Rutas de {order_id}:")
+        print(f"  escaneo JSON          {legacy_time * 1000:10.1f} ms")
+        print(f"  índice route_stops    {indexed_time * 1000:10.2f} ms (incluye hidratación)")
+        
+        models = session.query(RouteModel).order_by(RouteModel.created_at.desc()).limit(args.page).all()
+        legacy_time, _ = _best_of(args.repeat, lambda: [repo._legacy_stops(model) for model in models])
+        per_route_time, _ = _best_of(args.repeat, lambda: [repo._to_domain(model) for model in models])
+        batched_time, routes = _best_of(args.repeat, lambda: repo._to_domain_list(models))
+        assert sum(len(route.stops) for route in routes) == args.page * args.stops
+        print(f"Paradas de una página de {args.page} rutas:")
+        print(f"  JSON por ruta         {legacy_time * 1000:10.1f} ms")
+        print(f"  una consulta por ruta {per_route_time * 1000:10.1f} ms")
+        print(f"  consulta por bloque   {batched_time * 1000:10.1f} ms")
+        
+        loop.close()
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Benchmark: historial comprimido de recorridos vs. filas de vehicle_positions
+
+Genera rutas completadas con un punto GPS cada `--every` segundos y mide:
+- bytes por punto en la base (tabla + índice) como filas de
+  vehicle_positions y como bloques en route_track_chunks
+- el tiempo de archivar (leer filas, codificar, insertar bloques y borrar)
+- la velocidad de decodificación de los bloques (puntos/s)
+- la reproducción de una ventana de `--window` minutos de una ruta:
+  bloques que la tocan vs. consulta por rango sobre las filas
+
+Uso:
+    python benchmarks/bench_route_tracks.py --routes 100 --hours 8 --every 5
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+# Agregar path del monolito
+monolith_path = Path(__file__).parent.parent
+if str(monolith_path) not in sys.path:
+    sys.path.insert(0, str(monolith_path))
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from infrastructure.database import Base
+from logistics.infrastructure.repositories import (
+    RouteModel, RouteTrackChunkModel, RouteTrackModel, SQLAlchemyPositionRepository, VehiclePositionModel
+)
+from logistics.infrastructure.repositories.track_codec import decode_track
+from logistics.domain.entities import RouteStatus
+
+START = datetime(2026, 3, 2, 6, 0)
+INSERT_CHUNK = 50000
+
+
+def _best_of(repeat, fn):
+    """Ejecutar una función varias veces y retornar (mejor tiempo, resultado)"""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _database_bytes(engine) -> int:
+    with engine.connect() as conn:
+        conn.execute(text("VACUUM"))
+        return conn.execute(text("PRAGMA page_count")).scalar() * conn.execute(text("PRAGMA page_size")).scalar()
+
+
+def populate(engine, routes: int, hours: float, every: int, seed: int = 11) -> int:
+    """Rutas completadas y las posiciones de su vehículo (caminata aleatoria a ~30 km/h)"""
+    rng = np.random.default_rng(seed)
+    points = int(hours * 3600 // every) + 1
+    offsets = [timedelta(seconds=every * index) for index in range(points)]
+    step = 30 / 3.6 * every / 111_000  # Grados recorridos por reporte
+    with engine.begin() as conn:
+        conn.execute(insert(RouteModel), [{
+            "id": f"route-{index:05d}",
+            "route_number": f"RT-BENCH-{index:05d}",
+            "vehicle_id": f"veh-{index:05d}",
+            "status": RouteStatus.COMPLETED,
+            "stops_json": "[]",
+            "start_time": START,
+            "end_time": START + offsets[-1],
+            "created_at": START,
+            "updated_at": START + offsets[-1]
+        } for index in range(routes)])
+        rows = []
+        for index in range(routes):
+            heading = np.cumsum(rng.normal(0, 0.3, points))
+            lat = 4.6 + np.cumsum(np.sin(heading) * step)
+            lon = -74.1 + np.cumsum(np.cos(heading) * step)
+            vehicle_id = f"veh-{index:05d}"
+            rows.extend(
+                {"vehicle_id": vehicle_id, "lat": point_lat, "lon": point_lon, "ts": START + offset}
+                for point_lat, point_lon, offset in zip(lat.tolist(), lon.tolist(), offsets)
+            )
+            if len(rows) >= INSERT_CHUNK:
+                conn.execute(VehiclePositionModel.__table__.insert(), rows)
+                rows = []
+        if rows:
+            conn.execute(VehiclePositionModel.__table__.insert(), rows)
+    return routes * points
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--routes", type=int, default=100, help="Rutas completadas (un vehículo por ruta)")
+    parser.add_argument("--hours", type=float, default=8, help="Horas de recorrido por ruta")
+    parser.add_argument("--every", type=int, default=5, help="Segundos entre reportes")
+    parser.add_argument("--chunk", type=int, default=30, help="Minutos por bloque")
+    parser.add_argument("--window", type=int, default=60, help="Minutos de la ventana reproducida")
+    parser.add_argument("--repeat", type=int, default=5, help="Repeticiones por medición")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine, tables=[
+            RouteModel.__table__, VehiclePositionModel.__table__,
+            RouteTrackModel.__table__, RouteTrackChunkModel.__table__
+        ])
+        start = time.perf_counter()
+        points = populate(engine, args.routes, args.hours, args.every)
+        print(f"Poblado: {args.routes:,} rutas / {points:,} puntos en {time.perf_counter() - start:.1f}s")
+        raw_bytes = _database_bytes(engine)
+        
+        session = sessionmaker(bind=engine)()
+        repository = SQLAlchemyPositionRepository(session)
+        loop = asyncio.new_event_loop()
+        window_start = START + timedelta(hours=args.hours / 2)
+        window_end = window_start + timedelta(minutes=args.window)
+        
+        raw_time, raw_positions = _best_of(args.repeat, lambda: loop.run_until_complete(
+            repository.find_range("veh-00000", window_start, window_end)
+        ))
+        
+        start = time.perf_counter()
+        archived = 0
+        while True:
+            count = loop.run_until_complete(repository.archive_route_tracks(
+                START + timedelta(days=1), args.chunk, limit=50
+            ))
+            archived += count
+            if count < 50:
+                break
+        archive_time = time.perf_counter() - start
+        blob_bytes = sum(byte_count for byte_count, in session.query(RouteTrackModel.byte_count))
+        session.close()
+        archived_bytes = _database_bytes(engine)
+        
+        session = sessionmaker(bind=engine)()
+        repository = SQLAlchemyPositionRepository(session)
+        chunks = session.query(RouteTrackChunkModel.point_count, RouteTrackChunkModel.data).all()
+        decode_time, _ = _best_of(args.repeat, lambda: [decode_track(data, count) for count, data in chunks])
+        track_time, track = _best_of(args.repeat, lambda: loop.run_until_complete(
+            repository.find_route_track("route-00000", window_start, window_end)
+        ))
+        assert [position.ts for position in track] == [position.ts for position in raw_positions]
+        
+        print("Espacio en la base (tablas + índices, tras VACUUM):")
+        print(f"  filas vehicle_positions   {raw_bytes / points:8.1f} bytes/punto  ({raw_bytes / 1e6:,.1f} MB)")
+        print(f"  bloques route_track_chunks{archived_bytes / points:8.1f} bytes/punto  ({archived_bytes / 1e6:,.1f} MB)")
+        print(f"  solo los bloques          {blob_bytes / points:8.2f} bytes/punto")
+        print(f"Archivar {archived} rutas: {archive_time:.1f}s ({points / archive_time:,.0f} puntos/s)")
+        print(f"Decodificar {len(chunks):,} bloques: {decode_time * 1000:,.1f} ms ({points / decode_time / 1e6:,.1f} M puntos/s)")
+        print(f"Ventana de {args.window} min de una ruta ({len(track)} puntos):")
+        print(f"  rango sobre filas         {raw_time * 1000:8.2f} ms")
+        print(f"  bloques que la tocan      {track_time * 1000:8.2f} ms (incluye Position por punto)")
+        
+        loop.close()
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Benchmark: vehículos más cercanos y paradas dentro de un área
+
+Llena el índice espacial con la flota (posiciones por lotes, como la
+ingesta) y con las paradas de las rutas activas, y compara la latencia de
+cada consulta contra recorrer todo:
+- SpatialIndex: grilla de celdas, anillos alrededor del punto para los k
+  más cercanos y solo las celdas del rectángulo para el área
+- la línea base: haversine vectorizado con NumPy contra todos los
+  vehículos (argpartition) y filtro de todas las paradas en columnas,
+  devolviendo las mismas paradas
+Reporta p50/p99 por consulta en microsegundos y el costo de mover la flota.
+El área cuesta según cuántas paradas devuelve: con áreas grandes y muchas
+paradas domina armar el resultado.
+
+Uso:
+    python benchmarks/bench_spatial_index.py --vehicles 5000 --stops 50000 --queries 2000
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+# Agregar path del monolito
+monolith_path = Path(__file__).parent.parent
+if str(monolith_path) not in sys.path:
+    sys.path.insert(0, str(monolith_path))
+
+from logistics.infrastructure.tracking import PositionRingBuffers, SpatialIndex
+from logistics.infrastructure.optimization import haversine_distances
+from logistics.domain.entities import Coordinates, Route, Stop
+
+START = datetime(2026, 3, 2, 8, 0)
+# Bogotá y alrededores
+MIN_LAT, MIN_LON, SPAN = 4.45, -74.25, 0.4
+
+
+def _percentiles(samples):
+    values = np.array(samples) * 1e6
+    return np.percentile(values, 50), np.percentile(values, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vehicles", type=int, default=5000, help="Vehículos con posición")
+    parser.add_argument("--stops", type=int, default=50000, help="Paradas pendientes de rutas activas")
+    parser.add_argument("--stops-per-route", type=int, default=25, help="Paradas por ruta")
+    parser.add_argument("--queries", type=int, default=2000, help="Consultas de cada tipo")
+    parser.add_argument("--k", type=int, default=5, help="Vehículos por consulta")
+    parser.add_argument("--area-km", type=float, default=2.0, help="Lado del área consultada en km")
+    parser.add_argument("--cell", type=float, default=0.01, help="Lado de la celda en grados")
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(9)
+    vehicle_ids = [f"veh-{index:05d}" for index in range(args.vehicles)]
+    lat = MIN_LAT + rng.random(args.vehicles) * SPAN
+    lon = MIN_LON + rng.random(args.vehicles) * SPAN
+    buffers = PositionRingBuffers(max_pending=10 ** 9)
+    index = SpatialIndex(buffers, cell_degrees=args.cell)
+    
+    # Dos lotes con toda la flota: el segundo mueve los vehículos ~100 m
+    timings = []
+    for step in range(2):
+        lat += rng.normal(0, 0.001, args.vehicles) * step
+        buffers.append_many(vehicle_ids, lat, lon, [START + timedelta(seconds=step)] * args.vehicles)
+        start = time.perf_counter()
+        index.positions_updated(vehicle_ids)
+        timings.append(time.perf_counter() - start)
+    print(f"{args.vehicles:,} vehículos, {args.stops:,} paradas, celdas de {args.cell}°")
+    print(f"  mover la flota: {timings[1] * 1000:,.1f} ms por lote ({timings[1] / args.vehicles * 1e6:.2f} µs por vehículo)")
+    
+    stop_lat = MIN_LAT + rng.random(args.stops) * SPAN
+    stop_lon = MIN_LON + rng.random(args.stops) * SPAN
+    stops = [
+        Stop(f"order-{position}", priority=position % args.stops_per_route + 1,
+             location=Coordinates(float(stop_lat[position]), float(stop_lon[position])))
+        for position in range(args.stops)
+    ]
+    for first in range(0, args.stops, args.stops_per_route):
+        index.track_route(Route.create(stops=stops[first:first + args.stops_per_route]))
+    print(f"  índice: {index.metrics()}")
+    
+    queries = [(MIN_LAT + random.random() * SPAN, MIN_LON + random.random() * SPAN) for _ in range(args.queries)]
+    side = args.area_km / 111.2
+    
+    indexed, scanned, mismatches = [], [], 0
+    for query_lat, query_lon in queries:
+        start = time.perf_counter()
+        found = index.nearest_vehicles(Coordinates(query_lat, query_lon), args.k, available_only=False)
+        indexed.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        distances = haversine_distances([query_lat], [query_lon], lat, lon)[0]
+        closest = np.argpartition(distances, args.k - 1)[:args.k]
+        expected = [vehicle_ids[position] for position in closest[np.argsort(distances[closest])]]
+        scanned.append(time.perf_counter() - start)
+        mismatches += [vehicle.vehicle_id for vehicle in found] != expected
+    print(f"  {args.k} más cercanos ({mismatches} diferencias con la línea base)")
+    print(f"    {'SpatialIndex':<34} p50 {_percentiles(indexed)[0]:>9,.1f} µs  p99 {_percentiles(indexed)[1]:>9,.1f} µs")
+    print(f"    {'línea base: NumPy sobre todos':<34} p50 {_percentiles(scanned)[0]:>9,.1f} µs  p99 {_percentiles(scanned)[1]:>9,.1f} µs")
+    
+    indexed, scanned, mismatches = [], [], 0
+    for query_lat, query_lon in queries:
+        south_west = Coordinates(query_lat, query_lon)
+        north_east = Coordinates(query_lat + side, query_lon + side)
+        start = time.perf_counter()
+        found = index.stops_in_area(south_west, north_east)
+        indexed.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        inside = [stops[position] for position in np.flatnonzero(
+            (stop_lat >= south_west.lat) & (stop_lat <= north_east.lat)
+            & (stop_lon >= south_west.lon) & (stop_lon <= north_east.lon)
+        ).tolist()]
+        scanned.append(time.perf_counter() - start)
+        mismatches += len(found) != len(inside)
+    print(f"  paradas en {args.area_km} km x {args.area_km} km ({mismatches} diferencias con la línea base)")
+    print(f"    {'SpatialIndex':<34} p50 {_percentiles(indexed)[0]:>9,.1f} µs  p99 {_percentiles(indexed)[1]:>9,.1f} µs")
+    print(f"    {'línea base: NumPy sobre todas':<34} p50 {_percentiles(scanned)[0]:>9,.1f} µs  p99 {_percentiles(scanned)[1]:>9,.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
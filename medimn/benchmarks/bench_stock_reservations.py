@@ -0,0 +1,192 @@
+"""
+Benchmark: muchas órdenes concurrentes compitiendo por SKUs escasos
+
+Compara la reserva con UPDATE condicionado + libro de reservas contra la línea
+base de leer, comprobar y escribir el stock, y verifica que nunca se
+reserva más de lo que hay.
+
+Uso:
+    python benchmarks/bench_stock_reservations.py --workers 16 --orders 4000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Agregar path del monolito
+monolith_path = Path(__file__).parent.parent
+if str(monolith_path) not in sys.path:
+    sys.path.insert(0, str(monolith_path))
+
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import sessionmaker
+
+from infrastructure.database import Base
+from product.infrastructure.repositories import (
+    ProductModel,
+    StockReservationModel,
+    SQLAlchemyStockReservationRepository
+)
+from product.domain.entities import ReservationStatus
+
+
+def populate(engine, sku_count: int, stock: int):
+    """Crear SKUs con poco stock para forzar la contención"""
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(ProductModel), [
+            {
+                "id": f"SKU-{index:04d}",
+                "name": f"Producto {index}",
+                "price_minor": 100,
+                "stock": stock,
+                "reserved": 0,
+                "is_active": True,
+                "created_at": now,
+                "updated_at": now
+            }
+            for index in range(sku_count)
+        ])
+
+
+def _random_lines(rng: random.Random, sku_count: int):
+    """Entre 1 y 4 SKUs distintos con cantidades pequeñas"""
+    skus = rng.sample(range(sku_count), rng.randint(1, min(4, sku_count)))
+    return {f"SKU-{index:04d}": rng.randint(1, 3) for index in skus}
+
+
+def run_ledger(session_factory, orders: int, sku_count: int, seed: int):
+    """Reservar con el repositorio; una de cada cuatro reservas se libera"""
+    rng = random.Random(seed)
+    loop = asyncio.new_event_loop()
+    session = session_factory()
+    repo = SQLAlchemyStockReservationRepository(session)
+    accepted = rejected = 0
+    promised = Counter()
+    try:
+        for _ in range(orders):
+            lines = _random_lines(rng, sku_count)
+            try:
+                reservation = loop.run_until_complete(repo.reserve(
+                    lines,
+                    expires_at=datetime.utcnow() + timedelta(minutes=15)
+                ))
+            except ValueError:
+                rejected += 1
+                continue
+            accepted += 1
+            if rng.random() < 0.25:
+                loop.run_until_complete(repo.release(reservation.reservation_id))
+            else:
+                promised.update(lines)
+    finally:
+        session.close()
+        loop.close()
+    return accepted, rejected, promised
+
+
+def run_read_check_write(session_factory, orders: int, sku_count: int, seed: int):
+    """Línea base: leer el disponible, comprobar en Python y escribir"""
+    rng = random.Random(seed)
+    session = session_factory()
+    accepted = rejected = 0
+    promised = Counter()
+    try:
+        for _ in range(orders):
+            lines = _random_lines(rng, sku_count)
+            products = session.query(ProductModel).filter(ProductModel.id.in_(lines)).all()
+            if any(product.stock - product.reserved < lines[product.id] for product in products):
+                session.rollback()
+                rejected += 1
+                continue
+            for product in products:
+                product.reserved = product.reserved + lines[product.id]
+            session.commit()
+            accepted += 1
+            promised.update(lines)
+    finally:
+        session.close()
+    return accepted, rejected, promised
+
+
+def check_invariants(session_factory, promised: Counter, stock: int):
+    """Retornar los SKUs sobrevendidos y los que no cuadran con el libro"""
+    session = session_factory()
+    try:
+        # Lo prometido a los clientes, no el contador, que pierde escrituras concurrentes
+        oversold = sum(1 for qty in promised.values() if qty > stock)
+        ledger = dict(session.query(
+            StockReservationModel.sku_id, func.sum(StockReservationModel.qty)
+        ).filter(
+            StockReservationModel.status == ReservationStatus.ACTIVE.value
+        ).group_by(StockReservationModel.sku_id).all())
+        mismatched = sum(
+            1 for sku_id, reserved in session.query(ProductModel.id, ProductModel.reserved)
+            if ledger.get(sku_id, 0) != reserved
+        )
+        return oversold, mismatched
+    finally:
+        session.close()
+
+
+def measure(name, target, args):
+    """Ejecutar un escenario en una base de datos nueva"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(
+            f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            connect_args={"check_same_thread": False, "timeout": 60}
+        )
+        Base.metadata.create_all(engine, tables=[ProductModel.__table__, StockReservationModel.__table__])
+        populate(engine, args.skus, args.stock)
+        session_factory = sessionmaker(bind=engine)
+        barrier = threading.Barrier(args.workers)
+        per_worker = args.orders // args.workers
+        
+        def _worker(seed):
+            barrier.wait()
+            return target(session_factory, per_worker, args.skus, seed)
+        
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(_worker, range(args.workers)))
+        elapsed = time.perf_counter() - start
+        
+        accepted = sum(result[0] for result in results)
+        rejected = sum(result[1] for result in results)
+        promised = sum((result[2] for result in results), Counter())
+        oversold, mismatched = check_invariants(session_factory, promised, args.stock)
+        print(f"{name}:")
+        print(f"  {accepted + rejected:,} órdenes en {elapsed:.2f}s ({(accepted + rejected) / elapsed:,.0f}/s)")
+        print(f"  aceptadas {accepted:,} / rechazadas {rejected:,}")
+        print(f"  unidades prometidas {sum(promised.values()):,} de {args.skus * args.stock:,}")
+        print(f"  SKUs sobrevendidos: {oversold}")
+        if target is run_ledger:
+            print(f"  SKUs con retenido distinto al libro: {mismatched}")
+        engine.dispose()
+        return oversold
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=16, help="Hilos concurrentes")
+    parser.add_argument("--orders", type=int, default=4000, help="Órdenes en total")
+    parser.add_argument("--skus", type=int, default=20, help="SKUs en competencia")
+    parser.add_argument("--stock", type=int, default=100, help="Stock inicial por SKU")
+    args = parser.parse_args()
+    
+    print(f"{args.workers} hilos, {args.orders:,} órdenes, {args.skus} SKUs con {args.stock} unidades")
+    measure("Leer, comprobar y escribir (línea base)", run_read_check_write, args)
+    oversold = measure("UPDATE condicionado + libro de reservas", run_ledger, args)
+    assert oversold == 0, "La reserva condicionada no debe sobrevender"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Benchmark: reparto en vivo de posiciones a miles de suscriptores
+
+Simula conexiones SSE/WebSocket que siguen un vehículo, una ruta o un
+vendedor mientras la flota reporta por lotes, y compara:
+- TrackingBroadcaster: índices por vehículo/ruta/vendedor, un JSON por
+  cambio compartido por todos los suscriptores y colas que guardan solo lo
+  último de cada vehículo
+- la línea base: un asyncio.Queue sin límite por suscriptor, recorriendo
+  todos los suscriptores y serializando el mensaje para cada uno
+Los clientes leen cada `--drain-every` lotes (clientes lentos); se mide el
+costo de publicar, los mensajes entregados y el máximo encolado.
+
+Uso:
+    python benchmarks/bench_tracking_fanout.py --subscribers 5000 --vehicles 2000 --batches 50
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Agregar path del monolito
+monolith_path = Path(__file__).parent.parent
+if str(monolith_path) not in sys.path:
+    sys.path.insert(0, str(monolith_path))
+
+from logistics.infrastructure.tracking import PositionRingBuffers, TrackingBroadcaster
+from logistics.domain.entities import Route, Stop
+
+
+def make_routes(vehicles: int, vendors: int):
+    """Una ruta planificada por vehículo, repartidas entre los vendedores"""
+    return [
+        Route.create(stops=[Stop(f"order-{index}")], vehicle_id=f"veh-{index:05d}", vendor_id=f"vendor-{index % vendors:03d}")
+        for index in range(vehicles)
+    ]
+
+
+def make_filters(subscribers: int, routes, vendors: int, seed: int = 11):
+    """Filtro de cada suscriptor: 70% un vehículo, 20% una ruta, 10% un vendedor"""
+    rng = random.Random(seed)
+    filters = []
+    for _ in range(subscribers):
+        draw = rng.random()
+        route = rng.choice(routes)
+        if draw < 0.7:
+            filters.append(([route.vehicle_id], [], []))
+        elif draw < 0.9:
+            filters.append(([], [str(route.id)], []))
+        else:
+            filters.append(([], [], [f"vendor-{rng.randrange(vendors):03d}"]))
+    return filters
+
+
+def make_batches(vehicles: int, batch: int, batches: int, seed: int = 7):
+    rng = random.Random(seed)
+    start = datetime(2026, 3, 2, 8, 0)
+    return [
+        [
+            (f"veh-{rng.randrange(vehicles):05d}", 4.5 + rng.random() * 0.3, -74.2 + rng.random() * 0.3,
+             start + timedelta(seconds=index * batch + offset))
+            for offset in range(batch)
+        ]
+        for index in range(batches)
+    ]
+
+
+def run_broadcaster(routes, filters, batches, drain_every: int):
+    buffers = PositionRingBuffers(max_pending=10 ** 9)
+    feed = TrackingBroadcaster(buffers)
+    for route in routes:
+        feed.track_route(route)
+    subscriptions = [feed.subscribe(*subscription_filter) for subscription_filter in filters]
+    loop = asyncio.new_event_loop()
+    delivered = max_pending = 0
+    publish = 0.0
+    for index, positions in enumerate(batches, 1):
+        vehicle_ids, lat, lon, timestamps = (list(column) for column in zip(*positions))
+        buffers.append_many(vehicle_ids, lat, lon, timestamps)
+        start = time.perf_counter()
+        feed.positions_updated(vehicle_ids)
+        publish += time.perf_counter() - start
+        if index % drain_every == 0:
+            max_pending = max(max_pending, max(subscription.pending for subscription in subscriptions))
+            for subscription in subscriptions:
+                delivered += len(loop.run_until_complete(subscription.next_updates(0)))
+    loop.close()
+    return publish, delivered, max_pending, feed.metrics()
+
+
+def run_naive(routes, filters, batches, drain_every: int):
+    """Línea base: cada suscriptor revisa cada posición y serializa su propia copia"""
+    route_of = {route.vehicle_id: (str(route.id), route.vendor_id) for route in routes}
+    loop = asyncio.new_event_loop()
+    queues = [asyncio.Queue() for _ in filters]
+    delivered = max_pending = serialized = 0
+    publish = 0.0
+    for index, positions in enumerate(batches, 1):
+        start = time.perf_counter()
+        for vehicle_id, lat, lon, ts in positions:
+            route_id, vendor_id = route_of[vehicle_id]
+            for (vehicle_ids, route_ids, vendor_ids), queue in zip(filters, queues):
+                if vehicle_id in vehicle_ids or route_id in route_ids or vendor_id in vendor_ids:
+                    queue.put_nowait(json.dumps({
+                        "vehicleId": vehicle_id, "routeId": route_id, "lat": lat, "lon": lon, "ts": ts.isoformat()
+                    }))
+                    serialized += 1
+        publish += time.perf_counter() - start
+        if index % drain_every == 0:
+            max_pending = max(max_pending, max(queue.qsize() for queue in queues))
+            for queue in queues:
+                while not queue.empty():
+                    queue.get_nowait()
+                    delivered += 1
+    loop.close()
+    return publish, delivered, max_pending, serialized
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribers", type=int, default=5000, help="Conexiones abiertas")
+    parser.add_argument("--vehicles", type=int, default=2000, help="Vehículos de la flota (uno por ruta)")
+    parser.add_argument("--vendors", type=int, default=50, help="Vendedores")
+    parser.add_argument("--batch", type=int, default=1000, help="Posiciones por lote")
+    parser.add_argument("--batches", type=int, default=50, help="Lotes reportados")
+    parser.add_argument("--drain-every", type=int, default=5, help="Lotes entre lecturas de cada cliente")
+    args = parser.parse_args()
+    
+    routes = make_routes(args.vehicles, args.vendors)
+    filters = make_filters(args.subscribers, routes, args.vendors)
+    batches = make_batches(args.vehicles, args.batch, args.batches)
+    points = args.batch * args.batches
+    print(f"{points:,} posiciones de {args.vehicles:,} vehículos, {args.subscribers:,} suscriptores, "
+          f"lectura cada {args.drain_every} lotes")
+    
+    publish, delivered, max_pending, metrics = run_broadcaster(routes, filters, batches, args.drain_every)
+    print(f"  {'TrackingBroadcaster':<30} publicar {publish * 1000:>9,.1f} ms  ({publish / args.batches * 1000:,.2f} ms/lote)"
+          f"  entregados {delivered:>10,}  máx. en cola {max_pending:,}")
+    print(f"    serializados {metrics['published']:,}, entregas {metrics['offered']:,}, fusionados {metrics['coalesced']:,}")
+    
+    publish, delivered, max_pending, serialized = run_naive(routes, filters, batches, args.drain_every)
+    print(f"  {'línea base: Queue por cliente':<30} publicar {publish * 1000:>9,.1f} ms  ({publish / args.batches * 1000:,.2f} ms/lote)"
+          f"  entregados {delivered:>10,}  máx. en cola {max_pending:,}")
+    print(f"    serializados {serialized:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -72,6 +72,71 @@ class MonolithSettings(BaseSettings):
         env="VERIFICATION_CODE_LENGTH"
     )
     
+    # Idempotency-Key (creación de órdenes y rutas)
+    idempotency_ttl_hours: int = Field(default=24, env="IDEMPOTENCY_TTL_HOURS")
+    
+    # Reservas de stock
+    stock_reservation_ttl_minutes: int = Field(default=15, env="STOCK_RESERVATION_TTL_MINUTES")
+    stock_reservation_sweep_seconds: int = Field(default=30, env="STOCK_RESERVATION_SWEEP_SECONDS")
+    
+    # Outbox de eventos de dominio
+    outbox_batch_size: int = Field(default=100, env="OUTBOX_BATCH_SIZE")
+    outbox_poll_interval_seconds: float = Field(default=1.0, env="OUTBOX_POLL_INTERVAL_SECONDS")
+    outbox_max_attempts: int = Field(default=10, env="OUTBOX_MAX_ATTEMPTS")
+    outbox_retention_hours: int = Field(default=24, env="OUTBOX_RETENTION_HOURS")
+    
+    # Event bus: "sync" ejecuta los handlers en la petición, "async" los encola
+    event_bus_mode: str = Field(default="sync", env="EVENT_BUS_MODE")
+    event_bus_workers: int = Field(default=4, env="EVENT_BUS_WORKERS")
+    event_bus_queue_size: int = Field(default=1000, env="EVENT_BUS_QUEUE_SIZE")
+    event_bus_overflow_size: int = Field(default=10000, env="EVENT_BUS_OVERFLOW_SIZE")
+    event_bus_backpressure: str = Field(default="block", env="EVENT_BUS_BACKPRESSURE")
+    event_bus_handler_timeout_seconds: float = Field(default=5.0, env="EVENT_BUS_HANDLER_TIMEOUT_SECONDS")
+    event_bus_drain_timeout_seconds: float = Field(default=10.0, env="EVENT_BUS_DRAIN_TIMEOUT_SECONDS")
+    event_bus_batch_size: int = Field(default=200, env="EVENT_BUS_BATCH_SIZE")
+    event_bus_batch_wait_seconds: float = Field(default=0.5, env="EVENT_BUS_BATCH_WAIT_SECONDS")
+    event_transport: str = Field(default="local", env="EVENT_TRANSPORT")
+    event_transport_batch_size: int = Field(default=500, env="EVENT_TRANSPORT_BATCH_SIZE")
+    event_transport_poll_seconds: float = Field(default=0.5, env="EVENT_TRANSPORT_POLL_SECONDS")
+    event_transport_retention_hours: int = Field(default=1, env="EVENT_TRANSPORT_RETENTION_HOURS")
+    
+    # Optimizador de rutas: tiempo máximo de mejora local (2-opt/Or-opt) por ruta
+    route_optimizer_time_budget_ms: int = Field(default=300, env="ROUTE_OPTIMIZER_TIME_BUDGET_MS")
+    
+    # Planificador de flota: presupuesto de reloj por plan y procesos del pool por worker de uvicorn
+    # (0 = un proceso por núcleo; el pool arranca en la primera planificación)
+    fleet_planner_time_budget_ms: int = Field(default=2000, env="FLEET_PLANNER_TIME_BUDGET_MS")
+    fleet_planner_workers: int = Field(default=2, env="FLEET_PLANNER_WORKERS")
+    
+    # Caché de distancias en disco (archivo disperso de max_locations² float32)
+    distance_cache_dir: str = Field(default="./distance_cache", env="DISTANCE_CACHE_DIR")
+    distance_cache_max_locations: int = Field(default=8192, env="DISTANCE_CACHE_MAX_LOCATIONS")
+    
+    # Geocodificación offline: CSV local address,lat,lon (vacío = solo la tabla geocode_cache)
+    geocoding_gazetteer_path: str = Field(default="", env="GEOCODING_GAZETTEER_PATH")
+    
+    # Posiciones GPS: anillo por vehículo en memoria y guardado por lotes en vehicle_positions
+    tracking_ring_capacity: int = Field(default=256, env="TRACKING_RING_CAPACITY")
+    tracking_flush_batch_size: int = Field(default=5000, env="TRACKING_FLUSH_BATCH_SIZE")
+    tracking_flush_interval_seconds: float = Field(default=1.0, env="TRACKING_FLUSH_INTERVAL_SECONDS")
+    tracking_max_pending: int = Field(default=500_000, env="TRACKING_MAX_PENDING")
+    
+    # Seguimiento en vivo (SSE/WebSocket): cambios distintos en espera por suscriptor y keepalive
+    tracking_stream_queue_size: int = Field(default=256, env="TRACKING_STREAM_QUEUE_SIZE")
+    tracking_stream_heartbeat_seconds: float = Field(default=15.0, env="TRACKING_STREAM_HEARTBEAT_SECONDS")
+    
+    # ETAs de paradas pendientes: recálculo agrupado y escritura a las órdenes solo si cambian lo suficiente
+    eta_recompute_interval_seconds: float = Field(default=30.0, env="ETA_RECOMPUTE_INTERVAL_SECONDS")
+    eta_min_change_minutes: float = Field(default=2.0, env="ETA_MIN_CHANGE_MINUTES")
+    
+    # Índice espacial de vehículos y paradas: lado de la celda de la grilla en grados (0.01 ≈ 1.1 km)
+    spatial_index_cell_degrees: float = Field(default=0.01, env="SPATIAL_INDEX_CELL_DEGREES")
+    
+    # Recorridos de rutas completadas: bloques comprimidos por ventana de tiempo, archivados tras un margen
+    track_chunk_minutes: int = Field(default=30, env="TRACK_CHUNK_MINUTES")
+    track_archive_grace_seconds: float = Field(default=60.0, env="TRACK_ARCHIVE_GRACE_SECONDS")
+    track_archive_interval_seconds: float = Field(default=60.0, env="TRACK_ARCHIVE_INTERVAL_SECONDS")
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -1,9 +1,11 @@
 """
 Configuración de base de datos unificada para el monolito
 """
-from sqlalchemy import create_engine
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import Table, create_engine, inspect, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 from .config import get_settings
 
 settings = get_settings()
@@ -22,6 +24,22 @@ engine = create_engine(
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Motor aparte para lecturas largas en streaming (exportaciones): con StaticPool
+# todas las sesiones comparten una conexión y el commit de otra petición cerraría
+# el cursor a mitad de la lectura; aquí cada sesión abre y cierra la suya.
+# Una base en memoria solo existe en la conexión compartida, así que la reutiliza.
+streaming_engine = engine if ":memory:" in settings.database_url else create_engine(
+    settings.database_url,
+    poolclass=NullPool,
+    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {},
+    echo=settings.debug
+)
+StreamingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=streaming_engine)
+
+# Migraciones de arranque: create_all no altera tablas existentes, así que los
+# módulos de modelos registran aquí los pasos idempotentes que las ponen al día
+_migrations: List[Callable[[Engine], None]] = []
+
 
 def get_db():
     """Dependency para obtener sesión de base de datos"""
@@ -32,8 +50,67 @@ def get_db():
         db.close()
 
 
-def create_tables():
-    """Crear todas las tablas de todos los servicios"""
+def register_migration(migration: Callable[[Engine], None]) -> Callable[[Engine], None]:
+    """Registrar un paso de migración; corre en cada arranque y debe ser idempotente"""
+    _migrations.append(migration)
+    return migration
+
+
+def run_migrations(bind: Engine = None) -> None:
+    """Ejecutar los pasos registrados, en orden de registro"""
+    for migration in _migrations:
+        migration(bind or engine)
+
+
+def add_missing_columns(bind: Engine, table: Table, defaults: Dict[str, Optional[str]]) -> List[str]:
+    """
+    Agregar a una tabla existente las columnas del modelo que le falten
+    
+    `defaults` asocia cada columna a revisar con su DEFAULT en SQL (None si
+    no tiene); el tipo y el NOT NULL salen del modelo. Retorna las agregadas.
+    """
+    existing = {column["name"] for column in inspect(bind).get_columns(table.name)}
+    added = [name for name in defaults if name not in existing]
+    if added:
+        with bind.begin() as conn:
+            for name in added:
+                column = table.c[name]
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {name} {column.type.compile(dialect=bind.dialect)}"
+                if defaults[name] is not None:
+                    ddl += f" DEFAULT {defaults[name]}"
+                if not column.nullable:
+                    ddl += " NOT NULL"
+                conn.execute(text(ddl))
+    return added
+
+
+def create_missing_indexes(bind: Engine, table: Table) -> None:
+    """Crear los índices del modelo que no existan en una tabla ya creada"""
+    for index in table.indexes:
+        index.create(bind, checkfirst=True)
+
+
+def replace_legacy_column(bind: Engine, table_name: str, legacy_column: str, values: Dict[str, str]) -> bool:
+    """
+    Llenar columnas nuevas desde una columna legada y eliminarla
+    
+    `values` asocia cada columna nueva (ya agregada) con su expresión SQL
+    sobre la legada. El UPDATE y el DROP van en una transacción; si la
+    columna legada ya no existe no hace nada y retorna False.
+    """
+    if legacy_column not in {column["name"] for column in inspect(bind).get_columns(table_name)}:
+        return False
+    assignments = ", ".join(f"{name} = {expression}" for name, expression in values.items())
+    with bind.begin() as conn:
+        if assignments:
+            conn.execute(text(f"UPDATE {table_name} SET {assignments} WHERE {legacy_column} IS NOT NULL"))
+        conn.execute(text(f"ALTER TABLE {table_name} DROP COLUMN {legacy_column}"))
+    return True
+
+
+def create_tables(bind: Engine = None):
+    """Crear todas las tablas de todos los servicios y aplicar las migraciones"""
+    bind = bind or engine
     print(f"🔌 Configurando conexión a base de datos unificada...")
     print(f"   URL: {settings.database_url[:100]}...")
     
@@ -43,7 +120,7 @@ def create_tables():
     try:
         # Probar la conexión
         from sqlalchemy import text
-        with engine.connect() as conn:
+        with bind.connect() as conn:
             result = conn.execute(text("SELECT 1"))
             print(f"✅ Conexión a base de datos exitosa")
     except Exception as e:
@@ -57,9 +134,16 @@ def create_tables():
         print(f"   Tablas: {', '.join(table_names)}")
     
     try:
-        Base.metadata.create_all(bind=engine)
+        Base.metadata.create_all(bind=bind)
         print(f"✅ Tablas creadas exitosamente")
     except Exception as e:
         print(f"❌ Error al crear tablas: {e}")
         raise
+    
+    try:
+        run_migrations(bind)
+        print(f"✅ Migraciones aplicadas")
+    except Exception as e:
+        print(f"❌ Error al aplicar migraciones: {e}")
+        raise
 
@@ -19,6 +19,19 @@ from ..value_objects import SKU, ProductName, Stock, Location, Supplier
 class InventoryItem(Entity):
     """Entidad que representa un item de inventario"""
     
+    __slots__ = (
+        "_sku",
+        "_name",
+        "_stock",
+        "_min_stock",
+        "_max_stock",
+        "_location",
+        "_supplier",
+        "_category",
+        "_unit_price",
+        "_is_active",
+    )
+    
     def __init__(
         self,
         item_id: EntityId,
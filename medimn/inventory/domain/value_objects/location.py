@@ -7,6 +7,8 @@ from typing import Any, Optional
 class Location:
     """Ubicación del item en el almacén"""
     
+    __slots__ = ("_value", "_warehouse", "_section")
+    
     def __init__(self, value: str, warehouse: Optional[str] = None, section: Optional[str] = None):
         if not value:
             raise ValueError("La ubicación no puede estar vacía")
@@ -7,6 +7,8 @@ from typing import Any
 class ProductName:
     """Nombre del producto en inventario"""
     
+    __slots__ = ("_value",)
+    
     def __init__(self, value: str):
         if not value:
             raise ValueError("El nombre del producto no puede estar vacío")
@@ -7,6 +7,8 @@ from typing import Any
 class SKU:
     """SKU - Identificador único de producto"""
     
+    __slots__ = ("_value",)
+    
     def __init__(self, value: str):
         if not value:
             raise ValueError("SKU no puede estar vacío")
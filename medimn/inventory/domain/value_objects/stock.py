@@ -7,6 +7,8 @@ from typing import Any
 class Stock:
     """Cantidad de stock disponible"""
     
+    __slots__ = ("_value",)
+    
     def __init__(self, value: int):
         if value < 0:
             raise ValueError("El stock no puede ser negativo")
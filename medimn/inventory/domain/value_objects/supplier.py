@@ -7,6 +7,8 @@ from typing import Any, Optional
 class Supplier:
     """Proveedor del item"""
     
+    __slots__ = ("_name", "_contact")
+    
     def __init__(self, name: str, contact: Optional[str] = None):
         if not name:
             raise ValueError("El nombre del proveedor no puede estar vacío")
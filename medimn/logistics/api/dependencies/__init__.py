@@ -1,22 +1,48 @@
 """
 Dependencies de la API
 """
+from contextlib import contextmanager
+from datetime import timedelta
+
 from fastapi import Depends
-from ...infrastructure.database import get_db
-from ...infrastructure.repositories import SQLAlchemyLogisticsRepository
-from ...domain.ports import ILogisticsRepository
+from order.infrastructure.repositories import SQLAlchemyOrderRepository
+from shared.infrastructure.leases import WorkerLease
+from ...infrastructure.database import SessionLocal, get_db
+from ...infrastructure.repositories import (
+    SQLAlchemyLogisticsRepository, SQLAlchemyGeocodeCache, SQLAlchemyPositionRepository
+)
+from ...infrastructure.geocoding import CachedGazetteerGeocoder, Gazetteer, GeocodingStats
+from ...infrastructure.optimization import MemmapDistanceMatrix, NumpyRouteOptimizer, ProcessPoolFleetPlanner
+from ...infrastructure.tracking import (
+    EtaEngine, PositionFlusher, PositionRingBuffers, RepositoryActiveRouteSource, SpatialIndex, TrackArchiver,
+    TrackingBroadcaster
+)
+from ...infrastructure.adapters import OrderRepositoryDispatchSource, OrderRepositoryEtaSink
+from ...infrastructure.config import get_settings
+from ...domain.entities import RouteStatus
+from ...domain.ports import IGeocoder, ILogisticsRepository
 from ...application.handlers import (
     CreateRouteCommandHandler,
     StartRouteCommandHandler,
     CompleteRouteCommandHandler,
+    CompleteStopCommandHandler,
     CancelRouteCommandHandler,
     UpdateRouteCommandHandler,
     DeleteRouteCommandHandler,
     GenerateOptimalRouteCommandHandler,
+    PlanFleetRoutesCommandHandler,
+    IngestPositionsCommandHandler,
     GetRouteByIdQueryHandler,
     GetRoutesByVehicleQueryHandler,
+    GetRoutesByOrderQueryHandler,
     GetRoutesByStatusQueryHandler,
-    GetAllRoutesQueryHandler
+    GetAllRoutesQueryHandler,
+    GetTrackingInfoQueryHandler,
+    OpenTrackingStreamQueryHandler,
+    GetRouteTrackQueryHandler,
+    GeocodeAddressesQueryHandler,
+    FindNearestVehiclesQueryHandler,
+    FindStopsInAreaQueryHandler
 )
 
 
@@ -32,17 +58,22 @@ def get_create_route_handler(repo=Depends(get_logistics_repository)):
 
 def get_start_route_handler(repo=Depends(get_logistics_repository)):
     """Dependency para obtener handler de iniciar ruta"""
-    return StartRouteCommandHandler(repo)
+    return StartRouteCommandHandler(repo, tracking_feed, eta_engine, spatial_index)
 
 
 def get_complete_route_handler(repo=Depends(get_logistics_repository)):
     """Dependency para obtener handler de completar ruta"""
-    return CompleteRouteCommandHandler(repo)
+    return CompleteRouteCommandHandler(repo, tracking_feed, eta_engine, spatial_index)
+
+
+def get_complete_stop_handler(repo=Depends(get_logistics_repository)):
+    """Dependency para obtener handler de entregar parada"""
+    return CompleteStopCommandHandler(repo, tracking_feed, eta_engine, spatial_index)
 
 
 def get_cancel_route_handler(repo=Depends(get_logistics_repository)):
     """Dependency para obtener handler de cancelar ruta"""
-    return CancelRouteCommandHandler(repo)
+    return CancelRouteCommandHandler(repo, tracking_feed, eta_engine, spatial_index)
 
 
 def get_route_by_id_handler(repo=Depends(get_logistics_repository)):
@@ -55,6 +86,11 @@ def get_routes_by_vehicle_handler(repo=Depends(get_logistics_repository)):
     return GetRoutesByVehicleQueryHandler(repo)
 
 
+def get_routes_by_order_handler(repo=Depends(get_logistics_repository)):
+    """Dependency para obtener handler de obtener rutas por orden"""
+    return GetRoutesByOrderQueryHandler(repo)
+
+
 def get_routes_by_status_handler(repo=Depends(get_logistics_repository)):
     """Dependency para obtener handler de obtener rutas por estado"""
     return GetRoutesByStatusQueryHandler(repo)
@@ -67,15 +103,177 @@ def get_all_routes_handler(repo=Depends(get_logistics_repository)):
 
 def get_update_route_handler(repo=Depends(get_logistics_repository)):
     """Dependency para obtener handler de actualizar ruta"""
-    return UpdateRouteCommandHandler(repo)
+    return UpdateRouteCommandHandler(repo, tracking_feed, eta_engine, spatial_index)
 
 
 def get_delete_route_handler(repo=Depends(get_logistics_repository)):
     """Dependency para obtener handler de eliminar ruta"""
-    return DeleteRouteCommandHandler(repo)
+    return DeleteRouteCommandHandler(repo, spatial_index)
+
+
+# Distancias compartidas por el optimizador, el planificador de flota y las estimaciones
+distance_matrix = MemmapDistanceMatrix(
+    get_settings().distance_cache_dir,
+    max_locations=get_settings().distance_cache_max_locations
+)
+
+# El optimizador no guarda estado entre llamadas: una instancia por proceso
+_route_optimizer = NumpyRouteOptimizer(distance_matrix=distance_matrix.matrix)
 
 
 def get_generate_optimal_route_handler(repo=Depends(get_logistics_repository)):
     """Dependency para obtener handler de generar ruta óptima"""
-    return GenerateOptimalRouteCommandHandler(repo)
+    return GenerateOptimalRouteCommandHandler(
+        repo,
+        route_optimizer=_route_optimizer,
+        time_budget_seconds=get_settings().route_optimizer_time_budget_ms / 1000,
+        spatial_index=spatial_index
+    )
+
+
+# Pool de procesos compartido; arranca en la primera planificación y lo cierra el lifespan
+fleet_planner = ProcessPoolFleetPlanner(
+    max_workers=get_settings().fleet_planner_workers or None,
+    distance_matrix=distance_matrix.matrix
+)
+
+
+# El gazetteer se carga una vez por proceso, en la primera dirección que falte en la caché
+gazetteer = Gazetteer(get_settings().geocoding_gazetteer_path or None)
+geocoding_stats = GeocodingStats()
+
+
+def get_geocoder(db=Depends(get_db)) -> IGeocoder:
+    """Dependency para obtener el geocodificador"""
+    return CachedGazetteerGeocoder(SQLAlchemyGeocodeCache(db), gazetteer, stats=geocoding_stats)
+
+
+def get_geocode_addresses_handler(geocoder=Depends(get_geocoder)):
+    """Dependency para obtener handler de geocodificar direcciones"""
+    return GeocodeAddressesQueryHandler(geocoder)
+
+
+def get_plan_fleet_routes_handler(
+    repo=Depends(get_logistics_repository),
+    geocoder=Depends(get_geocoder)
+):
+    """Dependency para obtener handler de planificar la flota"""
+    return PlanFleetRoutesCommandHandler(
+        repo,
+        # Misma sesión que las rutas: la asignación de órdenes se confirma con ellas
+        order_source=OrderRepositoryDispatchSource(SQLAlchemyOrderRepository(repo.db)),
+        fleet_planner=fleet_planner,
+        time_budget_seconds=get_settings().fleet_planner_time_budget_ms / 1000,
+        geocoder=geocoder,
+        spatial_index=spatial_index
+    )
+
+
+# Posiciones recientes por vehículo en memoria; el lifespan corre el flusher a vehicle_positions
+position_buffers = PositionRingBuffers(
+    capacity=get_settings().tracking_ring_capacity,
+    max_pending=get_settings().tracking_max_pending
+)
+position_flusher = PositionFlusher(
+    position_buffers,
+    batch_size=get_settings().tracking_flush_batch_size,
+    interval_seconds=get_settings().tracking_flush_interval_seconds
+)
+
+# Recorridos de las rutas completadas: de vehicle_positions a bloques comprimidos
+track_archiver = TrackArchiver(
+    chunk_minutes=get_settings().track_chunk_minutes,
+    grace_seconds=get_settings().track_archive_grace_seconds,
+    interval_seconds=get_settings().track_archive_interval_seconds
+)
+
+
+# Reparto en vivo de posiciones y avance de rutas a las conexiones SSE/WebSocket del proceso
+tracking_feed = TrackingBroadcaster(
+    position_buffers,
+    max_pending=get_settings().tracking_stream_queue_size
+)
+
+
+@contextmanager
+def _eta_order_repository():
+    """Repositorio de órdenes con sesión propia para cada escritura de ETAs"""
+    db = SessionLocal()
+    try:
+        yield SQLAlchemyOrderRepository(db)
+    finally:
+        db.close()
+
+
+# Vueltas del recálculo sin renovar tras las cuales otro worker toma la escritura de ETAs
+ETA_LEASE_INTERVALS = 3
+
+# ETAs de las paradas pendientes de las rutas en curso; el lifespan corre su recálculo periódico.
+# Todos los workers las calculan desde la base; solo el que tiene la concesión las escribe
+eta_engine = EtaEngine(
+    position_buffers,
+    OrderRepositoryEtaSink(_eta_order_repository),
+    distance_matrix=distance_matrix.matrix,
+    min_change_minutes=get_settings().eta_min_change_minutes,
+    interval_seconds=get_settings().eta_recompute_interval_seconds,
+    route_source=RepositoryActiveRouteSource(),
+    lease=WorkerLease(
+        "eta_engine",
+        ttl=timedelta(seconds=ETA_LEASE_INTERVALS * get_settings().eta_recompute_interval_seconds)
+    )
+)
+
+
+# Vehículos (última posición) y paradas de las rutas activas, para búsquedas por cercanía y por área
+spatial_index = SpatialIndex(position_buffers, cell_degrees=get_settings().spatial_index_cell_degrees)
+
+
+async def track_active_routes():
+    """Retomar las ETAs de las rutas en curso e indexar las paradas activas (al arrancar el proceso)"""
+    with _stream_logistics_repository() as repository:
+        for route in await repository.find_by_status(RouteStatus.PLANNED):
+            spatial_index.track_route(route)
+        for route in await repository.find_by_status(RouteStatus.IN_PROGRESS):
+            eta_engine.track_route(route)
+            spatial_index.track_route(route)
+
+
+def get_ingest_positions_handler():
+    """Dependency para obtener handler de registrar posiciones GPS"""
+    return IngestPositionsCommandHandler(position_buffers, tracking_feed, eta_engine, spatial_index)
+
+
+def get_tracking_info_handler(repo=Depends(get_logistics_repository), db=Depends(get_db)):
+    """Dependency para obtener handler de seguimiento de ruta"""
+    return GetTrackingInfoQueryHandler(repo, position_buffers, SQLAlchemyPositionRepository(db), eta_engine)
+
+
+def get_route_track_handler(repo=Depends(get_logistics_repository), db=Depends(get_db)):
+    """Dependency para obtener handler de recorrido de ruta"""
+    return GetRouteTrackQueryHandler(repo, SQLAlchemyPositionRepository(db))
+
+
+@contextmanager
+def _stream_logistics_repository():
+    """Repositorio con sesión propia, fuera de una petición (seguimiento en vivo, arranque)"""
+    db = SessionLocal()
+    try:
+        yield SQLAlchemyLogisticsRepository(db)
+    finally:
+        db.close()
+
+
+def get_open_tracking_stream_handler():
+    """Dependency para obtener handler de seguimiento en vivo"""
+    # No usa get_db: la conexión puede durar horas y no debe retener una sesión
+    return OpenTrackingStreamQueryHandler(_stream_logistics_repository, tracking_feed)
+
+
+def get_nearest_vehicles_handler():
+    """Dependency para obtener handler de vehículos más cercanos"""
+    return FindNearestVehiclesQueryHandler(spatial_index)
+
 
+def get_stops_in_area_handler():
+    """Dependency para obtener handler de paradas dentro de un área"""
+    return FindStopsInAreaQueryHandler(spatial_index)
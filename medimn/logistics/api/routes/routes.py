@@ -1,23 +1,34 @@
 """
 Rutas de la API de logística
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 from datetime import datetime
+import asyncio
+import json
 
 from ...application.commands import (
-    CreateRouteCommand, StartRouteCommand, CompleteRouteCommand, CancelRouteCommand,
-    UpdateRouteCommand, DeleteRouteCommand, GenerateOptimalRouteCommand
+    CreateRouteCommand, StartRouteCommand, CompleteRouteCommand, CompleteStopCommand, CancelRouteCommand,
+    UpdateRouteCommand, DeleteRouteCommand, GenerateOptimalRouteCommand, PlanFleetRoutesCommand,
+    IngestPositionsCommand
 )
 from ...application.queries import (
-    GetRouteByIdQuery, GetRoutesByVehicleQuery, GetRoutesByStatusQuery, GetAllRoutesQuery
+    GetRouteByIdQuery, GetRoutesByVehicleQuery, GetRoutesByOrderQuery, GetRoutesByStatusQuery, GetAllRoutesQuery,
+    GeocodeAddressesQuery, GetTrackingInfoQuery, GetRouteTrackQuery, OpenTrackingStreamQuery, FindNearestVehiclesQuery,
+    FindStopsInAreaQuery
 )
+from ...infrastructure.config import get_settings
+from shared.infrastructure.idempotency import IDEMPOTENCY_HEADER, get_idempotency_store
 from ..dependencies import (
     get_create_route_handler, get_start_route_handler, get_complete_route_handler,
-    get_cancel_route_handler, get_update_route_handler, get_delete_route_handler,
-    get_generate_optimal_route_handler, get_route_by_id_handler,
-    get_routes_by_vehicle_handler, get_routes_by_status_handler, get_all_routes_handler
+    get_cancel_route_handler, get_complete_stop_handler, get_update_route_handler, get_delete_route_handler,
+    get_generate_optimal_route_handler, get_plan_fleet_routes_handler, get_geocode_addresses_handler,
+    geocoding_stats, get_ingest_positions_handler, get_tracking_info_handler, get_route_track_handler, position_buffers,
+    get_open_tracking_stream_handler, tracking_feed, get_nearest_vehicles_handler, get_stops_in_area_handler,
+    get_route_by_id_handler,
+    get_routes_by_vehicle_handler, get_routes_by_order_handler, get_routes_by_status_handler, get_all_routes_handler
 )
 
 router = APIRouter()
@@ -59,6 +70,11 @@ class StartRouteRequest(BaseModel):
         populate_by_name = True
 
 
+class CompleteStopRequest(BaseModel):
+    """Request para entregar parada"""
+    completedAt: Optional[datetime] = None
+
+
 class UpdateRouteRequest(BaseModel):
     """Request para actualizar ruta"""
     status: Optional[str] = None
@@ -69,10 +85,41 @@ class UpdateRouteRequest(BaseModel):
     endTime: Optional[datetime] = None
 
 
+class LocationRequest(BaseModel):
+    """Coordenadas en grados decimales"""
+    lat: float = Field(..., ge=-90, le=90)
+    lon: float = Field(..., ge=-180, le=180)
+
+
+class StopLocationRequest(LocationRequest):
+    """Coordenadas de entrega de una orden"""
+    orderId: str
+
+
 class GenerateOptimalRouteRequest(BaseModel):
-    """Request para generar ruta óptima"""
-    orderIds: List[str] = Field(..., min_items=1)
+    """Request para generar ruta óptima (con coordenadas se optimiza el orden de las paradas)"""
+    orderIds: List[str] = Field(default_factory=list)
     vehicleType: Optional[str] = None
+    stops: Optional[List[StopLocationRequest]] = None
+    depot: Optional[LocationRequest] = None
+    returnToDepot: bool = True
+
+
+class FleetVehicleRequest(BaseModel):
+    """Vehículo disponible para el turno"""
+    vehicleId: str
+    capacity: int = Field(..., gt=0)
+    vehicleType: Optional[str] = None
+
+
+class PlanFleetRoutesRequest(BaseModel):
+    """Request para planificar las rutas del turno con las órdenes CONFIRMED"""
+    vehicles: List[FleetVehicleRequest] = Field(..., min_length=1)
+    depot: LocationRequest
+    stops: List[StopLocationRequest] = Field(default_factory=list)
+    orderIds: Optional[List[str]] = None
+    shiftStart: Optional[datetime] = None
+    shiftMinutes: int = Field(default=600, gt=0, le=24 * 60)
 
 
 class RouteResponse(BaseModel):
@@ -102,6 +149,110 @@ class RouteResponse(BaseModel):
     updatedAt: Optional[str] = None  # Alias según especificación
 
 
+class GeocodeAddressesRequest(BaseModel):
+    """Request para geocodificar direcciones de entrega"""
+    addresses: List[str] = Field(..., min_length=1, max_length=5000)
+
+
+class GeocodedAddressResponse(BaseModel):
+    """Coordenadas de una dirección (null si no se encontró)"""
+    address: str
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+
+
+class GeocodeAddressesResponse(BaseModel):
+    """Response de geocodificación con los contadores acumulados del proceso"""
+    results: List[GeocodedAddressResponse]
+    stats: dict
+
+
+class VehiclePositionRequest(LocationRequest):
+    """Posición GPS reportada por un vehículo"""
+    vehicleId: str = Field(..., min_length=1)
+    ts: datetime
+
+
+class IngestPositionsRequest(BaseModel):
+    """Request para registrar un lote de posiciones GPS"""
+    positions: List[VehiclePositionRequest] = Field(..., min_length=1, max_length=50000)
+
+
+class IngestPositionsResponse(BaseModel):
+    """Response de la ingesta con los contadores del proceso"""
+    accepted: int
+    stats: dict
+
+
+class TrackingInfoResponse(BaseModel):
+    """Response de seguimiento de una ruta"""
+    vehicleId: str
+    position: Optional[dict] = None
+    nextStopEta: Optional[dict] = None
+
+
+class RouteTrackResponse(BaseModel):
+    """Response del recorrido de una ruta"""
+    routeId: str
+    vehicleId: Optional[str] = None
+    archived: bool
+    count: int
+    positions: List[dict]
+
+
+class NearbyVehicleResponse(BaseModel):
+    """Vehículo cercano con su última posición"""
+    vehicleId: str
+    position: dict
+    distanceKm: float
+    routeId: Optional[str] = None
+
+
+class AreaStopResponse(BaseModel):
+    """Parada pendiente dentro del área"""
+    routeId: str
+    orderId: str
+    lat: float
+    lon: float
+    priority: int
+    vehicleId: Optional[str] = None
+
+
+class FleetPlanResponse(BaseModel):
+    """Response del plan de flota"""
+    routes: List[RouteResponse]
+    unassignedOrderIds: List[str]
+
+
+def _route_response(route) -> RouteResponse:
+    """Convertir una ruta del dominio a RouteResponse"""
+    return RouteResponse(
+        id=str(route.id),
+        _id=str(route.id),
+        routeNumber=route.route_number,
+        vendorId=route.vendor_id,
+        vehicleId=route.vehicle_id,
+        vehicleType=route.vehicle_type,
+        driverName=route.driver_name,
+        driverPhone=route.driver_phone,
+        stops=[stop.to_dict() for stop in route.stops],
+        status=route.status.value,
+        startTime=route.start_time,
+        endTime=route.end_time,
+        estimatedDistance=route.estimated_distance,
+        estimatedDuration=route.estimated_duration,
+        estimatedFuel=route.estimated_fuel,
+        actualDistance=route.actual_distance,
+        actualDuration=route.actual_duration,
+        actualFuel=route.actual_fuel,
+        progress=route.progress,
+        created_at=route.created_at,
+        updated_at=route.updated_at,
+        createdAt=route.created_at.isoformat() if route.created_at else None,
+        updatedAt=route.updated_at.isoformat() if route.updated_at else None
+    )
+
+
 # ========== Endpoints ==========
 
 @router.post(
@@ -113,9 +264,22 @@ class RouteResponse(BaseModel):
 )
 async def create_route(
     request: CreateRouteRequest,
-    handler=Depends(get_create_route_handler)
+    handler=Depends(get_create_route_handler),
+    idempotency_store=Depends(get_idempotency_store),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER)
 ):
-    """Crear nueva ruta"""
+    """Crear nueva ruta (reintentos con el mismo Idempotency-Key reproducen la respuesta)"""
+    return await idempotency_store.run(
+        scope="routes",
+        key=idempotency_key,
+        payload=request.model_dump(mode="json"),
+        operation=lambda: _create_route(request, handler),
+        status_code=status.HTTP_201_CREATED
+    )
+
+
+async def _create_route(request: CreateRouteRequest, handler) -> RouteResponse:
+    """Crear la ruta y construir la respuesta"""
     try:
         command = CreateRouteCommand(
             stops=[stop.model_dump() for stop in request.stops],
@@ -305,6 +469,35 @@ async def complete_route(
         )
 
 
+@router.post(
+    "/routes/{route_id}/stops/{order_id}/complete",
+    response_model=RouteResponse,
+    summary="Entregar parada",
+    description="Marca entregada una parada de una ruta en progreso; las ETAs de las paradas siguientes se recalculan desde esta entrega"
+)
+async def complete_stop(
+    route_id: str,
+    order_id: str,
+    request: Optional[CompleteStopRequest] = None,
+    handler=Depends(get_complete_stop_handler)
+):
+    """Entregar parada"""
+    try:
+        command = CompleteStopCommand(
+            route_id=route_id,
+            order_id=order_id,
+            completed_at=request.completedAt if request else None
+        )
+        route = await handler.handle(command)
+        
+        return _route_response(route)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
 @router.post(
     "/routes/{route_id}/cancel",
     response_model=RouteResponse,
@@ -404,6 +597,56 @@ async def list_routes(
         )
 
 
+@router.get(
+    "/routes/by-order/{order_id}",
+    response_model=List[RouteResponse],
+    summary="Rutas de una orden",
+    description="Lista las rutas con una parada para la orden, la más reciente primero"
+)
+async def list_routes_by_order(
+    order_id: str,
+    handler=Depends(get_routes_by_order_handler)
+):
+    """Listar rutas por orden"""
+    try:
+        query = GetRoutesByOrderQuery(order_id=order_id)
+        routes = await handler.handle(query)
+        
+        return [
+            RouteResponse(
+                id=str(route.id),
+                _id=str(route.id),
+                routeNumber=route.route_number,
+                vendorId=route.vendor_id,
+                vehicleId=route.vehicle_id,
+                vehicleType=route.vehicle_type,
+                driverName=route.driver_name,
+                driverPhone=route.driver_phone,
+                stops=[stop.to_dict() for stop in route.stops],
+                status=route.status.value,
+                startTime=route.start_time,
+                endTime=route.end_time,
+                estimatedDistance=route.estimated_distance,
+                estimatedDuration=route.estimated_duration,
+                estimatedFuel=route.estimated_fuel,
+                actualDistance=route.actual_distance,
+                actualDuration=route.actual_duration,
+                actualFuel=route.actual_fuel,
+                progress=route.progress,
+                created_at=route.created_at,
+                updated_at=route.updated_at,
+                createdAt=route.created_at.isoformat() if route.created_at else None,
+                updatedAt=route.updated_at.isoformat() if route.updated_at else None
+            )
+            for route in routes
+        ]
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
 @router.put(
     "/routes/{route_id}",
     response_model=RouteResponse,
@@ -509,7 +752,10 @@ async def generate_optimal_route(
     try:
         command = GenerateOptimalRouteCommand(
             order_ids=request.orderIds,
-            vehicle_type=request.vehicleType
+            vehicle_type=request.vehicleType,
+            locations=[stop.model_dump() for stop in request.stops] if request.stops else None,
+            depot=request.depot.model_dump() if request.depot else None,
+            return_to_depot=request.returnToDepot
         )
         
         route = await handler.handle(command)
@@ -550,3 +796,335 @@ async def generate_optimal_route(
             detail=str(e)
         )
 
+
+@router.post(
+    "/routes/plan-fleet",
+    response_model=FleetPlanResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Planificar rutas de la flota",
+    description="Reparte las órdenes CONFIRMED del día entre los vehículos respetando capacidad y ventanas de ETA"
+)
+async def plan_fleet_routes(
+    request: PlanFleetRoutesRequest,
+    handler=Depends(get_plan_fleet_routes_handler)
+):
+    """Planificar rutas de la flota"""
+    try:
+        command = PlanFleetRoutesCommand(
+            vehicles=[vehicle.model_dump() for vehicle in request.vehicles],
+            depot=request.depot.model_dump(),
+            locations=[stop.model_dump() for stop in request.stops],
+            shift_start=request.shiftStart,
+            shift_minutes=request.shiftMinutes,
+            order_ids=request.orderIds
+        )
+        
+        routes, unassigned = await handler.handle(command)
+        
+        return FleetPlanResponse(
+            routes=[_route_response(route) for route in routes],
+            unassignedOrderIds=unassigned
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.post(
+    "/geocoding/batch",
+    response_model=GeocodeAddressesResponse,
+    summary="Geocodificar direcciones",
+    description="Resuelve direcciones de entrega con la caché y el gazetteer local; incluye la tasa de aciertos de la caché"
+)
+async def geocode_addresses(
+    request: GeocodeAddressesRequest,
+    handler=Depends(get_geocode_addresses_handler)
+):
+    """Geocodificar direcciones"""
+    try:
+        results = await handler.handle(GeocodeAddressesQuery(addresses=request.addresses))
+        
+        return GeocodeAddressesResponse(
+            results=[
+                GeocodedAddressResponse(
+                    address=address,
+                    lat=coordinates.lat if coordinates else None,
+                    lon=coordinates.lon if coordinates else None
+                )
+                for address, coordinates in results
+            ],
+            stats=geocoding_stats.to_dict()
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.post(
+    "/tracking/positions",
+    response_model=IngestPositionsResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Registrar posiciones GPS",
+    description="Recibe un lote de posiciones de la flota; la última por vehículo queda disponible al instante y el historial se guarda en segundo plano"
+)
+async def ingest_positions(
+    request: IngestPositionsRequest,
+    handler=Depends(get_ingest_positions_handler)
+):
+    """Registrar posiciones GPS"""
+    try:
+        # Un solo model_dump para todo el lote: es la mitad del costo que uno por posición
+        accepted = await handler.handle(IngestPositionsCommand(positions=request.model_dump()["positions"]))
+        
+        return IngestPositionsResponse(accepted=accepted, stats=position_buffers.metrics())
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.get(
+    "/routes/{route_id}/tracking",
+    response_model=TrackingInfoResponse,
+    summary="Seguimiento de ruta",
+    description="Última posición del vehículo de la ruta y ETA de la próxima parada"
+)
+async def get_route_tracking(
+    route_id: str,
+    handler=Depends(get_tracking_info_handler)
+):
+    """Obtener seguimiento de una ruta"""
+    try:
+        tracking = await handler.handle(GetTrackingInfoQuery(route_id=route_id))
+        
+        return TrackingInfoResponse(**tracking.to_dict())
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.get(
+    "/routes/{route_id}/track",
+    response_model=RouteTrackResponse,
+    summary="Recorrido de ruta",
+    description="Posiciones del vehículo de la ruta entre `from` y `to` (por defecto, todo el recorrido); las rutas completadas se leen de su historial comprimido"
+)
+async def get_route_track(
+    route_id: str,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    handler=Depends(get_route_track_handler)
+):
+    """Reproducir el recorrido de una ruta"""
+    try:
+        track = await handler.handle(GetRouteTrackQuery(route_id=route_id, start=start, end=end))
+        
+        return RouteTrackResponse(**track.to_dict())
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.get(
+    "/tracking/vehicles/nearest",
+    response_model=List[NearbyVehicleResponse],
+    summary="Vehículos más cercanos",
+    description="Los vehículos con posición más cercanos a un punto (en línea recta); por defecto solo los que no tienen una ruta en curso"
+)
+async def find_nearest_vehicles(
+    lat: float,
+    lon: float,
+    k: int = Query(5, ge=1, le=100),
+    availableOnly: bool = True,
+    handler=Depends(get_nearest_vehicles_handler)
+):
+    """Buscar los vehículos más cercanos a un punto"""
+    try:
+        vehicles = await handler.handle(FindNearestVehiclesQuery(lat=lat, lon=lon, k=k, available_only=availableOnly))
+        
+        return [
+            NearbyVehicleResponse(
+                vehicleId=vehicle.vehicle_id,
+                position=vehicle.position.to_dict(),
+                distanceKm=round(vehicle.distance_km, 3),
+                routeId=vehicle.route_id
+            )
+            for vehicle in vehicles
+        ]
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@router.get(
+    "/tracking/stops/in-area",
+    response_model=List[AreaStopResponse],
+    summary="Paradas dentro de un área",
+    description="Paradas pendientes con ubicación de las rutas planificadas o en curso dentro del rectángulo indicado"
+)
+async def find_stops_in_area(
+    minLat: float,
+    minLon: float,
+    maxLat: float,
+    maxLon: float,
+    handler=Depends(get_stops_in_area_handler)
+):
+    """Buscar las paradas dentro de un rectángulo"""
+    try:
+        stops = await handler.handle(FindStopsInAreaQuery(
+            min_lat=minLat, min_lon=minLon, max_lat=maxLat, max_lon=maxLon
+        ))
+        
+        return [
+            AreaStopResponse(
+                routeId=stop.route_id,
+                orderId=stop.order_id,
+                lat=stop.location.lat,
+                lon=stop.location.lon,
+                priority=stop.priority,
+                vehicleId=stop.vehicle_id
+            )
+            for stop in stops
+        ]
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+async def _sse_frames(subscription, heartbeat_seconds: float) -> AsyncIterator[str]:
+    """Eventos SSE de una suscripción; un comentario de keepalive si no hay cambios"""
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            updates = await subscription.next_updates(heartbeat_seconds)
+            if not updates:
+                yield ": keepalive\n\n"
+                continue
+            yield "".join(f"event: {update.kind}\ndata: {update.data}\n\n" for update in updates)
+    finally:
+        tracking_feed.unsubscribe(subscription)
+
+
+@router.get(
+    "/tracking/stream",
+    response_class=StreamingResponse,
+    summary="Seguimiento en vivo (SSE)",
+    description="Envía como Server-Sent Events las posiciones y el avance de los vehículos, rutas o vendedores indicados; un cliente lento recibe solo lo más reciente de cada uno"
+)
+async def stream_tracking(
+    vehicleId: List[str] = Query(default=[]),
+    routeId: List[str] = Query(default=[]),
+    vendorId: List[str] = Query(default=[]),
+    handler=Depends(get_open_tracking_stream_handler)
+):
+    """Seguir vehículos, rutas o vendedores en vivo por SSE"""
+    try:
+        subscription = await handler.handle(OpenTrackingStreamQuery(
+            vehicle_ids=vehicleId, route_ids=routeId, vendor_ids=vendorId
+        ))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return StreamingResponse(
+        _sse_frames(subscription, get_settings().tracking_stream_heartbeat_seconds),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
+@router.websocket("/tracking/ws")
+async def tracking_websocket(
+    websocket: WebSocket,
+    vehicleId: List[str] = Query(default=[]),
+    routeId: List[str] = Query(default=[]),
+    vendorId: List[str] = Query(default=[]),
+    handler=Depends(get_open_tracking_stream_handler)
+):
+    """Seguir vehículos, rutas o vendedores en vivo por WebSocket; cada mensaje es un arreglo de cambios"""
+    try:
+        subscription = await handler.handle(OpenTrackingStreamQuery(
+            vehicle_ids=vehicleId, route_ids=routeId, vendor_ids=vendorId
+        ))
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+    
+    await websocket.accept()
+    # Lo que envíe el cliente se ignora; leer solo sirve para enterarse de que se fue
+    receiver = asyncio.ensure_future(websocket.receive())
+    try:
+        while True:
+            updates = asyncio.ensure_future(
+                subscription.next_updates(get_settings().tracking_stream_heartbeat_seconds)
+            )
+            done, _ = await asyncio.wait({receiver, updates}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                if receiver.result()["type"] == "websocket.disconnect":
+                    updates.cancel()
+                    break
+                receiver = asyncio.ensure_future(websocket.receive())
+            batch = await updates
+            if batch:
+                # Los cambios ya vienen serializados: se arma el arreglo sin volver a codificarlos
+                await websocket.send_text("[" + ",".join(
+                    f'{{"type":{json.dumps(update.kind)},"data":{update.data}}}' for update in batch
+                ) + "]")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        tracking_feed.unsubscribe(subscription)
@@ -49,6 +49,14 @@ class CompleteRouteCommand:
     route_id: str
 
 
+@dataclass
+class CompleteStopCommand:
+    """Comando para marcar entregada una parada de una ruta"""
+    route_id: str
+    order_id: str
+    completed_at: Optional[datetime] = None
+
+
 @dataclass
 class CancelRouteCommand:
     """Comando para cancelar una ruta"""
@@ -86,4 +94,24 @@ class GenerateOptimalRouteCommand:
     """Comando para generar ruta óptima"""
     order_ids: List[str]
     vehicle_type: Optional[str] = None
+    locations: Optional[List[dict]] = None  # [{"orderId": str, "lat": float, "lon": float}]
+    depot: Optional[dict] = None  # {"lat": float, "lon": float}
+    return_to_depot: bool = True
+
+
+@dataclass
+class PlanFleetRoutesCommand:
+    """Comando para planificar las rutas del turno para toda la flota"""
+    vehicles: List[dict]  # [{"vehicleId": str, "capacity": int, "vehicleType": str}]
+    depot: dict  # {"lat": float, "lon": float}
+    locations: List[dict]  # [{"orderId": str, "lat": float, "lon": float}]
+    shift_start: Optional[datetime] = None
+    shift_minutes: int = 600
+    order_ids: Optional[List[str]] = None  # Limitar el plan a estas órdenes
+
+
+@dataclass
+class IngestPositionsCommand:
+    """Comando para registrar un lote de posiciones GPS de la flota"""
+    positions: List[dict]  # [{"vehicleId": str, "lat": float, "lon": float, "ts": datetime}]
 
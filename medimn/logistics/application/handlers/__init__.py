@@ -1,8 +1,11 @@
 """
 Handlers para comandos y queries
 """
+import asyncio
 import sys
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from typing import Callable, ContextManager, List, Optional, Tuple
 
 # Agregar el path del módulo shared al PYTHONPATH
 shared_path = str(Path(__file__).parent.parent.parent.parent / "shared")
@@ -13,19 +16,26 @@ from shared.domain.value_objects import EntityId
 from shared.domain.events import event_bus
 from ..commands import (
     CreateRouteCommand, AddStopCommand, RemoveStopCommand,
-    StartRouteCommand, CompleteRouteCommand, CancelRouteCommand,
+    StartRouteCommand, CompleteRouteCommand, CompleteStopCommand, CancelRouteCommand,
     UpdateTrackingCommand, UpdateRouteCommand, DeleteRouteCommand,
-    GenerateOptimalRouteCommand
+    GenerateOptimalRouteCommand, PlanFleetRoutesCommand, IngestPositionsCommand
 )
 from ..queries import (
-    GetRouteByIdQuery, GetRoutesByVehicleQuery, GetRoutesByStatusQuery,
-    GetTrackingInfoQuery, GetAllRoutesQuery
+    GetRouteByIdQuery, GetRoutesByVehicleQuery, GetRoutesByOrderQuery, GetRoutesByStatusQuery,
+    GetTrackingInfoQuery, GetRouteTrackQuery, GetAllRoutesQuery, GeocodeAddressesQuery, OpenTrackingStreamQuery,
+    FindNearestVehiclesQuery, FindStopsInAreaQuery
+)
+from ...domain.entities import (
+    Route, Stop, ETA, RouteStatus, Coordinates, DeliveryJob, FleetVehicle, TrackingInfo, RouteTrack, AreaStop, NearbyVehicle,
+    ROAD_DETOUR_FACTOR, vehicle_profile
 )
-from ...domain.entities import Route, Stop, ETA, RouteStatus
 from ...domain.events import (
-    RouteCreatedEvent, RouteStartedEvent, RouteCompletedEvent, RouteCancelledEvent
+    RouteCreatedEvent, RouteStartedEvent, RouteCompletedEvent, RouteCancelledEvent, StopCompletedEvent
+)
+from ...domain.ports import (
+    IDispatchOrderSource, IEtaEngine, IFleetPlanner, IGeocoder, ILogisticsRepository, IPositionBuffer,
+    IPositionRepository, IRouteOptimizer, ISpatialIndex, ITrackingFeed, ITrackingSubscription
 )
-from ...domain.ports import ILogisticsRepository
 
 
 class CreateRouteCommandHandler:
@@ -87,8 +97,17 @@ class CreateRouteCommandHandler:
 class StartRouteCommandHandler:
     """Handler para el comando StartRoute"""
     
-    def __init__(self, logistics_repository: ILogisticsRepository):
+    def __init__(
+        self,
+        logistics_repository: ILogisticsRepository,
+        tracking_feed: Optional[ITrackingFeed] = None,
+        eta_engine: Optional[IEtaEngine] = None,
+        spatial_index: Optional[ISpatialIndex] = None
+    ):
         self.logistics_repository = logistics_repository
+        self.tracking_feed = tracking_feed
+        self.eta_engine = eta_engine
+        self.spatial_index = spatial_index
     
     async def handle(self, command: StartRouteCommand) -> Route:
         """Manejar comando de iniciar ruta"""
@@ -111,14 +130,30 @@ class StartRouteCommandHandler:
         
         route = await self.logistics_repository.save(route)
         
+        if self.tracking_feed is not None:
+            self.tracking_feed.route_updated(route)
+        if self.eta_engine is not None:
+            self.eta_engine.track_route(route)
+        if self.spatial_index is not None:
+            self.spatial_index.track_route(route)
+        
         return route
 
 
 class CompleteRouteCommandHandler:
     """Handler para el comando CompleteRoute"""
     
-    def __init__(self, logistics_repository: ILogisticsRepository):
+    def __init__(
+        self,
+        logistics_repository: ILogisticsRepository,
+        tracking_feed: Optional[ITrackingFeed] = None,
+        eta_engine: Optional[IEtaEngine] = None,
+        spatial_index: Optional[ISpatialIndex] = None
+    ):
         self.logistics_repository = logistics_repository
+        self.tracking_feed = tracking_feed
+        self.eta_engine = eta_engine
+        self.spatial_index = spatial_index
     
     async def handle(self, command: CompleteRouteCommand) -> Route:
         """Manejar comando de completar ruta"""
@@ -138,14 +173,77 @@ class CompleteRouteCommandHandler:
         
         route = await self.logistics_repository.save(route)
         
+        if self.tracking_feed is not None:
+            self.tracking_feed.route_updated(route)
+        if self.eta_engine is not None:
+            self.eta_engine.track_route(route)
+        if self.spatial_index is not None:
+            self.spatial_index.track_route(route)
+        
+        return route
+
+
+class CompleteStopCommandHandler:
+    """Handler para el comando CompleteStop"""
+    
+    def __init__(
+        self,
+        logistics_repository: ILogisticsRepository,
+        tracking_feed: Optional[ITrackingFeed] = None,
+        eta_engine: Optional[IEtaEngine] = None,
+        spatial_index: Optional[ISpatialIndex] = None
+    ):
+        self.logistics_repository = logistics_repository
+        self.tracking_feed = tracking_feed
+        self.eta_engine = eta_engine
+        self.spatial_index = spatial_index
+    
+    async def handle(self, command: CompleteStopCommand) -> Route:
+        """Manejar comando de marcar entregada una parada"""
+        route = await self.logistics_repository.find_by_id(EntityId(command.route_id))
+        if not route:
+            raise ValueError(f"Ruta {command.route_id} no encontrada")
+        
+        completed_at = command.completed_at
+        if completed_at is not None and completed_at.tzinfo is not None:
+            completed_at = completed_at.astimezone(timezone.utc).replace(tzinfo=None)
+        route.complete_stop(command.order_id, completed_at)
+        
+        # Publicar eventos
+        route._record_event(StopCompletedEvent(route_id=str(route.id), order_id=command.order_id))
+        
+        for event in route.get_domain_events():
+            await event_bus.publish(event)
+        
+        route.clear_domain_events()
+        
+        route = await self.logistics_repository.save(route)
+        
+        # Las ETAs de las paradas siguientes parten de esta entrega
+        if self.tracking_feed is not None:
+            self.tracking_feed.route_updated(route)
+        if self.eta_engine is not None:
+            self.eta_engine.track_route(route)
+        if self.spatial_index is not None:
+            self.spatial_index.track_route(route)
+        
         return route
 
 
 class CancelRouteCommandHandler:
     """Handler para el comando CancelRoute"""
     
-    def __init__(self, logistics_repository: ILogisticsRepository):
+    def __init__(
+        self,
+        logistics_repository: ILogisticsRepository,
+        tracking_feed: Optional[ITrackingFeed] = None,
+        eta_engine: Optional[IEtaEngine] = None,
+        spatial_index: Optional[ISpatialIndex] = None
+    ):
         self.logistics_repository = logistics_repository
+        self.tracking_feed = tracking_feed
+        self.eta_engine = eta_engine
+        self.spatial_index = spatial_index
     
     async def handle(self, command: CancelRouteCommand) -> Route:
         """Manejar comando de cancelar ruta"""
@@ -165,6 +263,13 @@ class CancelRouteCommandHandler:
         
         route = await self.logistics_repository.save(route)
         
+        if self.tracking_feed is not None:
+            self.tracking_feed.route_updated(route)
+        if self.eta_engine is not None:
+            self.eta_engine.track_route(route)
+        if self.spatial_index is not None:
+            self.spatial_index.track_route(route)
+        
         return route
 
 
@@ -197,6 +302,17 @@ class GetRoutesByVehicleQueryHandler:
         return routes[query.skip:query.skip + query.limit]
 
 
+class GetRoutesByOrderQueryHandler:
+    """Handler para la query GetRoutesByOrder"""
+    
+    def __init__(self, logistics_repository: ILogisticsRepository):
+        self.logistics_repository = logistics_repository
+    
+    async def handle(self, query: GetRoutesByOrderQuery) -> list:
+        """Manejar query de obtener rutas de una orden (la más reciente primero)"""
+        return await self.logistics_repository.find_by_order_id(query.order_id)
+
+
 class GetRoutesByStatusQueryHandler:
     """Handler para la query GetRoutesByStatus"""
     
@@ -228,8 +344,17 @@ class GetAllRoutesQueryHandler:
 class UpdateRouteCommandHandler:
     """Handler para el comando UpdateRoute"""
     
-    def __init__(self, logistics_repository: ILogisticsRepository):
+    def __init__(
+        self,
+        logistics_repository: ILogisticsRepository,
+        tracking_feed: Optional[ITrackingFeed] = None,
+        eta_engine: Optional[IEtaEngine] = None,
+        spatial_index: Optional[ISpatialIndex] = None
+    ):
         self.logistics_repository = logistics_repository
+        self.tracking_feed = tracking_feed
+        self.eta_engine = eta_engine
+        self.spatial_index = spatial_index
     
     async def handle(self, command: UpdateRouteCommand) -> Route:
         """Manejar comando de actualización de ruta"""
@@ -252,14 +377,26 @@ class UpdateRouteCommandHandler:
         
         route = await self.logistics_repository.save(route)
         
+        if self.tracking_feed is not None:
+            self.tracking_feed.route_updated(route)
+        if self.eta_engine is not None:
+            self.eta_engine.track_route(route)
+        if self.spatial_index is not None:
+            self.spatial_index.track_route(route)
+        
         return route
 
 
 class DeleteRouteCommandHandler:
     """Handler para el comando DeleteRoute"""
     
-    def __init__(self, logistics_repository: ILogisticsRepository):
+    def __init__(
+        self,
+        logistics_repository: ILogisticsRepository,
+        spatial_index: Optional[ISpatialIndex] = None
+    ):
         self.logistics_repository = logistics_repository
+        self.spatial_index = spatial_index
     
     async def handle(self, command: DeleteRouteCommand) -> bool:
         """Manejar comando de eliminación de ruta"""
@@ -267,32 +404,76 @@ class DeleteRouteCommandHandler:
         if not deleted:
             raise ValueError(f"Ruta {command.route_id} no encontrada")
         
+        if self.spatial_index is not None:
+            self.spatial_index.forget_route(command.route_id)
+        
         return True
 
 
 class GenerateOptimalRouteCommandHandler:
-    """Handler para el comando GenerateOptimalRoute"""
+    """
+    Handler para el comando GenerateOptimalRoute
     
-    def __init__(self, logistics_repository: ILogisticsRepository):
+    Con coordenadas para las órdenes, el optimizador ordena las paradas y las
+    estimaciones salen del recorrido y del perfil del vehículo; sin
+    coordenadas se conserva el orden recibido con estimaciones por parada.
+    """
+    
+    def __init__(
+        self,
+        logistics_repository: ILogisticsRepository,
+        route_optimizer: Optional[IRouteOptimizer] = None,
+        time_budget_seconds: float = 0.3,
+        spatial_index: Optional[ISpatialIndex] = None
+    ):
         self.logistics_repository = logistics_repository
+        self.route_optimizer = route_optimizer
+        self.time_budget_seconds = time_budget_seconds
+        self.spatial_index = spatial_index
     
     async def handle(self, command: GenerateOptimalRouteCommand) -> Route:
         """Manejar comando de generar ruta óptima"""
-        # Crear stops desde order_ids
-        # En una implementación real, aquí se consultaría el Order Service para obtener las direcciones
-        # y se usaría un algoritmo de optimización de rutas (como TSP o VRP)
-        stops = []
-        for idx, order_id in enumerate(command.order_ids):
-            stop = Stop(
-                order_id=order_id,
-                priority=idx + 1
+        locations = {
+            location["orderId"]: Coordinates(location["lat"], location["lon"])
+            for location in command.locations or []
+        }
+        order_ids = list(dict.fromkeys(command.order_ids or list(locations)))
+        if not order_ids:
+            raise ValueError("Se requiere al menos una orden para generar la ruta")
+        
+        if locations and self.route_optimizer:
+            missing = [order_id for order_id in order_ids if order_id not in locations]
+            if missing:
+                raise ValueError(f"Faltan coordenadas para las órdenes: {', '.join(missing)}")
+            depot = Coordinates(command.depot["lat"], command.depot["lon"]) if command.depot else None
+            
+            # CPU intensivo: fuera del event loop
+            tour = await asyncio.to_thread(
+                self.route_optimizer.optimize,
+                [locations[order_id] for order_id in order_ids],
+                depot,
+                command.return_to_depot,
+                self.time_budget_seconds
             )
-            stops.append(stop)
-        
-        # Calcular estimaciones básicas (en producción, usar un servicio de mapas)
-        estimated_distance = len(stops) * 5.0  # Estimación simple: 5km por parada
-        estimated_duration = len(stops) * 15  # Estimación simple: 15 min por parada
-        estimated_fuel = estimated_distance * 0.1  # Estimación simple: 0.1L por km
+            order_ids = [order_ids[index] for index in tour.sequence]
+            
+            profile = vehicle_profile(command.vehicle_type)
+            road_km = tour.distance_km * ROAD_DETOUR_FACTOR
+            estimated_distance = round(road_km, 2)
+            estimated_duration = round(
+                road_km / profile.average_speed_kmh * 60 + profile.service_minutes_per_stop * len(order_ids)
+            )
+            estimated_fuel = round(road_km * profile.fuel_liters_per_km, 2)
+        else:
+            # Sin coordenadas: estimaciones simples por parada
+            estimated_distance = len(order_ids) * 5.0  # Estimación simple: 5km por parada
+            estimated_duration = len(order_ids) * 15  # Estimación simple: 15 min por parada
+            estimated_fuel = estimated_distance * 0.1  # Estimación simple: 0.1L por km
+        
+        stops = [
+            Stop(order_id=order_id, priority=idx + 1, location=locations.get(order_id))
+            for idx, order_id in enumerate(order_ids)
+        ]
         
         # Crear ruta
         route = Route.create(
@@ -306,5 +487,381 @@ class GenerateOptimalRouteCommandHandler:
         # Guardar ruta
         route = await self.logistics_repository.save(route)
         
+        if self.spatial_index is not None:
+            self.spatial_index.track_route(route)
+        
         return route
 
+
+class PlanFleetRoutesCommandHandler:
+    """
+    Handler para el comando PlanFleetRoutes
+    
+    Toma las órdenes CONFIRMED sin ruta del día del turno, las reparte entre
+    los vehículos respetando capacidad y ventanas de ETA y guarda una ruta
+    por vehículo usado junto con la ruta asignada a cada orden. Las órdenes sin coordenadas en el comando se
+    geocodifican por su dirección de entrega; las que siguen sin coordenadas
+    o no caben en ningún vehículo quedan sin asignar.
+    """
+    
+    def __init__(
+        self,
+        logistics_repository: ILogisticsRepository,
+        order_source: IDispatchOrderSource,
+        fleet_planner: IFleetPlanner,
+        time_budget_seconds: float = 2.0,
+        geocoder: Optional[IGeocoder] = None,
+        spatial_index: Optional[ISpatialIndex] = None
+    ):
+        self.logistics_repository = logistics_repository
+        self.order_source = order_source
+        self.fleet_planner = fleet_planner
+        self.time_budget_seconds = time_budget_seconds
+        self.geocoder = geocoder
+        self.spatial_index = spatial_index
+    
+    async def handle(self, command: PlanFleetRoutesCommand) -> Tuple[List[Route], List[str]]:
+        """Manejar comando de planificar la flota; retorna (rutas, órdenes sin asignar)"""
+        if not command.vehicles:
+            raise ValueError("Se requiere al menos un vehículo para planificar")
+        if command.shift_minutes <= 0:
+            raise ValueError("La duración del turno debe ser mayor a 0")
+        vehicles = [
+            FleetVehicle(
+                vehicle_id=vehicle["vehicleId"],
+                capacity=vehicle["capacity"],
+                vehicle_type=vehicle.get("vehicleType")
+            )
+            for vehicle in command.vehicles
+        ]
+        if any(vehicle.capacity <= 0 for vehicle in vehicles):
+            raise ValueError("La capacidad de los vehículos debe ser mayor a 0")
+        depot = Coordinates(command.depot["lat"], command.depot["lon"])
+        locations = {
+            location["orderId"]: Coordinates(location["lat"], location["lon"])
+            for location in command.locations or []
+        }
+        shift_start = command.shift_start or datetime.utcnow()
+        
+        # Órdenes del día del turno (o sin fecha)
+        orders = await self.order_source.get_confirmed_orders()
+        if command.order_ids is not None:
+            wanted = set(command.order_ids)
+            orders = [order for order in orders if order.order_id in wanted]
+        orders = [
+            order for order in orders
+            if (order.window_start or order.delivery_date) is None
+            or (order.window_start or order.delivery_date).date() == shift_start.date()
+        ]
+        
+        # Un solo lote de geocodificación para las que llegaron sin coordenadas
+        to_geocode = [order for order in orders if order.order_id not in locations and order.delivery_address]
+        if to_geocode and self.geocoder:
+            geocoded = await self.geocoder.geocode_many([order.delivery_address for order in to_geocode])
+            for order in to_geocode:
+                if geocoded.get(order.delivery_address):
+                    locations[order.order_id] = geocoded[order.delivery_address]
+        
+        unassigned = [order.order_id for order in orders if order.order_id not in locations]
+        planned = [order for order in orders if order.order_id in locations]
+        if not planned:
+            return [], unassigned
+        
+        def _minutes(moment: datetime) -> float:
+            return (moment - shift_start).total_seconds() / 60
+        
+        jobs = [
+            DeliveryJob(
+                location=locations[order.order_id],
+                demand=order.demand,
+                earliest_minutes=_minutes(order.window_start) if order.window_start else 0.0,
+                latest_minutes=_minutes(order.window_end) if order.window_end else None
+            )
+            for order in planned
+        ]
+        
+        # CPU intensivo: fuera del event loop
+        plan = await asyncio.to_thread(
+            self.fleet_planner.plan,
+            depot,
+            jobs,
+            vehicles,
+            command.shift_minutes,
+            self.time_budget_seconds
+        )
+        
+        routes = []
+        for tour in plan.tours:
+            vehicle = vehicles[tour.vehicle_index]
+            stops = []
+            for position, (index, start) in enumerate(zip(tour.sequence, tour.service_start_minutes)):
+                order = planned[index]
+                window = order.window_end - order.window_start if order.window_start and order.window_end else None
+                stops.append(Stop(
+                    order_id=order.order_id,
+                    eta=ETA(
+                        date=shift_start + timedelta(minutes=start),
+                        window_minutes=int(window.total_seconds() // 60) if window else 0
+                    ),
+                    priority=position + 1,
+                    location=locations[order.order_id]
+                ))
+            
+            route = Route.create(
+                stops=stops,
+                vehicle_id=vehicle.vehicle_id,
+                vehicle_type=vehicle.vehicle_type,
+                estimated_distance=round(tour.distance_km, 2),
+                estimated_duration=round(tour.duration_minutes),
+                estimated_fuel=round(tour.distance_km * vehicle_profile(vehicle.vehicle_type).fuel_liters_per_km, 2)
+            )
+            routes.append(route)
+        
+        # Rutas y asignación de las órdenes en una sola transacción: o todo el plan o nada
+        conflicts = await self.order_source.assign_routes({
+            stop.order_id: str(route.id) for route in routes for stop in route.stops
+        })
+        if conflicts:
+            raise ValueError(
+                f"Las órdenes ya no están disponibles para planificar: {', '.join(sorted(conflicts))}"
+            )
+        routes = await self.logistics_repository.save_all(routes)
+        
+        for route in routes:
+            route._record_event(RouteCreatedEvent(
+                route_id=str(route.id),
+                vehicle_id=route.vehicle_id
+            ))
+            for event in route.get_domain_events():
+                await event_bus.publish(event)
+            route.clear_domain_events()
+            if self.spatial_index is not None:
+                self.spatial_index.track_route(route)
+        
+        unassigned.extend(planned[index].order_id for index in plan.unassigned)
+        return routes, unassigned
+
+
+class GeocodeAddressesQueryHandler:
+    """Handler para la query GeocodeAddresses"""
+    
+    def __init__(self, geocoder: IGeocoder):
+        self.geocoder = geocoder
+    
+    async def handle(self, query: GeocodeAddressesQuery) -> List[Tuple[str, Optional[Coordinates]]]:
+        """Manejar query de geocodificar direcciones (en el orden recibido)"""
+        if not query.addresses:
+            raise ValueError("Se requiere al menos una dirección")
+        
+        results = await self.geocoder.geocode_many(query.addresses)
+        return [(address, results.get(address)) for address in query.addresses]
+
+
+class IngestPositionsCommandHandler:
+    """Handler para el comando IngestPositions"""
+    
+    def __init__(
+        self,
+        position_buffer: IPositionBuffer,
+        tracking_feed: Optional[ITrackingFeed] = None,
+        eta_engine: Optional[IEtaEngine] = None,
+        spatial_index: Optional[ISpatialIndex] = None
+    ):
+        self.position_buffer = position_buffer
+        self.tracking_feed = tracking_feed
+        self.eta_engine = eta_engine
+        self.spatial_index = spatial_index
+    
+    async def handle(self, command: IngestPositionsCommand) -> int:
+        """Manejar comando de registrar posiciones; retorna cuántas se aceptaron"""
+        if not command.positions:
+            raise ValueError("Se requiere al menos una posición")
+        
+        # Columnas en vez de un objeto por posición
+        vehicle_ids = [position["vehicleId"] for position in command.positions]
+        if not all(vehicle_ids):
+            raise ValueError("Vehicle ID es requerido")
+        timestamps = [
+            # Igual que el resto del dominio: UTC sin zona horaria
+            ts if ts.tzinfo is None else ts.astimezone(timezone.utc).replace(tzinfo=None)
+            for ts in (position["ts"] for position in command.positions)
+        ]
+        lat = [position["lat"] for position in command.positions]
+        lon = [position["lon"] for position in command.positions]
+        
+        accepted = self.position_buffer.append_many(vehicle_ids, lat, lon, timestamps)
+        if self.tracking_feed is not None:
+            self.tracking_feed.positions_updated(vehicle_ids)
+        if self.eta_engine is not None:
+            self.eta_engine.positions_updated(vehicle_ids)
+        if self.spatial_index is not None:
+            self.spatial_index.positions_updated(vehicle_ids)
+        
+        return accepted
+
+
+class GetTrackingInfoQueryHandler:
+    """Handler para la query GetTrackingInfo"""
+    
+    def __init__(
+        self,
+        logistics_repository: ILogisticsRepository,
+        position_buffer: IPositionBuffer,
+        position_repository: Optional[IPositionRepository] = None,
+        eta_engine: Optional[IEtaEngine] = None
+    ):
+        self.logistics_repository = logistics_repository
+        self.position_buffer = position_buffer
+        self.position_repository = position_repository
+        self.eta_engine = eta_engine
+    
+    async def handle(self, query: GetTrackingInfoQuery) -> TrackingInfo:
+        """
+        Manejar query de seguimiento de una ruta
+        
+        La posición sale del anillo del vehículo en memoria; si el vehículo
+        no reportó en este proceso (reinicio u otro worker) se lee la última
+        guardada. La próxima parada es la primera sin entregar (o se deduce
+        del progreso si no se marcaron entregas) y su ETA, la recalculada
+        con la posición del vehículo si la hay.
+        """
+        route = await self.logistics_repository.find_by_id(EntityId(query.route_id))
+        if not route:
+            raise ValueError(f"Ruta {query.route_id} no encontrada")
+        if not route.vehicle_id:
+            raise ValueError(f"La ruta {query.route_id} no tiene vehículo asignado")
+        
+        position = self.position_buffer.latest(route.vehicle_id)
+        if position is None and self.position_repository is not None:
+            position = await self.position_repository.find_latest(route.vehicle_id)
+        
+        next_stop = None
+        remaining = route.remaining_stops
+        if len(remaining) < len(route.stops):
+            next_stop = remaining[0] if remaining else None
+        else:
+            next_index = int(len(route.stops) * route.progress / 100)
+            if next_index < len(route.stops):
+                next_stop = route.stops[next_index]
+        next_stop_eta = None
+        if next_stop is not None:
+            live_eta = self.eta_engine.eta(next_stop.order_id) if self.eta_engine is not None else None
+            next_stop_eta = live_eta or next_stop.eta
+        
+        return TrackingInfo(route.vehicle_id, position=position, next_stop_eta=next_stop_eta)
+
+
+class GetRouteTrackQueryHandler:
+    """Handler para la query GetRouteTrack"""
+    
+    def __init__(self, logistics_repository: ILogisticsRepository, position_repository: IPositionRepository):
+        self.logistics_repository = logistics_repository
+        self.position_repository = position_repository
+    
+    async def handle(self, query: GetRouteTrackQuery) -> RouteTrack:
+        """
+        Manejar query de recorrido de una ruta
+        
+        Una ruta completada y archivada se lee de sus bloques comprimidos,
+        decodificando solo los del rango; si no, de vehicle_positions entre
+        el inicio de la ruta y su fin (o ahora, si sigue en curso).
+        """
+        start, end = (
+            ts if ts is None or ts.tzinfo is None else ts.astimezone(timezone.utc).replace(tzinfo=None)
+            for ts in (query.start, query.end)
+        )
+        if start is not None and end is not None and start > end:
+            raise ValueError("El inicio del rango no puede ser posterior al fin")
+        
+        route = await self.logistics_repository.find_by_id(EntityId(query.route_id))
+        if not route:
+            raise ValueError(f"Ruta {query.route_id} no encontrada")
+        if not route.vehicle_id or route.start_time is None:
+            return RouteTrack(query.route_id, route.vehicle_id)
+        
+        positions = await self.position_repository.find_route_track(query.route_id, start, end)
+        if positions is not None:
+            return RouteTrack(query.route_id, route.vehicle_id, positions, archived=True)
+        
+        low = max(start, route.start_time) if start is not None else route.start_time
+        high = route.end_time or datetime.utcnow()
+        if end is not None:
+            high = min(end, high)
+        positions = await self.position_repository.find_range(route.vehicle_id, low, high) if low <= high else []
+        return RouteTrack(query.route_id, route.vehicle_id, positions)
+
+
+class OpenTrackingStreamQueryHandler:
+    """
+    Handler para la query OpenTrackingStream
+    
+    Asocia al feed las rutas seguidas (y las activas de los vendedores
+    seguidos) para que las posiciones de sus vehículos lleguen al
+    suscriptor, y abre la suscripción. El repositorio se abre solo para
+    esto: la conexión en vivo puede durar horas.
+    """
+    
+    def __init__(
+        self,
+        logistics_repository_factory: Callable[[], ContextManager[ILogisticsRepository]],
+        tracking_feed: ITrackingFeed
+    ):
+        self.logistics_repository_factory = logistics_repository_factory
+        self.tracking_feed = tracking_feed
+    
+    async def handle(self, query: OpenTrackingStreamQuery) -> ITrackingSubscription:
+        """Manejar query de abrir el seguimiento en vivo"""
+        if not (query.vehicle_ids or query.route_ids or query.vendor_ids):
+            raise ValueError("Se requiere al menos un vehículo, ruta o vendedor a seguir")
+        
+        with self.logistics_repository_factory() as repository:
+            for route_id in query.route_ids:
+                route = await repository.find_by_id(EntityId(route_id))
+                if not route:
+                    raise ValueError(f"Ruta {route_id} no encontrada")
+                self.tracking_feed.track_route(route)
+            
+            if query.vendor_ids:
+                vendor_ids = set(query.vendor_ids)
+                for status in (RouteStatus.PLANNED, RouteStatus.IN_PROGRESS):
+                    for route in await repository.find_by_status(status):
+                        if route.vendor_id in vendor_ids:
+                            self.tracking_feed.track_route(route)
+        
+        return self.tracking_feed.subscribe(
+            vehicle_ids=query.vehicle_ids,
+            route_ids=query.route_ids,
+            vendor_ids=query.vendor_ids
+        )
+
+
+class FindNearestVehiclesQueryHandler:
+    """Handler para la query FindNearestVehicles"""
+    
+    def __init__(self, spatial_index: ISpatialIndex):
+        self.spatial_index = spatial_index
+    
+    async def handle(self, query: FindNearestVehiclesQuery) -> List[NearbyVehicle]:
+        """Manejar query de vehículos más cercanos a un punto"""
+        if query.k < 1:
+            raise ValueError("Se requiere al menos un vehículo")
+        
+        return self.spatial_index.nearest_vehicles(
+            Coordinates(query.lat, query.lon), query.k, available_only=query.available_only
+        )
+
+
+class FindStopsInAreaQueryHandler:
+    """Handler para la query FindStopsInArea"""
+    
+    def __init__(self, spatial_index: ISpatialIndex):
+        self.spatial_index = spatial_index
+    
+    async def handle(self, query: FindStopsInAreaQuery) -> List[AreaStop]:
+        """Manejar query de paradas dentro de un rectángulo"""
+        south_west = Coordinates(query.min_lat, query.min_lon)
+        north_east = Coordinates(query.max_lat, query.max_lon)
+        if south_west.lat > north_east.lat or south_west.lon > north_east.lon:
+            raise ValueError("El mínimo del área no puede superar al máximo")
+        
+        return self.spatial_index.stops_in_area(south_west, north_east)
@@ -1,8 +1,9 @@
 """
 Queries del servicio de logística
 """
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional
 
 
 @dataclass
@@ -19,6 +20,12 @@ class GetRoutesByVehicleQuery:
     limit: int = 100
 
 
+@dataclass
+class GetRoutesByOrderQuery:
+    """Query para obtener las rutas que entregan una orden"""
+    order_id: str
+
+
 @dataclass
 class GetRoutesByStatusQuery:
     """Query para obtener rutas por estado"""
@@ -33,6 +40,14 @@ class GetTrackingInfoQuery:
     route_id: str
 
 
+@dataclass
+class GetRouteTrackQuery:
+    """Query para reproducir el recorrido de una ruta en un rango de tiempo"""
+    route_id: str
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+
+
 @dataclass
 class GetAllRoutesQuery:
     """Query para obtener todas las rutas"""
@@ -40,3 +55,34 @@ class GetAllRoutesQuery:
     limit: int = 100
     status: Optional[str] = None
 
+
+@dataclass
+class GeocodeAddressesQuery:
+    """Query para geocodificar un lote de direcciones de entrega"""
+    addresses: List[str]
+
+
+@dataclass
+class OpenTrackingStreamQuery:
+    """Query para seguir en vivo vehículos, rutas o vendedores"""
+    vehicle_ids: List[str] = field(default_factory=list)
+    route_ids: List[str] = field(default_factory=list)
+    vendor_ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class FindNearestVehiclesQuery:
+    """Query para los vehículos más cercanos a un punto"""
+    lat: float
+    lon: float
+    k: int = 5
+    available_only: bool = True
+
+
+@dataclass
+class FindStopsInAreaQuery:
+    """Query para las paradas pendientes dentro de un rectángulo"""
+    min_lat: float
+    min_lon: float
+    max_lat: float
+    max_lon: float
@@ -1,9 +1,10 @@
 """
 Entidades del dominio de logística
 """
+from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
-from typing import List, Optional
+from typing import Dict, List, Optional
 from uuid import uuid4, UUID
 import sys
 from pathlib import Path
@@ -15,6 +16,7 @@ if shared_path not in sys.path:
 
 from shared.domain.entity import Entity
 from shared.domain.value_objects import EntityId
+from shared.domain.numbering import next_number
 
 
 class RouteStatus(Enum):
@@ -28,6 +30,8 @@ class RouteStatus(Enum):
 class Position:
     """Value Object para posición GPS"""
     
+    __slots__ = ("lat", "lon", "ts")
+    
     def __init__(self, lat: float, lon: float, timestamp: datetime):
         if not (-90 <= lat <= 90):
             raise ValueError("Latitud debe estar entre -90 y 90")
@@ -47,9 +51,142 @@ class Position:
         }
 
 
+class Coordinates:
+    """Value Object para coordenadas geográficas (grados decimales)"""
+    
+    __slots__ = ("lat", "lon")
+    
+    def __init__(self, lat: float, lon: float):
+        if not (-90 <= lat <= 90):
+            raise ValueError("Latitud debe estar entre -90 y 90")
+        if not (-180 <= lon <= 180):
+            raise ValueError("Longitud debe estar entre -180 y 180")
+        
+        self.lat = lat
+        self.lon = lon
+    
+    def to_dict(self) -> dict:
+        """Convertir a diccionario"""
+        return {"lat": self.lat, "lon": self.lon}
+
+
+@dataclass(frozen=True, slots=True)
+class VehicleProfile:
+    """Parámetros de un tipo de vehículo para estimar duración y combustible"""
+    average_speed_kmh: float
+    fuel_liters_per_km: float
+    service_minutes_per_stop: float = 10.0
+
+
+# Distancia por calles respecto a la distancia en línea recta (haversine)
+ROAD_DETOUR_FACTOR = 1.3
+
+DEFAULT_VEHICLE_PROFILE = VehicleProfile(average_speed_kmh=30.0, fuel_liters_per_km=0.1)
+
+VEHICLE_PROFILES: Dict[str, VehicleProfile] = {
+    "motorcycle": VehicleProfile(average_speed_kmh=35.0, fuel_liters_per_km=0.04, service_minutes_per_stop=8.0),
+    "van": DEFAULT_VEHICLE_PROFILE,
+    "truck": VehicleProfile(average_speed_kmh=25.0, fuel_liters_per_km=0.25, service_minutes_per_stop=15.0),
+}
+
+
+def vehicle_profile(vehicle_type: Optional[str]) -> VehicleProfile:
+    """Perfil del tipo de vehículo; los tipos desconocidos usan el perfil por defecto"""
+    return VEHICLE_PROFILES.get((vehicle_type or "").lower(), DEFAULT_VEHICLE_PROFILE)
+
+
+@dataclass(frozen=True, slots=True)
+class OptimizedTour:
+    """Resultado del optimizador: orden de visita y distancia en línea recta"""
+    sequence: List[int]  # Índices de las paradas en orden de visita
+    distance_km: float
+
+
+@dataclass(frozen=True, slots=True)
+class DispatchOrder:
+    """Orden confirmada pendiente de asignar a una ruta"""
+    order_id: str
+    demand: int  # Unidades a entregar
+    window_start: Optional[datetime] = None
+    window_end: Optional[datetime] = None
+    delivery_date: Optional[datetime] = None
+    delivery_address: Optional[str] = None
+
+
+@dataclass(frozen=True, slots=True)
+class GeocodedAddress:
+    """Coordenadas de una dirección normalizada y cómo se resolvió"""
+    coordinates: Coordinates
+    precision: str  # "exact" o "partial" (coincidió un prefijo de la dirección)
+
+
+@dataclass(frozen=True, slots=True)
+class TrackingUpdate:
+    """Cambio enviado a los suscriptores del seguimiento en vivo"""
+    kind: str  # "position" o "route"
+    key: str  # Un suscriptor lento solo conserva el último cambio de cada clave
+    data: str  # JSON, serializado una vez para todos los suscriptores
+
+
+@dataclass(frozen=True, slots=True)
+class NearbyVehicle:
+    """Vehículo cerca de un punto, con su última posición"""
+    vehicle_id: str
+    position: Position
+    distance_km: float  # En línea recta (haversine)
+    route_id: Optional[str] = None  # Ruta en curso; None si está disponible
+
+
+@dataclass(frozen=True, slots=True)
+class AreaStop:
+    """Parada pendiente de una ruta planificada o en curso"""
+    route_id: str
+    order_id: str
+    location: Coordinates
+    priority: int
+    vehicle_id: Optional[str] = None
+
+
+@dataclass(frozen=True, slots=True)
+class FleetVehicle:
+    """Vehículo disponible para el despacho del día"""
+    vehicle_id: str
+    capacity: int  # Unidades que puede llevar
+    vehicle_type: Optional[str] = None
+
+
+@dataclass(frozen=True, slots=True)
+class DeliveryJob:
+    """Entrega a planificar; los minutos se cuentan desde el inicio del turno"""
+    location: Coordinates
+    demand: int
+    earliest_minutes: float = 0.0
+    latest_minutes: Optional[float] = None  # None: hasta el fin del turno
+
+
+@dataclass(frozen=True, slots=True)
+class VehicleTour:
+    """Recorrido de un vehículo dentro de un plan de flota"""
+    vehicle_index: int
+    sequence: List[int]  # Índices de las entregas en orden de visita
+    service_start_minutes: List[float]  # Inicio de atención de cada entrega
+    distance_km: float  # Por calles, ida y vuelta al depósito
+    duration_minutes: float  # Hasta volver al depósito
+
+
+@dataclass(frozen=True, slots=True)
+class FleetPlan:
+    """Resultado del planificador de flota"""
+    tours: List[VehicleTour]
+    unassigned: List[int]  # Entregas que no caben por capacidad o ventana
+    distance_km: float
+
+
 class ETA:
     """Value Object para tiempo estimado de llegada"""
     
+    __slots__ = ("date", "window_minutes")
+    
     def __init__(self, date: datetime, window_minutes: int):
         if window_minutes < 0:
             raise ValueError("La ventana de tiempo no puede ser negativa")
@@ -68,7 +205,16 @@ class ETA:
 class Stop:
     """Value Object para parada de ruta"""
     
-    def __init__(self, order_id: str, eta: Optional[ETA] = None, priority: int = 1):
+    __slots__ = ("order_id", "eta", "priority", "location", "completed_at")
+    
+    def __init__(
+        self,
+        order_id: str,
+        eta: Optional[ETA] = None,
+        priority: int = 1,
+        location: Optional[Coordinates] = None,
+        completed_at: Optional[datetime] = None
+    ):
         if not order_id or not order_id.strip():
             raise ValueError("Order ID es requerido")
         if priority < 1:
@@ -77,6 +223,8 @@ class Stop:
         self.order_id = order_id
         self.eta = eta
         self.priority = priority
+        self.location = location  # Permite recalcular la ETA con la posición del vehículo
+        self.completed_at = completed_at  # Momento de la entrega
     
     def to_dict(self) -> dict:
         """Convertir a diccionario"""
@@ -86,12 +234,36 @@ class Stop:
         }
         if self.eta:
             result["eta"] = self.eta.to_dict()
+        if self.location:
+            result["location"] = self.location.to_dict()
+        if self.completed_at:
+            result["completedAt"] = self.completed_at.isoformat()
         return result
 
 
 class Route(Entity):
     """Entidad Route del dominio de logística"""
     
+    __slots__ = (
+        "_stops",
+        "_vehicle_id",
+        "_status",
+        "_route_number",
+        "_vendor_id",
+        "_vehicle_type",
+        "_driver_name",
+        "_driver_phone",
+        "_start_time",
+        "_end_time",
+        "_estimated_distance",
+        "_estimated_duration",
+        "_estimated_fuel",
+        "_actual_distance",
+        "_actual_duration",
+        "_actual_fuel",
+        "_progress",
+    )
+    
     def __init__(
         self,
         route_id: EntityId,
@@ -138,10 +310,7 @@ class Route(Entity):
     
     def _generate_route_number(self) -> str:
         """Generar número de ruta único"""
-        timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-        import random
-        random_part = random.randint(100, 999)
-        return f"R-{timestamp}-{random_part}"
+        return next_number("R")
     
     @property
     def stops(self) -> List[Stop]:
@@ -211,6 +380,11 @@ class Route(Entity):
     def progress(self) -> float:
         return self._progress
     
+    @property
+    def remaining_stops(self) -> List[Stop]:
+        """Paradas sin entregar, en orden de visita"""
+        return [stop for stop in self._stops if stop.completed_at is None]
+    
     def add_stop(self, stop: Stop):
         """Agregar parada a la ruta"""
         if self._status != RouteStatus.PLANNED:
@@ -279,6 +453,23 @@ class Route(Entity):
             self._end_time = end_time
         self._updated_at = datetime.utcnow()
     
+    def complete_stop(self, order_id: str, completed_at: Optional[datetime] = None) -> Stop:
+        """Marcar entregada una parada; el progreso pasa a ser la fracción de paradas entregadas"""
+        if self._status != RouteStatus.IN_PROGRESS:
+            raise ValueError("Solo se pueden entregar paradas de rutas en progreso")
+        
+        stop = next((s for s in self._stops if s.order_id == order_id), None)
+        if not stop:
+            raise ValueError(f"Parada con order_id {order_id} no encontrada")
+        if stop.completed_at is not None:
+            raise ValueError(f"La parada con order_id {order_id} ya fue entregada")
+        
+        stop.completed_at = completed_at or datetime.utcnow()
+        completed = sum(1 for s in self._stops if s.completed_at is not None)
+        self._progress = completed / len(self._stops) * 100
+        self._updated_at = datetime.utcnow()
+        return stop
+    
     def cancel_route(self):
         """Cancelar ruta"""
         if self._status == RouteStatus.COMPLETED:
@@ -322,6 +513,8 @@ class Route(Entity):
 class TrackingInfo:
     """Value Object para información de seguimiento"""
     
+    __slots__ = ("vehicle_id", "position", "next_stop_eta")
+    
     def __init__(
         self,
         vehicle_id: str,
@@ -347,3 +540,31 @@ class TrackingInfo:
         
         return result
 
+
+class RouteTrack:
+    """Value Object para el recorrido del vehículo de una ruta en un rango de tiempo"""
+    
+    __slots__ = ("route_id", "vehicle_id", "positions", "archived")
+    
+    def __init__(
+        self,
+        route_id: str,
+        vehicle_id: Optional[str] = None,
+        positions: Optional[List[Position]] = None,
+        archived: bool = False
+    ):
+        self.route_id = route_id
+        self.vehicle_id = vehicle_id
+        self.positions = positions or []
+        self.archived = archived  # Leído de los bloques comprimidos de una ruta completada
+    
+    def to_dict(self) -> dict:
+        """Convertir a diccionario"""
+        return {
+            "routeId": self.route_id,
+            "vehicleId": self.vehicle_id,
+            "archived": self.archived,
+            "count": len(self.positions),
+            "positions": [position.to_dict() for position in self.positions]
+        }
+
@@ -15,6 +15,8 @@ from shared.domain.events import DomainEvent
 class RouteCreatedEvent(DomainEvent):
     """Evento cuando se crea una ruta"""
     
+    __slots__ = ("route_id", "vehicle_id")
+    
     def __init__(self, route_id: str, vehicle_id: str = None):
         super().__init__()
         self.route_id = route_id
@@ -24,6 +26,8 @@ class RouteCreatedEvent(DomainEvent):
 class RouteStartedEvent(DomainEvent):
     """Evento cuando se inicia una ruta"""
     
+    __slots__ = ("route_id", "vehicle_id")
+    
     def __init__(self, route_id: str, vehicle_id: str):
         super().__init__()
         self.route_id = route_id
@@ -33,6 +37,8 @@ class RouteStartedEvent(DomainEvent):
 class RouteCompletedEvent(DomainEvent):
     """Evento cuando se completa una ruta"""
     
+    __slots__ = ("route_id",)
+    
     def __init__(self, route_id: str):
         super().__init__()
         self.route_id = route_id
@@ -41,7 +47,19 @@ class RouteCompletedEvent(DomainEvent):
 class RouteCancelledEvent(DomainEvent):
     """Evento cuando se cancela una ruta"""
     
+    __slots__ = ("route_id",)
+    
     def __init__(self, route_id: str):
         super().__init__()
         self.route_id = route_id
 
+
+class StopCompletedEvent(DomainEvent):
+    """Evento cuando se entrega una parada de una ruta"""
+    
+    __slots__ = ("route_id", "order_id")
+    
+    def __init__(self, route_id: str, order_id: str):
+        super().__init__()
+        self.route_id = route_id
+        self.order_id = order_id
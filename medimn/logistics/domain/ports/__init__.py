@@ -2,7 +2,8 @@
 Puertos (interfaces) del dominio de logística
 """
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from datetime import datetime
+from typing import Dict, Optional, List, Sequence, Tuple
 import sys
 from pathlib import Path
 
@@ -12,7 +13,10 @@ if shared_path not in sys.path:
     sys.path.insert(0, shared_path)
 
 from shared.domain.value_objects import EntityId
-from ..entities import Route, RouteStatus
+from ..entities import (
+    ETA, AreaStop, Coordinates, DeliveryJob, DispatchOrder, FleetPlan, FleetVehicle, GeocodedAddress, NearbyVehicle,
+    OptimizedTour, Position, Route, RouteStatus, TrackingUpdate
+)
 
 
 class ILogisticsRepository(ABC):
@@ -23,6 +27,11 @@ class ILogisticsRepository(ABC):
         """Guardar ruta"""
         pass
     
+    @abstractmethod
+    async def save_all(self, routes: List[Route]) -> List[Route]:
+        """Guardar varias rutas en una sola transacción"""
+        pass
+    
     @abstractmethod
     async def find_by_id(self, route_id: EntityId) -> Optional[Route]:
         """Buscar ruta por ID"""
@@ -43,6 +52,11 @@ class ILogisticsRepository(ABC):
         """Listar todas las rutas"""
         pass
     
+    @abstractmethod
+    async def find_by_order_id(self, order_id: str) -> List[Route]:
+        """Buscar rutas que tienen una parada para la orden"""
+        pass
+    
     @abstractmethod
     async def delete(self, route_id: EntityId) -> bool:
         """Eliminar ruta"""
@@ -53,3 +67,262 @@ class ILogisticsRepository(ABC):
         """Verificar si existe una ruta con ese ID"""
         pass
 
+
+class IRouteOptimizer(ABC):
+    """Puerto (interfaz) para el optimizador de secuencia de paradas de un vehículo"""
+    
+    @abstractmethod
+    def optimize(
+        self,
+        stops: List[Coordinates],
+        depot: Optional[Coordinates] = None,
+        return_to_depot: bool = True,
+        time_budget_seconds: float = 0.3
+    ) -> OptimizedTour:
+        """
+        Ordenar las paradas minimizando la distancia recorrida
+        
+        Sin depósito la ruta es abierta y puede empezar en cualquier parada.
+        Es CPU intensivo: llamarlo fuera del event loop.
+        """
+        pass
+
+
+class IFleetPlanner(ABC):
+    """Puerto (interfaz) para planificar las rutas de toda la flota a la vez"""
+    
+    @abstractmethod
+    def plan(
+        self,
+        depot: Coordinates,
+        jobs: List[DeliveryJob],
+        vehicles: List[FleetVehicle],
+        shift_minutes: float = 600,
+        time_budget_seconds: float = 2.0
+    ) -> FleetPlan:
+        """
+        Repartir las entregas entre los vehículos respetando capacidad y ventanas
+        
+        Las rutas salen y vuelven al depósito dentro del turno. Es CPU
+        intensivo: llamarlo fuera del event loop.
+        """
+        pass
+
+
+class IDispatchOrderSource(ABC):
+    """Puerto (interfaz) para leer las órdenes listas para despachar"""
+    
+    @abstractmethod
+    async def get_confirmed_orders(self) -> List[DispatchOrder]:
+        """Órdenes CONFIRMED que todavía no tienen ruta"""
+        pass
+    
+    @abstractmethod
+    async def assign_routes(self, assignments: Dict[str, str]) -> List[str]:
+        """
+        Dejar asignada la ruta de cada orden {id de orden: id de ruta}
+        
+        La asignación se confirma junto con el guardado de las rutas; si
+        alguna orden ya no está disponible no se asigna ninguna.
+        
+        Returns:
+            IDs de las órdenes que ya no se pueden asignar
+        """
+        pass
+
+
+class IGeocodeCache(ABC):
+    """Puerto (interfaz) para la caché persistente dirección normalizada -> coordenadas"""
+    
+    @abstractmethod
+    async def get_many(self, keys: List[str]) -> Dict[str, GeocodedAddress]:
+        """Entradas guardadas para las direcciones normalizadas (las ausentes se omiten)"""
+        pass
+    
+    @abstractmethod
+    async def put_many(self, entries: Dict[str, GeocodedAddress]) -> None:
+        """Guardar entradas nuevas; las que otro proceso ya guardó se ignoran"""
+        pass
+
+
+class IGeocoder(ABC):
+    """Puerto (interfaz) para geocodificar direcciones de entrega"""
+    
+    @abstractmethod
+    async def geocode_many(self, addresses: List[str]) -> Dict[str, Optional[Coordinates]]:
+        """Coordenadas de cada dirección (None si no se pudo resolver)"""
+        pass
+
+
+class IPositionBuffer(ABC):
+    """Puerto (interfaz) para las posiciones GPS recientes de la flota"""
+    
+    @abstractmethod
+    def append_many(
+        self,
+        vehicle_ids: Sequence[str],
+        lat: Sequence[float],
+        lon: Sequence[float],
+        timestamps: Sequence[datetime]
+    ) -> int:
+        """Registrar un lote de posiciones (columnas del mismo largo, ts en UTC)"""
+        pass
+    
+    @abstractmethod
+    def latest(self, vehicle_id: str) -> Optional[Position]:
+        """Última posición conocida del vehículo en este proceso"""
+        pass
+
+
+class IPositionRepository(ABC):
+    """Puerto (interfaz) para el historial persistido de posiciones GPS"""
+    
+    @abstractmethod
+    async def save_many(
+        self,
+        vehicle_ids: Sequence[str],
+        lat: Sequence[float],
+        lon: Sequence[float],
+        timestamps: Sequence[datetime]
+    ) -> int:
+        """Guardar un lote de posiciones"""
+        pass
+    
+    @abstractmethod
+    async def find_latest(self, vehicle_id: str) -> Optional[Position]:
+        """Posición más reciente guardada del vehículo"""
+        pass
+    
+    @abstractmethod
+    async def find_latest_many(self, vehicle_ids: Sequence[str]) -> Dict[str, Position]:
+        """Posición más reciente guardada de cada vehículo (los que no tienen no aparecen)"""
+        pass
+    
+    @abstractmethod
+    async def find_range(self, vehicle_id: str, start: datetime, end: datetime) -> List[Position]:
+        """Posiciones guardadas del vehículo entre `start` y `end`, por tiempo"""
+        pass
+    
+    @abstractmethod
+    async def archive_route_tracks(self, ended_before: datetime, chunk_minutes: int, limit: int) -> int:
+        """Comprimir el recorrido de rutas completadas antes de `ended_before`; retorna cuántas"""
+        pass
+    
+    @abstractmethod
+    async def find_route_track(
+        self,
+        route_id: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> Optional[List[Position]]:
+        """Posiciones archivadas de la ruta en el rango; None si la ruta no está archivada"""
+        pass
+
+
+class ITrackingSubscription(ABC):
+    """Puerto (interfaz) para la cola de un suscriptor del seguimiento en vivo"""
+    
+    @abstractmethod
+    async def next_updates(self, timeout: float) -> List[TrackingUpdate]:
+        """Cambios pendientes; espera hasta `timeout` segundos (lista vacía si no hubo)"""
+        pass
+
+
+class ITrackingFeed(ABC):
+    """Puerto (interfaz) para publicar posiciones y avance de rutas a los suscriptores"""
+    
+    @abstractmethod
+    def subscribe(
+        self,
+        vehicle_ids: Sequence[str] = (),
+        route_ids: Sequence[str] = (),
+        vendor_ids: Sequence[str] = ()
+    ) -> ITrackingSubscription:
+        """Seguir vehículos, rutas o vendedores; la cola arranca con el estado actual"""
+        pass
+    
+    @abstractmethod
+    def unsubscribe(self, subscription: ITrackingSubscription) -> None:
+        """Dejar de enviar cambios al suscriptor"""
+        pass
+    
+    @abstractmethod
+    def track_route(self, route: Route) -> None:
+        """Asociar el vehículo de la ruta a la ruta y al vendedor, sin publicar"""
+        pass
+    
+    @abstractmethod
+    def route_updated(self, route: Route) -> None:
+        """Publicar el estado y el avance de la ruta"""
+        pass
+    
+    @abstractmethod
+    def positions_updated(self, vehicle_ids: Sequence[str]) -> None:
+        """Publicar la última posición de los vehículos que alguien sigue"""
+        pass
+
+
+class IOrderEtaSink(ABC):
+    """Puerto (interfaz) para llevar las ETAs recalculadas a las órdenes"""
+    
+    @abstractmethod
+    async def update_etas(self, etas: Dict[str, ETA]) -> int:
+        """Guardar la ETA de cada orden (por ID); retorna cuántas órdenes se actualizaron"""
+        pass
+
+
+class IActiveRouteSource(ABC):
+    """Puerto (interfaz) para releer las rutas en curso y dónde están sus vehículos"""
+    
+    @abstractmethod
+    async def load(self) -> Tuple[List[Route], Dict[str, Position]]:
+        """Rutas en curso y la última posición guardada de cada uno de sus vehículos"""
+        pass
+
+
+class IEtaEngine(ABC):
+    """Puerto (interfaz) para recalcular la ETA de las paradas pendientes de las rutas en curso"""
+    
+    @abstractmethod
+    def track_route(self, route: Route) -> None:
+        """Tomar la ruta (o soltarla si ya no está en curso) y recalcular sus paradas pendientes"""
+        pass
+    
+    @abstractmethod
+    def positions_updated(self, vehicle_ids: Sequence[str]) -> None:
+        """Marcar los vehículos que reportaron; el recálculo se hace después, agrupado"""
+        pass
+    
+    @abstractmethod
+    def eta(self, order_id: str) -> Optional[ETA]:
+        """Última ETA calculada para la parada de la orden"""
+        pass
+
+
+class ISpatialIndex(ABC):
+    """Puerto (interfaz) para buscar vehículos y paradas por ubicación"""
+    
+    @abstractmethod
+    def positions_updated(self, vehicle_ids: Sequence[str]) -> None:
+        """Mover los vehículos a su última posición"""
+        pass
+    
+    @abstractmethod
+    def track_route(self, route: Route) -> None:
+        """Indexar las paradas pendientes de la ruta (o sacarlas si ya no está activa)"""
+        pass
+    
+    @abstractmethod
+    def forget_route(self, route_id: str) -> None:
+        """Sacar las paradas de una ruta eliminada"""
+        pass
+    
+    @abstractmethod
+    def nearest_vehicles(self, point: Coordinates, k: int, available_only: bool = True) -> List[NearbyVehicle]:
+        """Los `k` vehículos más cercanos al punto, del más cercano al más lejano"""
+        pass
+    
+    @abstractmethod
+    def stops_in_area(self, south_west: Coordinates, north_east: Coordinates) -> List[AreaStop]:
+        """Paradas pendientes dentro del rectángulo"""
+        pass
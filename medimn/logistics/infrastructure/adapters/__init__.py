@@ -2,3 +2,6 @@
 Adapters de infraestructura para logística
 """
 
+from .order_adapter import OrderRepositoryDispatchSource, OrderRepositoryEtaSink
+
+__all__ = ["OrderRepositoryDispatchSource", "OrderRepositoryEtaSink"]
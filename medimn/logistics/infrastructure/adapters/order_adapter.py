@@ -0,0 +1,56 @@
+"""
+Adaptadores hacia el módulo de órdenes: órdenes a despachar y ETAs recalculadas
+"""
+import sys
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, ContextManager, Dict, List
+
+# Agregar path del monolito
+monolith_path = Path(__file__).parent.parent.parent.parent
+if str(monolith_path) not in sys.path:
+    sys.path.insert(0, str(monolith_path))
+
+from order.domain.entities import ETA as OrderETA, OrderStatus
+from order.domain.ports import IOrderRepository
+from ...domain.entities import DispatchOrder, ETA
+from ...domain.ports import IDispatchOrderSource, IOrderEtaSink
+
+
+class OrderRepositoryDispatchSource(IDispatchOrderSource):
+    """Órdenes confirmadas leídas del repositorio de órdenes (mismo proceso y sesión)"""
+    
+    def __init__(self, order_repository: IOrderRepository):
+        self.order_repository = order_repository
+    
+    async def get_confirmed_orders(self) -> List[DispatchOrder]:
+        orders = await self.order_repository.find_by_status(OrderStatus.CONFIRMED)
+        return [
+            DispatchOrder(
+                order_id=str(order.id),
+                demand=sum(item.qty for item in order.items),
+                window_start=order.eta.date if order.eta else None,
+                window_end=order.eta.date + timedelta(minutes=order.eta.window_minutes) if order.eta else None,
+                delivery_date=order.delivery_date,
+                delivery_address=order.delivery_address
+            )
+            for order in orders
+            if not order.route_id
+        ]
+    
+    async def assign_routes(self, assignments: Dict[str, str]) -> List[str]:
+        # Sin commit: la sesión es la del repositorio de rutas, que confirma ambos a la vez
+        return await self.order_repository.assign_routes(assignments, commit=False)
+
+
+class OrderRepositoryEtaSink(IOrderEtaSink):
+    """Escribe las ETAs en las órdenes con una sesión propia por lote (corre fuera de las peticiones)"""
+    
+    def __init__(self, order_repository_factory: Callable[[], ContextManager[IOrderRepository]]):
+        self.order_repository_factory = order_repository_factory
+    
+    async def update_etas(self, etas: Dict[str, ETA]) -> int:
+        with self.order_repository_factory() as repository:
+            return await repository.update_etas({
+                order_id: OrderETA(eta.date, eta.window_minutes) for order_id, eta in etas.items()
+            })
@@ -43,6 +43,78 @@ class LogisticsServiceSettings:
     def allowed_origins(self) -> list:
         return self._monolith_settings.allowed_origins
     
+    @property
+    def route_optimizer_time_budget_ms(self) -> int:
+        return self._monolith_settings.route_optimizer_time_budget_ms
+    
+    @property
+    def fleet_planner_time_budget_ms(self) -> int:
+        return self._monolith_settings.fleet_planner_time_budget_ms
+    
+    @property
+    def fleet_planner_workers(self) -> int:
+        return self._monolith_settings.fleet_planner_workers
+    
+    @property
+    def distance_cache_dir(self) -> str:
+        return self._monolith_settings.distance_cache_dir
+    
+    @property
+    def distance_cache_max_locations(self) -> int:
+        return self._monolith_settings.distance_cache_max_locations
+    
+    @property
+    def geocoding_gazetteer_path(self) -> str:
+        return self._monolith_settings.geocoding_gazetteer_path
+    
+    @property
+    def tracking_ring_capacity(self) -> int:
+        return self._monolith_settings.tracking_ring_capacity
+    
+    @property
+    def tracking_flush_batch_size(self) -> int:
+        return self._monolith_settings.tracking_flush_batch_size
+    
+    @property
+    def tracking_flush_interval_seconds(self) -> float:
+        return self._monolith_settings.tracking_flush_interval_seconds
+    
+    @property
+    def tracking_max_pending(self) -> int:
+        return self._monolith_settings.tracking_max_pending
+    
+    @property
+    def tracking_stream_queue_size(self) -> int:
+        return self._monolith_settings.tracking_stream_queue_size
+    
+    @property
+    def tracking_stream_heartbeat_seconds(self) -> float:
+        return self._monolith_settings.tracking_stream_heartbeat_seconds
+    
+    @property
+    def eta_recompute_interval_seconds(self) -> float:
+        return self._monolith_settings.eta_recompute_interval_seconds
+    
+    @property
+    def eta_min_change_minutes(self) -> float:
+        return self._monolith_settings.eta_min_change_minutes
+    
+    @property
+    def spatial_index_cell_degrees(self) -> float:
+        return self._monolith_settings.spatial_index_cell_degrees
+    
+    @property
+    def track_chunk_minutes(self) -> int:
+        return self._monolith_settings.track_chunk_minutes
+    
+    @property
+    def track_archive_grace_seconds(self) -> float:
+        return self._monolith_settings.track_archive_grace_seconds
+    
+    @property
+    def track_archive_interval_seconds(self) -> float:
+        return self._monolith_settings.track_archive_interval_seconds
+    
     @property
     def auth_service_url(self) -> str:
         # En el monolito, todos los servicios están en la misma app
@@ -0,0 +1,149 @@
+"""
+Geocodificación offline de direcciones de entrega
+
+Las direcciones se normalizan (minúsculas, sin tildes, abreviaturas como
+"Cl", "Cra" o "Av" expandidas, sin "#"/"No.") y se buscan primero en la
+tabla geocode_cache; solo las que faltan se resuelven contra el
+gazetteer, un CSV local `address,lat,lon` que se carga en memoria la
+primera vez que hace falta. Si la dirección completa no está, se prueba
+quitando palabras del final (ciudad, complemento, placa) y el resultado
+queda marcado como "partial".
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import csv
+import re
+import threading
+import unicodedata
+
+from ...domain.entities import Coordinates, GeocodedAddress
+from ...domain.ports import IGeocodeCache, IGeocoder
+
+ADDRESS_ABBREVIATIONS = {
+    "cl": "calle", "cll": "calle", "clle": "calle",
+    "cra": "carrera", "cr": "carrera", "kr": "carrera", "kra": "carrera", "carr": "carrera",
+    "av": "avenida", "avda": "avenida",
+    "ak": "avenida carrera", "ac": "avenida calle",
+    "dg": "diagonal", "diag": "diagonal",
+    "tv": "transversal", "transv": "transversal",
+    "apto": "apartamento", "ap": "apartamento",
+    "of": "oficina", "int": "interior",
+}
+
+# Marcadores de número que no aportan a la búsqueda ("Calle 100 # 15-20" = "Calle 100 15-20")
+NUMBER_MARKERS = {"#", "no", "nro", "num", "numero"}
+
+# Palabras mínimas de un prefijo para aceptarlo como coincidencia parcial
+MIN_PARTIAL_TOKENS = 2
+
+
+def normalize_address(address: str) -> str:
+    """Forma canónica de una dirección para buscarla en la caché y en el gazetteer"""
+    text = unicodedata.normalize("NFKD", address or "")
+    text = "".join(char for char in text if not unicodedata.combining(char)).lower()
+    text = re.sub(r"n[°º]", " # ", text)
+    text = re.sub(r"([a-z])(\d)", r"\1 \2", text)
+    text = re.sub(r"(\d)([a-z])", r"\1 \2", text)
+    text = re.sub(r"[^a-z0-9#\- ]", " ", text.replace("#", " # "))
+    text = re.sub(r"\s*-\s*", "-", text).strip("- ")
+    tokens = []
+    for token in text.split():
+        if token in NUMBER_MARKERS or token == "-":
+            continue
+        tokens.append(ADDRESS_ABBREVIATIONS.get(token, token))
+    return " ".join(tokens)
+
+
+class Gazetteer:
+    """Índice en memoria dirección normalizada -> coordenadas, cargado de un CSV local"""
+    
+    def __init__(self, path: Optional[str] = None, entries: Optional[Dict[str, Coordinates]] = None):
+        self.path = path
+        self._entries = entries
+        self._lock = threading.Lock()
+    
+    @property
+    def entries(self) -> Dict[str, Coordinates]:
+        if self._entries is None:
+            with self._lock:
+                if self._entries is None:
+                    self._entries = self._load()
+        return self._entries
+    
+    def resolve(self, key: str) -> Optional[GeocodedAddress]:
+        """Dirección completa o, si falta, su prefijo más largo presente"""
+        tokens = key.split()
+        for size in range(len(tokens), MIN_PARTIAL_TOKENS - 1, -1):
+            coordinates = self.entries.get(" ".join(tokens[:size]))
+            if coordinates is not None:
+                return GeocodedAddress(coordinates, "exact" if size == len(tokens) else "partial")
+        return None
+    
+    def _load(self) -> Dict[str, Coordinates]:
+        entries: Dict[str, Coordinates] = {}
+        if not self.path:
+            return entries
+        with open(self.path, newline="", encoding="utf-8") as handle:
+            for row in csv.DictReader(handle):
+                key = normalize_address(row["address"])
+                if key:
+                    entries.setdefault(key, Coordinates(float(row["lat"]), float(row["lon"])))
+        return entries
+
+
+@dataclass
+class GeocodingStats:
+    """Contadores acumulados del proceso"""
+    lookups: int = 0
+    cache_hits: int = 0  # En la tabla o repetidas dentro del mismo lote
+    resolved: int = 0  # Resueltas con el gazetteer
+    unresolved: int = 0
+    
+    @property
+    def hit_rate(self) -> float:
+        return self.cache_hits / self.lookups if self.lookups else 0.0
+    
+    def to_dict(self) -> dict:
+        """Convertir a diccionario"""
+        return {
+            "lookups": self.lookups,
+            "cacheHits": self.cache_hits,
+            "resolved": self.resolved,
+            "unresolved": self.unresolved,
+            "hitRate": round(self.hit_rate, 4)
+        }
+
+
+class CachedGazetteerGeocoder(IGeocoder):
+    """Geocodificador por lotes: caché en base de datos y gazetteer local para lo que falte"""
+    
+    def __init__(self, cache: IGeocodeCache, gazetteer: Gazetteer, stats: Optional[GeocodingStats] = None):
+        self.cache = cache
+        self.gazetteer = gazetteer
+        self.stats = stats or GeocodingStats()
+    
+    async def geocode_many(self, addresses: List[str]) -> Dict[str, Optional[Coordinates]]:
+        keys = [normalize_address(address) for address in addresses]
+        unique = list(dict.fromkeys(key for key in keys if key))
+        found = await self.cache.get_many(unique)
+        hits = sum(1 for key in unique if key in found)
+        
+        new = {}
+        for key in unique:
+            if key not in found:
+                entry = self.gazetteer.resolve(key)
+                if entry is not None:
+                    new[key] = entry
+        if new:
+            await self.cache.put_many(new)
+            found.update(new)
+        
+        self.stats.lookups += len(addresses)
+        self.stats.cache_hits += hits + (sum(1 for key in keys if key) - len(unique))
+        self.stats.resolved += len(new)
+        self.stats.unresolved += sum(1 for key in keys if key not in found)
+        
+        return {
+            address: found[key].coordinates if key in found else None
+            for address, key in zip(addresses, keys)
+        }
@@ -0,0 +1,172 @@
+"""
+Optimizador de secuencia de paradas para un vehículo (NumPy)
+
+Construye la matriz de distancias haversine vectorizada, arma un recorrido
+con vecino más cercano y lo mejora con 2-opt y Or-opt hasta que no haya
+mejoras o se agote el presupuesto de tiempo.
+"""
+from typing import Callable, List, Optional
+import time
+
+import numpy as np
+
+from ...domain.entities import Coordinates, OptimizedTour
+from ...domain.ports import IRouteOptimizer
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Mejora mínima para aceptar un movimiento (evita ciclos por redondeo)
+IMPROVEMENT_EPSILON = 1e-9
+
+# Largo máximo de los segmentos que mueve Or-opt
+OR_OPT_MAX_SEGMENT = 3
+
+# (lat, lon) -> matriz de distancias en km; haversine_matrix o una caché
+DistanceMatrixFunction = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+
+def haversine_distances(lat_a, lon_a, lat_b, lon_b) -> np.ndarray:
+    """Distancias en km de cada punto `a` (filas) a cada punto `b` (columnas)"""
+    lat_a = np.radians(np.asarray(lat_a, dtype=np.float64))
+    lon_a = np.radians(np.asarray(lon_a, dtype=np.float64))
+    lat_b = np.radians(np.asarray(lat_b, dtype=np.float64))
+    lon_b = np.radians(np.asarray(lon_b, dtype=np.float64))
+    half_dlat = (lat_a[:, None] - lat_b[None, :]) / 2
+    half_dlon = (lon_a[:, None] - lon_b[None, :]) / 2
+    a = np.sin(half_dlat) ** 2 + np.cos(lat_a)[:, None] * np.cos(lat_b)[None, :] * np.sin(half_dlon) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def haversine_matrix(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Distancias en km entre todos los pares de puntos (grados decimales)"""
+    return haversine_distances(lat, lon, lat, lon)
+
+
+def nearest_neighbour(matrix: np.ndarray, start: int, count: int) -> np.ndarray:
+    """Recorrido que desde `start` visita siempre la parada pendiente más cercana (nodos 0..count-1)"""
+    path = [start]
+    visited = np.zeros(count, dtype=bool)
+    current = start
+    for _ in range(count):
+        distances = np.where(visited, np.inf, matrix[current, :count])
+        current = int(np.argmin(distances))
+        visited[current] = True
+        path.append(current)
+    return np.array(path)
+
+
+def tour_length(matrix: np.ndarray, path: np.ndarray, end: int) -> float:
+    """Distancia del recorrido, incluido el tramo final hacia `end`"""
+    return float(matrix[path[:-1], path[1:]].sum() + matrix[path[-1], end])
+
+
+def two_opt(matrix: np.ndarray, path: np.ndarray, end: int, deadline: float) -> bool:
+    """
+    Invertir tramos mientras acorten el recorrido; el primer nodo queda fijo
+    
+    Para cada i evalúa todos los j a la vez: quitar (p[i-1], p[i]) y
+    (p[j], p[j+1]) y unir (p[i-1], p[j]) y (p[i], p[j+1]).
+    """
+    improved = False
+    size = len(path)
+    changed = True
+    while changed and time.perf_counter() < deadline:
+        changed = False
+        for i in range(1, size - 1):
+            a, b = path[i - 1], path[i]
+            c = path[i + 1:]
+            e = np.append(path[i + 2:], end)
+            delta = matrix[a, c] + matrix[b, e] - matrix[a, b] - matrix[c, e]
+            best = int(np.argmin(delta))
+            if delta[best] < -IMPROVEMENT_EPSILON:
+                j = i + 1 + best
+                path[i:j + 1] = path[i:j + 1][::-1].copy()
+                changed = improved = True
+            if time.perf_counter() >= deadline:
+                break
+    return improved
+
+
+def or_opt(matrix: np.ndarray, path: np.ndarray, end: int, deadline: float) -> np.ndarray:
+    """Mover segmentos de 1 a 3 paradas (también invertidos) a la mejor posición"""
+    for length in range(1, OR_OPT_MAX_SEGMENT + 1):
+        i = 1
+        while i + length <= len(path) and time.perf_counter() < deadline:
+            first, last = path[i], path[i + length - 1]
+            before = path[i - 1]
+            after = path[i + length] if i + length < len(path) else end
+            removal_gain = matrix[before, first] + matrix[last, after] - matrix[before, after]
+            
+            rest = np.concatenate((path[:i], path[i + length:]))
+            a = rest
+            b = np.append(rest[1:], end)
+            base = matrix[a, b]
+            forward = matrix[a, first] + matrix[last, b] - base
+            backward = matrix[a, last] + matrix[first, b] - base
+            k_forward, k_backward = int(np.argmin(forward)), int(np.argmin(backward))
+            reverse = backward[k_backward] < forward[k_forward]
+            k = k_backward if reverse else k_forward
+            insertion_cost = backward[k] if reverse else forward[k]
+            
+            if insertion_cost - removal_gain < -IMPROVEMENT_EPSILON:
+                segment = path[i:i + length]
+                if reverse:
+                    segment = segment[::-1]
+                path = np.concatenate((rest[:k + 1], segment, rest[k + 1:]))
+            else:
+                i += 1
+    return path
+
+
+class NumpyRouteOptimizer(IRouteOptimizer):
+    """
+    Secuenciador de paradas de un vehículo: vecino más cercano + 2-opt/Or-opt
+    
+    Trabaja sobre una matriz con un nodo extra de distancia cero: sin
+    depósito es el inicio libre de la ruta y en rutas sin regreso es el
+    final libre, así el mismo código resuelve rutas abiertas y cerradas.
+    """
+    
+    def __init__(self, distance_matrix: Optional[DistanceMatrixFunction] = None):
+        self.distance_matrix = distance_matrix or haversine_matrix
+    
+    def optimize(
+        self,
+        stops: List[Coordinates],
+        depot: Optional[Coordinates] = None,
+        return_to_depot: bool = True,
+        time_budget_seconds: float = 0.3
+    ) -> OptimizedTour:
+        count = len(stops)
+        if count == 0:
+            raise ValueError("Se requiere al menos una parada para optimizar")
+        deadline = time.perf_counter() + time_budget_seconds
+        
+        points = stops + ([depot] if depot else [])
+        size = len(points)
+        matrix = np.zeros((size + 1, size + 1))
+        matrix[:size, :size] = self.distance_matrix(
+            [point.lat for point in points],
+            [point.lon for point in points]
+        )
+        free_node = size
+        start = count if depot else free_node
+        end = start if depot and return_to_depot else free_node
+        
+        path = nearest_neighbour(matrix, start, count)
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = two_opt(matrix, path, end, deadline)
+            length_before = tour_length(matrix, path, end)
+            path = or_opt(matrix, path, end, deadline)
+            improved = improved or tour_length(matrix, path, end) < length_before - IMPROVEMENT_EPSILON
+        
+        return OptimizedTour(
+            sequence=[int(node) for node in path[1:]],
+            distance_km=tour_length(matrix, path, end)
+        )
+
+
+# Al final: estos módulos reutilizan las funciones y constantes de este
+from .fleet import ProcessPoolFleetPlanner
+from .distance_cache import MemmapDistanceMatrix
@@ -0,0 +1,202 @@
+"""
+Caché persistente de la matriz de distancias (memmap de NumPy)
+
+Cada ubicación (coordenadas redondeadas a 5 decimales, ~1 m) recibe una
+posición fija en `locations.bin`, un archivo de registros lat/lon que solo
+crece. Las distancias viven en `distances.f32`: una matriz float32 de
+`max_locations` x `max_locations` mapeada en memoria. El archivo es
+disperso, así que solo ocupan disco las páginas escritas. Una celda en 0
+fuera de la diagonal es una distancia sin calcular; las que faltan se
+calculan vectorizadas por filas y se guardan en ambos sentidos.
+
+Los workers del monolito comparten los archivos: la asignación de
+posiciones se serializa con un bloqueo del archivo de ubicaciones (flock en
+POSIX, msvcrt.locking en Windows) y cada proceso incorpora las ubicaciones
+que agregaron los demás.
+"""
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+import math
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import numpy as np
+
+from . import haversine_distances
+from ...domain.entities import ROAD_DETOUR_FACTOR, VehicleProfile
+
+COORDINATE_DECIMALS = 5
+
+LOCATIONS_FILE = "locations.bin"
+DISTANCES_FILE = "distances.f32"
+
+_LOCATION_RECORD = np.dtype([("lat", "<f8"), ("lon", "<f8")])
+
+
+@contextmanager
+def _exclusive_lock(handle: BinaryIO) -> Iterator[None]:
+    """Bloqueo exclusivo entre procesos sobre un archivo abierto"""
+    if fcntl is not None:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+        return
+    
+    # msvcrt bloquea un rango desde la posición actual: siempre el primer byte
+    handle.seek(0)
+    while True:
+        try:
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+            break
+        except OSError:
+            # LK_LOCK se rinde tras ~10 s de reintentos; otro proceso sigue escribiendo
+            continue
+    try:
+        yield
+    finally:
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _covering_rows(missing: np.ndarray) -> np.ndarray:
+    """
+    Filas a calcular para cubrir las celdas faltantes
+    
+    La matriz es simétrica: cada fila calculada completa también su columna.
+    Se eligen primero las filas con más faltantes, así una ubicación nueva
+    solo calcula su propia fila.
+    """
+    pending = missing.copy()
+    remaining = int(pending.sum())
+    rows = []
+    for row in np.argsort(-pending.sum(axis=1), kind="stable"):
+        if not remaining:
+            break
+        covered = int(pending[row, :].sum()) + int(pending[:, row].sum()) - int(pending[row, row])
+        if covered:
+            rows.append(row)
+            pending[row, :] = False
+            pending[:, row] = False
+            remaining -= covered
+    return np.array(rows, dtype=np.intp)
+
+
+class MemmapDistanceMatrix:
+    """
+    Matriz de distancias en km compartida entre procesos y reinicios
+    
+    `matrix(lat, lon)` tiene la misma firma que `haversine_matrix`, así que
+    se inyecta tal cual en el optimizador de rutas y en el planificador de
+    flota. Con la caché llena las ubicaciones nuevas se calculan sin
+    guardarse.
+    """
+    
+    def __init__(self, directory: str, max_locations: int = 8192, distance_function=haversine_distances):
+        self.directory = Path(directory)
+        self.max_locations = max_locations
+        self.distance_function = distance_function
+        self.hits = 0
+        self.misses = 0
+        self._slots: Dict[Tuple[float, float], int] = {}
+        self._location_count = 0
+        self._read_offset = 0
+        self._locations = None
+        self._distances: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+    
+    def matrix(self, lat, lon) -> np.ndarray:
+        """Distancias en km entre todos los pares de puntos"""
+        lat = np.round(np.asarray(lat, dtype=np.float64), COORDINATE_DECIMALS)
+        lon = np.round(np.asarray(lon, dtype=np.float64), COORDINATE_DECIMALS)
+        with self._lock:
+            self._open()
+            slots = self._slots_for(list(zip(lat.tolist(), lon.tolist())))
+            if None in slots:
+                return self.distance_function(lat, lon, lat, lon)
+            
+            index = np.array(slots, dtype=np.intp)
+            result = self._distances[np.ix_(index, index)].astype(np.float64)
+            missing = (result == 0) & (index[:, None] != index[None, :])
+            missing_cells = int(missing.sum())
+            self.misses += missing_cells
+            self.hits += result.size - len(index) - missing_cells
+            
+            rows = _covering_rows(missing)
+            if rows.size:
+                # Misma precisión que lo leído del archivo
+                values = self.distance_function(lat[rows], lon[rows], lat, lon).astype(np.float32)
+                result[rows, :] = values
+                result[:, rows] = values.T
+                self._distances[np.ix_(index[rows], index)] = values
+                self._distances[np.ix_(index, index[rows])] = values.T
+            return result
+    
+    def duration_minutes(self, lat, lon, profile: VehicleProfile) -> np.ndarray:
+        """Minutos de manejo entre todos los pares para un perfil de vehículo"""
+        return self.matrix(lat, lon) * ROAD_DETOUR_FACTOR / profile.average_speed_kmh * 60
+    
+    @property
+    def hit_rate(self) -> float:
+        """Fracción de celdas leídas de la caché"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+    
+    def close(self):
+        """Bajar a disco y soltar los archivos"""
+        with self._lock:
+            if self._distances is not None:
+                self._distances.flush()
+                self._distances = None
+            if self._locations is not None:
+                self._locations.close()
+                self._locations = None
+    
+    def _open(self):
+        if self._distances is not None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._locations = open(self.directory / LOCATIONS_FILE, "a+b")
+        with _exclusive_lock(self._locations):
+            path = self.directory / DISTANCES_FILE
+            if path.exists() and path.stat().st_size:
+                # La capacidad la fija el archivo existente
+                self.max_locations = math.isqrt(path.stat().st_size // 4)
+            else:
+                with open(path, "wb") as handle:
+                    handle.truncate(self.max_locations * self.max_locations * 4)
+            self._distances = np.memmap(
+                path, dtype=np.float32, mode="r+", shape=(self.max_locations, self.max_locations)
+            )
+            self._sync_locations()
+    
+    def _sync_locations(self):
+        """Incorporar las ubicaciones agregadas (también por otros procesos)"""
+        self._locations.seek(self._read_offset)
+        data = self._locations.read()
+        complete = len(data) - len(data) % _LOCATION_RECORD.itemsize
+        for record in np.frombuffer(data[:complete], dtype=_LOCATION_RECORD):
+            self._slots.setdefault((float(record["lat"]), float(record["lon"])), self._location_count)
+            self._location_count += 1
+        self._read_offset += complete
+    
+    def _slots_for(self, keys: List[Tuple[float, float]]) -> List[Optional[int]]:
+        """Posición de cada ubicación; asigna las nuevas mientras haya lugar"""
+        if any(key not in self._slots for key in keys):
+            with _exclusive_lock(self._locations):
+                self._sync_locations()
+                new = [key for key in dict.fromkeys(keys) if key not in self._slots]
+                new = new[:max(self.max_locations - self._location_count, 0)]
+                if new:
+                    self._locations.seek(0, 2)
+                    self._locations.write(np.array(new, dtype=_LOCATION_RECORD).tobytes())
+                    self._locations.flush()
+                    self._sync_locations()
+        return [self._slots.get(key) for key in keys]
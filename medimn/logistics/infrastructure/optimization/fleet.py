@@ -0,0 +1,354 @@
+"""
+Planificador de flota: VRP con capacidad y ventanas de tiempo
+
+Cada candidato se construye con inserción más barata factible en un orden
+aleatorizado (el primero, determinista: ventanas más ajustadas y entregas
+más lejanas primero) y se mejora con relocate entre rutas y 2-opt dentro
+de cada ruta. Los candidatos se evalúan en paralelo en un pool de procesos
+hasta agotar el presupuesto de tiempo (reloj de pared) y gana el que deja
+menos entregas sin asignar y, a igualdad, recorre menos distancia.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+import multiprocessing
+import os
+import random
+import time
+
+import numpy as np
+
+from . import IMPROVEMENT_EPSILON, DistanceMatrixFunction, haversine_matrix
+from ...domain.entities import (
+    Coordinates, DeliveryJob, FleetPlan, FleetVehicle, ROAD_DETOUR_FACTOR, VehicleTour, vehicle_profile
+)
+from ...domain.ports import IFleetPlanner
+
+# Ruido del orden de inserción en los candidatos aleatorizados (minutos)
+ORDER_JITTER_MINUTES = 120.0
+
+
+@dataclass(frozen=True)
+class _Problem:
+    """Datos que viajan a cada proceso; nodo 0 = depósito, nodo i = entrega i - 1"""
+    distance: np.ndarray  # km por calles
+    demand: List[int]
+    earliest: List[float]
+    latest: List[float]
+    capacity: List[int]
+    minutes_per_km: List[float]
+    service_minutes: List[float]
+    shift_minutes: float
+
+
+class _Tour:
+    """Ruta en construcción con sus horarios (inicio de atención y el más tardío admisible)"""
+    
+    __slots__ = ("vehicle", "nodes", "load", "begin", "latest", "end")
+    
+    def __init__(self, vehicle: int):
+        self.vehicle = vehicle
+        self.nodes: List[int] = []
+        self.load = 0
+        self.begin: List[float] = []
+        self.latest: List[float] = []
+        self.end = 0.0
+
+
+class _Solver:
+    """Construcción y búsqueda local de un proceso"""
+    
+    def __init__(self, problem: _Problem):
+        self.problem = problem
+        self.distance = problem.distance.tolist()
+    
+    def schedule(self, vehicle: int, nodes: List[int]) -> Optional[Tuple[List[float], List[float], float]]:
+        """Horarios de la secuencia o None si incumple alguna ventana o el turno"""
+        problem, distance = self.problem, self.distance
+        per_km, service = problem.minutes_per_km[vehicle], problem.service_minutes[vehicle]
+        begin = []
+        clock, previous = 0.0, 0
+        for node in nodes:
+            clock = max(clock + distance[previous][node] * per_km, problem.earliest[node])
+            if clock > problem.latest[node]:
+                return None
+            begin.append(clock)
+            clock += service
+            previous = node
+        end = clock + distance[previous][0] * per_km
+        if end > problem.shift_minutes:
+            return None
+        
+        # Inicio más tardío de cada parada que mantiene factible el resto
+        latest = [0.0] * len(nodes)
+        bound, following = problem.shift_minutes, 0
+        for index in range(len(nodes) - 1, -1, -1):
+            node = nodes[index]
+            bound = min(problem.latest[node], bound - distance[node][following] * per_km - service)
+            latest[index] = bound
+            following = node
+        return begin, latest, end
+    
+    def assign(self, tour: _Tour, nodes: List[int]) -> bool:
+        """Reemplazar la secuencia de la ruta si es factible"""
+        timing = self.schedule(tour.vehicle, nodes)
+        if timing is None:
+            return False
+        tour.nodes = nodes
+        tour.load = sum(self.problem.demand[node] for node in nodes)
+        tour.begin, tour.latest, tour.end = timing
+        return True
+    
+    def best_insertion(self, tour: _Tour, node: int) -> Optional[Tuple[float, int]]:
+        """(distancia agregada, posición) de la inserción factible más barata"""
+        problem, distance = self.problem, self.distance
+        if tour.load + problem.demand[node] > problem.capacity[tour.vehicle]:
+            return None
+        per_km, service = problem.minutes_per_km[tour.vehicle], problem.service_minutes[tour.vehicle]
+        from_node = distance[node]
+        earliest, latest = problem.earliest[node], problem.latest[node]
+        nodes = tour.nodes
+        best_cost, best_position = float("inf"), -1
+        previous, depart = 0, 0.0
+        for position in range(len(nodes) + 1):
+            following = nodes[position] if position < len(nodes) else 0
+            start = max(depart + distance[previous][node] * per_km, earliest)
+            if start > latest:
+                # Con desigualdad triangular las posiciones siguientes llegan aún más tarde
+                break
+            bound = tour.latest[position] if position < len(nodes) else problem.shift_minutes
+            if start + service + from_node[following] * per_km <= bound:
+                cost = distance[previous][node] + from_node[following] - distance[previous][following]
+                if cost < best_cost:
+                    best_cost, best_position = cost, position
+            if position < len(nodes):
+                previous, depart = following, tour.begin[position] + service
+        return (best_cost, best_position) if best_position >= 0 else None
+    
+    def insert(self, tours: List[_Tour], node: int, limit: float = float("inf")) -> bool:
+        """Insertar en la ruta donde agregue menos distancia (y menos que `limit`)"""
+        best = None
+        for tour in tours:
+            found = self.best_insertion(tour, node)
+            if found and found[0] < limit and (best is None or found[0] < best[0]):
+                best = (found[0], found[1], tour)
+        if best is None:
+            return False
+        _, position, tour = best
+        return self.assign(tour, tour.nodes[:position] + [node] + tour.nodes[position:])
+    
+    def construct(self, rng: random.Random, randomized: bool) -> Tuple[List[_Tour], List[int]]:
+        """Inserción más barata factible, de la ventana más ajustada a la más holgada"""
+        problem = self.problem
+        jitter = ORDER_JITTER_MINUTES if randomized else 0.0
+        order = sorted(
+            range(1, len(problem.demand)),
+            key=lambda node: (
+                problem.latest[node] + jitter * rng.random(),
+                -self.distance[0][node] * (1 + rng.random() if randomized else 1)
+            )
+        )
+        tours = [_Tour(vehicle) for vehicle in range(len(problem.capacity))]
+        if randomized:
+            rng.shuffle(tours)
+        unassigned = [node for node in order if not self.insert(tours, node)]
+        return tours, unassigned
+    
+    def relocate(self, tours: List[_Tour], rng: random.Random, deadline: float) -> bool:
+        """Mover cada entrega a la posición más barata de cualquier ruta"""
+        improved = False
+        for tour in rng.sample(tours, len(tours)):
+            for node in list(tour.nodes):
+                if time.time() >= deadline:
+                    return improved
+                position = tour.nodes.index(node)
+                previous = tour.nodes[position - 1] if position else 0
+                following = tour.nodes[position + 1] if position + 1 < len(tour.nodes) else 0
+                gain = self.distance[previous][node] + self.distance[node][following] - self.distance[previous][following]
+                if gain <= IMPROVEMENT_EPSILON:
+                    continue
+                saved = (tour.nodes, tour.load, tour.begin, tour.latest, tour.end)
+                # Quitar una parada nunca atrasa las demás: siempre es factible
+                self.assign(tour, tour.nodes[:position] + tour.nodes[position + 1:])
+                if self.insert(tours, node, limit=gain - IMPROVEMENT_EPSILON):
+                    improved = True
+                else:
+                    tour.nodes, tour.load, tour.begin, tour.latest, tour.end = saved
+        return improved
+    
+    def two_opt(self, tour: _Tour, deadline: float) -> bool:
+        """Invertir tramos de la ruta mientras acorten y respeten las ventanas"""
+        distance = self.distance
+        improved, changed = False, True
+        while changed and time.time() < deadline:
+            changed = False
+            nodes = tour.nodes
+            for i in range(len(nodes) - 1):
+                a, b = nodes[i - 1] if i else 0, nodes[i]
+                for j in range(i + 1, len(nodes)):
+                    c, e = nodes[j], nodes[j + 1] if j + 1 < len(nodes) else 0
+                    delta = distance[a][c] + distance[b][e] - distance[a][b] - distance[c][e]
+                    if delta < -IMPROVEMENT_EPSILON and self.assign(
+                        tour, nodes[:i] + nodes[i:j + 1][::-1] + nodes[j + 1:]
+                    ):
+                        changed = improved = True
+                        break
+                if changed:
+                    break
+        return improved
+    
+    def improve(self, tours: List[_Tour], unassigned: List[int], rng: random.Random, deadline: float):
+        """Búsqueda local hasta un óptimo local o agotar el tiempo"""
+        improved = True
+        while improved and time.time() < deadline:
+            improved = self.relocate(tours, rng, deadline)
+            for tour in tours:
+                improved = self.two_opt(tour, deadline) or improved
+            # Lo liberado puede dejar lugar a entregas sin asignar
+            for node in list(unassigned):
+                if self.insert(tours, node):
+                    unassigned.remove(node)
+                    improved = True
+    
+    def tour_distance(self, tour: _Tour) -> float:
+        path = [0] + tour.nodes + [0]
+        return sum(self.distance[a][b] for a, b in zip(path, path[1:]))
+
+
+def _solve_candidates(problem: _Problem, seed: int, stride: int, deadline: float):
+    """
+    Construir y mejorar candidatos hasta `deadline` (time.time()) y devolver el mejor
+    
+    Corre en los procesos del pool; cada proceso usa las semillas seed,
+    seed + stride, ... y el primer candidato se completa aunque no quede tiempo.
+    """
+    solver = _Solver(problem)
+    best = None
+    while best is None or time.time() < deadline:
+        rng = random.Random(seed)
+        tours, unassigned = solver.construct(rng, randomized=seed > 0)
+        solver.improve(tours, unassigned, rng, deadline)
+        used = [tour for tour in tours if tour.nodes]
+        distance = sum(solver.tour_distance(tour) for tour in used)
+        if best is None or (len(unassigned), distance) < best[0]:
+            best = (
+                (len(unassigned), distance),
+                sorted(unassigned),
+                [(tour.vehicle, tour.nodes, tour.begin, tour.end, solver.tour_distance(tour)) for tour in used]
+            )
+        seed += stride
+    return best
+
+
+def _warm_up() -> bool:
+    """Tarea vacía: obliga al proceso a arrancar e importar este módulo"""
+    return True
+
+
+class ProcessPoolFleetPlanner(IFleetPlanner):
+    """
+    Planificador de flota multi-arranque sobre un pool de procesos
+    
+    El pool se crea en `start()` o en el primer uso y se reutiliza; con un
+    solo worker los candidatos se evalúan en el proceso actual.
+    """
+    
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        detour_factor: float = ROAD_DETOUR_FACTOR,
+        distance_matrix: Optional[DistanceMatrixFunction] = None
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.detour_factor = detour_factor
+        self.distance_matrix = distance_matrix or haversine_matrix
+        self._executor: Optional[ProcessPoolExecutor] = None
+    
+    def plan(
+        self,
+        depot: Coordinates,
+        jobs: List[DeliveryJob],
+        vehicles: List[FleetVehicle],
+        shift_minutes: float = 600,
+        time_budget_seconds: float = 2.0
+    ) -> FleetPlan:
+        if not jobs:
+            raise ValueError("Se requiere al menos una entrega para planificar")
+        if not vehicles:
+            raise ValueError("Se requiere al menos un vehículo para planificar")
+        deadline = time.time() + time_budget_seconds
+        
+        problem = self._problem(depot, jobs, vehicles, shift_minutes)
+        if self.max_workers == 1:
+            results = [_solve_candidates(problem, 0, 1, deadline)]
+        else:
+            executor = self._pool()
+            futures = [
+                executor.submit(_solve_candidates, problem, seed, self.max_workers, deadline)
+                for seed in range(self.max_workers)
+            ]
+            results = [future.result() for future in futures]
+        
+        (_, distance), unassigned, tours = min(results, key=lambda result: result[0])
+        return FleetPlan(
+            tours=[
+                VehicleTour(
+                    vehicle_index=vehicle,
+                    sequence=[node - 1 for node in nodes],
+                    service_start_minutes=begin,
+                    distance_km=tour_km,
+                    duration_minutes=end
+                )
+                for vehicle, nodes, begin, end, tour_km in sorted(tours)
+            ],
+            unassigned=[node - 1 for node in unassigned],
+            distance_km=distance
+        )
+    
+    def start(self):
+        """Arrancar los procesos del pool sin esperar (evita pagar el arranque en la primera planificación)"""
+        if self.max_workers > 1:
+            pool = self._pool()
+            for _ in range(self.max_workers):
+                pool.submit(_warm_up)
+    
+    def shutdown(self):
+        """Terminar los procesos del pool"""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+    
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: hacer fork de un servidor con hilos y event loop no es seguro
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+    
+    def _problem(
+        self,
+        depot: Coordinates,
+        jobs: List[DeliveryJob],
+        vehicles: List[FleetVehicle],
+        shift_minutes: float
+    ) -> _Problem:
+        points = [depot] + [job.location for job in jobs]
+        profiles = [vehicle_profile(vehicle.vehicle_type) for vehicle in vehicles]
+        return _Problem(
+            distance=self.distance_matrix(
+                [point.lat for point in points],
+                [point.lon for point in points]
+            ) * self.detour_factor,
+            demand=[0] + [job.demand for job in jobs],
+            earliest=[0.0] + [max(0.0, job.earliest_minutes) for job in jobs],
+            latest=[shift_minutes] + [
+                shift_minutes if job.latest_minutes is None else min(job.latest_minutes, shift_minutes)
+                for job in jobs
+            ],
+            capacity=[vehicle.capacity for vehicle in vehicles],
+            minutes_per_km=[60 / profile.average_speed_kmh for profile in profiles],
+            service_minutes=[profile.service_minutes_per_stop for profile in profiles],
+            shift_minutes=shift_minutes
+        )
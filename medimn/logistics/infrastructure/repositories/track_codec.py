@@ -0,0 +1,75 @@
+"""
+Codificación compacta de recorridos GPS
+
+Un bloque guarda tres columnas de enteros: ts en milisegundos y lat/lon en
+millonésimas de grado (~0.11 m). Cada columna se guarda como diferencias con
+el punto anterior (el primero, absoluto), en zigzag para que las negativas
+sean chicas, y como varint: 7 bits por byte, el bit alto indica que sigue
+otro byte. Con un reporte cada pocos segundos casi todas las diferencias
+caben en 1-2 bytes, ~5-6 bytes por punto contra más de 60 de una fila.
+Todo con NumPy, sin recorrer punto por punto.
+"""
+from typing import Tuple
+
+import numpy as np
+
+# Unidades guardadas
+TS_UNIT_MICROSECONDS = 1000
+COORDINATE_SCALE = 1_000_000
+
+_MAX_VARINT_BYTES = 10
+_SHIFTS = np.arange(_MAX_VARINT_BYTES, dtype=np.uint64) * np.uint64(7)
+# Menor valor que necesita i + 1 bytes
+_THRESHOLDS = np.left_shift(np.uint64(1), _SHIFTS[1:])
+
+
+def _zigzag(values: np.ndarray) -> np.ndarray:
+    return ((values << 1) ^ (values >> 63)).view(np.uint64)
+
+
+def _unzigzag(values: np.ndarray) -> np.ndarray:
+    return (values >> np.uint64(1)).view(np.int64) ^ -(values & np.uint64(1)).view(np.int64)
+
+
+def _pack_varints(values: np.ndarray) -> bytes:
+    lengths = 1 + (values[:, None] >= _THRESHOLDS).sum(axis=1)
+    width = int(lengths.max()) if len(values) else 1
+    groups = ((values[:, None] >> _SHIFTS[:width]) & np.uint64(0x7F)).astype(np.uint8)
+    position = np.arange(width)
+    groups[position < lengths[:, None] - 1] |= 0x80
+    return groups[position < lengths[:, None]].tobytes()
+
+
+def _unpack_varints(data: bytes) -> np.ndarray:
+    raw = np.frombuffer(data, dtype=np.uint8)
+    ends = np.flatnonzero(raw < 0x80)
+    if not len(ends) or ends[-1] != len(raw) - 1:
+        raise ValueError("Bloque de recorrido incompleto")
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    # Posición de cada byte dentro de su valor
+    offsets = np.arange(len(raw)) - np.repeat(starts, ends - starts + 1)
+    parts = (raw & 0x7F).astype(np.uint64) << (offsets.astype(np.uint64) * np.uint64(7))
+    return np.bitwise_or.reduceat(parts, starts)
+
+
+def encode_track(ts_ms: np.ndarray, lat: np.ndarray, lon: np.ndarray) -> bytes:
+    """Bloque con los puntos (ordenados por tiempo) de un recorrido"""
+    columns = np.stack([
+        np.asarray(ts_ms, dtype=np.int64),
+        np.rint(np.asarray(lat, dtype=np.float64) * COORDINATE_SCALE).astype(np.int64),
+        np.rint(np.asarray(lon, dtype=np.float64) * COORDINATE_SCALE).astype(np.int64)
+    ])
+    deltas = np.diff(columns, axis=1, prepend=0)
+    return _pack_varints(_zigzag(deltas.ravel()))
+
+
+def decode_track(data: bytes, count: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Columnas (ts en ms, lat, lon) de un bloque de `count` puntos"""
+    if not count:
+        empty = np.empty(0)
+        return empty.astype(np.int64), empty, empty
+    values = _unpack_varints(data)
+    if len(values) != 3 * count:
+        raise ValueError(f"El bloque tiene {len(values)} valores, se esperaban {3 * count}")
+    ts, lat, lon = np.cumsum(_unzigzag(values).reshape(3, count), axis=1)
+    return ts, lat / COORDINATE_SCALE, lon / COORDINATE_SCALE
@@ -0,0 +1,380 @@
+"""
+Ingesta de posiciones GPS de la flota
+
+Cada vehículo tiene un anillo columnar (una fila de arreglos NumPy de ts,
+lat y lon de tamaño fijo) con sus posiciones más recientes, así la última
+posición se lee en O(1) sin tocar la base de datos. Los lotes recibidos quedan
+además pendientes, en columnas, hasta que `PositionFlusher` los guarda en
+vehicle_positions en segundo plano.
+
+Los anillos se mantienen ordenados por tiempo: una posición más vieja que
+la última del vehículo (llegó tarde o reintentada) se guarda en el
+historial pero no entra al anillo.
+
+`TrackArchiver` pasa el recorrido de las rutas completadas de
+vehicle_positions a bloques comprimidos (ver repositories.track_codec).
+`RepositoryActiveRouteSource` relee de la base las rutas en curso y las
+últimas posiciones para el worker que escribe las ETAs (ver eta).
+"""
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+import asyncio
+import threading
+
+import numpy as np
+
+from ..database import SessionLocal
+from ..repositories import SQLAlchemyLogisticsRepository, SQLAlchemyPositionRepository
+from .broadcaster import TrackingBroadcaster, TrackingSubscription
+from .eta import EtaEngine
+from .spatial import GeoGrid, SpatialIndex
+from ...domain.entities import Position, Route, RouteStatus
+from ...domain.ports import IActiveRouteSource, IPositionBuffer
+
+# Lote pendiente de guardar: (vehicle_ids, lat, lon, ts en microsegundos desde epoch)
+PositionChunk = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+_NO_POSITION = np.iinfo(np.int64).min
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _to_microseconds(timestamps: Sequence[datetime]) -> np.ndarray:
+    # Restar el epoch es ~5 veces más rápido que convertir a datetime64 con np.array
+    return np.fromiter(((ts - _EPOCH) // _MICROSECOND for ts in timestamps), dtype=np.int64, count=len(timestamps))
+
+
+def _to_datetimes(microseconds: np.ndarray) -> list:
+    return microseconds.astype("datetime64[us]").tolist()
+
+
+class PositionRingBuffers(IPositionBuffer):
+    """
+    Anillos por vehículo y lotes pendientes de guardar
+    
+    Cada vehículo recibe una fila de tres matrices (ts, lat, lon) de
+    `capacity` columnas; la fila es su anillo. Un lote se escribe en todas
+    las filas a la vez con indexación vectorizada, sin recorrer vehículo
+    por vehículo. Las matrices duplican sus filas cuando llegan vehículos
+    nuevos.
+    
+    Si la base de datos no da abasto y los pendientes superan
+    `max_pending`, se descartan los lotes más viejos (quedan contados en
+    `dropped`); los anillos siguen al día.
+    """
+    
+    def __init__(self, capacity: int = 256, max_pending: int = 500_000, initial_vehicles: int = 64):
+        self.capacity = capacity
+        self.max_pending = max_pending
+        self.ingested = 0
+        self.stale = 0  # Más viejas que la última del vehículo: solo al historial
+        self.dropped = 0
+        self._slots: Dict[str, int] = {}
+        self._ts = np.zeros((initial_vehicles, capacity), dtype=np.int64)
+        self._lat = np.zeros((initial_vehicles, capacity), dtype=np.float64)
+        self._lon = np.zeros((initial_vehicles, capacity), dtype=np.float64)
+        self._head = np.zeros(initial_vehicles, dtype=np.int64)  # Próxima columna a escribir
+        self._count = np.zeros(initial_vehicles, dtype=np.int64)
+        self._latest_ts = np.full(initial_vehicles, _NO_POSITION, dtype=np.int64)
+        self._pending: Deque[PositionChunk] = deque()
+        self._pending_count = 0
+        self._lock = threading.Lock()
+    
+    def append_many(
+        self,
+        vehicle_ids: Sequence[str],
+        lat: Sequence[float],
+        lon: Sequence[float],
+        timestamps: Sequence[datetime]
+    ) -> int:
+        """Validar el lote en bloque, actualizar los anillos y dejarlo pendiente"""
+        count = len(vehicle_ids)
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        if not (len(lat) == len(lon) == len(timestamps) == count):
+            raise ValueError("Las columnas del lote deben tener el mismo largo")
+        invalid = np.flatnonzero(~((np.abs(lat) <= 90) & (np.abs(lon) <= 180)))
+        if invalid.size:
+            raise ValueError(f"Coordenadas fuera de rango en la posición {int(invalid[0])} del lote")
+        if not count:
+            return 0
+        ts = _to_microseconds(timestamps)
+        
+        with self._lock:
+            slots = self._slots_for(vehicle_ids)
+            
+            # Por vehículo y por tiempo; lo anterior a la última posición no entra al anillo
+            order = np.lexsort((ts, slots))
+            order = order[ts[order] >= self._latest_ts[slots[order]]]
+            self.stale += count - len(order)
+            if len(order):
+                self._write(slots[order], ts[order], lat[order], lon[order])
+            
+            self._pending.append((np.asarray(vehicle_ids, dtype=object), lat, lon, ts))
+            self._pending_count += count
+            while self._pending_count > self.max_pending and len(self._pending) > 1:
+                dropped = self._pending.popleft()
+                self._pending_count -= len(dropped[0])
+                self.dropped += len(dropped[0])
+            self.ingested += count
+        
+        return count
+    
+    def latest(self, vehicle_id: str) -> Optional[Position]:
+        """Última posición del vehículo sin consultar la base de datos"""
+        slot = self._slots.get(vehicle_id)
+        if slot is None:
+            return None
+        column = (self._head[slot] - 1) % self.capacity
+        return Position(
+            float(self._lat[slot, column]),
+            float(self._lon[slot, column]),
+            _to_datetimes(self._ts[slot, column:column + 1])[0]
+        )
+    
+    def recent(self, vehicle_id: str, limit: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Últimas `limit` posiciones (ts, lat, lon) del vehículo, de la más vieja a la más nueva"""
+        slot = self._slots.get(vehicle_id)
+        if slot is None:
+            empty = np.empty(0)
+            return empty.astype(np.int64), empty, empty
+        size = min(limit, int(self._count[slot]))
+        columns = np.arange(self._head[slot] - size, self._head[slot]) % self.capacity
+        return self._ts[slot, columns], self._lat[slot, columns], self._lon[slot, columns]
+    
+    def _slots_for(self, vehicle_ids: Sequence[str]) -> np.ndarray:
+        """Fila de cada posición del lote; agrega filas para los vehículos nuevos"""
+        slots = self._slots
+        result = np.fromiter(
+            (slots.setdefault(vehicle_id, len(slots)) for vehicle_id in vehicle_ids),
+            dtype=np.intp, count=len(vehicle_ids)
+        )
+        if len(slots) > len(self._head):
+            rows = max(len(slots), 2 * len(self._head)) - len(self._head)
+            self._ts = np.vstack([self._ts, np.zeros((rows, self.capacity), dtype=np.int64)])
+            self._lat = np.vstack([self._lat, np.zeros((rows, self.capacity))])
+            self._lon = np.vstack([self._lon, np.zeros((rows, self.capacity))])
+            self._head = np.append(self._head, np.zeros(rows, dtype=np.int64))
+            self._count = np.append(self._count, np.zeros(rows, dtype=np.int64))
+            self._latest_ts = np.append(self._latest_ts, np.full(rows, _NO_POSITION, dtype=np.int64))
+        return result
+    
+    def _write(self, slots: np.ndarray, ts: np.ndarray, lat: np.ndarray, lon: np.ndarray):
+        """Escribir posiciones ordenadas por (vehículo, tiempo) en sus anillos"""
+        starts = np.flatnonzero(np.diff(slots, prepend=-1))
+        sizes = np.diff(np.append(starts, len(slots)))
+        group_slots = slots[starts]
+        # Posición de cada punto dentro de su vehículo; de un grupo más largo que el anillo solo quedan los últimos
+        rank = np.arange(len(slots)) - np.repeat(starts, sizes)
+        keep = rank >= np.repeat(sizes, sizes) - self.capacity
+        columns = (self._head[slots] + rank) % self.capacity
+        
+        self._ts[slots[keep], columns[keep]] = ts[keep]
+        self._lat[slots[keep], columns[keep]] = lat[keep]
+        self._lon[slots[keep], columns[keep]] = lon[keep]
+        self._head[group_slots] = (self._head[group_slots] + sizes) % self.capacity
+        self._count[group_slots] = np.minimum(self._count[group_slots] + sizes, self.capacity)
+        self._latest_ts[group_slots] = ts[np.append(starts[1:], len(slots)) - 1]
+    
+    @property
+    def pending(self) -> int:
+        return self._pending_count
+    
+    def drain(self, limit: int) -> Optional[PositionChunk]:
+        """Sacar hasta `limit` posiciones pendientes, en orden de llegada"""
+        with self._lock:
+            if not self._pending:
+                return None
+            parts = []
+            taken = 0
+            while self._pending and taken < limit:
+                chunk = self._pending.popleft()
+                room = limit - taken
+                if len(chunk[0]) > room:
+                    # Partir el lote: el resto vuelve al frente
+                    self._pending.appendleft(tuple(column[room:] for column in chunk))
+                    chunk = tuple(column[:room] for column in chunk)
+                parts.append(chunk)
+                taken += len(chunk[0])
+            self._pending_count -= taken
+        return tuple(np.concatenate(columns) for columns in zip(*parts))
+    
+    def requeue(self, chunk: PositionChunk):
+        """Devolver al frente un lote que no se pudo guardar"""
+        with self._lock:
+            self._pending.appendleft(chunk)
+            self._pending_count += len(chunk[0])
+    
+    def metrics(self) -> dict:
+        """Contadores de ingesta del proceso"""
+        return {
+            "vehicles": len(self._slots),
+            "ingested": self.ingested,
+            "pending": self._pending_count,
+            "stale": self.stale,
+            "dropped": self.dropped
+        }
+
+
+class PositionFlusher:
+    """Guarda en segundo plano las posiciones pendientes, un INSERT por lote"""
+    
+    def __init__(
+        self,
+        buffers: PositionRingBuffers,
+        session_factory=SessionLocal,
+        batch_size: int = 5000,
+        interval_seconds: float = 1.0
+    ):
+        self.buffers = buffers
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.flushed = 0
+        self._stopping = False
+        self._wakeup: Optional[asyncio.Event] = None
+    
+    async def flush_once(self) -> int:
+        """Guardar todo lo pendiente al momento de la llamada"""
+        flushed = 0
+        session = self.session_factory()
+        try:
+            repository = SQLAlchemyPositionRepository(session)
+            for _ in range(-(-self.buffers.pending // self.batch_size)):
+                chunk = self.buffers.drain(self.batch_size)
+                if chunk is None:
+                    break
+                vehicle_ids, lat, lon, ts = chunk
+                try:
+                    flushed += await repository.save_many(
+                        vehicle_ids.tolist(), lat.tolist(), lon.tolist(), _to_datetimes(ts)
+                    )
+                except Exception:
+                    session.rollback()
+                    self.buffers.requeue(chunk)
+                    raise
+                # Ceder el loop entre lotes para no bloquear peticiones
+                await asyncio.sleep(0)
+        finally:
+            session.close()
+            self.flushed += flushed
+        
+        return flushed
+    
+    async def run(self):
+        """Guardar periódicamente hasta que se detenga; al detenerse guarda lo que quede"""
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        while True:
+            try:
+                await self.flush_once()
+            except Exception as e:
+                print(f"⚠️  Error guardando posiciones GPS: {e}")
+            
+            if self._stopping:
+                return
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+    
+    def stop(self):
+        """Pedir al flusher que guarde lo pendiente y termine"""
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+
+class TrackArchiver:
+    """
+    Comprime en segundo plano el recorrido de las rutas completadas
+    
+    Espera `grace_seconds` desde el fin de la ruta para que el flusher haya
+    guardado sus últimas posiciones, y archiva `batch_size` rutas por
+    transacción hasta ponerse al día.
+    """
+    
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        chunk_minutes: int = 30,
+        grace_seconds: float = 60.0,
+        batch_size: int = 50,
+        interval_seconds: float = 60.0
+    ):
+        if chunk_minutes <= 0:
+            raise ValueError("La ventana de los bloques debe ser mayor a 0")
+        self.session_factory = session_factory
+        self.chunk_minutes = chunk_minutes
+        self.grace = timedelta(seconds=grace_seconds)
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.archived = 0
+        self._stopping = False
+        self._wakeup: Optional[asyncio.Event] = None
+    
+    async def archive_once(self) -> int:
+        """Archivar las rutas completadas hace más de `grace_seconds`"""
+        archived = 0
+        session = self.session_factory()
+        try:
+            repository = SQLAlchemyPositionRepository(session)
+            ended_before = datetime.utcnow() - self.grace
+            while not self._stopping:
+                count = await repository.archive_route_tracks(ended_before, self.chunk_minutes, self.batch_size)
+                archived += count
+                if count < self.batch_size:
+                    break
+                # Ceder el loop entre lotes para no bloquear peticiones
+                await asyncio.sleep(0)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+            self.archived += archived
+        
+        return archived
+    
+    async def run(self):
+        """Archivar periódicamente hasta que se detenga"""
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        while not self._stopping:
+            try:
+                await self.archive_once()
+            except Exception as e:
+                print(f"⚠️  Error archivando recorridos de rutas: {e}")
+            
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+    
+    def stop(self):
+        """Pedir al archivador que termine (lo pendiente se archiva al reiniciar)"""
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+
+class RepositoryActiveRouteSource(IActiveRouteSource):
+    """Rutas en curso y últimas posiciones leídas de la base, con una sesión por lectura"""
+    
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+    
+    async def load(self) -> Tuple[List[Route], Dict[str, Position]]:
+        session = self.session_factory()
+        try:
+            routes = await SQLAlchemyLogisticsRepository(session).find_by_status(RouteStatus.IN_PROGRESS)
+            positions = await SQLAlchemyPositionRepository(session).find_latest_many(
+                list({route.vehicle_id for route in routes if route.vehicle_id})
+            )
+            return routes, positions
+        finally:
+            session.close()
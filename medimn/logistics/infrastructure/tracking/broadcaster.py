@@ -0,0 +1,227 @@
+"""
+Seguimiento en vivo: reparto de posiciones y avance de rutas a suscriptores
+
+Cada suscriptor (una conexión SSE o WebSocket) sigue vehículos, rutas o
+vendedores. Los índices por vehículo, ruta y vendedor dan en O(1) a quién
+le interesa un cambio; el cambio se serializa una sola vez y la misma
+instancia se deja en la cola de cada suscriptor. Si nadie sigue un
+vehículo, sus posiciones ni siquiera se serializan.
+
+Las colas son por proceso: un suscriptor recibe las posiciones que llegan
+al worker donde está conectado.
+"""
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+import asyncio
+import json
+
+from ...domain.entities import Route, RouteStatus, TrackingUpdate
+from ...domain.ports import IPositionBuffer, ITrackingFeed, ITrackingSubscription
+
+# Rutas cuyo vehículo se asocia a la ruta y al vendedor
+ACTIVE_ROUTE_STATUSES = {RouteStatus.PLANNED, RouteStatus.IN_PROGRESS}
+
+
+class TrackingSubscription(ITrackingSubscription):
+    """
+    Cola de un suscriptor
+    
+    Guarda solo el último cambio por clave: un consumidor lento recibe la
+    posición más reciente de cada vehículo, no todas las intermedias. Con
+    `max_pending` claves distintas en espera se descarta la más vieja.
+    """
+    
+    def __init__(
+        self,
+        vehicle_ids: Iterable[str],
+        route_ids: Iterable[str],
+        vendor_ids: Iterable[str],
+        max_pending: int = 256
+    ):
+        self.vehicle_ids: FrozenSet[str] = frozenset(vehicle_ids)
+        self.route_ids: FrozenSet[str] = frozenset(route_ids)
+        self.vendor_ids: FrozenSet[str] = frozenset(vendor_ids)
+        self.max_pending = max_pending
+        self.delivered = 0
+        self.coalesced = 0  # Reemplazados por uno más nuevo antes de enviarse
+        self.dropped = 0
+        self._pending: "OrderedDict[str, TrackingUpdate]" = OrderedDict()
+        self._ready = asyncio.Event()
+    
+    def offer(self, update: TrackingUpdate):
+        """Encolar un cambio reemplazando el pendiente de la misma clave"""
+        pending = self._pending
+        if update.key in pending:
+            self.coalesced += 1
+        elif len(pending) >= self.max_pending:
+            pending.popitem(last=False)
+            self.dropped += 1
+        pending[update.key] = update
+        self._ready.set()
+    
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+    
+    async def next_updates(self, timeout: float) -> List[TrackingUpdate]:
+        if not self._pending:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return []
+        updates = list(self._pending.values())
+        self._pending.clear()
+        self.delivered += len(updates)
+        return updates
+
+
+class TrackingBroadcaster(ITrackingFeed):
+    """Publica posiciones y avance de rutas a los suscriptores del proceso"""
+    
+    def __init__(self, position_buffer: IPositionBuffer, max_pending: int = 256):
+        self.position_buffer = position_buffer
+        self.max_pending = max_pending
+        self.published = 0  # Cambios serializados
+        self.offered = 0  # Entregas a colas de suscriptores
+        self._subscriptions: Set[TrackingSubscription] = set()
+        self._by_vehicle: Dict[str, Set[TrackingSubscription]] = {}
+        self._by_route: Dict[str, Set[TrackingSubscription]] = {}
+        self._by_vendor: Dict[str, Set[TrackingSubscription]] = {}
+        self._routes: Dict[str, Tuple[str, Optional[str]]] = {}  # route_id -> (vehicle_id, vendor_id)
+        self._vehicle_routes: Dict[str, str] = {}
+        self._route_states: Dict[str, TrackingUpdate] = {}
+    
+    def subscribe(
+        self,
+        vehicle_ids: Sequence[str] = (),
+        route_ids: Sequence[str] = (),
+        vendor_ids: Sequence[str] = ()
+    ) -> TrackingSubscription:
+        subscription = TrackingSubscription(vehicle_ids, route_ids, vendor_ids, self.max_pending)
+        self._subscriptions.add(subscription)
+        for keys, index in self._indexes(subscription):
+            for key in keys:
+                index.setdefault(key, set()).add(subscription)
+        
+        # Estado actual: rutas seguidas y última posición de sus vehículos
+        routes = set(subscription.route_ids)
+        if subscription.vendor_ids:
+            routes.update(
+                route_id for route_id, (_, vendor_id) in self._routes.items()
+                if vendor_id in subscription.vendor_ids
+            )
+        vehicles = set(subscription.vehicle_ids)
+        vehicles.update(self._routes[route_id][0] for route_id in routes if route_id in self._routes)
+        for route_id in routes:
+            if route_id in self._route_states:
+                subscription.offer(self._route_states[route_id])
+        for vehicle_id in vehicles:
+            update = self._position_update(vehicle_id)
+            if update is not None:
+                subscription.offer(update)
+        return subscription
+    
+    def unsubscribe(self, subscription: ITrackingSubscription) -> None:
+        if subscription not in self._subscriptions:
+            return
+        self._subscriptions.discard(subscription)
+        for keys, index in self._indexes(subscription):
+            for key in keys:
+                subscribers = index.get(key)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del index[key]
+    
+    def track_route(self, route: Route) -> None:
+        self._track(route, self._route_update(route))
+    
+    def route_updated(self, route: Route) -> None:
+        update = self._route_update(route)
+        self._track(route, update)
+        self.published += 1
+        route_id = str(route.id)
+        self._offer(update, self._targets(route.vehicle_id, route_id, route.vendor_id))
+    
+    def positions_updated(self, vehicle_ids: Sequence[str]) -> None:
+        if not self._subscriptions:
+            return
+        for vehicle_id in dict.fromkeys(vehicle_ids):
+            route_id = self._vehicle_routes.get(vehicle_id)
+            targets = self._targets(
+                vehicle_id, route_id, self._routes[route_id][1] if route_id is not None else None
+            )
+            if targets:
+                update = self._position_update(vehicle_id)
+                if update is not None:
+                    self.published += 1
+                    self._offer(update, targets)
+    
+    def metrics(self) -> dict:
+        """Contadores del reparto en este proceso"""
+        return {
+            "subscribers": len(self._subscriptions),
+            "published": self.published,
+            "offered": self.offered,
+            "coalesced": sum(subscription.coalesced for subscription in self._subscriptions),
+            "dropped": sum(subscription.dropped for subscription in self._subscriptions)
+        }
+    
+    def _indexes(self, subscription: TrackingSubscription):
+        return (
+            (subscription.vehicle_ids, self._by_vehicle),
+            (subscription.route_ids, self._by_route),
+            (subscription.vendor_ids, self._by_vendor)
+        )
+    
+    def _targets(self, vehicle_id: Optional[str], route_id: Optional[str], vendor_id: Optional[str]):
+        """Suscriptores del vehículo, de su ruta o de su vendedor (sin repetir)"""
+        groups = [
+            subscribers for subscribers in (
+                self._by_vehicle.get(vehicle_id) if vehicle_id else None,
+                self._by_route.get(route_id) if route_id else None,
+                self._by_vendor.get(vendor_id) if vendor_id else None
+            )
+            if subscribers
+        ]
+        if len(groups) > 1:
+            return set().union(*groups)
+        return groups[0] if groups else ()
+    
+    def _offer(self, update: TrackingUpdate, targets):
+        for subscription in targets:
+            subscription.offer(update)
+        self.offered += len(targets)
+    
+    def _track(self, route: Route, update: TrackingUpdate):
+        route_id = str(route.id)
+        previous = self._routes.pop(route_id, None)
+        if previous is not None and self._vehicle_routes.get(previous[0]) == route_id:
+            del self._vehicle_routes[previous[0]]
+        self._route_states.pop(route_id, None)
+        if route.status in ACTIVE_ROUTE_STATUSES:
+            self._route_states[route_id] = update
+            if route.vehicle_id:
+                self._routes[route_id] = (route.vehicle_id, route.vendor_id)
+                self._vehicle_routes[route.vehicle_id] = route_id
+    
+    def _route_update(self, route: Route) -> TrackingUpdate:
+        route_id = str(route.id)
+        return TrackingUpdate("route", f"route:{route_id}", json.dumps({
+            "routeId": route_id,
+            "vehicleId": route.vehicle_id,
+            "vendorId": route.vendor_id,
+            "status": route.status.value,
+            "progress": route.progress
+        }))
+    
+    def _position_update(self, vehicle_id: str) -> Optional[TrackingUpdate]:
+        position = self.position_buffer.latest(vehicle_id)
+        if position is None:
+            return None
+        return TrackingUpdate("position", f"position:{vehicle_id}", json.dumps({
+            "vehicleId": vehicle_id,
+            "routeId": self._vehicle_routes.get(vehicle_id),
+            **position.to_dict()
+        }))
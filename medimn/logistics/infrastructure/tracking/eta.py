@@ -0,0 +1,312 @@
+"""
+Recálculo incremental de ETAs de las rutas en curso
+
+Al tomar una ruta se calculan una sola vez, con la matriz de distancias en
+caché, los tramos entre sus paradas pendientes y sus minutos acumulados
+(manejo + atención en cada parada). Con una posición nueva o una parada
+entregada solo se calcula el tramo desde el vehículo (o desde la última
+entrega) hasta la próxima parada; la ETA de las demás es ese momento más
+los minutos acumulados.
+
+Las posiciones solo marcan el vehículo: el recálculo y la escritura a las
+órdenes ocurren cada `interval_seconds`, una vez por ruta aunque hayan
+llegado cientos de posiciones, y solo para las ETAs que se movieron al
+menos `min_change_minutes` respecto de lo último escrito.
+
+Cada worker sigue sus rutas en memoria, igual que el seguimiento en vivo,
+y en cada vuelta las alinea con la base (`route_source`): rutas en curso,
+paradas entregadas por otro worker y la última posición guardada de cada
+vehículo. Solo el worker con la concesión `lease` escribe a las órdenes;
+los demás calculan las ETAs solo para sus consultas.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+import asyncio
+
+import numpy as np
+
+from ..optimization import DistanceMatrixFunction, haversine_distances, haversine_matrix
+from ...domain.entities import ETA, ROAD_DETOUR_FACTOR, Position, Route, RouteStatus, vehicle_profile
+from ...domain.ports import IActiveRouteSource, IEtaEngine, IOrderEtaSink, IPositionBuffer
+
+
+def _route_signature(route: Route) -> Tuple:
+    """Lo que cambia el plan de una ruta: vehículo y paradas (con su entrega)"""
+    return (route.vehicle_id, route.vehicle_type, tuple(
+        (
+            stop.order_id,
+            stop.completed_at,
+            (stop.location.lat, stop.location.lon) if stop.location else None,
+            stop.eta.window_minutes if stop.eta else 0
+        )
+        for stop in route.stops
+    ))
+
+
+class _RoutePlan:
+    """Paradas pendientes de una ruta con sus minutos acumulados desde la primera"""
+    
+    __slots__ = (
+        "vehicle_id", "order_ids", "windows", "lat", "lon", "offsets", "minutes_per_km",
+        "anchor_time", "anchor_minutes"
+    )
+    
+    def __init__(self, route: Route, distance_matrix: DistanceMatrixFunction):
+        remaining = route.remaining_stops
+        completed = [stop for stop in route.stops if stop.completed_at is not None]
+        # Última entrega con ubicación: punto de partida si el vehículo no reportó después
+        anchor = max(
+            (stop for stop in completed if stop.location is not None),
+            key=lambda stop: stop.completed_at,
+            default=None
+        )
+        points = ([anchor] if anchor else []) + remaining
+        profile = vehicle_profile(route.vehicle_type)
+        
+        self.vehicle_id = route.vehicle_id
+        self.order_ids = [stop.order_id for stop in remaining]
+        self.windows = [stop.eta.window_minutes if stop.eta else 0 for stop in remaining]
+        self.lat = np.array([stop.location.lat for stop in points])
+        self.lon = np.array([stop.location.lon for stop in points])
+        self.minutes_per_km = ROAD_DETOUR_FACTOR / profile.average_speed_kmh * 60
+        
+        steps = np.arange(len(points) - 1)
+        legs = distance_matrix(self.lat, self.lon)[steps, steps + 1] * self.minutes_per_km
+        start = 1 if anchor else 0
+        self.offsets = np.concatenate(([0.0], np.cumsum(legs[start:] + profile.service_minutes_per_stop)))
+        self.anchor_time = anchor.completed_at if anchor else None
+        self.anchor_minutes = float(legs[0]) if anchor else None
+        if anchor:
+            self.lat, self.lon = self.lat[1:], self.lon[1:]
+    
+    def etas(self, position) -> Optional[List[datetime]]:
+        """ETA de cada parada pendiente; None si no hay desde dónde calcularla"""
+        if position is not None and (self.anchor_time is None or position.ts >= self.anchor_time):
+            distance = haversine_distances([position.lat], [position.lon], self.lat[:1], self.lon[:1])[0, 0]
+            first = position.ts + timedelta(minutes=float(distance * self.minutes_per_km))
+        elif self.anchor_time is not None:
+            first = self.anchor_time + timedelta(minutes=self.anchor_minutes)
+        else:
+            return None
+        return [first + timedelta(minutes=offset) for offset in self.offsets.tolist()]
+
+
+class EtaEngine(IEtaEngine):
+    """
+    ETAs de las paradas pendientes, recalculadas por ruta y escritas por lotes
+    
+    `run()` corre en el lifespan: cada `interval_seconds` recalcula las rutas
+    con vehículos que reportaron o paradas entregadas y lleva a las órdenes
+    las ETAs que cambiaron lo suficiente.
+    
+    Con `lease` (una por nombre para todos los workers, ver
+    shared.infrastructure.leases) solo escribe mientras la tenga; sin ella
+    el proceso se asume único.
+    """
+    
+    def __init__(
+        self,
+        position_buffer: IPositionBuffer,
+        eta_sink: IOrderEtaSink,
+        distance_matrix: Optional[DistanceMatrixFunction] = None,
+        min_change_minutes: float = 2.0,
+        interval_seconds: float = 30.0,
+        route_source: Optional[IActiveRouteSource] = None,
+        lease=None
+    ):
+        self.position_buffer = position_buffer
+        self.eta_sink = eta_sink
+        self.route_source = route_source
+        self.lease = lease
+        self.is_leader = lease is None
+        self.distance_matrix = distance_matrix or haversine_matrix
+        self.min_change = timedelta(minutes=min_change_minutes)
+        self.interval_seconds = interval_seconds
+        self.recomputed = 0  # Rutas recalculadas
+        self.written = 0  # ETAs llevadas a las órdenes
+        self.skipped = 0  # Cambios menores a min_change_minutes
+        self._plans: Dict[str, _RoutePlan] = {}
+        self._vehicle_routes: Dict[str, str] = {}
+        self._moved: Set[str] = set()
+        self._dirty_routes: Set[str] = set()
+        self._etas: Dict[str, ETA] = {}
+        self._written_dates: Dict[str, datetime] = {}
+        self._pending: Dict[str, ETA] = {}
+        self._signatures: Dict[str, Tuple] = {}
+        self._stored_positions: Dict[str, Position] = {}
+        self._stopping = False
+        self._wakeup: Optional[asyncio.Event] = None
+    
+    def track_route(self, route: Route) -> None:
+        route_id = str(route.id)
+        previous = self._untrack(route_id)
+        
+        remaining = route.remaining_stops
+        if (
+            route.status == RouteStatus.IN_PROGRESS
+            and route.vehicle_id
+            and remaining
+            and all(stop.location is not None for stop in remaining)
+        ):
+            plan = self._plans[route_id] = _RoutePlan(route, self.distance_matrix)
+            self._vehicle_routes[route.vehicle_id] = route_id
+            self._dirty_routes.add(route_id)
+            self._signatures[route_id] = _route_signature(route)
+        else:
+            plan = None
+        self._forget(previous, plan)
+    
+    def _untrack(self, route_id: str) -> Optional[_RoutePlan]:
+        """Soltar la ruta; retorna su plan anterior"""
+        previous = self._plans.pop(route_id, None)
+        if previous is not None and self._vehicle_routes.get(previous.vehicle_id) == route_id:
+            del self._vehicle_routes[previous.vehicle_id]
+        self._dirty_routes.discard(route_id)
+        self._signatures.pop(route_id, None)
+        return previous
+    
+    def _forget(self, previous: Optional[_RoutePlan], plan: Optional[_RoutePlan]) -> None:
+        """Paradas entregadas o rutas que ya no están en curso: olvidar sus ETAs"""
+        if previous is not None:
+            for order_id in set(previous.order_ids).difference(plan.order_ids if plan else ()):
+                self._etas.pop(order_id, None)
+                self._written_dates.pop(order_id, None)
+                self._pending.pop(order_id, None)
+    
+    def sync(self, routes: Sequence[Route], positions: Dict[str, Position]) -> None:
+        """
+        Alinear lo seguido con lo que guardaron todos los workers
+        
+        Suelta las rutas que ya no están en curso, vuelve a tomar las que
+        cambiaron (otro worker entregó una parada o cambió el vehículo) y
+        marca los vehículos cuya última posición guardada es más nueva que la
+        que este proceso conocía.
+        """
+        active = {str(route.id): route for route in routes}
+        for route_id in [route_id for route_id in self._plans if route_id not in active]:
+            self._forget(self._untrack(route_id), None)
+        for route_id, route in active.items():
+            if self._signatures.get(route_id) != _route_signature(route):
+                self.track_route(route)
+        
+        stored = {}
+        for vehicle_id, position in positions.items():
+            if vehicle_id not in self._vehicle_routes:
+                continue
+            known = self._stored_positions.get(vehicle_id)
+            if known is not None and known.ts >= position.ts:
+                stored[vehicle_id] = known
+            else:
+                stored[vehicle_id] = position
+                self._moved.add(vehicle_id)
+        self._stored_positions = stored
+    
+    def positions_updated(self, vehicle_ids: Sequence[str]) -> None:
+        self._moved.update(vehicle_ids)
+    
+    def eta(self, order_id: str) -> Optional[ETA]:
+        return self._etas.get(order_id)
+    
+    def _latest(self, vehicle_id: str) -> Optional[Position]:
+        """Última posición del vehículo: la recibida por este proceso o la guardada por otro"""
+        live = self.position_buffer.latest(vehicle_id)
+        stored = self._stored_positions.get(vehicle_id)
+        if live is None or (stored is not None and stored.ts > live.ts):
+            return stored
+        return live
+    
+    def recompute(self) -> int:
+        """Recalcular las rutas afectadas desde la última vez; retorna cuántas"""
+        route_ids = self._dirty_routes
+        route_ids.update(
+            self._vehicle_routes[vehicle_id] for vehicle_id in self._moved if vehicle_id in self._vehicle_routes
+        )
+        self._dirty_routes = set()
+        self._moved = set()
+        
+        for route_id in route_ids:
+            plan = self._plans.get(route_id)
+            etas = plan.etas(self._latest(plan.vehicle_id)) if plan else None
+            if etas is None:
+                continue
+            for order_id, date, window in zip(plan.order_ids, etas, plan.windows):
+                eta = ETA(date, window)
+                self._etas[order_id] = eta
+                written = self._written_dates.get(order_id)
+                if written is None or abs(date - written) >= self.min_change:
+                    self._pending[order_id] = eta
+                else:
+                    self.skipped += 1
+        self.recomputed += len(route_ids)
+        return len(route_ids)
+    
+    async def flush_once(self) -> int:
+        """Recalcular y escribir las ETAs pendientes en una sola llamada al destino"""
+        if self.lease is not None:
+            leader = self.lease.acquire()
+            if leader and not self.is_leader:
+                # Concesión recién tomada: lo último escrito fue de otro worker, reescribir todo
+                self._dirty_routes.update(self._plans)
+            self.is_leader = leader
+        if self.route_source is not None:
+            self.sync(*await self.route_source.load())
+        self.recompute()
+        if not self.is_leader:
+            # Otro worker escribe las ETAs: estas quedan solo para consultas de este proceso
+            self._pending.clear()
+            self._written_dates.clear()
+            return 0
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        try:
+            await self.eta_sink.update_etas(pending)
+        except Exception:
+            # Reintentar en la próxima vuelta sin pisar lo recalculado mientras tanto
+            self._pending = {**pending, **self._pending}
+            raise
+        for order_id, eta in pending.items():
+            self._written_dates[order_id] = eta.date
+        self.written += len(pending)
+        return len(pending)
+    
+    async def run(self):
+        """Recalcular y escribir periódicamente hasta que se detenga"""
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        while True:
+            try:
+                await self.flush_once()
+            except Exception as e:
+                print(f"⚠️  Error actualizando ETAs de órdenes: {e}")
+            
+            if self._stopping:
+                if self.lease is not None and self.is_leader:
+                    # Que otro worker tome las escrituras sin esperar a que venza
+                    try:
+                        self.lease.release()
+                    except Exception as e:
+                        print(f"⚠️  Error liberando la concesión de ETAs: {e}")
+                    self.is_leader = False
+                return
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+    
+    def stop(self):
+        """Pedir al motor que escriba lo pendiente y termine"""
+        self._stopping = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+    
+    def metrics(self) -> dict:
+        """Contadores del recálculo en este proceso"""
+        return {
+            "routes": len(self._plans),
+            "leader": self.is_leader,
+            "recomputed": self.recomputed,
+            "written": self.written,
+            "skipped": self.skipped
+        }
@@ -0,0 +1,261 @@
+"""
+Índice espacial en memoria de vehículos y paradas
+
+Grilla uniforme de celdas de `cell_degrees` grados (0.01° ≈ 1.1 km de
+latitud): un geohash de precisión fija, pero con celdas (fila, columna)
+enteras para que las vecinas salgan de sumar y restar, sin decodificar.
+Cada celda guarda los elementos que caen en ella con sus coordenadas;
+mover un vehículo es cambiarlo de celda solo si la cruzó.
+
+- k más cercanos: se recorren anillos de celdas alrededor del punto hasta
+  tener k candidatos más cerca que cualquier celda sin visitar.
+- Rectángulo: se recorren solo las celdas que lo cubren.
+Si hubiera que visitar más celdas que elementos (índice disperso o área
+muy grande) se revisan todos los elementos de una vez.
+
+Vehículos: última posición de cada uno, con cada lote de la ingesta.
+Paradas: las pendientes con ubicación de las rutas planificadas o en curso.
+Como el resto del seguimiento, el índice es por proceso.
+"""
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+import math
+
+import numpy as np
+
+from ..optimization import EARTH_RADIUS_KM, haversine_distances
+from ...domain.entities import AreaStop, Coordinates, NearbyVehicle, Position, Route, RouteStatus
+from ...domain.ports import IPositionBuffer, ISpatialIndex
+
+Cell = Tuple[int, int]
+
+_ACTIVE_STATUSES = (RouteStatus.PLANNED, RouteStatus.IN_PROGRESS)
+
+
+def _ring(row: int, col: int, distance: int) -> Iterator[Cell]:
+    """Celdas a exactamente `distance` celdas (en filas o columnas) de la central"""
+    if distance == 0:
+        yield row, col
+        return
+    for column in range(col - distance, col + distance + 1):
+        yield row - distance, column
+        yield row + distance, column
+    for line in range(row - distance + 1, row + distance):
+        yield line, col - distance
+        yield line, col + distance
+
+
+class GeoGrid:
+    """Elementos con coordenadas agrupados por celda de la grilla"""
+    
+    def __init__(self, cell_degrees: float = 0.01):
+        if cell_degrees <= 0:
+            raise ValueError("El tamaño de la celda debe ser mayor a 0")
+        self.cell_degrees = cell_degrees
+        self._cells: Dict[Cell, Dict[Hashable, Tuple[float, float]]] = {}
+        self._points: Dict[Hashable, Cell] = {}
+    
+    def __len__(self) -> int:
+        return len(self._points)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._points
+    
+    def _cell(self, lat: float, lon: float) -> Cell:
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+    
+    def put(self, key: Hashable, lat: float, lon: float) -> bool:
+        """Agregar o mover el elemento; retorna si cambió de celda"""
+        cell = self._cell(lat, lon)
+        previous = self._points.get(key)
+        self._points[key] = cell
+        if previous is not None and previous != cell:
+            self._discard(key, previous)
+        self._cells.setdefault(cell, {})[key] = (lat, lon)
+        return previous != cell
+    
+    def remove(self, key: Hashable) -> None:
+        previous = self._points.pop(key, None)
+        if previous is not None:
+            self._discard(key, previous)
+    
+    def _discard(self, key: Hashable, cell: Cell):
+        members = self._cells[cell]
+        del members[key]
+        if not members:
+            del self._cells[cell]
+    
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        k: int,
+        accept: Optional[Callable[[Hashable], bool]] = None
+    ) -> List[Tuple[Hashable, float]]:
+        """Los `k` elementos aceptados más cercanos, como (clave, km), del más cercano al más lejano"""
+        if k <= 0 or not self._points:
+            return []
+        row, col = self._cell(lat, lon)
+        keys: List[Hashable] = []
+        distances = np.empty(0)
+        distance = 0
+        while (2 * distance + 1) ** 2 <= len(self._points):
+            found = [
+                member
+                for cell in _ring(row, col, distance)
+                for member in self._cells.get(cell, {}).items()
+                if accept is None or accept(member[0])
+            ]
+            if found:
+                keys.extend(key for key, _ in found)
+                distances = np.concatenate((distances, self._distances(lat, lon, found)))
+            if len(keys) >= k:
+                closest = np.argpartition(distances, k - 1)[:k] if len(keys) > k else np.arange(len(keys))
+                # Nada fuera de los anillos visitados puede estar más cerca que el k-ésimo
+                if distances[closest].max() <= self._reach(lat, lon, row, col, distance):
+                    return self._sorted(keys, distances, closest)
+            distance += 1
+        
+        # Más anillos que elementos: revisar todos
+        found = [
+            member
+            for members in self._cells.values()
+            for member in members.items()
+            if accept is None or accept(member[0])
+        ]
+        if not found:
+            return []
+        keys = [key for key, _ in found]
+        distances = self._distances(lat, lon, found)
+        closest = np.argpartition(distances, k - 1)[:k] if len(keys) > k else np.arange(len(keys))
+        return self._sorted(keys, distances, closest)
+    
+    def within(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[Hashable]:
+        """Elementos dentro del rectángulo (bordes incluidos)"""
+        first_row, first_col = self._cell(min_lat, min_lon)
+        last_row, last_col = self._cell(max_lat, max_lon)
+        result: List[Hashable] = []
+        cells = self._cells
+        if (last_row - first_row + 1) * (last_col - first_col + 1) > len(cells):
+            border: Iterable[Dict[Hashable, Tuple[float, float]]] = cells.values()
+        else:
+            # Las celdas interiores caen enteras en el rectángulo: solo se revisan las del borde
+            for line in range(first_row + 1, last_row):
+                for column in range(first_col + 1, last_col):
+                    result.extend(cells.get((line, column), ()))
+            border = (
+                cells.get((line, column), {})
+                for line in range(first_row, last_row + 1)
+                for column in range(first_col, last_col + 1)
+                if line in (first_row, last_row) or column in (first_col, last_col)
+            )
+        for members in border:
+            for key, (lat, lon) in members.items():
+                if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon:
+                    result.append(key)
+        return result
+    
+    @staticmethod
+    def _distances(lat: float, lon: float, members: List[Tuple[Hashable, Tuple[float, float]]]) -> np.ndarray:
+        return haversine_distances(
+            [lat], [lon], [point[0] for _, point in members], [point[1] for _, point in members]
+        )[0]
+    
+    def _reach(self, lat: float, lon: float, row: int, col: int, distance: int) -> float:
+        """Distancia mínima (km) desde el punto a cualquier lugar fuera de los anillos visitados"""
+        size = self.cell_degrees
+        south, north = (row - distance) * size, (row + distance + 1) * size
+        west, east = (col - distance) * size, (col + distance + 1) * size
+        lat_gap = math.radians(min(lat - south, north - lat))
+        lon_gap = math.radians(min(lon - west, east - lon, 180.0))
+        # Entre latitudes de hasta `widest`, un salto de lon_gap no cubre menos que sobre ese paralelo
+        widest = math.radians(min(90.0, max(abs(south), abs(north))))
+        lon_reach = 2 * math.asin(min(1.0, math.cos(widest) * math.sin(lon_gap / 2)))
+        return EARTH_RADIUS_KM * min(lat_gap, lon_reach)
+    
+    @staticmethod
+    def _sorted(keys: List[Hashable], distances: np.ndarray, closest: np.ndarray) -> List[Tuple[Hashable, float]]:
+        closest = closest[np.argsort(distances[closest], kind="stable")]
+        return [(keys[index], float(distances[index])) for index in closest]
+
+
+class SpatialIndex(ISpatialIndex):
+    """
+    Vehículos y paradas de las rutas activas en dos grillas
+    
+    `positions_updated` lo llama la ingesta con cada lote; `track_route`,
+    los handlers que crean o cambian rutas. Un vehículo está ocupado
+    mientras su ruta está en curso.
+    """
+    
+    def __init__(self, position_buffer: IPositionBuffer, cell_degrees: float = 0.01):
+        self.position_buffer = position_buffer
+        self.moved = 0  # Vehículos que cambiaron de celda
+        self._vehicles = GeoGrid(cell_degrees)
+        self._stops = GeoGrid(cell_degrees)
+        self._positions: Dict[str, Position] = {}
+        # Claves enteras y crecientes: se hashean más rápido que (ruta, orden) y ordenarlas da el orden de las rutas
+        self._stop_details: Dict[int, AreaStop] = {}
+        self._route_stops: Dict[str, List[int]] = {}
+        self._next_stop_key = 0
+        self._route_vehicles: Dict[str, str] = {}
+        self._busy: Dict[str, str] = {}  # Vehículo -> ruta en curso
+    
+    def positions_updated(self, vehicle_ids: Sequence[str]) -> None:
+        for vehicle_id in dict.fromkeys(vehicle_ids):
+            position = self.position_buffer.latest(vehicle_id)
+            if position is not None:
+                self._positions[vehicle_id] = position
+                if self._vehicles.put(vehicle_id, position.lat, position.lon):
+                    self.moved += 1
+    
+    def track_route(self, route: Route) -> None:
+        route_id = str(route.id)
+        self.forget_route(route_id)
+        if route.status not in _ACTIVE_STATUSES:
+            return
+        
+        keys = []
+        for stop in sorted(route.remaining_stops, key=lambda stop: stop.priority):
+            if stop.location is None:
+                continue
+            key = self._next_stop_key
+            self._next_stop_key += 1
+            self._stop_details[key] = AreaStop(route_id, stop.order_id, stop.location, stop.priority, route.vehicle_id)
+            self._stops.put(key, stop.location.lat, stop.location.lon)
+            keys.append(key)
+        if keys:
+            self._route_stops[route_id] = keys
+        if route.status == RouteStatus.IN_PROGRESS and route.vehicle_id:
+            self._busy[route.vehicle_id] = route_id
+            self._route_vehicles[route_id] = route.vehicle_id
+    
+    def forget_route(self, route_id: str) -> None:
+        for key in self._route_stops.pop(route_id, ()):
+            self._stops.remove(key)
+            del self._stop_details[key]
+        vehicle_id = self._route_vehicles.pop(route_id, None)
+        if vehicle_id is not None and self._busy.get(vehicle_id) == route_id:
+            del self._busy[vehicle_id]
+    
+    def nearest_vehicles(self, point: Coordinates, k: int, available_only: bool = True) -> List[NearbyVehicle]:
+        busy = self._busy
+        accept = (lambda vehicle_id: vehicle_id not in busy) if available_only and busy else None
+        return [
+            NearbyVehicle(vehicle_id, self._positions[vehicle_id], distance_km, busy.get(vehicle_id))
+            for vehicle_id, distance_km in self._vehicles.nearest(point.lat, point.lon, k, accept)
+        ]
+    
+    def stops_in_area(self, south_west: Coordinates, north_east: Coordinates) -> List[AreaStop]:
+        keys = self._stops.within(south_west.lat, south_west.lon, north_east.lat, north_east.lon)
+        keys.sort()
+        details = self._stop_details
+        return [details[key] for key in keys]
+    
+    def metrics(self) -> dict:
+        """Contadores del índice en este proceso"""
+        return {
+            "vehicles": len(self._vehicles),
+            "busy": len(self._busy),
+            "stops": len(self._stops),
+            "moved": self.moved
+        }
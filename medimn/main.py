@@ -5,6 +5,7 @@ Combina todos los microservicios en una sola aplicación FastAPI
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import sys
 from pathlib import Path
 
@@ -25,7 +26,7 @@ except ImportError:
 
 # Product Service
 try:
-    from product.infrastructure.repositories import ProductModel
+    from product.infrastructure.repositories import ProductModel, StockReservationModel
 except ImportError:
     pass
 
@@ -40,7 +41,9 @@ except ImportError:
 
 # Logistics Service
 try:
-    from logistics.infrastructure.repositories import RouteModel
+    from logistics.infrastructure.repositories import (
+        RouteModel, RouteStopModel, GeocodeCacheModel, VehiclePositionModel, RouteTrackModel, RouteTrackChunkModel
+    )
 except ImportError:
     pass
 
@@ -50,6 +53,15 @@ try:
 except ImportError:
     pass
 
+# Secuencias de numeración compartidas
+from shared.infrastructure.number_allocator import NumberSequenceModel, HiLoNumberAllocator
+from shared.infrastructure.idempotency import IdempotencyKeyModel, IdempotencyStore
+from shared.infrastructure.outbox import OutboxEventModel, get_outbox_dispatcher
+from shared.infrastructure.event_transport import EventLogModel, EventTransportRelay, build_event_transport
+from shared.infrastructure.leases import WorkerLeaseModel
+from shared.domain.numbering import set_number_allocator
+from shared.domain.events import Backpressure, event_bus
+
 # Importar routers de todos los servicios
 from auth.api.routes import router as auth_router
 from product.api.routes import router as product_router
@@ -61,6 +73,23 @@ from notifications.api.routes import router as notifications_router
 
 settings = get_settings()
 
+# Frecuencia de limpieza de claves de idempotencia expiradas
+IDEMPOTENCY_PURGE_INTERVAL_SECONDS = 3600
+
+# Tiempo máximo para drenar el outbox al apagar
+OUTBOX_DRAIN_TIMEOUT_SECONDS = 5
+
+
+async def _purge_idempotency_keys():
+    """Eliminar periódicamente las claves de idempotencia expiradas"""
+    store = IdempotencyStore()
+    while True:
+        try:
+            store.purge_expired()
+        except Exception as e:
+            print(f"⚠️  Error limpiando claves de idempotencia: {e}")
+        await asyncio.sleep(IDEMPOTENCY_PURGE_INTERVAL_SECONDS)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -80,6 +109,27 @@ async def lifespan(app: FastAPI):
     create_tables()
     print("✅ Base de datos inicializada")
     
+    # Números de orden/ruta únicos entre workers sin consulta por orden
+    from infrastructure.database import engine
+    set_number_allocator(HiLoNumberAllocator(engine))
+    
+    from logistics.api.dependencies import (
+        distance_matrix, eta_engine, fleet_planner, position_flusher, track_active_routes, track_archiver
+    )
+    
+    # Guardar por lotes las posiciones GPS recibidas
+    position_flusher_task = asyncio.create_task(position_flusher.run())
+    
+    # Recalcular las ETAs de las rutas en curso y llevarlas a las órdenes; indexar las paradas activas
+    try:
+        await track_active_routes()
+    except Exception as e:
+        print(f"⚠️  Error cargando rutas activas para ETAs e índice espacial: {e}")
+    eta_engine_task = asyncio.create_task(eta_engine.run())
+    
+    # Comprimir el recorrido de las rutas completadas
+    track_archiver_task = asyncio.create_task(track_archiver.run())
+    
     # Configurar event handlers de cada servicio
     try:
         from auth.application.services import UserEventHandler, setup_event_handlers as setup_auth_handlers
@@ -105,9 +155,75 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"⚠️  Error configurando order handlers: {e}")
     
+    purge_task = asyncio.create_task(_purge_idempotency_keys())
+    
+    # Liberar por lotes las reservas de stock vencidas
+    from product.infrastructure.reservation_sweeper import StockReservationSweeper
+    sweeper_task = asyncio.create_task(
+        StockReservationSweeper(interval_seconds=settings.stock_reservation_sweep_seconds).run()
+    )
+    
+    # Opcional: handlers de eventos fuera de la petición (cola acotada + pool de workers)
+    if settings.event_bus_mode == "async":
+        event_bus.start(
+            workers=settings.event_bus_workers,
+            max_queue_size=settings.event_bus_queue_size,
+            backpressure=Backpressure(settings.event_bus_backpressure),
+            handler_timeout=settings.event_bus_handler_timeout_seconds,
+            max_overflow_size=settings.event_bus_overflow_size
+        )
+    
+    # Reenviar los eventos a los demás workers y recibir los suyos
+    transport = build_event_transport(settings)
+    relay, relay_task = None, None
+    if transport is not None:
+        await transport.start()
+        event_bus.attach_transport(transport)
+        relay = EventTransportRelay(
+            transport,
+            batch_size=settings.event_transport_batch_size,
+            poll_interval_seconds=settings.event_transport_poll_seconds
+        )
+        relay_task = asyncio.create_task(relay.run())
+    app.state.event_relay = relay
+    
+    # Entregar en segundo plano los eventos del outbox
+    dispatcher = get_outbox_dispatcher()
+    dispatcher_task = asyncio.create_task(dispatcher.run())
+    
     yield
     
     # Shutdown
+    purge_task.cancel()
+    sweeper_task.cancel()
+    fleet_planner.shutdown()
+    distance_matrix.close()
+    position_flusher.stop()
+    await position_flusher_task
+    eta_engine.stop()
+    await eta_engine_task
+    track_archiver.stop()
+    await track_archiver_task
+    
+    # Drenar lo pendiente antes de cerrar; lo que quede se entrega al reiniciar
+    dispatcher.stop()
+    try:
+        await asyncio.wait_for(dispatcher_task, timeout=OUTBOX_DRAIN_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        pass
+    
+    if relay is not None:
+        relay.stop()
+        try:
+            await asyncio.wait_for(relay_task, timeout=settings.event_transport_poll_seconds * 2)
+        except asyncio.TimeoutError:
+            relay_task.cancel()
+        event_bus.detach_transport()
+        await transport.close()
+    
+    # Procesar los eventos encolados antes de salir
+    if not await event_bus.drain(timeout=settings.event_bus_drain_timeout_seconds):
+        print("⚠️  Eventos sin procesar al vencer el drenado del event bus")
     print(f"🛑 Cerrando {settings.service_name}")
 
 
@@ -170,6 +286,16 @@ def create_app() -> FastAPI:
             "environment": settings.environment
         }
     
+    @app.get("/metrics/events")
+    async def events_metrics():
+        """Retraso del outbox, cola del event bus y transporte entre procesos"""
+        relay = getattr(app.state, "event_relay", None)
+        return {
+            "outbox": get_outbox_dispatcher().metrics(),
+            "bus": event_bus.metrics(),
+            "transport": relay.metrics() if relay is not None else None
+        }
+    
     return app
 
 
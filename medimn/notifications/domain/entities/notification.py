@@ -35,6 +35,17 @@ class NotificationPriority(Enum):
 class Notification(Entity):
     """Entidad que representa una notificación"""
     
+    __slots__ = (
+        "_user_id",
+        "_title",
+        "_message",
+        "_notification_type",
+        "_priority",
+        "_is_read",
+        "_link",
+        "_metadata",
+    )
+    
     def __init__(
         self,
         notification_id: EntityId,
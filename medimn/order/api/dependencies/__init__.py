@@ -1,14 +1,17 @@
 """
 Dependencies de la API
 """
+from contextlib import contextmanager
 from functools import lru_cache
 from fastapi import Depends
-from ...infrastructure.database import get_db
+from ...infrastructure.database import StreamingSessionLocal, get_db
 from ...infrastructure.repositories import SQLAlchemyOrderRepository
 from ...infrastructure.adapters.product_service_adapter import ProductServiceAdapter
 from ...domain.ports import IOrderRepository
 from ...application.handlers import (
     CreateOrderCommandHandler,
+    BulkCreateOrdersCommandHandler,
+    BulkOrderTransitionCommandHandler,
     UpdateOrderCommandHandler,
     ConfirmOrderCommandHandler,
     CancelOrderCommandHandler,
@@ -16,12 +19,18 @@ from ...application.handlers import (
     MarkOrderShippedCommandHandler,
     MarkOrderDeliveredCommandHandler,
     AddReservationCommandHandler,
+    ReserveOrderStockCommandHandler,
     RemoveReservationCommandHandler,
     RequestReturnCommandHandler,
     DeleteOrderCommandHandler,
     GetOrderByIdQueryHandler,
     GetOrdersByStatusQueryHandler,
-    GetAllOrdersQueryHandler
+    GetAllOrdersQueryHandler,
+    GetOrdersBySkuQueryHandler,
+    GetSkuSalesQueryHandler,
+    GetMonthlyRevenueQueryHandler,
+    GetOrderChangesQueryHandler,
+    ExportOrdersQueryHandler
 )
 
 
@@ -43,6 +52,22 @@ def get_create_order_handler(
     return CreateOrderCommandHandler(repo, product_adapter)
 
 
+def get_bulk_create_orders_handler(
+    repo=Depends(get_order_repository),
+    product_adapter=Depends(get_product_adapter)
+):
+    """Dependency para obtener handler de crear órdenes en lote"""
+    return BulkCreateOrdersCommandHandler(repo, product_adapter)
+
+
+def get_bulk_order_transition_handler(
+    repo=Depends(get_order_repository),
+    product_adapter=Depends(get_product_adapter)
+):
+    """Dependency para obtener handler de transiciones de estado en lote"""
+    return BulkOrderTransitionCommandHandler(repo, product_adapter)
+
+
 def get_update_order_handler(repo=Depends(get_order_repository)):
     """Dependency para obtener handler de actualizar orden"""
     return UpdateOrderCommandHandler(repo)
@@ -53,9 +78,12 @@ def get_confirm_order_handler(repo=Depends(get_order_repository)):
     return ConfirmOrderCommandHandler(repo)
 
 
-def get_cancel_order_handler(repo=Depends(get_order_repository)):
+def get_cancel_order_handler(
+    repo=Depends(get_order_repository),
+    product_adapter=Depends(get_product_adapter)
+):
     """Dependency para obtener handler de cancelar orden"""
-    return CancelOrderCommandHandler(repo)
+    return CancelOrderCommandHandler(repo, product_adapter)
 
 
 def get_mark_order_picked_handler(repo=Depends(get_order_repository)):
@@ -78,9 +106,20 @@ def get_add_reservation_handler(repo=Depends(get_order_repository)):
     return AddReservationCommandHandler(repo)
 
 
-def get_remove_reservation_handler(repo=Depends(get_order_repository)):
+def get_reserve_order_stock_handler(
+    repo=Depends(get_order_repository),
+    product_adapter=Depends(get_product_adapter)
+):
+    """Dependency para obtener handler de reservar stock de una orden"""
+    return ReserveOrderStockCommandHandler(repo, product_adapter)
+
+
+def get_remove_reservation_handler(
+    repo=Depends(get_order_repository),
+    product_adapter=Depends(get_product_adapter)
+):
     """Dependency para obtener handler de eliminar reserva"""
-    return RemoveReservationCommandHandler(repo)
+    return RemoveReservationCommandHandler(repo, product_adapter)
 
 
 def get_order_by_id_handler(repo=Depends(get_order_repository)):
@@ -106,3 +145,39 @@ def get_request_return_handler(repo=Depends(get_order_repository)):
 def get_delete_order_handler(repo=Depends(get_order_repository)):
     """Dependency para obtener handler de eliminar orden"""
     return DeleteOrderCommandHandler(repo)
+
+
+def get_orders_by_sku_handler(repo=Depends(get_order_repository)):
+    """Dependency para obtener handler de órdenes por SKU"""
+    return GetOrdersBySkuQueryHandler(repo)
+
+
+def get_sku_sales_handler(repo=Depends(get_order_repository)):
+    """Dependency para obtener handler de ventas por SKU"""
+    return GetSkuSalesQueryHandler(repo)
+
+
+def get_monthly_revenue_handler(repo=Depends(get_order_repository)):
+    """Dependency para obtener handler de ingresos por mes"""
+    return GetMonthlyRevenueQueryHandler(repo)
+
+
+def get_order_changes_handler(repo=Depends(get_order_repository)):
+    """Dependency para obtener handler del feed de cambios de órdenes"""
+    return GetOrderChangesQueryHandler(repo)
+
+
+@contextmanager
+def _export_order_repository():
+    """Repositorio con conexión propia que dura lo que dura la respuesta en streaming"""
+    db = StreamingSessionLocal()
+    try:
+        yield SQLAlchemyOrderRepository(db)
+    finally:
+        db.close()
+
+
+def get_export_orders_handler():
+    """Dependency para obtener handler de exportación de órdenes"""
+    # No usa get_db: su sesión se cierra antes de que termine el streaming
+    return ExportOrdersQueryHandler(_export_order_repository)
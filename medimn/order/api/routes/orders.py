@@ -1,22 +1,30 @@
 """
 Rutas de la API de órdenes
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
 from ...application.commands import (
-    CreateOrderCommand, UpdateOrderCommand, ConfirmOrderCommand,
+    CreateOrderCommand, BulkCreateOrdersCommand, UpdateOrderCommand, ConfirmOrderCommand,
     CancelOrderCommand, MarkOrderPickedCommand, MarkOrderShippedCommand,
     MarkOrderDeliveredCommand, AddReservationCommand, RemoveReservationCommand,
-    RequestReturnCommand, DeleteOrderCommand
+    ReserveOrderStockCommand, RequestReturnCommand, DeleteOrderCommand,
+    BulkConfirmOrdersCommand, BulkMarkOrdersPickedCommand, BulkMarkOrdersShippedCommand,
+    BulkMarkOrdersDeliveredCommand, BulkCancelOrdersCommand
 )
 from ...application.queries import (
-    GetOrderByIdQuery, GetOrdersByStatusQuery, GetAllOrdersQuery
+    GetOrderByIdQuery, GetOrdersByStatusQuery, GetAllOrdersQuery,
+    GetOrdersBySkuQuery, GetSkuSalesQuery, GetOrderChangesQuery, ExportOrdersQuery
 )
+from ...application.handlers import EXPORT_MEDIA_TYPES
+from shared.infrastructure.idempotency import IDEMPOTENCY_HEADER, get_idempotency_store
 from ..dependencies import (
     get_create_order_handler,
+    get_bulk_create_orders_handler,
+    get_bulk_order_transition_handler,
     get_update_order_handler,
     get_confirm_order_handler,
     get_cancel_order_handler,
@@ -24,12 +32,17 @@ from ..dependencies import (
     get_mark_order_shipped_handler,
     get_mark_order_delivered_handler,
     get_add_reservation_handler,
+    get_reserve_order_stock_handler,
     get_remove_reservation_handler,
     get_order_by_id_handler,
     get_orders_by_status_handler,
     get_all_orders_handler,
     get_request_return_handler,
-    get_delete_order_handler
+    get_delete_order_handler,
+    get_orders_by_sku_handler,
+    get_sku_sales_handler,
+    get_order_changes_handler,
+    get_export_orders_handler
 )
 
 router = APIRouter()
@@ -64,6 +77,16 @@ class CreateOrderRequest(BaseModel):
     routeId: Optional[str] = None
 
 
+class BulkCreateOrdersRequest(BaseModel):
+    """Request para crear órdenes en lote"""
+    orders: List[CreateOrderRequest] = Field(..., min_items=1, max_items=500)
+
+
+class BulkTransitionRequest(BaseModel):
+    """Request para transición de estado en lote"""
+    orderIds: List[str] = Field(..., min_items=1, max_items=1000)
+
+
 class UpdateOrderRequest(BaseModel):
     """Request para actualizar orden"""
     items: Optional[List[OrderItemRequest]] = None
@@ -105,12 +128,131 @@ class OrderResponse(BaseModel):
     eta: Optional[dict] = None
     totals: Optional[dict] = None
     totalAmount: Optional[float] = None
+    currency: Optional[str] = None
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     createdAt: Optional[str] = None  # Alias según especificación
     updatedAt: Optional[str] = None  # Alias según especificación
 
 
+class SkuSalesResponse(BaseModel):
+    """Response de ventas agregadas por SKU"""
+    skuId: str
+    currency: str
+    units: int
+    revenue: float
+    revenueMinor: int  # Ingresos exactos en centavos
+    orders: int
+
+
+class OrderChangeResponse(BaseModel):
+    """Cambio de una orden en el feed (solo datos de resumen)"""
+    op: str  # "upsert" o "delete"
+    orderId: str
+    changeSeq: int
+    orderNumber: Optional[str] = None
+    status: Optional[str] = None
+    clientId: Optional[str] = None
+    vendorId: Optional[str] = None
+    total: Optional[float] = None
+    currency: Optional[str] = None
+    updatedAt: Optional[datetime] = None
+
+
+class OrderChangesResponse(BaseModel):
+    """Página del feed de cambios con su token de continuación"""
+    changes: List[OrderChangeResponse]
+    nextToken: str
+    hasMore: bool
+
+
+class BulkOrderResultResponse(BaseModel):
+    """Resultado de una orden dentro de un lote"""
+    index: int
+    success: bool
+    order: Optional[OrderResponse] = None
+    error: Optional[str] = None
+
+
+class BulkCreateOrdersResponse(BaseModel):
+    """Response de creación de órdenes en lote"""
+    created: int
+    failed: int
+    results: List[BulkOrderResultResponse]
+
+
+class BulkTransitionResultResponse(BaseModel):
+    """Resultado de una orden dentro de una transición en lote"""
+    orderId: str
+    success: bool
+    error: Optional[str] = None
+
+
+class BulkTransitionResponse(BaseModel):
+    """Response de transición de estado en lote"""
+    updated: int
+    rejected: int
+    results: List[BulkTransitionResultResponse]
+
+
+# Acción de la URL -> comando de transición en lote
+BULK_TRANSITION_COMMANDS = {
+    "confirm": BulkConfirmOrdersCommand,
+    "pick": BulkMarkOrdersPickedCommand,
+    "ship": BulkMarkOrdersShippedCommand,
+    "deliver": BulkMarkOrdersDeliveredCommand,
+    "cancel": BulkCancelOrdersCommand,
+}
+
+
+def _to_create_command(request: CreateOrderRequest) -> CreateOrderCommand:
+    """Construir el comando de creación desde el request"""
+    return CreateOrderCommand(
+        items=[item.model_dump() for item in request.items],
+        eta=request.eta.model_dump() if request.eta else None,
+        client_id=request.clientId,
+        vendor_id=request.vendorId,
+        delivery_address=request.deliveryAddress,
+        delivery_date=request.deliveryDate,
+        contact_name=request.contactName,
+        contact_phone=request.contactPhone,
+        notes=request.notes,
+        route_id=request.routeId
+    )
+
+
+def _to_order_response(order) -> OrderResponse:
+    """Construir la respuesta de una orden"""
+    return OrderResponse(
+        id=str(order.id),
+        _id=str(order.id),
+        orderNumber=order.order_number,
+        clientId=order.client_id,
+        vendorId=order.vendor_id,
+        products=[item.to_dict() for item in order.items],
+        items=[item.to_dict() for item in order.items],
+        status=order.status.value,
+        deliveryAddress=order.delivery_address,
+        deliveryDate=order.delivery_date,
+        contactName=order.contact_name,
+        contactPhone=order.contact_phone,
+        notes=order.notes,
+        routeId=order.route_id,
+        returnRequested=order.return_requested,
+        returnReason=order.return_reason,
+        returnStatus=order.return_status.value if order.return_status else None,
+        reservations=order.reservations,
+        eta=order.eta.to_dict() if order.eta else None,
+        totals=order.totals,
+        totalAmount=order.total_amount,
+        currency=order.currency,
+        created_at=order.created_at,
+        updated_at=order.updated_at,
+        createdAt=order.created_at.isoformat() if order.created_at else None,
+        updatedAt=order.updated_at.isoformat() if order.updated_at else None
+    )
+
+
 # ========== Endpoints ==========
 
 @router.post(
@@ -122,22 +264,24 @@ class OrderResponse(BaseModel):
 )
 async def create_order(
     request: CreateOrderRequest,
-    handler=Depends(get_create_order_handler)
+    handler=Depends(get_create_order_handler),
+    idempotency_store=Depends(get_idempotency_store),
+    idempotency_key: Optional[str] = Header(None, alias=IDEMPOTENCY_HEADER)
 ):
-    """Crear nueva orden"""
+    """Crear nueva orden (reintentos con el mismo Idempotency-Key reproducen la respuesta)"""
+    return await idempotency_store.run(
+        scope="orders",
+        key=idempotency_key,
+        payload=request.model_dump(mode="json"),
+        operation=lambda: _create_order(request, handler),
+        status_code=status.HTTP_201_CREATED
+    )
+
+
+async def _create_order(request: CreateOrderRequest, handler) -> OrderResponse:
+    """Crear la orden y construir la respuesta"""
     try:
-        command = CreateOrderCommand(
-            items=[item.model_dump() for item in request.items],
-            eta=request.eta.model_dump() if request.eta else None,
-            client_id=request.clientId,
-            vendor_id=request.vendorId,
-            delivery_address=request.deliveryAddress,
-            delivery_date=request.deliveryDate,
-            contact_name=request.contactName,
-            contact_phone=request.contactPhone,
-            notes=request.notes,
-            route_id=request.routeId
-        )
+        command = _to_create_command(request)
         
         order = await handler.handle(command)
         
@@ -163,6 +307,7 @@ async def create_order(
             eta=order.eta.to_dict() if order.eta else None,
             totals=order.totals,
             totalAmount=order.total_amount,
+            currency=order.currency,
             created_at=order.created_at,
             updated_at=order.updated_at,
             createdAt=order.created_at.isoformat() if order.created_at else None,
@@ -175,6 +320,218 @@ async def create_order(
         )
 
 
+@router.post(
+    "/orders/bulk",
+    response_model=BulkCreateOrdersResponse,
+    summary="Crear órdenes en lote",
+    description="Crea varias órdenes validando todos los SKUs con una consulta y guardándolas en una transacción"
+)
+async def bulk_create_orders(
+    request: BulkCreateOrdersRequest,
+    handler=Depends(get_bulk_create_orders_handler)
+):
+    """Crear órdenes en lote con resultado por orden"""
+    try:
+        command = BulkCreateOrdersCommand(
+            orders=[_to_create_command(order_request) for order_request in request.orders]
+        )
+        
+        results = await handler.handle(command)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    created = sum(1 for result in results if result.success)
+    return BulkCreateOrdersResponse(
+        created=created,
+        failed=len(results) - created,
+        results=[
+            BulkOrderResultResponse(
+                index=result.index,
+                success=result.success,
+                order=_to_order_response(result.order) if result.order else None,
+                error=result.error
+            )
+            for result in results
+        ]
+    )
+
+
+@router.post(
+    "/orders/bulk/{action}",
+    response_model=BulkTransitionResponse,
+    summary="Transición de estado en lote",
+    description="Confirma, recoge, envía, entrega o cancela varias órdenes validando la máquina de estados por conjunto"
+)
+async def bulk_transition_orders(
+    action: str,
+    request: BulkTransitionRequest,
+    handler=Depends(get_bulk_order_transition_handler)
+):
+    """Aplicar una transición de estado a varias órdenes"""
+    command_class = BULK_TRANSITION_COMMANDS.get(action)
+    if not command_class:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Acción {action} no soportada. Use: {', '.join(BULK_TRANSITION_COMMANDS)}"
+        )
+    
+    results = await handler.handle(command_class(order_ids=request.orderIds))
+    
+    updated = sum(1 for result in results if result.success)
+    return BulkTransitionResponse(
+        updated=updated,
+        rejected=len(results) - updated,
+        results=[
+            BulkTransitionResultResponse(
+                orderId=result.order_id,
+                success=result.success,
+                error=result.error
+            )
+            for result in results
+        ]
+    )
+
+
+@router.get(
+    "/orders/by-sku/{sku_id}",
+    response_model=List[OrderResponse],
+    summary="Órdenes por SKU",
+    description="Lista las órdenes que contienen un SKU (por defecto solo órdenes abiertas)"
+)
+async def list_orders_by_sku(
+    sku_id: str,
+    statuses: Optional[List[str]] = Query(None, alias="status"),
+    skip: int = 0,
+    limit: int = 100,
+    handler=Depends(get_orders_by_sku_handler)
+):
+    """Listar órdenes que contienen un SKU"""
+    try:
+        query = GetOrdersBySkuQuery(sku_id=sku_id, statuses=statuses, skip=skip, limit=limit)
+        orders = await handler.handle(query)
+        
+        return [_to_order_response(order) for order in orders]
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get(
+    "/orders/changes",
+    response_model=OrderChangesResponse,
+    summary="Feed de cambios de órdenes",
+    description="Cambios y eliminaciones de órdenes desde un token de continuación, para sincronizar clientes"
+)
+async def get_order_changes(
+    since: Optional[str] = None,
+    limit: int = 500,
+    clientId: Optional[str] = None,
+    vendorId: Optional[str] = None,
+    handler=Depends(get_order_changes_handler)
+):
+    """Obtener los cambios de órdenes posteriores al token"""
+    try:
+        query = GetOrderChangesQuery(since=since, limit=limit, client_id=clientId, vendor_id=vendorId)
+        page = await handler.handle(query)
+        
+        return OrderChangesResponse(
+            changes=[
+                OrderChangeResponse(
+                    op=change["op"],
+                    orderId=change["order_id"],
+                    changeSeq=change["change_seq"],
+                    orderNumber=change.get("order_number"),
+                    status=change.get("status"),
+                    clientId=change.get("client_id"),
+                    vendorId=change.get("vendor_id"),
+                    total=change.get("total"),
+                    currency=change.get("currency"),
+                    updatedAt=change["updated_at"]
+                )
+                for change in page["changes"]
+            ],
+            nextToken=page["next_token"],
+            hasMore=page["has_more"]
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get(
+    "/orders/export",
+    response_class=StreamingResponse,
+    summary="Exportar órdenes",
+    description="Exporta las órdenes de un rango de fechas en CSV o NDJSON, enviadas en streaming"
+)
+async def export_orders(
+    format: str = "csv",
+    dateFrom: Optional[datetime] = None,
+    dateTo: Optional[datetime] = None,
+    statuses: Optional[List[str]] = Query(None, alias="status"),
+    handler=Depends(get_export_orders_handler)
+):
+    """Exportar órdenes en streaming"""
+    try:
+        query = ExportOrdersQuery(format=format, date_from=dateFrom, date_to=dateTo, statuses=statuses)
+        chunks = handler.handle(query)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return StreamingResponse(
+        chunks,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            'Content-Disposition': f'attachment; filename="orders.{format}"'
+        }
+    )
+
+
+@router.get(
+    "/orders/sku-sales",
+    response_model=List[SkuSalesResponse],
+    summary="Ventas por SKU",
+    description="Unidades vendidas e ingresos por SKU en un rango de fechas"
+)
+async def get_sku_sales(
+    dateFrom: Optional[datetime] = None,
+    dateTo: Optional[datetime] = None,
+    skuId: Optional[str] = None,
+    handler=Depends(get_sku_sales_handler)
+):
+    """Obtener ventas agregadas por SKU"""
+    try:
+        query = GetSkuSalesQuery(date_from=dateFrom, date_to=dateTo, sku_id=skuId)
+        rows = await handler.handle(query)
+        
+        return [
+            SkuSalesResponse(
+                skuId=row["sku_id"],
+                currency=row["currency"],
+                units=row["units"],
+                revenue=row["revenue"],
+                revenueMinor=row["revenue_minor"],
+                orders=row["orders"]
+            )
+            for row in rows
+        ]
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
 @router.get(
     "/orders/{order_id}",
     response_model=OrderResponse,
@@ -212,6 +569,7 @@ async def get_order(
             eta=order.eta.to_dict() if order.eta else None,
             totals=order.totals,
             totalAmount=order.total_amount,
+            currency=order.currency,
             created_at=order.created_at,
             updated_at=order.updated_at,
             createdAt=order.created_at.isoformat() if order.created_at else None,
@@ -264,6 +622,7 @@ async def list_orders(
                 eta=order.eta.to_dict() if order.eta else None,
                 totals=order.totals,
                 totalAmount=order.total_amount,
+                currency=order.currency,
                 created_at=order.created_at,
                 updated_at=order.updated_at,
                 createdAt=order.created_at.isoformat() if order.created_at else None,
@@ -332,6 +691,7 @@ async def update_order(
             eta=order.eta.to_dict() if order.eta else None,
             totals=order.totals,
             totalAmount=order.total_amount,
+            currency=order.currency,
             created_at=order.created_at,
             updated_at=order.updated_at,
             createdAt=order.created_at.isoformat() if order.created_at else None,
@@ -419,6 +779,7 @@ async def request_return(
             eta=order.eta.to_dict() if order.eta else None,
             totals=order.totals,
             totalAmount=order.total_amount,
+            currency=order.currency,
             created_at=order.created_at,
             updated_at=order.updated_at,
             createdAt=order.created_at.isoformat() if order.created_at else None,
@@ -435,3 +796,49 @@ async def request_return(
             detail=str(e)
         )
 
+
+@router.post(
+    "/orders/{order_id}/reservations",
+    response_model=OrderResponse,
+    summary="Reservar stock de la orden",
+    description="Retiene el stock de todos los ítems de la orden con una reserva que vence por TTL"
+)
+async def reserve_order_stock(
+    order_id: str,
+    handler=Depends(get_reserve_order_stock_handler)
+):
+    """Reservar stock de una orden"""
+    try:
+        order = await handler.handle(ReserveOrderStockCommand(order_id=order_id))
+        return _to_order_response(order)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
+@router.delete(
+    "/orders/{order_id}/reservations/{reservation_id}",
+    response_model=OrderResponse,
+    summary="Liberar reserva de la orden",
+    description="Libera el stock retenido por una reserva y la quita de la orden"
+)
+async def remove_order_reservation(
+    order_id: str,
+    reservation_id: str,
+    handler=Depends(get_remove_reservation_handler)
+):
+    """Liberar reserva de una orden"""
+    try:
+        order = await handler.handle(RemoveReservationCommand(
+            order_id=order_id,
+            reservation_id=reservation_id
+        ))
+        return _to_order_response(order)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
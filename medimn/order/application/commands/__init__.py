@@ -22,6 +22,12 @@ class CreateOrderCommand:
     route_id: Optional[str] = None
 
 
+@dataclass
+class BulkCreateOrdersCommand:
+    """Comando para crear varias órdenes en un solo lote"""
+    orders: List[CreateOrderCommand]
+
+
 @dataclass
 class UpdateOrderCommand:
     """Comando para actualizar una orden"""
@@ -67,6 +73,36 @@ class MarkOrderDeliveredCommand:
     order_id: str
 
 
+@dataclass
+class BulkConfirmOrdersCommand:
+    """Comando para confirmar varias órdenes"""
+    order_ids: List[str]
+
+
+@dataclass
+class BulkMarkOrdersPickedCommand:
+    """Comando para marcar varias órdenes como recogidas"""
+    order_ids: List[str]
+
+
+@dataclass
+class BulkMarkOrdersShippedCommand:
+    """Comando para marcar varias órdenes como enviadas (ola de despacho)"""
+    order_ids: List[str]
+
+
+@dataclass
+class BulkMarkOrdersDeliveredCommand:
+    """Comando para marcar varias órdenes como entregadas"""
+    order_ids: List[str]
+
+
+@dataclass
+class BulkCancelOrdersCommand:
+    """Comando para cancelar varias órdenes"""
+    order_ids: List[str]
+
+
 @dataclass
 class AddReservationCommand:
     """Comando para agregar reserva a una orden"""
@@ -74,6 +110,12 @@ class AddReservationCommand:
     reservation_id: str
 
 
+@dataclass
+class ReserveOrderStockCommand:
+    """Comando para retener el stock de todos los ítems de una orden"""
+    order_id: str
+
+
 @dataclass
 class RemoveReservationCommand:
     """Comando para eliminar reserva de una orden"""
@@ -1,29 +1,40 @@
 """
 Handlers para comandos y queries
 """
+import asyncio
+import csv
+import io
+import json
 import sys
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Callable, ContextManager, Dict, Iterable, Iterator, List, Optional
 
 # Agregar el path del módulo shared al PYTHONPATH
 shared_path = str(Path(__file__).parent.parent.parent.parent / "shared")
 if shared_path not in sys.path:
     sys.path.insert(0, shared_path)
 
-from shared.domain.value_objects import EntityId
-from shared.domain.events import event_bus
+from shared.domain.value_objects import DEFAULT_CURRENCY, EntityId, minor_unit_exponent
 from ..commands import (
-    CreateOrderCommand, UpdateOrderCommand, ConfirmOrderCommand,
+    CreateOrderCommand, BulkCreateOrdersCommand, UpdateOrderCommand, ConfirmOrderCommand,
     CancelOrderCommand, MarkOrderPickedCommand, MarkOrderShippedCommand,
     MarkOrderDeliveredCommand, AddReservationCommand, RemoveReservationCommand,
+    ReserveOrderStockCommand, BulkConfirmOrdersCommand, BulkMarkOrdersPickedCommand, BulkMarkOrdersShippedCommand,
+    BulkMarkOrdersDeliveredCommand, BulkCancelOrdersCommand,
     RequestReturnCommand, DeleteOrderCommand
 )
 from ..queries import (
-    GetOrderByIdQuery, GetOrdersByStatusQuery, GetAllOrdersQuery
+    GetOrderByIdQuery, GetOrdersByStatusQuery, GetAllOrdersQuery,
+    GetOrdersBySkuQuery, GetSkuSalesQuery, GetMonthlyRevenueQuery, GetOrderChangesQuery,
+    ExportOrdersQuery
+)
+from ...domain.entities import (
+    Order, OrderItem, ETA, OrderStatus, OPEN_ORDER_STATUSES, ORDER_TRANSITIONS
 )
-from ...domain.entities import Order, OrderItem, ETA, OrderStatus
 from ...domain.events import (
     OrderCreatedEvent, OrderConfirmedEvent, OrderCancelledEvent,
-    OrderShippedEvent, OrderDeliveredEvent
+    OrderPickedEvent, OrderShippedEvent, OrderDeliveredEvent
 )
 from ...domain.ports import IOrderRepository
 
@@ -42,19 +53,31 @@ class CreateOrderCommandHandler:
     async def handle(self, command: CreateOrderCommand) -> Order:
         """Manejar comando de creación de orden"""
         # Validar productos con el servicio de productos (si el adaptador está disponible)
+        currencies = None
         if self.product_adapter:
             try:
                 sku_ids = [item["skuId"] for item in command.items]
-                await self.product_adapter.validate_products(sku_ids)
+                currencies = await self.product_adapter.validate_products(sku_ids)
             except ValueError as e:
                 raise ValueError(f"Error al validar productos: {str(e)}")
         
+        order = self._build_order(command, currencies)
+        
+        # Guardar orden junto con su evento de creación (outbox)
+        self._record_created(order)
+        order = await self.order_repository.save(order)
+        
+        return order
+    
+    def _build_order(self, command: CreateOrderCommand, currencies: Optional[Dict[str, str]] = None) -> Order:
+        """Construir la entidad a partir del comando; cada artículo toma la moneda de su producto"""
         # Convertir items
         order_items = [
             OrderItem(
                 sku_id=item["skuId"],
                 qty=item["qty"],
-                price=item["price"]
+                price=item["price"],
+                currency=(currencies or {}).get(item["skuId"], DEFAULT_CURRENCY)
             )
             for item in command.items
         ]
@@ -69,7 +92,7 @@ class CreateOrderCommandHandler:
             )
         
         # Crear orden
-        order = Order.create(
+        return Order.create(
             items=order_items,
             reservations=command.reservations,
             eta=eta,
@@ -83,22 +106,69 @@ class CreateOrderCommandHandler:
             notes=command.notes,
             route_id=command.route_id
         )
-        
-        # Guardar orden
-        order = await self.order_repository.save(order)
-        
-        # Publicar eventos
+    
+    @staticmethod
+    def _record_created(order: Order) -> None:
+        """Registrar el evento de orden creada"""
         order._record_event(OrderCreatedEvent(
             order_id=str(order.id),
             user_id=""  # En producción, obtener del contexto de autenticación
         ))
+
+
+@dataclass
+class BulkOrderResult:
+    """Resultado de una orden dentro de un lote"""
+    index: int
+    order: Optional[Order] = None
+    error: Optional[str] = None
+    
+    @property
+    def success(self) -> bool:
+        return self.order is not None
+
+
+class BulkCreateOrdersCommandHandler(CreateOrderCommandHandler):
+    """Handler para el comando BulkCreateOrders (una consulta al catálogo y una transacción)"""
+    
+    async def handle(self, command: BulkCreateOrdersCommand) -> List[BulkOrderResult]:
+        """Manejar comando de creación de órdenes en lote"""
+        # Validar todos los SKUs del lote con una sola consulta al catálogo
+        available_skus = None
+        if self.product_adapter:
+            sku_ids = list(dict.fromkeys(
+                item["skuId"] for order_command in command.orders for item in order_command.items
+            ))
+            try:
+                available_skus = await self.product_adapter.get_available_skus(sku_ids)
+            except ValueError as e:
+                raise ValueError(f"Error al validar productos: {str(e)}")
         
-        for event in order.get_domain_events():
-            await event_bus.publish(event)
+        results = [BulkOrderResult(index=index) for index in range(len(command.orders))]
+        valid_orders = []
+        for result, order_command in zip(results, command.orders):
+            if available_skus is not None:
+                missing = [item["skuId"] for item in order_command.items if item["skuId"] not in available_skus]
+                if missing:
+                    result.error = f"Producto con SKU {missing[0]} no encontrado o no está activo"
+                    continue
+            try:
+                valid_orders.append((result, self._build_order(order_command, available_skus)))
+            except ValueError as e:
+                result.error = str(e)
         
-        order.clear_domain_events()
+        if not valid_orders:
+            return results
         
-        return order
+        # Guardar todas las órdenes válidas y sus eventos (outbox) en una transacción
+        for _, order in valid_orders:
+            self._record_created(order)
+        saved_orders = await self.order_repository.save_all([order for _, order in valid_orders])
+        
+        for (result, _), order in zip(valid_orders, saved_orders):
+            result.order = order
+        
+        return results
 
 
 class UpdateOrderCommandHandler:
@@ -116,11 +186,13 @@ class UpdateOrderCommandHandler:
         
         # Actualizar items si se proporcionan
         if command.items:
+            # Mismos productos del pedido: se mantiene su moneda
             order_items = [
                 OrderItem(
                     sku_id=item["skuId"],
                     qty=item["qty"],
-                    price=item["price"]
+                    price=item["price"],
+                    currency=order.currency
                 )
                 for item in command.items
             ]
@@ -180,14 +252,9 @@ class ConfirmOrderCommandHandler:
         
         order.confirm()
         
-        # Publicar eventos
+        # El evento se guarda en el outbox junto con la orden y se entrega en segundo plano
         order._record_event(OrderConfirmedEvent(order_id=str(order.id)))
         
-        for event in order.get_domain_events():
-            await event_bus.publish(event)
-        
-        order.clear_domain_events()
-        
         order = await self.order_repository.save(order)
         
         return order
@@ -196,8 +263,13 @@ class ConfirmOrderCommandHandler:
 class CancelOrderCommandHandler:
     """Handler para el comando CancelOrder"""
     
-    def __init__(self, order_repository: IOrderRepository):
+    def __init__(
+        self,
+        order_repository: IOrderRepository,
+        product_adapter=None  # ProductServiceAdapter
+    ):
         self.order_repository = order_repository
+        self.product_adapter = product_adapter
     
     async def handle(self, command: CancelOrderCommand) -> Order:
         """Manejar comando de cancelación de orden"""
@@ -207,13 +279,14 @@ class CancelOrderCommandHandler:
         
         order.cancel()
         
-        # Publicar eventos
-        order._record_event(OrderCancelledEvent(order_id=str(order.id)))
-        
-        for event in order.get_domain_events():
-            await event_bus.publish(event)
+        # Devolver el stock retenido; las reservas que no se liberen vencerán por TTL
+        if self.product_adapter:
+            for reservation_id in list(order.reservations):
+                await self.product_adapter.release_reservation(reservation_id)
+                order.remove_reservation(reservation_id)
         
-        order.clear_domain_events()
+        # El evento se guarda en el outbox junto con la orden y se entrega en segundo plano
+        order._record_event(OrderCancelledEvent(order_id=str(order.id)))
         
         order = await self.order_repository.save(order)
         
@@ -233,6 +306,10 @@ class MarkOrderPickedCommandHandler:
             raise ValueError(f"Orden {command.order_id} no encontrada")
         
         order.mark_as_picked()
+        
+        # El evento se guarda en el outbox junto con la orden y se entrega en segundo plano
+        order._record_event(OrderPickedEvent(order_id=str(order.id)))
+        
         order = await self.order_repository.save(order)
         
         return order
@@ -252,14 +329,9 @@ class MarkOrderShippedCommandHandler:
         
         order.mark_as_shipped()
         
-        # Publicar eventos
+        # El evento se guarda en el outbox junto con la orden y se entrega en segundo plano
         order._record_event(OrderShippedEvent(order_id=str(order.id)))
         
-        for event in order.get_domain_events():
-            await event_bus.publish(event)
-        
-        order.clear_domain_events()
-        
         order = await self.order_repository.save(order)
         
         return order
@@ -279,19 +351,98 @@ class MarkOrderDeliveredCommandHandler:
         
         order.mark_as_delivered()
         
-        # Publicar eventos
+        # El evento se guarda en el outbox junto con la orden y se entrega en segundo plano
         order._record_event(OrderDeliveredEvent(order_id=str(order.id)))
         
-        for event in order.get_domain_events():
-            await event_bus.publish(event)
-        
-        order.clear_domain_events()
-        
         order = await self.order_repository.save(order)
         
         return order
 
 
+@dataclass
+class BulkTransitionResult:
+    """Resultado de una orden dentro de una transición en lote"""
+    order_id: str
+    success: bool
+    error: Optional[str] = None
+
+
+class BulkOrderTransitionCommandHandler:
+    """Handler para transiciones de estado en lote (confirmar, recoger, enviar, entregar, cancelar)"""
+    
+    TRANSITIONS = {
+        BulkConfirmOrdersCommand: (OrderStatus.CONFIRMED, OrderConfirmedEvent),
+        BulkMarkOrdersPickedCommand: (OrderStatus.PICKED, OrderPickedEvent),
+        BulkMarkOrdersShippedCommand: (OrderStatus.SHIPPED, OrderShippedEvent),
+        BulkMarkOrdersDeliveredCommand: (OrderStatus.DELIVERED, OrderDeliveredEvent),
+        BulkCancelOrdersCommand: (OrderStatus.CANCELLED, OrderCancelledEvent),
+    }
+    
+    # Reservas liberadas a la vez al cancelar en lote
+    RELEASE_CONCURRENCY = 20
+    
+    def __init__(
+        self,
+        order_repository: IOrderRepository,
+        product_adapter=None  # ProductServiceAdapter
+    ):
+        self.order_repository = order_repository
+        self.product_adapter = product_adapter
+    
+    async def handle(self, command) -> List[BulkTransitionResult]:
+        """Manejar comando de transición en lote"""
+        if type(command) not in self.TRANSITIONS:
+            raise ValueError(f"Comando no soportado: {type(command).__name__}")
+        target_status, event_class = self.TRANSITIONS[type(command)]
+        
+        def _event_for(order_id: str):
+            event = event_class(order_id=order_id)
+            event.aggregate_id = order_id
+            return event
+        
+        # Un evento por orden actualizada, escrito en el outbox en la misma transacción
+        updated, rejected = await self.order_repository.bulk_transition(
+            command.order_ids,
+            target_status,
+            ORDER_TRANSITIONS[target_status],
+            event_factory=_event_for
+        )
+        
+        # Igual que la cancelación individual: devolver el stock retenido (lo no liberado vence por TTL)
+        if target_status == OrderStatus.CANCELLED and self.product_adapter and updated:
+            await self._release_reservations(updated)
+        
+        updated_set = set(updated)
+        results = []
+        for order_id in dict.fromkeys(command.order_ids):
+            if order_id in updated_set:
+                results.append(BulkTransitionResult(order_id=order_id, success=True))
+            elif rejected.get(order_id) is None:
+                results.append(BulkTransitionResult(
+                    order_id=order_id,
+                    success=False,
+                    error=f"Orden {order_id} no encontrada"
+                ))
+            else:
+                results.append(BulkTransitionResult(
+                    order_id=order_id,
+                    success=False,
+                    error=f"No se puede pasar de {rejected[order_id].value} a {target_status.value}"
+                ))
+        
+        return results
+    
+    async def _release_reservations(self, order_ids: List[str]) -> None:
+        """Liberar las reservas de las órdenes canceladas, de a RELEASE_CONCURRENCY"""
+        taken = await self.order_repository.take_reservations(order_ids)
+        reservation_ids = [reservation_id for ids in taken.values() for reservation_id in ids]
+        for start in range(0, len(reservation_ids), self.RELEASE_CONCURRENCY):
+            await asyncio.gather(*(
+                self.product_adapter.release_reservation(reservation_id)
+                for reservation_id in reservation_ids[start:start + self.RELEASE_CONCURRENCY]
+            ))
+
+
 class AddReservationCommandHandler:
     """Handler para el comando AddReservation"""
     
@@ -310,11 +461,47 @@ class AddReservationCommandHandler:
         return order
 
 
+class ReserveOrderStockCommandHandler:
+    """Handler para el comando ReserveOrderStock"""
+    
+    def __init__(
+        self,
+        order_repository: IOrderRepository,
+        product_adapter  # ProductServiceAdapter
+    ):
+        self.order_repository = order_repository
+        self.product_adapter = product_adapter
+    
+    async def handle(self, command: ReserveOrderStockCommand) -> Order:
+        """Manejar comando de reservar el stock de una orden"""
+        order = await self.order_repository.find_by_id(EntityId(command.order_id))
+        if not order:
+            raise ValueError(f"Orden {command.order_id} no encontrada")
+        if order.status not in (OrderStatus.PLACED, OrderStatus.CONFIRMED):
+            raise ValueError(f"No se puede reservar stock de una orden en estado {order.status.value}")
+        
+        # Una sola reserva atómica con todas las líneas de la orden
+        reservation_id = await self.product_adapter.reserve_stock(
+            [{"skuId": item.sku_id, "qty": item.qty} for item in order.items],
+            order_id=str(order.id)
+        )
+        
+        order.add_reservation(reservation_id)
+        order = await self.order_repository.save(order)
+        
+        return order
+
+
 class RemoveReservationCommandHandler:
     """Handler para el comando RemoveReservation"""
     
-    def __init__(self, order_repository: IOrderRepository):
+    def __init__(
+        self,
+        order_repository: IOrderRepository,
+        product_adapter=None  # ProductServiceAdapter
+    ):
         self.order_repository = order_repository
+        self.product_adapter = product_adapter
     
     async def handle(self, command: RemoveReservationCommand) -> Order:
         """Manejar comando de eliminar reserva"""
@@ -322,6 +509,8 @@ class RemoveReservationCommandHandler:
         if not order:
             raise ValueError(f"Orden {command.order_id} no encontrada")
         
+        if self.product_adapter and command.reservation_id in order.reservations:
+            await self.product_adapter.release_reservation(command.reservation_id)
         order.remove_reservation(command.reservation_id)
         order = await self.order_repository.save(order)
         
@@ -405,3 +594,176 @@ class GetAllOrdersQueryHandler:
         orders = await self.order_repository.find_all(skip=query.skip, limit=query.limit, status=status_enum)
         return orders
 
+
+
+class GetOrdersBySkuQueryHandler:
+    """Handler para la query GetOrdersBySku"""
+    
+    def __init__(self, order_repository: IOrderRepository):
+        self.order_repository = order_repository
+    
+    async def handle(self, query: GetOrdersBySkuQuery) -> list:
+        """Manejar query de obtener órdenes que contienen un SKU"""
+        if query.statuses:
+            statuses = [OrderStatus(status) for status in query.statuses]
+        else:
+            statuses = list(OPEN_ORDER_STATUSES)
+        return await self.order_repository.find_by_sku(
+            query.sku_id,
+            statuses=statuses,
+            skip=query.skip,
+            limit=query.limit
+        )
+
+
+class GetSkuSalesQueryHandler:
+    """Handler para la query GetSkuSales"""
+    
+    def __init__(self, order_repository: IOrderRepository):
+        self.order_repository = order_repository
+    
+    async def handle(self, query: GetSkuSalesQuery) -> list:
+        """Manejar query de unidades vendidas por SKU"""
+        if query.date_from and query.date_to and query.date_from >= query.date_to:
+            raise ValueError("La fecha inicial debe ser anterior a la fecha final")
+        return await self.order_repository.get_sku_sales(
+            date_from=query.date_from,
+            date_to=query.date_to,
+            sku_id=query.sku_id
+        )
+
+
+class GetMonthlyRevenueQueryHandler:
+    """Handler para la query GetMonthlyRevenue"""
+    
+    def __init__(self, order_repository: IOrderRepository):
+        self.order_repository = order_repository
+    
+    async def handle(self, query: GetMonthlyRevenueQuery) -> list:
+        """Manejar query de órdenes e ingresos por mes"""
+        if query.date_from and query.date_to and query.date_from >= query.date_to:
+            raise ValueError("La fecha inicial debe ser anterior a la fecha final")
+        return await self.order_repository.get_monthly_revenue(
+            date_from=query.date_from,
+            date_to=query.date_to
+        )
+
+
+# Máximo de cambios por página del feed
+MAX_CHANGES_PAGE_SIZE = 1000
+
+
+class GetOrderChangesQueryHandler:
+    """Handler para la query GetOrderChanges"""
+    
+    def __init__(self, order_repository: IOrderRepository):
+        self.order_repository = order_repository
+    
+    async def handle(self, query: GetOrderChangesQuery) -> dict:
+        """Manejar query del feed de cambios de órdenes"""
+        if query.limit < 1 or query.limit > MAX_CHANGES_PAGE_SIZE:
+            raise ValueError(f"El límite debe estar entre 1 y {MAX_CHANGES_PAGE_SIZE}")
+        try:
+            since = int(query.since) if query.since else 0
+        except ValueError:
+            raise ValueError("Token de continuación inválido")
+        if since < 0:
+            raise ValueError("Token de continuación inválido")
+        
+        changes, next_since, has_more = await self.order_repository.get_changes(
+            since=since,
+            limit=query.limit,
+            client_id=query.client_id,
+            vendor_id=query.vendor_id
+        )
+        return {"changes": changes, "next_token": str(next_since), "has_more": has_more}
+
+
+# Columnas del archivo exportado
+EXPORT_COLUMNS = [
+    "id", "orderNumber", "status", "clientId", "vendorId", "total", "totalMinor",
+    "currency", "routeId", "deliveryDate", "createdAt", "updatedAt"
+]
+
+# Filas codificadas por cada parte que se envía al cliente
+EXPORT_CHUNK_ROWS = 500
+
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def _iso(value) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+class ExportOrdersQueryHandler:
+    """
+    Handler para la query ExportOrders
+    
+    Valida la query y retorna un iterador que codifica las filas por partes
+    de EXPORT_CHUNK_ROWS mientras el repositorio las lee en streaming; la
+    memoria no crece con el tamaño de la exportación. El repositorio se abre
+    al iterar (y se cierra al terminar), no con la petición.
+    """
+    
+    def __init__(self, order_repository_factory: Callable[[], ContextManager[IOrderRepository]]):
+        self.order_repository_factory = order_repository_factory
+    
+    def handle(self, query: ExportOrdersQuery) -> Iterator[str]:
+        """Manejar query de exportación de órdenes"""
+        if query.format not in EXPORT_MEDIA_TYPES:
+            raise ValueError(f"Formato no soportado: {query.format}. Use csv o ndjson")
+        if query.date_from and query.date_to and query.date_from >= query.date_to:
+            raise ValueError("La fecha inicial debe ser anterior a la fecha final")
+        statuses = [OrderStatus(status) for status in query.statuses] if query.statuses else None
+        
+        return self._stream(query, statuses)
+    
+    def _stream(self, query: ExportOrdersQuery, statuses: Optional[List[OrderStatus]]) -> Iterator[str]:
+        with self.order_repository_factory() as repository:
+            rows = repository.iter_export_rows(
+                date_from=query.date_from,
+                date_to=query.date_to,
+                statuses=statuses
+            )
+            if query.format == "csv":
+                yield from self._encode_csv(rows)
+            else:
+                yield from self._encode_ndjson(rows)
+    
+    @staticmethod
+    def _values(row: Any) -> list:
+        exponent = minor_unit_exponent(row.currency)
+        total_minor = row.total_minor or 0
+        return [
+            row.id, row.order_number, row.status, row.client_id, row.vendor_id,
+            f"{total_minor / 10 ** exponent:.{exponent}f}", total_minor, row.currency,
+            row.route_id, _iso(row.delivery_date), _iso(row.created_at), _iso(row.updated_at)
+        ]
+    
+    def _encode_csv(self, rows: Iterable[Any]) -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        pending = 0
+        for row in rows:
+            writer.writerow(self._values(row))
+            pending += 1
+            if pending >= EXPORT_CHUNK_ROWS:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+        yield buffer.getvalue()
+    
+    def _encode_ndjson(self, rows: Iterable[Any]) -> Iterator[str]:
+        lines = []
+        for row in rows:
+            record = dict(zip(EXPORT_COLUMNS, self._values(row)))
+            record["total"] = float(record["total"])
+            lines.append(json.dumps(record, ensure_ascii=False))
+            if len(lines) >= EXPORT_CHUNK_ROWS:
+                yield "\n".join(lines) + "\n"
+                lines = []
+        if lines:
+            yield "\n".join(lines) + "\n"
+
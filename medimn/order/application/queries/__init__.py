@@ -2,7 +2,8 @@
 Queries del servicio de órdenes
 """
 from dataclasses import dataclass
-from typing import Optional
+from datetime import datetime
+from typing import List, Optional
 
 
 @dataclass
@@ -26,3 +27,45 @@ class GetAllOrdersQuery:
     limit: int = 100
     status: Optional[str] = None
 
+
+@dataclass
+class GetOrdersBySkuQuery:
+    """Query para obtener las órdenes que contienen un SKU"""
+    sku_id: str
+    statuses: Optional[List[str]] = None  # Por defecto solo órdenes abiertas
+    skip: int = 0
+    limit: int = 100
+
+
+@dataclass
+class GetSkuSalesQuery:
+    """Query para obtener unidades vendidas por SKU en un rango de fechas"""
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    sku_id: Optional[str] = None
+
+
+@dataclass
+class GetMonthlyRevenueQuery:
+    """Query para obtener órdenes e ingresos por mes en un rango de fechas"""
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+
+
+@dataclass
+class GetOrderChangesQuery:
+    """Query para obtener los cambios de órdenes desde un token de continuación"""
+    since: Optional[str] = None
+    limit: int = 500
+    client_id: Optional[str] = None
+    vendor_id: Optional[str] = None
+
+
+@dataclass
+class ExportOrdersQuery:
+    """Query para exportar órdenes (CSV o NDJSON) en un rango de fechas"""
+    format: str = "csv"
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+    statuses: Optional[List[str]] = None
+
@@ -14,7 +14,10 @@ if shared_path not in sys.path:
     sys.path.insert(0, shared_path)
 
 from shared.domain.entity import Entity
-from shared.domain.value_objects import EntityId, Money
+from shared.domain.value_objects import (
+    DEFAULT_CURRENCY, EntityId, Money, apply_rate, from_minor_units, to_minor_units
+)
+from shared.domain.numbering import next_number
 
 
 class OrderStatus(Enum):
@@ -28,6 +31,34 @@ class OrderStatus(Enum):
     RETURNED = "RETURNED"
 
 
+# Estados en los que un pedido sigue abierto (aún no entregado ni cerrado)
+OPEN_ORDER_STATUSES = (
+    OrderStatus.PLACED,
+    OrderStatus.CONFIRMED,
+    OrderStatus.PICKED,
+    OrderStatus.SHIPPED,
+)
+
+# Estados que no cuentan como venta en los agregados por SKU
+NON_SALE_ORDER_STATUSES = (
+    OrderStatus.CANCELLED,
+    OrderStatus.RETURNED,
+)
+
+# Máquina de estados: estado destino -> estados desde los que se permite llegar
+ORDER_TRANSITIONS = {
+    OrderStatus.CONFIRMED: frozenset({OrderStatus.PLACED}),
+    OrderStatus.PICKED: frozenset({OrderStatus.CONFIRMED}),
+    OrderStatus.SHIPPED: frozenset({OrderStatus.PICKED}),
+    OrderStatus.DELIVERED: frozenset({OrderStatus.SHIPPED}),
+    OrderStatus.CANCELLED: frozenset(set(OrderStatus) - {OrderStatus.SHIPPED, OrderStatus.DELIVERED}),
+}
+
+
+# IVA del 16% como fracción exacta (numerador, denominador)
+TAX_RATE = (16, 100)
+
+
 class ReturnStatus(Enum):
     """Estados de devolución"""
     PENDING = "PENDING"
@@ -37,33 +68,62 @@ class ReturnStatus(Enum):
 
 
 class OrderItem:
-    """Value Object para artículo del pedido"""
+    """
+    Value Object para artículo del pedido
     
-    def __init__(self, sku_id: str, qty: int, price: float):
+    Precio y subtotal se guardan en unidades menores enteras de la moneda
+    del producto; `price` y `subtotal` los exponen como float.
+    """
+    
+    __slots__ = ("sku_id", "qty", "price_minor", "subtotal_minor", "currency")
+    
+    def __init__(self, sku_id: str, qty: int, price: float, currency: str = DEFAULT_CURRENCY):
+        self._init(sku_id, qty, to_minor_units(price, currency) if price >= 0 else -1, currency)
+    
+    @classmethod
+    def from_minor(cls, sku_id: str, qty: int, price_minor: int, currency: str = DEFAULT_CURRENCY) -> "OrderItem":
+        """Crear con el precio en unidades menores (al leer de la base de datos)"""
+        item = cls.__new__(cls)
+        item._init(sku_id, qty, price_minor, currency)
+        return item
+    
+    def _init(self, sku_id: str, qty: int, price_minor: int, currency: str):
         if not sku_id or not sku_id.strip():
             raise ValueError("SKU ID es requerido")
         if qty <= 0:
             raise ValueError("La cantidad debe ser mayor a 0")
-        if price < 0:
+        if price_minor < 0:
             raise ValueError("El precio no puede ser negativo")
         
         self.sku_id = sku_id
         self.qty = qty
-        self.price = price
-        self.subtotal = qty * price
+        self.price_minor = price_minor
+        self.subtotal_minor = qty * price_minor
+        self.currency = currency
+    
+    @property
+    def price(self) -> float:
+        return from_minor_units(self.price_minor, self.currency)
+    
+    @property
+    def subtotal(self) -> float:
+        return from_minor_units(self.subtotal_minor, self.currency)
     
     def to_dict(self) -> dict:
         """Convertir a diccionario"""
         return {
             "skuId": self.sku_id,
             "qty": self.qty,
-            "price": self.price
+            "price": self.price,
+            "currency": self.currency
         }
 
 
 class ETA:
     """Value Object para tiempo estimado de llegada"""
     
+    __slots__ = ("date", "window_minutes")
+    
     def __init__(self, date: datetime, window_minutes: int):
         if window_minutes < 0:
             raise ValueError("La ventana de tiempo no puede ser negativa")
@@ -82,6 +142,28 @@ class ETA:
 class Order(Entity):
     """Entidad Order del dominio de órdenes"""
     
+    __slots__ = (
+        "_items",
+        "_reservations",
+        "_eta",
+        "_status",
+        "_order_number",
+        "_client_id",
+        "_vendor_id",
+        "_delivery_address",
+        "_delivery_date",
+        "_contact_name",
+        "_contact_phone",
+        "_notes",
+        "_route_id",
+        "_return_requested",
+        "_return_reason",
+        "_return_status",
+        "_totals",
+        "_total_minor",
+        "_currency",
+    )
+    
     def __init__(
         self,
         order_id: EntityId,
@@ -106,8 +188,11 @@ class Order(Entity):
         
         if not items:
             raise ValueError("El pedido debe tener al menos un artículo")
+        if len({item.currency for item in items}) > 1:
+            raise ValueError("Todos los artículos del pedido deben tener la misma moneda")
         
         self._items = items
+        self._currency = items[0].currency
         self._reservations = reservations or []
         self._eta = eta
         self._status = status
@@ -127,11 +212,7 @@ class Order(Entity):
     
     def _generate_order_number(self) -> str:
         """Generar número de orden único"""
-        from datetime import datetime
-        timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-        import random
-        random_part = random.randint(1000, 9999)
-        return f"ORD-{timestamp}-{random_part}"
+        return next_number("ORD")
     
     @property
     def items(self) -> List[OrderItem]:
@@ -207,34 +288,46 @@ class Order(Entity):
         """Total amount del pedido"""
         return self._totals.get("grandTotal", 0.0)
     
+    @property
+    def total_minor(self) -> int:
+        """Total del pedido en unidades menores (lo que se guarda y se agrega en SQL)"""
+        return self._total_minor
+    
+    @property
+    def currency(self) -> str:
+        return self._currency
+    
     def _calculate_totals(self) -> dict:
-        """Calcular totales del pedido"""
-        subtotal = sum(item.subtotal for item in self._items)
+        """Calcular totales del pedido en unidades menores exactas"""
+        subtotal = sum(item.subtotal_minor for item in self._items)
         # Aquí se podrían aplicar reglas de negocio para calcular impuestos y envío
-        tax = subtotal * 0.16  # IVA del 16%
-        shipping = 0.0
-        grand_total = subtotal + tax + shipping
+        tax = apply_rate(subtotal, *TAX_RATE)
+        shipping = 0
+        self._total_minor = subtotal + tax + shipping
         
         return {
-            "subtotal": subtotal,
-            "tax": tax,
-            "shipping": shipping,
-            "grandTotal": grand_total
+            "subtotal": from_minor_units(subtotal, self._currency),
+            "tax": from_minor_units(tax, self._currency),
+            "shipping": from_minor_units(shipping, self._currency),
+            "grandTotal": from_minor_units(self._total_minor, self._currency)
         }
     
     def add_item(self, item: OrderItem):
         """Agregar artículo al pedido"""
         if self._status != OrderStatus.PLACED:
             raise ValueError("Solo se pueden agregar artículos a pedidos en estado PLACED")
+        if item.currency != self._currency:
+            raise ValueError(f"El artículo debe estar en la moneda del pedido ({self._currency})")
         
         # Verificar si ya existe el SKU
         existing_item = next((i for i in self._items if i.sku_id == item.sku_id), None)
         if existing_item:
             # Actualizar cantidad del artículo existente
-            updated_item = OrderItem(
+            updated_item = OrderItem.from_minor(
                 sku_id=existing_item.sku_id,
                 qty=existing_item.qty + item.qty,
-                price=existing_item.price
+                price_minor=existing_item.price_minor,
+                currency=existing_item.currency
             )
             self._items[self._items.index(existing_item)] = updated_item
         else:
@@ -261,7 +354,7 @@ class Order(Entity):
     
     def confirm(self):
         """Confirmar pedido"""
-        if self._status != OrderStatus.PLACED:
+        if self._status not in ORDER_TRANSITIONS[OrderStatus.CONFIRMED]:
             raise ValueError("Solo se pueden confirmar pedidos en estado PLACED")
         
         self._status = OrderStatus.CONFIRMED
@@ -269,7 +362,7 @@ class Order(Entity):
     
     def cancel(self):
         """Cancelar pedido"""
-        if self._status in [OrderStatus.SHIPPED, OrderStatus.DELIVERED]:
+        if self._status not in ORDER_TRANSITIONS[OrderStatus.CANCELLED]:
             raise ValueError("No se pueden cancelar pedidos enviados o entregados")
         
         self._status = OrderStatus.CANCELLED
@@ -277,7 +370,7 @@ class Order(Entity):
     
     def mark_as_picked(self):
         """Marcar como recogido"""
-        if self._status != OrderStatus.CONFIRMED:
+        if self._status not in ORDER_TRANSITIONS[OrderStatus.PICKED]:
             raise ValueError("Solo se pueden recoger pedidos confirmados")
         
         self._status = OrderStatus.PICKED
@@ -285,7 +378,7 @@ class Order(Entity):
     
     def mark_as_shipped(self):
         """Marcar como enviado"""
-        if self._status != OrderStatus.PICKED:
+        if self._status not in ORDER_TRANSITIONS[OrderStatus.SHIPPED]:
             raise ValueError("Solo se pueden enviar pedidos recogidos")
         
         self._status = OrderStatus.SHIPPED
@@ -293,7 +386,7 @@ class Order(Entity):
     
     def mark_as_delivered(self):
         """Marcar como entregado"""
-        if self._status != OrderStatus.SHIPPED:
+        if self._status not in ORDER_TRANSITIONS[OrderStatus.DELIVERED]:
             raise ValueError("Solo se pueden entregar pedidos enviados")
         
         self._status = OrderStatus.DELIVERED
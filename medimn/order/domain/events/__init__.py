@@ -15,6 +15,8 @@ from shared.domain.events import DomainEvent
 class OrderCreatedEvent(DomainEvent):
     """Evento cuando se crea un pedido"""
     
+    __slots__ = ("order_id", "user_id")
+    
     def __init__(self, order_id: str, user_id: str):
         super().__init__()
         self.order_id = order_id
@@ -24,6 +26,8 @@ class OrderCreatedEvent(DomainEvent):
 class OrderConfirmedEvent(DomainEvent):
     """Evento cuando se confirma un pedido"""
     
+    __slots__ = ("order_id",)
+    
     def __init__(self, order_id: str):
         super().__init__()
         self.order_id = order_id
@@ -32,6 +36,18 @@ class OrderConfirmedEvent(DomainEvent):
 class OrderCancelledEvent(DomainEvent):
     """Evento cuando se cancela un pedido"""
     
+    __slots__ = ("order_id",)
+    
+    def __init__(self, order_id: str):
+        super().__init__()
+        self.order_id = order_id
+
+
+class OrderPickedEvent(DomainEvent):
+    """Evento cuando se recoge un pedido"""
+    
+    __slots__ = ("order_id",)
+    
     def __init__(self, order_id: str):
         super().__init__()
         self.order_id = order_id
@@ -40,6 +56,8 @@ class OrderCancelledEvent(DomainEvent):
 class OrderShippedEvent(DomainEvent):
     """Evento cuando se envía un pedido"""
     
+    __slots__ = ("order_id",)
+    
     def __init__(self, order_id: str):
         super().__init__()
         self.order_id = order_id
@@ -48,6 +66,8 @@ class OrderShippedEvent(DomainEvent):
 class OrderDeliveredEvent(DomainEvent):
     """Evento cuando se entrega un pedido"""
     
+    __slots__ = ("order_id",)
+    
     def __init__(self, order_id: str):
         super().__init__()
         self.order_id = order_id
@@ -2,7 +2,8 @@
 Puertos (interfaces) del dominio de órdenes
 """
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from datetime import datetime
+from typing import Any, Callable, Dict, FrozenSet, Iterator, Optional, List, Tuple
 import sys
 from pathlib import Path
 
@@ -11,8 +12,9 @@ shared_path = str(Path(__file__).parent.parent.parent.parent / "shared")
 if shared_path not in sys.path:
     sys.path.insert(0, shared_path)
 
+from shared.domain.events import DomainEvent
 from shared.domain.value_objects import EntityId
-from ..entities import Order, OrderStatus
+from ..entities import ETA, Order, OrderStatus
 
 
 class IOrderRepository(ABC):
@@ -23,6 +25,11 @@ class IOrderRepository(ABC):
         """Guardar orden"""
         pass
     
+    @abstractmethod
+    async def save_all(self, orders: List[Order]) -> List[Order]:
+        """Guardar varias órdenes en una sola transacción"""
+        pass
+    
     @abstractmethod
     async def find_by_id(self, order_id: EntityId) -> Optional[Order]:
         """Buscar orden por ID"""
@@ -38,6 +45,115 @@ class IOrderRepository(ABC):
         """Listar todas las órdenes"""
         pass
     
+    @abstractmethod
+    async def find_by_sku(
+        self,
+        sku_id: str,
+        statuses: Optional[List[OrderStatus]] = None,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[Order]:
+        """Buscar órdenes que contienen un SKU"""
+        pass
+    
+    @abstractmethod
+    async def get_sku_sales(
+        self,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        sku_id: Optional[str] = None
+    ) -> List[dict]:
+        """Unidades e ingresos por SKU en un rango de fechas"""
+        pass
+    
+    @abstractmethod
+    async def get_monthly_revenue(
+        self,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> List[dict]:
+        """Órdenes e ingresos por mes en un rango de fechas"""
+        pass
+    
+    @abstractmethod
+    async def get_changes(
+        self,
+        since: int = 0,
+        limit: int = 500,
+        client_id: Optional[str] = None,
+        vendor_id: Optional[str] = None
+    ) -> Tuple[List[dict], int, bool]:
+        """
+        Cambios (altas, modificaciones y eliminaciones) posteriores a `since`
+        
+        Retorna los cambios, el número de cambio hasta el que se leyó y si
+        quedan más cambios por leer.
+        """
+        pass
+    
+    @abstractmethod
+    def iter_export_rows(
+        self,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        statuses: Optional[List[OrderStatus]] = None
+    ) -> Iterator[Any]:
+        """
+        Filas de resumen de órdenes en streaming, ordenadas por fecha de creación
+        
+        Cada fila expone id, order_number, status, client_id, vendor_id,
+        total_minor, currency, route_id, delivery_date, created_at y updated_at.
+        """
+        pass
+    
+    @abstractmethod
+    async def bulk_transition(
+        self,
+        order_ids: List[str],
+        target_status: OrderStatus,
+        allowed_from: FrozenSet[OrderStatus],
+        event_factory: Optional[Callable[[str], DomainEvent]] = None
+    ) -> Tuple[List[str], Dict[str, Optional[OrderStatus]]]:
+        """
+        Cambiar de estado varias órdenes con una actualización por conjunto
+        
+        Si se indica event_factory, el evento de cada orden actualizada se
+        escribe en el outbox en la misma transacción.
+        
+        Returns:
+            (ids actualizados, {id rechazado: estado actual o None si no existe})
+        """
+        pass
+    
+    @abstractmethod
+    async def assign_routes(self, assignments: Dict[str, str], commit: bool = True) -> List[str]:
+        """
+        Asignar ruta a varias órdenes CONFIRMED que todavía no tienen ruta
+        
+        Se asignan todas o ninguna: si alguna ya tiene ruta o cambió de estado
+        se deshace la transacción. Con commit=False la asignación queda en la
+        sesión para confirmarse junto con otras escrituras.
+        
+        Returns:
+            IDs de las órdenes que no se pudieron asignar (vacía si se asignaron)
+        """
+        pass
+    
+    @abstractmethod
+    async def update_etas(self, etas: Dict[str, ETA]) -> int:
+        """Guardar la ETA de varias órdenes (por ID) en una transacción; retorna cuántas existían"""
+        pass
+    
+    @abstractmethod
+    async def take_reservations(self, order_ids: List[str]) -> Dict[str, List[str]]:
+        """
+        Quitar las reservas de stock de varias órdenes y retornarlas
+        
+        Returns:
+            {id de orden: IDs de reserva que tenía}, solo las que tenían reservas
+        """
+        pass
+    
     @abstractmethod
     async def delete(self, order_id: EntityId) -> bool:
         """Eliminar orden"""
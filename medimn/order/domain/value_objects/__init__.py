@@ -13,7 +13,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '../../..'))
 from shared.domain.value_objects import EntityId
 
 
-@dataclass
+@dataclass(slots=True)
 class OrderItem:
     """Item de una orden"""
     sku_id: str
@@ -9,10 +9,16 @@ shared_path = str(Path(__file__).parent.parent.parent.parent / "shared")
 if shared_path not in sys.path:
     sys.path.insert(0, shared_path)
 
+from shared.domain.value_objects import DEFAULT_CURRENCY
 from shared.infrastructure.http_client import ProductServiceClient
 from ...infrastructure.config import get_settings
 
 
+def _currencies_by_id(products: list) -> dict:
+    """Moneda del precio de cada producto del catálogo, por ID"""
+    return {str(product['id']): product.get('currency') or DEFAULT_CURRENCY for product in products}
+
+
 class ProductServiceAdapter:
     """Adaptador para comunicación con el servicio de productos"""
     
@@ -21,12 +27,12 @@ class ProductServiceAdapter:
         product_service_url = self.settings.product_service_url
         self.client = ProductServiceClient(product_service_url)
     
-    async def validate_products(self, sku_ids: list) -> bool:
+    async def validate_products(self, sku_ids: list) -> dict:
         """
         Validar que todos los productos existen y están activos
         
         Returns:
-            bool: True si todos los productos son válidos
+            dict: {SKU: moneda del precio del producto} de los SKUs pedidos
         
         Raises:
             ValueError: Si algún producto no existe o no está activo
@@ -35,19 +41,60 @@ class ProductServiceAdapter:
             # Obtener todos los productos activos
             products = await self.client.get_products(active_only=True)
             
-            # Crear un set de IDs de productos disponibles
-            available_ids = {str(product['id']) for product in products}
+            # Moneda de cada producto disponible
+            currencies = _currencies_by_id(products)
             
             # Verificar que todos los SKUs estén disponibles
             for sku_id in sku_ids:
-                if sku_id not in available_ids:
+                if sku_id not in currencies:
                     raise ValueError(f"Producto con SKU {sku_id} no encontrado o no está activo")
             
-            return True
-            
+            return {sku_id: currencies[sku_id] for sku_id in sku_ids}
+        
         except Exception as e:
             raise ValueError(f"Error al validar productos: {str(e)}")
     
+    async def get_available_skus(self, sku_ids: list) -> dict:
+        """
+        Retornar {SKU: moneda} de los SKUs que existen y están activos con una sola consulta al catálogo
+        
+        Raises:
+            ValueError: Si no se puede consultar el catálogo
+        """
+        try:
+            products = await self.client.get_products(active_only=True)
+        except Exception as e:
+            raise ValueError(f"Error al consultar el catálogo: {str(e)}")
+        
+        currencies = _currencies_by_id(products)
+        return {sku_id: currencies[sku_id] for sku_id in sku_ids if sku_id in currencies}
+    
+    async def reserve_stock(self, lines: list, order_id: str = None) -> str:
+        """
+        Retener stock para las líneas de una orden
+        
+        Returns:
+            str: ID de la reserva creada
+        
+        Raises:
+            ValueError: Si no hay stock suficiente o el servicio falla
+        """
+        try:
+            reservation = await self.client.reserve_stock(lines, order_id=order_id)
+        except Exception as e:
+            raise ValueError(f"Error al reservar stock: {str(e)}")
+        
+        return reservation["reservationId"]
+    
+    async def release_reservation(self, reservation_id: str) -> bool:
+        """Liberar una reserva de stock (False si ya no estaba activa)"""
+        try:
+            await self.client.release_reservation(reservation_id)
+        except Exception:
+            return False
+        
+        return True
+    
     async def get_product_info(self, product_id: str) -> dict:
         """Obtener información de un producto"""
         try:
@@ -47,6 +47,11 @@ class OrderServiceSettings:
     def auth_service_url(self) -> str:
         # En el monolito, todos los servicios están en la misma app
         return "http://localhost:8000"
+    
+    @property
+    def product_service_url(self) -> str:
+        # En el monolito, todos los servicios están en la misma app
+        return f"http://localhost:{self.service_port}"
 
 
 # Instancia global
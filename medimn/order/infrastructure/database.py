@@ -15,11 +15,12 @@ from infrastructure.database import (
     Base,
     engine,
     SessionLocal,
+    StreamingSessionLocal,
     get_db as get_db_unified
 )
 
 # Re-exportar para compatibilidad
-__all__ = ["Base", "engine", "SessionLocal", "get_db", "create_tables"]
+__all__ = ["Base", "engine", "SessionLocal", "StreamingSessionLocal", "get_db", "create_tables"]
 
 def get_db():
     """Dependency para obtener sesión de base de datos"""
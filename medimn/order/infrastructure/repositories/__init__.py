@@ -10,7 +10,7 @@ if str(monolith_path) not in sys.path:
     sys.path.insert(0, str(monolith_path))
 
 
-from .models import Base, OrderModel
+from .models import Base, OrderModel, OrderItemModel, OrderTombstoneModel
 from .order_repository import SQLAlchemyOrderRepository
 
-__all__ = ['Base', 'OrderModel', 'SQLAlchemyOrderRepository']
+__all__ = ['Base', 'OrderModel', 'OrderItemModel', 'OrderTombstoneModel', 'SQLAlchemyOrderRepository']
@@ -10,11 +10,16 @@ if str(monolith_path) not in sys.path:
     sys.path.insert(0, str(monolith_path))
 
 # Usar Base unificada del monolito
-from infrastructure.database import Base
+from infrastructure.database import (
+    Base, add_missing_columns, create_missing_indexes, register_migration, replace_legacy_column
+)
 
-from sqlalchemy import Column, String, Integer, Float, DateTime, JSON
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, JSON, ForeignKey, Index
+from sqlalchemy.engine import Engine
 from datetime import datetime
 
+from shared.domain.value_objects import DEFAULT_CURRENCY, minor_unit_exponent
+
 
 class OrderModel(Base):
     """Modelo de orden en base de datos"""
@@ -22,9 +27,11 @@ class OrderModel(Base):
     
     id = Column(String, primary_key=True)
     order_number = Column(String, unique=True, index=True)
-    items = Column(JSON)  # Lista de items de la orden
+    items = Column(JSON(none_as_null=True), nullable=True)  # Legado: items previos a la tabla order_items
     status = Column(String, index=True)
-    total = Column(Float, default=0.0)
+    # Montos en unidades menores enteras (centavos): sumas exactas en SQL
+    total_minor = Column(BigInteger, nullable=False, default=0)
+    currency = Column(String(3), nullable=False, default=DEFAULT_CURRENCY)
     reservations = Column(JSON, nullable=True)  # Reservaciones
     eta = Column(JSON, nullable=True)  # ETA como JSON
     client_id = Column(String, nullable=True, index=True)
@@ -38,6 +45,71 @@ class OrderModel(Base):
     return_requested = Column(String, default="false")  # Boolean como string para compatibilidad
     return_reason = Column(String, nullable=True)
     return_status = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Secuencia del último cambio; alimenta el feed de cambios (GET /orders/changes)
+    change_seq = Column(BigInteger, nullable=True, index=True)
+    
+    __table_args__ = (
+        # Feed de cambios por cliente y por vendedor sin recorrer toda la tabla
+        Index("ix_orders_client_change_seq", "client_id", "change_seq"),
+        Index("ix_orders_vendor_change_seq", "vendor_id", "change_seq"),
+    )
+
+
+class OrderItemModel(Base):
+    """Modelo de artículo de orden en base de datos (una fila por SKU de la orden)"""
+    __tablename__ = "order_items"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    order_id = Column(String, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True)
+    position = Column(Integer, nullable=False, default=0)  # Orden original del artículo
+    sku_id = Column(String, nullable=False, index=True)
+    qty = Column(Integer, nullable=False)
+    price_minor = Column(BigInteger, nullable=False)
+    subtotal_minor = Column(BigInteger, nullable=False)
+    
+    __table_args__ = (
+        # Consultas por SKU que luego cruzan con la orden (SKU -> órdenes)
+        Index("ix_order_items_sku_order", "sku_id", "order_id"),
+    )
+
+
+class OrderTombstoneModel(Base):
+    """Marca de una orden eliminada, para que los clientes la quiten al sincronizar"""
+    __tablename__ = "order_tombstones"
+    
+    change_seq = Column(BigInteger, primary_key=True, autoincrement=False)
+    order_id = Column(String, nullable=False, index=True)
+    client_id = Column(String, nullable=True)
+    vendor_id = Column(String, nullable=True)
+    deleted_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_order_tombstones_client_change_seq", "client_id", "change_seq"),
+        Index("ix_order_tombstones_vendor_change_seq", "vendor_id", "change_seq"),
+    )
+
 
+@register_migration
+def upgrade_order_tables(bind: Engine) -> None:
+    """Migración de arranque: columnas agregadas a orders y order_items después de crearlas"""
+    add_missing_columns(bind, OrderModel.__table__, {
+        "total_minor": "0",
+        "currency": f"'{DEFAULT_CURRENCY}'",
+        "change_seq": None
+    })
+    add_missing_columns(bind, OrderItemModel.__table__, {
+        "price_minor": "0",
+        "subtotal_minor": "0"
+    })
+    # Montos legados en float: pasan a unidades menores y se eliminan
+    scale = 10 ** minor_unit_exponent(DEFAULT_CURRENCY)
+    replace_legacy_column(bind, "orders", "total", {"total_minor": f"CAST(ROUND(total * {scale}) AS BIGINT)"})
+    replace_legacy_column(bind, "order_items", "price", {
+        "price_minor": f"CAST(ROUND(price * {scale}) AS BIGINT)",
+        "subtotal_minor": f"qty * CAST(ROUND(price * {scale}) AS BIGINT)"
+    })
+    replace_legacy_column(bind, "order_items", "subtotal", {})
+    # Índices agregados después (created_at, feed de cambios por cliente y vendedor)
+    create_missing_indexes(bind, OrderModel.__table__)
@@ -1,16 +1,50 @@
 """
 Repositorio SQLAlchemy para órdenes
 """
+from sqlalchemy import func, distinct, extract, insert, null, select, update, bindparam
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime
 import json
 
-from .models import OrderModel
-from ...domain.entities import Order, OrderItem, ETA, OrderStatus, ReturnStatus
-from shared.domain.value_objects import EntityId
+from infrastructure.database import register_migration
+from .models import OrderModel, OrderItemModel, OrderTombstoneModel
+from ...domain.entities import (
+    Order, OrderItem, ETA, OrderStatus, ReturnStatus, NON_SALE_ORDER_STATUSES
+)
+from shared.domain.events import DomainEvent
+from shared.domain.value_objects import DEFAULT_CURRENCY, EntityId, enum_lookup, from_minor_units
+from shared.infrastructure.outbox import stage_events, notify_outbox
+from shared.infrastructure.number_allocator import NumberSequenceModel
 from ...domain.ports import IOrderRepository
 
+# Estados por valor sin pasar por EnumMeta.__call__ en cada fila
+_order_status = enum_lookup(OrderStatus)
+_return_status = enum_lookup(ReturnStatus)
+
+# Órdenes cuya ETA ya no se actualiza
+_ETA_CLOSED_STATUSES = (OrderStatus.DELIVERED.value, OrderStatus.CANCELLED.value)
+
+# Tamaño máximo de las listas IN (SQLite limita el número de parámetros)
+IN_CLAUSE_CHUNK_SIZE = 500
+
+# Secuencia (en number_sequences) que numera los cambios de órdenes
+CHANGE_SEQUENCE = "order_changes"
+
+# Filas que trae cada viaje del cursor del lado del servidor al exportar
+EXPORT_BATCH_SIZE = 2000
+
+# Órdenes legadas que pasan a order_items (o reciben change_seq) por transacción al arrancar
+LEGACY_BACKFILL_BATCH_SIZE = 500
+
+
+def _chunks(values: List[str], size: int = IN_CLAUSE_CHUNK_SIZE) -> Iterable[List[str]]:
+    """Partir una lista en bloques de tamaño fijo"""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
 
 class SQLAlchemyOrderRepository(IOrderRepository):
     """Implementación de repositorio de órdenes con SQLAlchemy"""
@@ -18,9 +52,76 @@ class SQLAlchemyOrderRepository(IOrderRepository):
     def __init__(self, session: Session):
         self.session = session
     
-    def _to_domain(self, model: OrderModel) -> Order:
+    def _load_items(self, order_ids: List[str]) -> Dict[str, List[OrderItem]]:
+        """Cargar los artículos de varias órdenes con una sola consulta por bloque"""
+        items_by_order: Dict[str, List[OrderItem]] = {order_id: [] for order_id in order_ids}
+        for chunk in _chunks(order_ids):
+            # La moneda de los artículos es la de su orden
+            rows = self.session.query(
+                OrderItemModel.order_id,
+                OrderItemModel.sku_id,
+                OrderItemModel.qty,
+                OrderItemModel.price_minor,
+                OrderModel.currency
+            ).join(
+                OrderModel, OrderModel.id == OrderItemModel.order_id
+            ).filter(
+                OrderItemModel.order_id.in_(chunk)
+            ).order_by(
+                OrderItemModel.order_id,
+                OrderItemModel.position
+            ).all()
+            
+            for order_id, sku_id, qty, price_minor, currency in rows:
+                items_by_order[order_id].append(
+                    OrderItem.from_minor(sku_id, qty, price_minor, currency or DEFAULT_CURRENCY)
+                )
+        
+        return items_by_order
+    
+    @staticmethod
+    def _legacy_items(model: OrderModel) -> List[OrderItem]:
+        """Leer items guardados en la columna JSON legada"""
+        return SQLAlchemyOrderRepository._parse_legacy_items(model.items, model.currency or DEFAULT_CURRENCY)
+    
+    @staticmethod
+    def _parse_legacy_items(raw_items: Any, currency: str = DEFAULT_CURRENCY) -> List[OrderItem]:
+        """Artículos de un valor de la columna JSON legada"""
+        raw_items = raw_items or []
+        if isinstance(raw_items, str):
+            raw_items = json.loads(raw_items)
+        return [
+            OrderItem(
+                sku_id=item.get("skuId", item.get("sku_id")),
+                qty=item["qty"],
+                price=item["price"],
+                currency=currency
+            )
+            for item in raw_items
+        ]
+    
+    @staticmethod
+    def _item_rows(order_id: str, items: List[OrderItem]) -> List[dict]:
+        """Filas de order_items para los artículos de una orden"""
+        return [
+            {
+                "order_id": order_id,
+                "position": position,
+                "sku_id": item.sku_id,
+                "qty": item.qty,
+                "price_minor": item.price_minor,
+                "subtotal_minor": item.subtotal_minor
+            }
+            for position, item in enumerate(items)
+        ]
+    
+    def _to_domain(self, model: OrderModel, items: Optional[List[OrderItem]] = None) -> Order:
         """Convertir modelo a entidad de dominio"""
-        items = [OrderItem(**item) for item in model.items]
+        if items is None:
+            items = self._load_items([model.id])[model.id]
+        if not items and model.items:
+            items = self._legacy_items(model)
+        
         eta = None
         if model.eta:
             eta_data = json.loads(model.eta) if isinstance(model.eta, str) else model.eta
@@ -32,14 +133,14 @@ class SQLAlchemyOrderRepository(IOrderRepository):
         return_status = None
         if model.return_status:
             try:
-                return_status = ReturnStatus(model.return_status)
+                return_status = _return_status(model.return_status)
             except ValueError:
                 return_status = None
         
         return Order(
             order_id=EntityId(model.id),
             items=items,
-            status=OrderStatus(model.status),
+            status=_order_status(model.status),
             reservations=model.reservations or [],
             eta=eta,
             order_number=model.order_number,
@@ -56,6 +157,11 @@ class SQLAlchemyOrderRepository(IOrderRepository):
             return_status=return_status
         )
     
+    def _to_domain_list(self, models: List[OrderModel]) -> List[Order]:
+        """Convertir varios modelos cargando todos sus artículos en lote"""
+        items_by_order = self._load_items([model.id for model in models])
+        return [self._to_domain(model, items_by_order[model.id]) for model in models]
+    
     async def save(self, order: Order) -> Order:
         """Guardar orden"""
         # Convertir entity a model
@@ -63,15 +169,87 @@ class SQLAlchemyOrderRepository(IOrderRepository):
             OrderModel.id == str(order.id)
         ).first()
         
+        order_model = self._stage(order, order_model, self._next_change_seqs(1))
+        self._insert_items([order])
+        # Los eventos pendientes de la orden se confirman en la misma transacción
+        stage_events(self.session, order.get_domain_events())
+        
+        self.session.commit()
+        order.clear_domain_events()
+        notify_outbox()
+        self.session.refresh(order_model)
+        
+        # Retornar la entidad actualizada
+        return self._to_domain(order_model)
+    
+    async def save_all(self, orders: List[Order]) -> List[Order]:
+        """Guardar varias órdenes en una sola transacción"""
+        order_ids = [str(order.id) for order in orders]
+        existing: Dict[str, OrderModel] = {}
+        for chunk in _chunks(order_ids):
+            for model in self.session.query(OrderModel).filter(OrderModel.id.in_(chunk)).all():
+                existing[model.id] = model
+        
+        first_seq = self._next_change_seqs(len(orders))
+        for offset, order in enumerate(orders):
+            self._stage(order, existing.get(str(order.id)), first_seq + offset)
+        self._insert_items(orders)
+        stage_events(self.session, [event for order in orders for event in order.get_domain_events()])
+        
+        self.session.commit()
+        for order in orders:
+            order.clear_domain_events()
+        notify_outbox()
+        
+        # Recargar en bloque (una consulta de órdenes y una de artículos por bloque)
+        models_by_id: Dict[str, OrderModel] = {}
+        for chunk in _chunks(order_ids):
+            for model in self.session.query(OrderModel).filter(OrderModel.id.in_(chunk)).all():
+                models_by_id[model.id] = model
+        
+        return self._to_domain_list([models_by_id[order_id] for order_id in order_ids])
+    
+    def _next_change_seqs(self, count: int) -> int:
+        """
+        Reservar `count` números de cambio consecutivos y retornar el primero
+        
+        El UPDATE del contador va en la transacción de la escritura y bloquea
+        su fila hasta el commit, así que los números se confirman en orden y
+        un cliente que ya leyó hasta N no puede perder un cambio menor que N.
+        El costo es que todas las escrituras de órdenes se serializan en esa
+        fila; una secuencia de la base de datos no lo evita sin perder el orden.
+        """
+        table = NumberSequenceModel.__table__
+        for _ in range(2):
+            last = self.session.execute(
+                update(table)
+                .where(table.c.name == CHANGE_SEQUENCE)
+                .values(next_hi=table.c.next_hi + count)
+                .returning(table.c.next_hi)
+            ).scalar()
+            if last is not None:
+                return last - count + 1
+            try:
+                with self.session.begin_nested():
+                    self.session.execute(insert(table).values(name=CHANGE_SEQUENCE, next_hi=0))
+            except IntegrityError:
+                # Otro worker creó la secuencia a la vez: reintentar el UPDATE
+                continue
+        
+        raise RuntimeError("No se pudo reservar la secuencia de cambios de órdenes")
+    
+    def _stage(self, order: Order, order_model: Optional[OrderModel], change_seq: int) -> OrderModel:
+        """Volcar la entidad en su modelo dentro de la sesión, sin confirmar"""
         eta_json = None
         if order.eta:
             eta_json = json.dumps(order.eta.to_dict())
         
         if order_model:
             # Actualizar existente
-            order_model.items = [item.to_dict() for item in order.items]
+            order_model.items = None
             order_model.status = order.status.value
-            order_model.total = order.total_amount
+            order_model.total_minor = order.total_minor
+            order_model.currency = order.currency
             order_model.reservations = order.reservations
             order_model.eta = eta_json
             order_model.order_number = order.order_number
@@ -87,14 +265,20 @@ class SQLAlchemyOrderRepository(IOrderRepository):
             order_model.return_reason = order.return_reason
             order_model.return_status = order.return_status.value if order.return_status else None
             order_model.updated_at = datetime.utcnow()
+            order_model.change_seq = change_seq
+            
+            # Reemplazar los artículos de la orden
+            self.session.query(OrderItemModel).filter(
+                OrderItemModel.order_id == str(order.id)
+            ).delete(synchronize_session=False)
         else:
             # Crear nuevo
             order_model = OrderModel(
                 id=str(order.id),
                 order_number=order.order_number,
-                items=[item.to_dict() for item in order.items],
                 status=order.status.value,
-                total=order.total_amount,
+                total_minor=order.total_minor,
+                currency=order.currency,
                 reservations=order.reservations,
                 eta=eta_json,
                 client_id=order.client_id,
@@ -107,15 +291,104 @@ class SQLAlchemyOrderRepository(IOrderRepository):
                 route_id=order.route_id,
                 return_requested="true" if order.return_requested else "false",
                 return_reason=order.return_reason,
-                return_status=order.return_status.value if order.return_status else None
+                return_status=order.return_status.value if order.return_status else None,
+                change_seq=change_seq
             )
             self.session.add(order_model)
         
-        self.session.commit()
-        self.session.refresh(order_model)
+        return order_model
+    
+    def _insert_items(self, orders: List[Order]) -> None:
+        """Insertar los artículos de las órdenes preparadas con _stage"""
+        # Las órdenes nuevas deben existir antes de insertar sus artículos (FK)
+        self.session.flush()
+        self.session.bulk_insert_mappings(
+            OrderItemModel,
+            [row for order in orders for row in self._item_rows(str(order.id), order.items)]
+        )
+    
+    def backfill_legacy_items(self, batch_size: int = LEGACY_BACKFILL_BATCH_SIZE) -> int:
+        """
+        Pasar a order_items los artículos que siguen en la columna JSON legada
         
-        # Retornar la entidad actualizada
-        return self._to_domain(order_model)
+        Recorre las órdenes con JSON por bloques de `batch_size` (una
+        transacción por bloque) y vacía la columna al migrar cada una, así que
+        al terminar la consulta inicial ya no encuentra filas. Las órdenes con
+        JSON inválido se dejan como están. Retorna las órdenes migradas.
+        """
+        migrated = 0
+        last_id = ""
+        while True:
+            rows = self.session.query(OrderModel.id, OrderModel.items, OrderModel.currency).filter(
+                OrderModel.items.isnot(None),
+                OrderModel.id > last_id
+            ).order_by(OrderModel.id).limit(batch_size).all()
+            if not rows:
+                return migrated
+            last_id = rows[-1][0]
+            
+            order_ids = [order_id for order_id, _, _ in rows]
+            with_rows = {
+                order_id for (order_id,) in self.session.query(OrderItemModel.order_id).filter(
+                    OrderItemModel.order_id.in_(order_ids)
+                ).distinct()
+            }
+            
+            item_rows: List[dict] = []
+            done: List[str] = []
+            for order_id, raw_items, currency in rows:
+                # Si ya tiene filas en order_items, esas mandan: solo se vacía el JSON
+                if order_id not in with_rows:
+                    try:
+                        items = self._parse_legacy_items(raw_items, currency or DEFAULT_CURRENCY)
+                    except (ValueError, KeyError, TypeError) as e:
+                        print(f"⚠️  Artículos legados inválidos en la orden {order_id}: {e}")
+                        continue
+                    item_rows.extend(self._item_rows(order_id, items))
+                done.append(order_id)
+            
+            if item_rows:
+                self.session.bulk_insert_mappings(OrderItemModel, item_rows)
+            if done:
+                self.session.execute(
+                    update(OrderModel)
+                    .where(OrderModel.id.in_(done))
+                    .values(items=null())
+                    .execution_options(synchronize_session=False)
+                )
+            self.session.commit()
+            migrated += len(done)
+    
+    def backfill_change_seqs(self, batch_size: int = LEGACY_BACKFILL_BATCH_SIZE) -> int:
+        """
+        Numerar las órdenes previas al feed de cambios (change_seq NULL)
+        
+        Toma los números de la secuencia de cambios por bloques de
+        `batch_size`, en orden de creación, para que el primer sync de un
+        cliente (since=0) las reciba. Retorna las órdenes numeradas.
+        """
+        numbered = 0
+        while True:
+            order_ids = [
+                order_id for (order_id,) in self.session.query(OrderModel.id).filter(
+                    OrderModel.change_seq.is_(None)
+                ).order_by(OrderModel.created_at, OrderModel.id).limit(batch_size)
+            ]
+            if not order_ids:
+                return numbered
+            
+            first_seq = self._next_change_seqs(len(order_ids))
+            self.session.execute(
+                update(OrderModel.__table__)
+                .where(OrderModel.__table__.c.id == bindparam("b_order_id"))
+                .values(change_seq=bindparam("b_change_seq")),
+                [
+                    {"b_order_id": order_id, "b_change_seq": first_seq + offset}
+                    for offset, order_id in enumerate(order_ids)
+                ]
+            )
+            self.session.commit()
+            numbered += len(order_ids)
     
     async def find_by_id(self, order_id: EntityId) -> Optional[Order]:
         """Buscar orden por ID"""
@@ -134,7 +407,7 @@ class SQLAlchemyOrderRepository(IOrderRepository):
             OrderModel.status == status.value
         ).all()
         
-        return [self._to_domain(model) for model in order_models]
+        return self._to_domain_list(order_models)
     
     async def find_all(self, skip: int = 0, limit: int = 100, status: Optional[OrderStatus] = None) -> List[Order]:
         """Obtener todas las órdenes"""
@@ -145,7 +418,285 @@ class SQLAlchemyOrderRepository(IOrderRepository):
         
         order_models = query.offset(skip).limit(limit).all()
         
-        return [self._to_domain(model) for model in order_models]
+        return self._to_domain_list(order_models)
+    
+    async def find_by_sku(
+        self,
+        sku_id: str,
+        statuses: Optional[List[OrderStatus]] = None,
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[Order]:
+        """Buscar órdenes que contienen un SKU (usa el índice sku_id de order_items)"""
+        # Partir de order_items para que el plan use el índice por SKU y no el de estado
+        query = self.session.query(OrderModel.id, OrderModel.created_at).join(
+            OrderItemModel, OrderItemModel.order_id == OrderModel.id
+        ).filter(
+            OrderItemModel.sku_id == sku_id
+        )
+        
+        if statuses:
+            query = query.filter(OrderModel.status.in_([status.value for status in statuses]))
+        
+        page = query.distinct().order_by(OrderModel.created_at.desc()).offset(skip).limit(limit).all()
+        order_ids = [order_id for order_id, _ in page]
+        if not order_ids:
+            return []
+        
+        models_by_id = {
+            model.id: model
+            for model in self.session.query(OrderModel).filter(OrderModel.id.in_(order_ids)).all()
+        }
+        
+        return self._to_domain_list([models_by_id[order_id] for order_id in order_ids])
+    
+    async def get_sku_sales(
+        self,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        sku_id: Optional[str] = None
+    ) -> List[dict]:
+        """Unidades vendidas e ingresos por SKU, agregados en la base de datos"""
+        # Filtrar primero las órdenes (índice created_at) y luego sus artículos (índice order_id)
+        sale_orders = self.session.query(OrderModel.id).filter(
+            OrderModel.status.notin_([status.value for status in NON_SALE_ORDER_STATUSES])
+        )
+        if date_from:
+            sale_orders = sale_orders.filter(OrderModel.created_at >= date_from)
+        if date_to:
+            sale_orders = sale_orders.filter(OrderModel.created_at < date_to)
+        
+        # Los montos solo se suman dentro de una misma moneda
+        query = self.session.query(
+            OrderItemModel.sku_id,
+            OrderModel.currency,
+            func.sum(OrderItemModel.qty),
+            func.sum(OrderItemModel.subtotal_minor),
+            func.count(distinct(OrderItemModel.order_id))
+        ).join(
+            OrderModel, OrderModel.id == OrderItemModel.order_id
+        ).filter(
+            OrderItemModel.order_id.in_(sale_orders)
+        )
+        
+        if sku_id:
+            query = query.filter(OrderItemModel.sku_id == sku_id)
+        
+        rows = query.group_by(
+            OrderItemModel.sku_id, OrderModel.currency
+        ).order_by(func.sum(OrderItemModel.qty).desc()).all()
+        
+        return [
+            {
+                "sku_id": row_sku_id,
+                "currency": currency,
+                "units": int(units or 0),
+                "revenue": from_minor_units(int(revenue or 0), currency),
+                "revenue_minor": int(revenue or 0),
+                "orders": int(orders or 0)
+            }
+            for row_sku_id, currency, units, revenue, orders in rows
+        ]
+    
+    async def get_monthly_revenue(
+        self,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> List[dict]:
+        """Órdenes e ingresos por mes con SUM entero de total_minor en la base de datos"""
+        year = extract("year", OrderModel.created_at)
+        month = extract("month", OrderModel.created_at)
+        query = self.session.query(
+            year,
+            month,
+            OrderModel.currency,
+            func.count(OrderModel.id),
+            func.sum(OrderModel.total_minor)
+        ).filter(
+            OrderModel.status.notin_([status.value for status in NON_SALE_ORDER_STATUSES])
+        )
+        if date_from:
+            query = query.filter(OrderModel.created_at >= date_from)
+        if date_to:
+            query = query.filter(OrderModel.created_at < date_to)
+        
+        rows = query.group_by(year, month, OrderModel.currency).order_by(year, month, OrderModel.currency).all()
+        
+        return [
+            {
+                "month": f"{int(row_year):04d}-{int(row_month):02d}",
+                "currency": currency,
+                "orders": int(orders or 0),
+                "revenue": from_minor_units(int(revenue or 0), currency),
+                "revenue_minor": int(revenue or 0)
+            }
+            for row_year, row_month, currency, orders, revenue in rows
+        ]
+    
+    async def bulk_transition(
+        self,
+        order_ids: List[str],
+        target_status: OrderStatus,
+        allowed_from: FrozenSet[OrderStatus],
+        event_factory: Optional[Callable[[str], DomainEvent]] = None
+    ) -> Tuple[List[str], Dict[str, Optional[OrderStatus]]]:
+        """Cambiar de estado varias órdenes validando el estado de origen en el WHERE"""
+        order_ids = list(dict.fromkeys(order_ids))
+        allowed_values = [status.value for status in allowed_from]
+        now = datetime.utcnow()
+        
+        updated: List[str] = []
+        for chunk in _chunks(order_ids):
+            result = self.session.execute(
+                update(OrderModel)
+                .where(OrderModel.id.in_(chunk), OrderModel.status.in_(allowed_values))
+                .values(status=target_status.value, updated_at=now)
+                .returning(OrderModel.id)
+                .execution_options(synchronize_session=False)
+            )
+            updated.extend(row[0] for row in result)
+        
+        if updated:
+            first_seq = self._next_change_seqs(len(updated))
+            self.session.execute(
+                update(OrderModel.__table__)
+                .where(OrderModel.__table__.c.id == bindparam("b_order_id"))
+                .values(change_seq=bindparam("b_change_seq")),
+                [
+                    {"b_order_id": order_id, "b_change_seq": first_seq + offset}
+                    for offset, order_id in enumerate(updated)
+                ]
+            )
+        
+        # Motivo del rechazo: estado actual de las que no cambiaron (o inexistentes)
+        updated_set = set(updated)
+        rejected: Dict[str, Optional[OrderStatus]] = {
+            order_id: None for order_id in order_ids if order_id not in updated_set
+        }
+        for chunk in _chunks(list(rejected)):
+            rows = self.session.query(OrderModel.id, OrderModel.status).filter(
+                OrderModel.id.in_(chunk)
+            ).all()
+            for order_id, current_status in rows:
+                rejected[order_id] = OrderStatus(current_status)
+        
+        if event_factory:
+            stage_events(self.session, [event_factory(order_id) for order_id in updated])
+        
+        self.session.commit()
+        if event_factory and updated:
+            notify_outbox()
+        
+        updated_order = {order_id: index for index, order_id in enumerate(order_ids)}
+        return sorted(updated, key=updated_order.get), rejected
+    
+    async def assign_routes(self, assignments: Dict[str, str], commit: bool = True) -> List[str]:
+        """Asignar ruta a órdenes CONFIRMED sin ruta, todas o ninguna"""
+        now = datetime.utcnow()
+        by_route: Dict[str, List[str]] = {}
+        for order_id, route_id in assignments.items():
+            by_route.setdefault(route_id, []).append(order_id)
+        
+        assigned: List[str] = []
+        for route_id, order_ids in by_route.items():
+            for chunk in _chunks(order_ids):
+                result = self.session.execute(
+                    update(OrderModel)
+                    .where(
+                        OrderModel.id.in_(chunk),
+                        OrderModel.route_id.is_(None),
+                        OrderModel.status == OrderStatus.CONFIRMED.value
+                    )
+                    .values(route_id=route_id, updated_at=now)
+                    .returning(OrderModel.id)
+                    .execution_options(synchronize_session=False)
+                )
+                assigned.extend(row[0] for row in result)
+        
+        # Otra planificación o un cambio de estado ganó alguna orden: no dejar el plan a medias
+        assigned_set = set(assigned)
+        conflicts = [order_id for order_id in assignments if order_id not in assigned_set]
+        if conflicts:
+            self.session.rollback()
+            return conflicts
+        
+        if assigned:
+            first_seq = self._next_change_seqs(len(assigned))
+            self.session.execute(
+                update(OrderModel.__table__)
+                .where(OrderModel.__table__.c.id == bindparam("b_order_id"))
+                .values(change_seq=bindparam("b_change_seq")),
+                [
+                    {"b_order_id": order_id, "b_change_seq": first_seq + offset}
+                    for offset, order_id in enumerate(assigned)
+                ]
+            )
+        if commit:
+            self.session.commit()
+        return []
+    
+    async def update_etas(self, etas: Dict[str, ETA]) -> int:
+        """
+        Guardar la ETA de varias órdenes con un UPDATE por lote, sin cargar las entidades
+        
+        Las órdenes entregadas o canceladas no se tocan: su ETA ya no aplica
+        aunque quien la calculó todavía no se haya enterado.
+        """
+        # Comparaciones simples en vez de NOT IN: el UPDATE por lote no admite listas expandidas
+        open_order = [OrderModel.status != status for status in _ETA_CLOSED_STATUSES]
+        existing: List[str] = []
+        for chunk in _chunks(list(etas)):
+            existing.extend(
+                row[0] for row in self.session.query(OrderModel.id).filter(OrderModel.id.in_(chunk), *open_order)
+            )
+        if not existing:
+            return 0
+        
+        now = datetime.utcnow()
+        first_seq = self._next_change_seqs(len(existing))
+        table = OrderModel.__table__
+        self.session.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_order_id"), *open_order)
+            .values(eta=bindparam("b_eta"), change_seq=bindparam("b_change_seq"), updated_at=now),
+            [
+                {
+                    "b_order_id": order_id,
+                    # Mismo formato que _stage
+                    "b_eta": json.dumps(etas[order_id].to_dict()),
+                    "b_change_seq": first_seq + offset
+                }
+                for offset, order_id in enumerate(existing)
+            ]
+        )
+        self.session.commit()
+        return len(existing)
+    
+    async def take_reservations(self, order_ids: List[str]) -> Dict[str, List[str]]:
+        """Quitar las reservas de varias órdenes en una transacción y retornarlas"""
+        taken: Dict[str, List[str]] = {}
+        for chunk in _chunks(list(dict.fromkeys(order_ids))):
+            rows = self.session.query(OrderModel.id, OrderModel.reservations).filter(
+                OrderModel.id.in_(chunk)
+            ).with_for_update().all()
+            taken.update((order_id, list(reservations)) for order_id, reservations in rows if reservations)
+        
+        if taken:
+            # Cada orden tocada entra al feed de cambios, igual que al asignar rutas
+            now = datetime.utcnow()
+            first_seq = self._next_change_seqs(len(taken))
+            table = OrderModel.__table__
+            self.session.execute(
+                update(table)
+                .where(table.c.id == bindparam("b_order_id"))
+                .values(reservations=[], updated_at=now, change_seq=bindparam("b_change_seq")),
+                [
+                    {"b_order_id": order_id, "b_change_seq": first_seq + offset}
+                    for offset, order_id in enumerate(taken)
+                ]
+            )
+        self.session.commit()
+        return taken
     
     async def delete(self, order_id: EntityId) -> bool:
         """Eliminar orden"""
@@ -154,12 +705,91 @@ class SQLAlchemyOrderRepository(IOrderRepository):
         ).first()
         
         if order_model:
+            self.session.query(OrderItemModel).filter(
+                OrderItemModel.order_id == str(order_id)
+            ).delete(synchronize_session=False)
+            # La marca queda en el feed de cambios para que los clientes la eliminen
+            self.session.add(OrderTombstoneModel(
+                change_seq=self._next_change_seqs(1),
+                order_id=order_model.id,
+                client_id=order_model.client_id,
+                vendor_id=order_model.vendor_id,
+                deleted_at=datetime.utcnow()
+            ))
             self.session.delete(order_model)
             self.session.commit()
             return True
         
         return False
     
+    async def get_changes(
+        self,
+        since: int = 0,
+        limit: int = 500,
+        client_id: Optional[str] = None,
+        vendor_id: Optional[str] = None
+    ) -> Tuple[List[dict], int, bool]:
+        """
+        Cambios de órdenes con número mayor a `since`, en orden de número
+        
+        Cada orden aparece una vez con su último cambio. Lee por rango del
+        índice (cliente/vendedor, change_seq) en órdenes y en tombstones y
+        mezcla ambos; retorna los cambios, el número hasta el que se leyó y
+        si quedan más.
+        """
+        orders = self.session.query(
+            OrderModel.id,
+            OrderModel.change_seq,
+            OrderModel.order_number,
+            OrderModel.status,
+            OrderModel.client_id,
+            OrderModel.vendor_id,
+            OrderModel.total_minor,
+            OrderModel.currency,
+            OrderModel.updated_at
+        ).filter(OrderModel.change_seq > since)
+        tombstones = self.session.query(
+            OrderTombstoneModel.order_id,
+            OrderTombstoneModel.change_seq,
+            OrderTombstoneModel.deleted_at
+        ).filter(OrderTombstoneModel.change_seq > since)
+        if client_id:
+            orders = orders.filter(OrderModel.client_id == client_id)
+            tombstones = tombstones.filter(OrderTombstoneModel.client_id == client_id)
+        if vendor_id:
+            orders = orders.filter(OrderModel.vendor_id == vendor_id)
+            tombstones = tombstones.filter(OrderTombstoneModel.vendor_id == vendor_id)
+        
+        changes = [
+            {
+                "op": "upsert",
+                "order_id": order_id,
+                "change_seq": change_seq,
+                "order_number": order_number,
+                "status": status,
+                "client_id": row_client_id,
+                "vendor_id": row_vendor_id,
+                "total": from_minor_units(total_minor or 0, currency),
+                "currency": currency,
+                "updated_at": updated_at
+            }
+            for (
+                order_id, change_seq, order_number, status, row_client_id, row_vendor_id, total_minor, currency,
+                updated_at
+            ) in orders.order_by(OrderModel.change_seq).limit(limit + 1).all()
+        ]
+        changes.extend(
+            {"op": "delete", "order_id": order_id, "change_seq": change_seq, "updated_at": deleted_at}
+            for order_id, change_seq, deleted_at
+            in tombstones.order_by(OrderTombstoneModel.change_seq).limit(limit + 1).all()
+        )
+        changes.sort(key=lambda change: change["change_seq"])
+        
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        next_since = changes[-1]["change_seq"] if changes else since
+        return changes, next_since, has_more
+    
     async def exists_by_id(self, order_id: EntityId) -> bool:
         """Verificar si existe una orden con ese ID"""
         count = self.session.query(OrderModel).filter(
@@ -167,4 +797,70 @@ class SQLAlchemyOrderRepository(IOrderRepository):
         ).count()
         
         return count > 0
+    
+    def iter_export_rows(
+        self,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        statuses: Optional[List[OrderStatus]] = None,
+        batch_size: int = EXPORT_BATCH_SIZE
+    ) -> Iterator[Any]:
+        """
+        Filas de resumen de órdenes por fecha de creación, leídas en streaming
+        
+        Con yield_per el driver usa un cursor del lado del servidor (en
+        Postgres, un cursor con nombre) y solo hay `batch_size` filas en
+        memoria; no se hidratan entidades ni artículos.
+        """
+        query = select(
+            OrderModel.id,
+            OrderModel.order_number,
+            OrderModel.status,
+            OrderModel.client_id,
+            OrderModel.vendor_id,
+            OrderModel.total_minor,
+            OrderModel.currency,
+            OrderModel.route_id,
+            OrderModel.delivery_date,
+            OrderModel.created_at,
+            OrderModel.updated_at
+        )
+        if date_from:
+            query = query.where(OrderModel.created_at >= date_from)
+        if date_to:
+            query = query.where(OrderModel.created_at < date_to)
+        if statuses:
+            query = query.where(OrderModel.status.in_([status.value for status in statuses]))
+        
+        result = self.session.execute(
+            query.order_by(OrderModel.created_at, OrderModel.id).execution_options(yield_per=batch_size)
+        )
+        try:
+            for partition in result.partitions():
+                yield from partition
+        finally:
+            result.close()
+
+
+@register_migration
+def backfill_order_items(bind: Engine) -> None:
+    """Migración de arranque: artículos de la columna JSON legada a order_items"""
+    session = Session(bind=bind)
+    try:
+        migrated = SQLAlchemyOrderRepository(session).backfill_legacy_items()
+    finally:
+        session.close()
+    if migrated:
+        print(f"✅ Artículos de {migrated} órdenes legadas migrados a order_items")
+
 
+@register_migration
+def backfill_change_seqs(bind: Engine) -> None:
+    """Migración de arranque: número de cambio para las órdenes previas al feed"""
+    session = Session(bind=bind)
+    try:
+        numbered = SQLAlchemyOrderRepository(session).backfill_change_seqs()
+    finally:
+        session.close()
+    if numbered:
+        print(f"✅ {numbered} órdenes sin número de cambio agregadas al feed de cambios")
@@ -1,11 +1,13 @@
 """
 Dependencias de FastAPI para el servicio de productos
 """
+from datetime import timedelta
 from sqlalchemy.orm import Session
 from fastapi import Depends
 
 from ...infrastructure.database import get_db
-from ...infrastructure.repositories import SQLAlchemyProductRepository
+from ...infrastructure.config import get_settings
+from ...infrastructure.repositories import SQLAlchemyProductRepository, SQLAlchemyStockReservationRepository
 from ...application.handlers import (
     CreateProductCommandHandler,
     UpdateProductCommandHandler,
@@ -17,7 +19,11 @@ from ...application.handlers import (
     GetProductByIdQueryHandler,
     GetProductByNameQueryHandler,
     GetAllProductsQueryHandler,
-    GetProductStockQueryHandler
+    GetProductStockQueryHandler,
+    ReserveStockCommandHandler,
+    ReleaseReservationCommandHandler,
+    CommitReservationCommandHandler,
+    GetAvailableToPromiseQueryHandler
 )
 
 
@@ -106,3 +112,40 @@ def get_product_stock_handler(
     """Obtener handler de query de stock"""
     return GetProductStockQueryHandler(product_repository)
 
+
+# Reservas de stock
+def get_stock_reservation_repository(db: Session = Depends(get_db)) -> SQLAlchemyStockReservationRepository:
+    """Obtener repositorio de reservas de stock"""
+    return SQLAlchemyStockReservationRepository(db)
+
+
+def get_reserve_stock_handler(
+    reservation_repository: SQLAlchemyStockReservationRepository = Depends(get_stock_reservation_repository)
+) -> ReserveStockCommandHandler:
+    """Obtener handler de reserva de stock"""
+    return ReserveStockCommandHandler(
+        reservation_repository,
+        default_ttl=timedelta(minutes=get_settings().stock_reservation_ttl_minutes)
+    )
+
+
+def get_release_reservation_handler(
+    reservation_repository: SQLAlchemyStockReservationRepository = Depends(get_stock_reservation_repository)
+) -> ReleaseReservationCommandHandler:
+    """Obtener handler de liberar reserva"""
+    return ReleaseReservationCommandHandler(reservation_repository)
+
+
+def get_commit_reservation_handler(
+    reservation_repository: SQLAlchemyStockReservationRepository = Depends(get_stock_reservation_repository)
+) -> CommitReservationCommandHandler:
+    """Obtener handler de consumir reserva"""
+    return CommitReservationCommandHandler(reservation_repository)
+
+
+def get_available_to_promise_handler(
+    reservation_repository: SQLAlchemyStockReservationRepository = Depends(get_stock_reservation_repository)
+) -> GetAvailableToPromiseQueryHandler:
+    """Obtener handler de disponible para prometer"""
+    return GetAvailableToPromiseQueryHandler(reservation_repository)
+
@@ -1,7 +1,7 @@
 """
 Rutas de la API de productos
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
@@ -14,13 +14,17 @@ from ...application.commands import (
     RemoveStockCommand,
     DeactivateProductCommand,
     ActivateProductCommand,
-    DeleteProductCommand
+    DeleteProductCommand,
+    ReserveStockCommand,
+    ReleaseReservationCommand,
+    CommitReservationCommand
 )
 from ...application.queries import (
     GetProductByIdQuery,
     GetProductByNameQuery,
     GetAllProductsQuery,
-    GetProductStockQuery
+    GetProductStockQuery,
+    GetAvailableToPromiseQuery
 )
 from ..dependencies import (
     get_create_product_handler,
@@ -33,7 +37,11 @@ from ..dependencies import (
     get_product_by_id_handler,
     get_product_by_name_handler,
     get_all_products_handler,
-    get_product_stock_handler
+    get_product_stock_handler,
+    get_reserve_stock_handler,
+    get_release_reservation_handler,
+    get_commit_reservation_handler,
+    get_available_to_promise_handler
 )
 
 router = APIRouter()
@@ -92,6 +100,7 @@ class ProductResponse(BaseModel):
     name: str
     description: Optional[str] = None
     price: float
+    currency: Optional[str] = None
     stock: int
     expiry: Optional[datetime] = None
     lot: Optional[str] = None
@@ -117,6 +126,35 @@ class StockResponse(BaseModel):
     stock: int
 
 
+class ReservationLineRequest(BaseModel):
+    """Línea de reserva de stock"""
+    skuId: str
+    qty: int = Field(..., ge=1)
+
+
+class ReserveStockRequest(BaseModel):
+    """Request para reservar stock"""
+    lines: List[ReservationLineRequest] = Field(..., min_length=1)
+    orderId: Optional[str] = None
+    ttlSeconds: Optional[int] = Field(None, ge=1)
+
+
+class ReservationResponse(BaseModel):
+    """Response de reserva de stock"""
+    reservationId: str
+    orderId: Optional[str] = None
+    lines: List[dict]
+    status: str
+    expiresAt: datetime
+    createdAt: datetime
+
+
+class AvailabilityResponse(BaseModel):
+    """Response de disponible para prometer por SKU"""
+    skuId: str
+    available: int
+
+
 # ========== Endpoints ==========
 
 @router.post(
@@ -173,6 +211,7 @@ async def create_product(
                 name=str(product.name),
                 description=str(product.description) if product.description else None,
                 price=product.price.amount,
+                currency=product.price.currency,
                 stock=product.stock.quantity,
                 expiry=product.expiry,
                 lot=str(product.lot) if product.lot else None,
@@ -238,6 +277,7 @@ async def get_products(
                     name=str(product.name),
                     description=str(product.description) if product.description else None,
                     price=product.price.amount,
+                    currency=product.price.currency,
                     stock=product.stock.quantity,
                     expiry=product.expiry,
                     lot=str(product.lot) if product.lot else None,
@@ -267,6 +307,95 @@ async def get_products(
         )
 
 
+@router.post(
+    "/products/reservations",
+    response_model=ReservationResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Reservar stock",
+    description="Reserva atómicamente varias cantidades de SKUs con vencimiento (TTL)"
+)
+async def reserve_stock(
+    request: ReserveStockRequest,
+    handler=Depends(get_reserve_stock_handler)
+):
+    """Reservar stock"""
+    try:
+        reservation = await handler.handle(ReserveStockCommand(
+            lines=[line.model_dump() for line in request.lines],
+            order_id=request.orderId,
+            ttl_seconds=request.ttlSeconds
+        ))
+        return ReservationResponse(**reservation.to_dict())
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
+
+
+@router.delete(
+    "/products/reservations/{reservation_id}",
+    response_model=MessageResponse,
+    summary="Liberar reserva",
+    description="Libera una reserva de stock activa"
+)
+async def release_reservation(
+    reservation_id: str,
+    handler=Depends(get_release_reservation_handler)
+):
+    """Liberar reserva"""
+    try:
+        await handler.handle(ReleaseReservationCommand(reservation_id=reservation_id))
+        return MessageResponse(message="Reserva liberada")
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+
+@router.post(
+    "/products/reservations/{reservation_id}/commit",
+    response_model=MessageResponse,
+    summary="Consumir reserva",
+    description="Descuenta del stock las cantidades de una reserva activa"
+)
+async def commit_reservation(
+    reservation_id: str,
+    handler=Depends(get_commit_reservation_handler)
+):
+    """Consumir reserva"""
+    try:
+        await handler.handle(CommitReservationCommand(reservation_id=reservation_id))
+        return MessageResponse(message="Reserva consumida")
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+
+@router.get(
+    "/products/availability",
+    response_model=List[AvailabilityResponse],
+    summary="Disponible para prometer",
+    description="Stock disponible (stock menos reservas activas) de varios SKUs"
+)
+async def get_availability(
+    skuIds: List[str] = Query(..., min_length=1),
+    handler=Depends(get_available_to_promise_handler)
+):
+    """Obtener disponible para prometer"""
+    available = await handler.handle(GetAvailableToPromiseQuery(sku_ids=skuIds))
+    return [
+        AvailabilityResponse(skuId=sku_id, available=qty)
+        for sku_id, qty in available.items()
+    ]
+
+
 @router.get(
     "/products/{product_id}",
     response_model=dict,
@@ -297,6 +426,7 @@ async def get_product(
                 name=str(product.name),
                 description=str(product.description) if product.description else None,
                 price=product.price.amount,
+                currency=product.price.currency,
                 stock=product.stock.quantity,
                 expiry=product.expiry,
                 lot=str(product.lot) if product.lot else None,
@@ -376,6 +506,7 @@ async def update_product(
                 name=str(product.name),
                 description=str(product.description) if product.description else None,
                 price=product.price.amount,
+                currency=product.price.currency,
                 stock=product.stock.quantity,
                 expiry=product.expiry,
                 lot=str(product.lot) if product.lot else None,
@@ -696,6 +827,7 @@ async def bulk_upload_products(
                     name=str(product.name),
                     description=str(product.description) if product.description else None,
                     price=product.price.amount,
+                    currency=product.price.currency,
                     stock=product.stock.quantity,
                     expiry=product.expiry,
                     lot=str(product.lot) if product.lot else None,
@@ -78,3 +78,23 @@ class DeleteProductCommand:
     """Comando para eliminar producto"""
     product_id: str
 
+
+@dataclass
+class ReserveStockCommand:
+    """Comando para reservar stock de varios SKUs"""
+    lines: List[dict]  # [{"skuId": str, "qty": int}]
+    order_id: Optional[str] = None
+    ttl_seconds: Optional[int] = None
+
+
+@dataclass
+class ReleaseReservationCommand:
+    """Comando para liberar una reserva de stock"""
+    reservation_id: str
+
+
+@dataclass
+class CommitReservationCommand:
+    """Comando para consumir una reserva de stock"""
+    reservation_id: str
+
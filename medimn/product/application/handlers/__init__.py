@@ -1,9 +1,9 @@
 """
 Handlers para comandos y queries del servicio de productos
 """
-from typing import Optional, List
+from typing import Dict, Optional, List
 from uuid import uuid4
-from datetime import datetime
+from datetime import datetime, timedelta
 import sys
 from pathlib import Path
 
@@ -21,20 +21,27 @@ from ..commands import (
     RemoveStockCommand,
     DeactivateProductCommand,
     ActivateProductCommand,
-    DeleteProductCommand
+    DeleteProductCommand,
+    ReserveStockCommand,
+    ReleaseReservationCommand,
+    CommitReservationCommand
 )
 from ..queries import (
     GetProductByIdQuery,
     GetProductByNameQuery,
     GetAllProductsQuery,
-    GetProductStockQuery
+    GetProductStockQuery,
+    GetAvailableToPromiseQuery
 )
-from ...domain.entities import Product, Batch
+from ...domain.entities import Product, Batch, StockReservation
 from ...domain.value_objects import (
     ProductName, ProductDescription, Stock, Lot, Warehouse, 
     Supplier, Category, VendorId
 )
-from ...domain.ports import IProductRepository
+from ...domain.ports import IProductRepository, IStockReservationRepository
+
+# Vigencia por defecto de una reserva de stock
+DEFAULT_RESERVATION_TTL = timedelta(minutes=15)
 
 
 # ========== Command Handlers ==========
@@ -69,11 +76,11 @@ class CreateProductCommandHandler:
             stock=Stock(command.stock),
             expiry=command.expiry,
             lot=Lot(command.lot) if command.lot else None,
-            warehouse=Warehouse(command.warehouse) if command.warehouse else None,
-            supplier=Supplier(command.supplier) if command.supplier else None,
-            category=Category(command.category) if command.category else None,
+            warehouse=Warehouse.of(command.warehouse) if command.warehouse else None,
+            supplier=Supplier.of(command.supplier) if command.supplier else None,
+            category=Category.of(command.category) if command.category else None,
             batches=batches,
-            vendor_id=VendorId(command.vendor_id) if command.vendor_id else None,
+            vendor_id=VendorId.of(command.vendor_id) if command.vendor_id else None,
             is_active=command.is_active
         )
         
@@ -326,3 +333,77 @@ class GetProductStockQueryHandler:
             return None
         return product.stock.quantity
 
+
+# ========== Reservas de stock ==========
+
+class ReserveStockCommandHandler:
+    """Handler para el comando ReserveStock"""
+    
+    def __init__(
+        self,
+        reservation_repository: IStockReservationRepository,
+        default_ttl: timedelta = DEFAULT_RESERVATION_TTL
+    ):
+        self.reservation_repository = reservation_repository
+        self.default_ttl = default_ttl
+    
+    async def handle(self, command: ReserveStockCommand) -> StockReservation:
+        """Manejar comando de reserva de stock"""
+        if not command.lines:
+            raise ValueError("La reserva debe tener al menos un artículo")
+        
+        # Agrupar líneas repetidas del mismo SKU
+        lines: Dict[str, int] = {}
+        for line in command.lines:
+            if line["qty"] <= 0:
+                raise ValueError(f"Cantidad inválida para SKU {line['skuId']}")
+            lines[line["skuId"]] = lines.get(line["skuId"], 0) + line["qty"]
+        
+        ttl = timedelta(seconds=command.ttl_seconds) if command.ttl_seconds else self.default_ttl
+        if ttl.total_seconds() <= 0:
+            raise ValueError("La vigencia de la reserva debe ser positiva")
+        
+        return await self.reservation_repository.reserve(
+            lines,
+            expires_at=datetime.utcnow() + ttl,
+            order_id=command.order_id
+        )
+
+
+class ReleaseReservationCommandHandler:
+    """Handler para el comando ReleaseReservation"""
+    
+    def __init__(self, reservation_repository: IStockReservationRepository):
+        self.reservation_repository = reservation_repository
+    
+    async def handle(self, command: ReleaseReservationCommand) -> bool:
+        """Manejar comando de liberar reserva"""
+        if not await self.reservation_repository.release(command.reservation_id):
+            raise ValueError(f"Reserva {command.reservation_id} no encontrada o no activa")
+        return True
+
+
+class CommitReservationCommandHandler:
+    """Handler para el comando CommitReservation"""
+    
+    def __init__(self, reservation_repository: IStockReservationRepository):
+        self.reservation_repository = reservation_repository
+    
+    async def handle(self, command: CommitReservationCommand) -> bool:
+        """Manejar comando de consumir reserva"""
+        if not await self.reservation_repository.commit(command.reservation_id):
+            raise ValueError(f"Reserva {command.reservation_id} no encontrada o no activa")
+        return True
+
+
+class GetAvailableToPromiseQueryHandler:
+    """Handler para la query GetAvailableToPromise"""
+    
+    def __init__(self, reservation_repository: IStockReservationRepository):
+        self.reservation_repository = reservation_repository
+    
+    async def handle(self, query: GetAvailableToPromiseQuery) -> Dict[str, int]:
+        """Manejar query de disponible para prometer (0 para SKUs inexistentes o inactivos)"""
+        available = await self.reservation_repository.available_to_promise(query.sku_ids)
+        return {sku_id: available.get(sku_id, 0) for sku_id in dict.fromkeys(query.sku_ids)}
+
@@ -2,7 +2,7 @@
 Queries del servicio de productos
 """
 from dataclasses import dataclass
-from typing import Optional
+from typing import List, Optional
 
 
 @dataclass
@@ -31,3 +31,9 @@ class GetProductStockQuery:
     """Query para obtener el stock de un producto"""
     product_id: str
 
+
+@dataclass
+class GetAvailableToPromiseQuery:
+    """Query para obtener el stock disponible para prometer de varios SKUs"""
+    sku_ids: List[str]
+
@@ -3,6 +3,7 @@ Event handlers del servicio de productos
 """
 import sys
 from pathlib import Path
+from typing import Dict, List
 
 # Agregar el path del módulo shared al PYTHONPATH
 shared_path = str(Path(__file__).parent.parent.parent.parent / "shared")
@@ -21,12 +22,6 @@ from ...domain.events import (
 class ProductEventHandler:
     """Handler para eventos de producto"""
     
-    async def on_product_created(self, event: ProductCreatedEvent):
-        """Manejar evento de producto creado"""
-        print(f"📦 [EVENT] Producto creado: {event.name} (${event.price})")
-        # Aquí se podría notificar a otros servicios
-        # Aquí se podría publicar a un message broker
-    
     async def on_product_updated(self, event: ProductUpdatedEvent):
         """Manejar evento de producto actualizado"""
         print(f"✏️ [EVENT] Producto actualizado: {event.product_id}")
@@ -38,25 +33,53 @@ class ProductEventHandler:
         print(f"❌ [EVENT] Producto desactivado: {event.product_id}")
         # Aquí se podría notificar a otros servicios
     
-    async def on_stock_updated(self, event: StockUpdatedEvent):
-        """Manejar evento de stock actualizado"""
-        print(f"📊 [EVENT] Stock actualizado: Producto {event.product_id} - {event.old_stock} → {event.new_stock}")
-        # Aquí se podría actualizar un sistema de inventario
-    
     async def on_low_stock(self, event: LowStockEvent):
         """Manejar evento de stock bajo"""
         print(f"⚠️ [EVENT] Stock bajo: Producto {event.product_id} - Stock actual: {event.current_stock}")
         # Aquí se podría enviar una notificación
         # Aquí se podría crear una orden de reabastecimiento automática
+    
+    # ========== Handlers en lote (cargas masivas e importaciones) ==========
+    
+    async def on_products_created_batch(self, events: List[ProductCreatedEvent]):
+        """Manejar un lote de productos creados"""
+        print(f"📦 [EVENT] {len(events)} productos creados")
+        # Aquí se podría notificar a otros servicios con un solo mensaje
+    
+    async def on_stock_updated_batch(self, events: List[StockUpdatedEvent]) -> Dict[str, int]:
+        """
+        Manejar un lote de cambios de stock
+        
+        Colapsa los cambios por producto al último stock, así una proyección
+        de inventario haría una sola escritura por lote.
+        
+        Returns:
+            Dict[str, int]: Stock final por producto
+        """
+        latest: Dict[str, int] = {}
+        for event in events:
+            latest[event.product_id] = event.new_stock
+        print(f"📊 [EVENT] Stock actualizado: {len(events)} cambios en {len(latest)} productos")
+        # Aquí se podría actualizar un sistema de inventario en una sola escritura
+        return latest
 
 
 def setup_event_handlers(event_handler: ProductEventHandler):
     """Configurar handlers de eventos"""
     from shared.domain.events import event_bus
+    from infrastructure.config import get_settings
+    
+    settings = get_settings()
+    batch_window = {
+        "max_batch_size": settings.event_bus_batch_size,
+        "max_wait_seconds": settings.event_bus_batch_wait_seconds
+    }
+    
+    # Eventos de alto volumen: se entregan en lotes
+    event_bus.subscribe_batch("ProductCreatedEvent", event_handler.on_products_created_batch, **batch_window)
+    event_bus.subscribe_batch("StockUpdatedEvent", event_handler.on_stock_updated_batch, **batch_window)
     
-    event_bus.subscribe("ProductCreatedEvent", event_handler.on_product_created)
     event_bus.subscribe("ProductUpdatedEvent", event_handler.on_product_updated)
     event_bus.subscribe("ProductDeactivatedEvent", event_handler.on_product_deactivated)
-    event_bus.subscribe("StockUpdatedEvent", event_handler.on_stock_updated)
     event_bus.subscribe("LowStockEvent", event_handler.on_low_stock)
 
@@ -2,8 +2,9 @@
 Entidades del dominio de productos
 """
 from datetime import datetime
-from typing import Optional, List
-from dataclasses import dataclass
+from enum import Enum
+from typing import Dict, Optional, List
+from dataclasses import dataclass, field
 import sys
 from pathlib import Path
 
@@ -27,7 +28,7 @@ from ..events import (
 )
 
 
-@dataclass
+@dataclass(slots=True)
 class Batch:
     """Value Object para lote con información adicional"""
     batch: str
@@ -48,6 +49,21 @@ class Batch:
 class Product(Entity):
     """Entidad Product del dominio de productos"""
     
+    __slots__ = (
+        "_name",
+        "_price",
+        "_description",
+        "_stock",
+        "_expiry",
+        "_lot",
+        "_warehouse",
+        "_supplier",
+        "_category",
+        "_batches",
+        "_vendor_id",
+        "_is_active",
+    )
+    
     LOW_STOCK_THRESHOLD = 10
     
     def __init__(
@@ -242,3 +258,33 @@ class Product(Entity):
         
         return product
 
+
+class ReservationStatus(Enum):
+    """Estados de una reserva de stock"""
+    ACTIVE = "ACTIVE"
+    COMMITTED = "COMMITTED"
+    RELEASED = "RELEASED"
+    EXPIRED = "EXPIRED"
+
+
+@dataclass(slots=True)
+class StockReservation:
+    """Retención temporal de stock de varios SKUs para una orden"""
+    reservation_id: str
+    lines: Dict[str, int]  # sku_id -> cantidad
+    expires_at: datetime
+    order_id: Optional[str] = None
+    status: ReservationStatus = ReservationStatus.ACTIVE
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    
+    def to_dict(self) -> dict:
+        """Convertir a diccionario"""
+        return {
+            "reservationId": self.reservation_id,
+            "orderId": self.order_id,
+            "lines": [{"skuId": sku_id, "qty": qty} for sku_id, qty in self.lines.items()],
+            "status": self.status.value,
+            "expiresAt": self.expires_at.isoformat(),
+            "createdAt": self.created_at.isoformat()
+        }
+
@@ -16,6 +16,8 @@ from shared.domain.events import DomainEvent
 class ProductCreatedEvent(DomainEvent):
     """Evento que se dispara cuando se crea un producto"""
     
+    __slots__ = ("product_id", "name", "price")
+    
     def __init__(self, product_id: str, name: str, price: float):
         super().__init__()
         self.product_id = product_id
@@ -34,6 +36,8 @@ class ProductCreatedEvent(DomainEvent):
 class ProductUpdatedEvent(DomainEvent):
     """Evento que se dispara cuando se actualiza un producto"""
     
+    __slots__ = ("product_id",)
+    
     def __init__(self, product_id: str):
         super().__init__()
         self.product_id = product_id
@@ -48,6 +52,8 @@ class ProductUpdatedEvent(DomainEvent):
 class ProductDeactivatedEvent(DomainEvent):
     """Evento que se dispara cuando se desactiva un producto"""
     
+    __slots__ = ("product_id",)
+    
     def __init__(self, product_id: str):
         super().__init__()
         self.product_id = product_id
@@ -62,6 +68,8 @@ class ProductDeactivatedEvent(DomainEvent):
 class StockUpdatedEvent(DomainEvent):
     """Evento que se dispara cuando se actualiza el stock"""
     
+    __slots__ = ("product_id", "old_stock", "new_stock")
+    
     def __init__(self, product_id: str, old_stock: int, new_stock: int):
         super().__init__()
         self.product_id = product_id
@@ -80,6 +88,8 @@ class StockUpdatedEvent(DomainEvent):
 class LowStockEvent(DomainEvent):
     """Evento que se dispara cuando el stock es bajo"""
     
+    __slots__ = ("product_id", "current_stock", "threshold")
+    
     def __init__(self, product_id: str, current_stock: int, threshold: int):
         super().__init__()
         self.product_id = product_id
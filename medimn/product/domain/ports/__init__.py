@@ -2,7 +2,8 @@
 Puertos (interfaces) del dominio de productos
 """
 from abc import ABC, abstractmethod
-from typing import Optional, List
+from datetime import datetime
+from typing import Dict, Optional, List
 import sys
 from pathlib import Path
 
@@ -13,7 +14,7 @@ if shared_path not in sys.path:
 
 from shared.domain.value_objects import EntityId
 from ..value_objects import ProductName
-from ..entities import Product
+from ..entities import Product, StockReservation
 
 
 class IProductRepository(ABC):
@@ -49,3 +50,47 @@ class IProductRepository(ABC):
         """Verificar si existe un producto con ese ID"""
         pass
 
+
+class IStockReservationRepository(ABC):
+    """Puerto (interfaz) para las reservas de stock"""
+    
+    @abstractmethod
+    async def reserve(
+        self,
+        lines: Dict[str, int],
+        expires_at: datetime,
+        order_id: Optional[str] = None
+    ) -> StockReservation:
+        """
+        Reservar atómicamente las cantidades de todos los SKUs
+        
+        Raises:
+            ValueError: Si algún SKU no tiene stock disponible suficiente
+        """
+        pass
+    
+    @abstractmethod
+    async def find_by_id(self, reservation_id: str) -> Optional[StockReservation]:
+        """Buscar reserva por ID"""
+        pass
+    
+    @abstractmethod
+    async def release(self, reservation_id: str) -> bool:
+        """Liberar una reserva activa"""
+        pass
+    
+    @abstractmethod
+    async def commit(self, reservation_id: str) -> bool:
+        """Consumir una reserva activa descontando el stock"""
+        pass
+    
+    @abstractmethod
+    async def release_expired(self, now: datetime, batch_size: int = 500) -> int:
+        """Liberar un lote de reservas vencidas; retorna las líneas liberadas"""
+        pass
+    
+    @abstractmethod
+    async def available_to_promise(self, sku_ids: List[str]) -> Dict[str, int]:
+        """Stock disponible para prometer (stock - reservado) por SKU"""
+        pass
+
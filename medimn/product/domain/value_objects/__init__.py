@@ -10,10 +10,10 @@ shared_path = str(Path(__file__).parent.parent.parent.parent / "shared")
 if shared_path not in sys.path:
     sys.path.insert(0, shared_path)
 
-from shared.domain.value_objects import Money
+from shared.domain.value_objects import InternedValueObject, Money
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ProductName:
     """Value Object para nombre de producto"""
     value: str
@@ -28,7 +28,7 @@ class ProductName:
         return self.value
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ProductDescription:
     """Value Object para descripción de producto"""
     value: str
@@ -41,7 +41,7 @@ class ProductDescription:
         return self.value or ""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Stock:
     """Value Object para stock de producto"""
     quantity: int
@@ -75,7 +75,7 @@ class Stock:
         return self.quantity >= amount
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Lot:
     """Value Object para lote de producto"""
     value: str
@@ -88,8 +88,8 @@ class Lot:
         return self.value or ""
 
 
-@dataclass(frozen=True)
-class Warehouse:
+@dataclass(frozen=True, slots=True)
+class Warehouse(InternedValueObject):
     """Value Object para bodega"""
     value: str
     
@@ -101,8 +101,8 @@ class Warehouse:
         return self.value or ""
 
 
-@dataclass(frozen=True)
-class Supplier:
+@dataclass(frozen=True, slots=True)
+class Supplier(InternedValueObject):
     """Value Object para proveedor"""
     value: str
     
@@ -114,8 +114,8 @@ class Supplier:
         return self.value or ""
 
 
-@dataclass(frozen=True)
-class Category:
+@dataclass(frozen=True, slots=True)
+class Category(InternedValueObject):
     """Value Object para categoría"""
     value: str
     
@@ -127,8 +127,8 @@ class Category:
         return self.value or ""
 
 
-@dataclass(frozen=True)
-class VendorId:
+@dataclass(frozen=True, slots=True)
+class VendorId(InternedValueObject):
     """Value Object para ID de vendedor"""
     value: str
     
@@ -43,6 +43,14 @@ class ProductServiceSettings:
     def allowed_origins(self) -> list:
         return self._monolith_settings.allowed_origins
     
+    @property
+    def stock_reservation_ttl_minutes(self) -> int:
+        return self._monolith_settings.stock_reservation_ttl_minutes
+    
+    @property
+    def stock_reservation_sweep_seconds(self) -> int:
+        return self._monolith_settings.stock_reservation_sweep_seconds
+    
     @property
     def auth_service_url(self) -> str:
         # En el monolito, todos los servicios están en la misma app
@@ -10,7 +10,7 @@ if str(monolith_path) not in sys.path:
     sys.path.insert(0, str(monolith_path))
 
 # Usar Base unificada del monolito
-from infrastructure.database import Base
+from infrastructure.database import Base, add_missing_columns, register_migration, replace_legacy_column
 
 # Agregar el path del módulo shared al PYTHONPATH
 shared_path = str(monolith_path / "shared")
@@ -20,10 +20,11 @@ if shared_path not in sys.path:
 from typing import Optional, List
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import Column, String, Boolean, DateTime, Float, Integer, Text, JSON
+from sqlalchemy.engine import Engine
+from sqlalchemy import Column, String, Boolean, DateTime, BigInteger, Integer, Text, JSON
 import json
 
-from shared.domain.value_objects import EntityId, Money
+from shared.domain.value_objects import DEFAULT_CURRENCY, EntityId, Money, minor_unit_exponent
 from ...domain.entities import Product, Batch
 from ...domain.value_objects import (
     ProductName, ProductDescription, Stock, Lot, Warehouse, 
@@ -41,8 +42,10 @@ class ProductModel(Base):
     id = Column(String, primary_key=True)
     name = Column(String, nullable=False, index=True)
     description = Column(Text, nullable=True)
-    price = Column(Float, nullable=False)
+    price_minor = Column(BigInteger, nullable=False)  # Precio en unidades menores (centavos)
+    currency = Column(String(3), nullable=False, default=DEFAULT_CURRENCY)
     stock = Column(Integer, default=0)
+    reserved = Column(Integer, nullable=False, default=0)  # Retenido por reservas activas
     expiry = Column(DateTime, nullable=True)
     lot = Column(String, nullable=True)
     warehouse = Column(String, nullable=True)
@@ -55,6 +58,19 @@ class ProductModel(Base):
     updated_at = Column(DateTime, nullable=False)
 
 
+@register_migration
+def upgrade_products_table(bind: Engine) -> None:
+    """Migración de arranque: columnas agregadas a products después de crearla"""
+    add_missing_columns(bind, ProductModel.__table__, {
+        "price_minor": "0",
+        "currency": f"'{DEFAULT_CURRENCY}'",
+        "reserved": "0"
+    })
+    # Precio legado en float (NOT NULL): pasa a unidades menores y se elimina
+    scale = 10 ** minor_unit_exponent(DEFAULT_CURRENCY)
+    replace_legacy_column(bind, "products", "price", {"price_minor": f"CAST(ROUND(price * {scale}) AS BIGINT)"})
+
+
 class SQLAlchemyProductRepository(IProductRepository):
     """Repositorio de productos con SQLAlchemy"""
     
@@ -81,16 +97,17 @@ class SQLAlchemyProductRepository(IProductRepository):
         return Product(
             product_id=EntityId(model.id),
             name=ProductName(model.name),
-            price=Money(model.price),
+            # Valores repetidos en todo el catálogo: instancias compartidas, validadas una vez
+            price=Money.from_minor(model.price_minor, model.currency or DEFAULT_CURRENCY),
             description=ProductDescription(model.description) if model.description else None,
             stock=Stock(model.stock),
             expiry=model.expiry,
             lot=Lot(model.lot) if model.lot else None,
-            warehouse=Warehouse(model.warehouse) if model.warehouse else None,
-            supplier=Supplier(model.supplier) if model.supplier else None,
-            category=Category(model.category) if model.category else None,
+            warehouse=Warehouse.of(model.warehouse) if model.warehouse else None,
+            supplier=Supplier.of(model.supplier) if model.supplier else None,
+            category=Category.of(model.category) if model.category else None,
             batches=batches,
-            vendor_id=VendorId(model.vendor_id) if model.vendor_id else None,
+            vendor_id=VendorId.of(model.vendor_id) if model.vendor_id else None,
             is_active=model.is_active
         )
     
@@ -105,7 +122,8 @@ class SQLAlchemyProductRepository(IProductRepository):
             id=str(product.id),
             name=str(product.name),
             description=str(product.description) if product.description else None,
-            price=product.price.amount,
+            price_minor=product.price.minor_units,
+            currency=product.price.currency,
             stock=product.stock.quantity,
             expiry=product.expiry,
             lot=str(product.lot) if product.lot else None,
@@ -130,7 +148,8 @@ class SQLAlchemyProductRepository(IProductRepository):
             # Actualizar
             existing.name = str(product.name)
             existing.description = str(product.description) if product.description else None
-            existing.price = product.price.amount
+            existing.price_minor = product.price.minor_units
+            existing.currency = product.price.currency
             existing.stock = product.stock.quantity
             existing.expiry = product.expiry
             existing.lot = str(product.lot) if product.lot else None
@@ -216,3 +235,6 @@ class SQLAlchemyProductRepository(IProductRepository):
         
         return count > 0
 
+
+# Reservas de stock (importado al final: depende de ProductModel)
+from .reservation_repository import StockReservationModel, SQLAlchemyStockReservationRepository
@@ -0,0 +1,222 @@
+"""
+Repositorio SQLAlchemy para reservas de stock
+"""
+from sqlalchemy import Column, String, Integer, DateTime, Index, bindparam, insert, update
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+from uuid import uuid4
+
+from infrastructure.database import Base
+from . import ProductModel
+from ...domain.entities import StockReservation, ReservationStatus
+from ...domain.ports import IStockReservationRepository
+
+# Tamaño máximo de las listas IN (SQLite limita el número de parámetros)
+IN_CLAUSE_CHUNK_SIZE = 500
+
+
+def _chunks(values: List, size: int = IN_CLAUSE_CHUNK_SIZE) -> Iterable[List]:
+    """Partir una lista en bloques de tamaño fijo"""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class StockReservationModel(Base):
+    """Modelo del libro de reservas (una fila por SKU de cada reserva)"""
+    __tablename__ = "stock_reservations"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    reservation_id = Column(String, nullable=False, index=True)
+    order_id = Column(String, nullable=True, index=True)
+    sku_id = Column(String, nullable=False)
+    qty = Column(Integer, nullable=False)
+    status = Column(String, nullable=False, default=ReservationStatus.ACTIVE.value)
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    # El barrido de vencidas busca por estado y vencimiento
+    __table_args__ = (
+        Index("ix_stock_reservations_status_expires", "status", "expires_at"),
+    )
+
+
+class SQLAlchemyStockReservationRepository(IStockReservationRepository):
+    """
+    Reservas con actualizaciones condicionadas sobre products.reserved.
+    
+    Cada SKU se reserva con UPDATE ... WHERE stock - reserved >= qty, en orden
+    de SKU para que transacciones concurrentes tomen los bloqueos en el mismo
+    orden; si algún SKU no alcanza, se deshace toda la reserva.
+    """
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    async def reserve(
+        self,
+        lines: Dict[str, int],
+        expires_at: datetime,
+        order_id: Optional[str] = None
+    ) -> StockReservation:
+        """Reservar atómicamente las cantidades de todos los SKUs"""
+        reservation = StockReservation(
+            reservation_id=str(uuid4()),
+            lines=dict(lines),
+            expires_at=expires_at,
+            order_id=order_id
+        )
+        
+        try:
+            insufficient = []
+            for sku_id in sorted(lines):
+                qty = lines[sku_id]
+                result = self.db.execute(
+                    update(ProductModel)
+                    .where(
+                        ProductModel.id == sku_id,
+                        ProductModel.is_active == True,
+                        ProductModel.stock - ProductModel.reserved >= qty
+                    )
+                    .values(reserved=ProductModel.reserved + qty)
+                    .execution_options(synchronize_session=False)
+                )
+                if result.rowcount == 0:
+                    insufficient.append(sku_id)
+            
+            if insufficient:
+                raise ValueError(f"Stock insuficiente para: {', '.join(insufficient)}")
+            
+            self.db.execute(insert(StockReservationModel), [
+                {
+                    "reservation_id": reservation.reservation_id,
+                    "order_id": order_id,
+                    "sku_id": sku_id,
+                    "qty": qty,
+                    "status": ReservationStatus.ACTIVE.value,
+                    "expires_at": expires_at,
+                    "created_at": reservation.created_at
+                }
+                for sku_id, qty in lines.items()
+            ])
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        
+        return reservation
+    
+    async def find_by_id(self, reservation_id: str) -> Optional[StockReservation]:
+        """Buscar reserva por ID"""
+        rows = self.db.query(StockReservationModel).filter(
+            StockReservationModel.reservation_id == reservation_id
+        ).order_by(StockReservationModel.id).all()
+        
+        if not rows:
+            return None
+        
+        return StockReservation(
+            reservation_id=reservation_id,
+            lines={row.sku_id: row.qty for row in rows},
+            expires_at=rows[0].expires_at,
+            order_id=rows[0].order_id,
+            status=ReservationStatus(rows[0].status),
+            created_at=rows[0].created_at
+        )
+    
+    def _close_lines(self, condition, new_status: ReservationStatus) -> Tuple[Dict[str, int], int]:
+        """
+        Pasar líneas ACTIVE a otro estado; retorna la cantidad por SKU y cuántas líneas cerró
+        
+        El filtro por ACTIVE en el mismo UPDATE evita liberar dos veces la misma
+        línea si el barrido y una liberación manual coinciden.
+        """
+        result = self.db.execute(
+            update(StockReservationModel)
+            .where(condition, StockReservationModel.status == ReservationStatus.ACTIVE.value)
+            .values(status=new_status.value)
+            .returning(StockReservationModel.sku_id, StockReservationModel.qty)
+            .execution_options(synchronize_session=False)
+        )
+        
+        qty_by_sku: Dict[str, int] = {}
+        closed = 0
+        for sku_id, qty in result:
+            qty_by_sku[sku_id] = qty_by_sku.get(sku_id, 0) + qty
+            closed += 1
+        return qty_by_sku, closed
+    
+    def _unreserve(self, qty_by_sku: Dict[str, int], consume: bool = False) -> None:
+        """Descontar lo retenido (y el stock, si se consume) con un executemany por SKU"""
+        if not qty_by_sku:
+            return
+        
+        table = ProductModel.__table__
+        values = {"reserved": table.c.reserved - bindparam("qty")}
+        if consume:
+            values["stock"] = table.c.stock - bindparam("qty")
+        
+        self.db.execute(
+            update(table).where(table.c.id == bindparam("sku")).values(**values),
+            [{"sku": sku_id, "qty": qty} for sku_id, qty in sorted(qty_by_sku.items())]
+        )
+    
+    async def release(self, reservation_id: str) -> bool:
+        """Liberar una reserva activa"""
+        qty_by_sku, _ = self._close_lines(
+            StockReservationModel.reservation_id == reservation_id,
+            ReservationStatus.RELEASED
+        )
+        self._unreserve(qty_by_sku)
+        self.db.commit()
+        
+        return bool(qty_by_sku)
+    
+    async def commit(self, reservation_id: str) -> bool:
+        """Consumir una reserva activa descontando el stock"""
+        qty_by_sku, _ = self._close_lines(
+            StockReservationModel.reservation_id == reservation_id,
+            ReservationStatus.COMMITTED
+        )
+        self._unreserve(qty_by_sku, consume=True)
+        self.db.commit()
+        
+        return bool(qty_by_sku)
+    
+    async def release_expired(self, now: datetime, batch_size: int = 500) -> int:
+        """Liberar un lote de líneas vencidas (usa el índice status + expires_at)"""
+        line_ids = [
+            row[0]
+            for row in self.db.query(StockReservationModel.id).filter(
+                StockReservationModel.status == ReservationStatus.ACTIVE.value,
+                StockReservationModel.expires_at <= now
+            ).limit(batch_size).all()
+        ]
+        if not line_ids:
+            return 0
+        
+        # Las que otro proceso cerró entre la lectura y el UPDATE no cuentan
+        qty_by_sku, expired = self._close_lines(
+            StockReservationModel.id.in_(line_ids),
+            ReservationStatus.EXPIRED
+        )
+        self._unreserve(qty_by_sku)
+        self.db.commit()
+        
+        return expired
+    
+    async def available_to_promise(self, sku_ids: List[str]) -> Dict[str, int]:
+        """Stock disponible por SKU con una lectura por clave primaria (sin sumar el libro)"""
+        available: Dict[str, int] = {}
+        for chunk in _chunks(list(dict.fromkeys(sku_ids))):
+            rows = self.db.query(
+                ProductModel.id,
+                ProductModel.stock - ProductModel.reserved
+            ).filter(
+                ProductModel.id.in_(chunk),
+                ProductModel.is_active == True
+            ).all()
+            for sku_id, free in rows:
+                available[sku_id] = max(int(free or 0), 0)
+        
+        return available
@@ -0,0 +1,47 @@
+"""
+Barrido en segundo plano de reservas de stock vencidas
+"""
+import asyncio
+from datetime import datetime
+
+from .database import SessionLocal
+from .repositories import SQLAlchemyStockReservationRepository
+
+
+class StockReservationSweeper:
+    """Libera por lotes las reservas cuyo TTL venció"""
+    
+    def __init__(self, session_factory=SessionLocal, batch_size: int = 500, interval_seconds: float = 30.0):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+    
+    async def sweep_once(self) -> int:
+        """Liberar todas las reservas vencidas, un lote por transacción"""
+        now = datetime.utcnow()
+        released = 0
+        session = self.session_factory()
+        try:
+            repository = SQLAlchemyStockReservationRepository(session)
+            while True:
+                count = await repository.release_expired(now, self.batch_size)
+                released += count
+                if count < self.batch_size:
+                    break
+                # Ceder el loop entre lotes para no bloquear peticiones
+                await asyncio.sleep(0)
+        finally:
+            session.close()
+        
+        return released
+    
+    async def run(self):
+        """Ejecutar el barrido periódicamente hasta que se cancele la tarea"""
+        while True:
+            try:
+                released = await self.sweep_once()
+                if released:
+                    print(f"🧹 Reservas de stock vencidas liberadas: {released}")
+            except Exception as e:
+                print(f"⚠️  Error liberando reservas vencidas: {e}")
+            await asyncio.sleep(self.interval_seconds)
@@ -1,11 +1,14 @@
 """
 Rutas de la API de reportes
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 from typing import List, Dict, Optional
 from datetime import datetime
 
+from order.api.dependencies import get_monthly_revenue_handler
+from order.application.queries import GetMonthlyRevenueQuery
+
 router = APIRouter()
 
 
@@ -21,8 +24,10 @@ class OrderStatusReport(BaseModel):
 class MonthlyOrderReport(BaseModel):
     """Reporte de órdenes por mes"""
     month: str
+    currency: str
     orders_count: int
     total_revenue: float
+    total_revenue_minor: int  # Ingresos exactos en centavos
 
 
 class InventoryStatusReport(BaseModel):
@@ -79,18 +84,30 @@ async def get_orders_by_status():
     summary="Reporte de órdenes por mes",
     description="Genera un reporte de órdenes agrupadas por mes"
 )
-async def get_orders_by_month():
-    """Obtener reporte de órdenes por mes"""
-    # TODO: Implementar lógica real consultando order-service
-    # Por ahora retorna mock data
+async def get_orders_by_month(
+    dateFrom: Optional[datetime] = None,
+    dateTo: Optional[datetime] = None,
+    handler=Depends(get_monthly_revenue_handler)
+):
+    """Obtener reporte de órdenes por mes (sumas enteras en la base de datos)"""
+    try:
+        rows = await handler.handle(GetMonthlyRevenueQuery(date_from=dateFrom, date_to=dateTo))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     
-    mock_data = [
-        {"month": "2025-01", "orders_count": 45, "total_revenue": 125000.0},
-        {"month": "2025-02", "orders_count": 52, "total_revenue": 148000.0},
-        {"month": "2025-03", "orders_count": 38, "total_revenue": 112000.0}
+    return [
+        MonthlyOrderReport(
+            month=row["month"],
+            currency=row["currency"],
+            orders_count=row["orders"],
+            total_revenue=row["revenue"],
+            total_revenue_minor=row["revenue_minor"]
+        )
+        for row in rows
     ]
-    
-    return mock_data
 
 
 @router.get(
@@ -3,19 +3,28 @@ Entidad base del dominio
 """
 from abc import ABC
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from .events import DomainEvent
 from .value_objects import EntityId
 
 
 class Entity(ABC):
-    """Clase base para entidades de dominio"""
+    """
+    Clase base para entidades de dominio
+    
+    Las subclases que se hidratan en volumen declaran `__slots__` con sus
+    atributos para no reservar un __dict__ por instancia.
+    """
+    
+    __slots__ = ("_id", "_domain_events", "_created_at", "_updated_at")
     
     def __init__(self, entity_id: EntityId):
         self._id = entity_id
-        self._domain_events: List[DomainEvent] = []
-        self._created_at = datetime.utcnow()
-        self._updated_at = datetime.utcnow()
+        # La lista se crea con el primer evento: las entidades leídas de la base no registran ninguno
+        self._domain_events: Optional[List[DomainEvent]] = None
+        now = datetime.utcnow()
+        self._created_at = now
+        self._updated_at = now
     
     @property
     def id(self) -> EntityId:
@@ -32,15 +41,17 @@ class Entity(ABC):
     def _record_event(self, event: DomainEvent):
         """Registrar un evento de dominio"""
         event.aggregate_id = str(self._id)
+        if self._domain_events is None:
+            self._domain_events = []
         self._domain_events.append(event)
     
     def get_domain_events(self) -> List[DomainEvent]:
         """Obtener eventos de dominio"""
-        return self._domain_events.copy()
+        return list(self._domain_events) if self._domain_events else []
     
     def clear_domain_events(self):
         """Limpiar eventos de dominio"""
-        self._domain_events.clear()
+        self._domain_events = None
     
     def __eq__(self, other) -> bool:
         if not isinstance(other, Entity):
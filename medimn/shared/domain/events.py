@@ -2,19 +2,64 @@
 Eventos de dominio base
 """
 from abc import ABC
+from collections import deque
 from datetime import datetime
-from typing import Any, Dict
+from enum import Enum
+from typing import Any, Deque, Dict, List, Optional, Tuple, Type
 from uuid import uuid4
+import asyncio
+import time
 
 
 class DomainEvent(ABC):
-    """Clase base para eventos de dominio"""
+    """
+    Clase base para eventos de dominio
+    
+    Las subclases declaran `__slots__` con sus atributos; el ID se genera
+    al leerlo por primera vez, así los eventos que nadie persiste no pagan
+    el uuid4.
+    """
+    
+    __slots__ = ("_event_id", "occurred_at", "aggregate_id")
+    
+    # Tipos de evento por nombre, para reconstruirlos desde el outbox
+    _registry: Dict[str, Type["DomainEvent"]] = {}
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        DomainEvent._registry[cls.__name__] = cls
+    
+    @classmethod
+    def event_class(cls, event_type: str) -> Optional[Type["DomainEvent"]]:
+        """Clase registrada para un nombre de evento"""
+        return cls._registry.get(event_type)
     
     def __init__(self):
-        self.event_id: str = str(uuid4())
+        self._event_id: Optional[str] = None
         self.occurred_at: datetime = datetime.utcnow()
         self.aggregate_id: str = ""
     
+    @property
+    def event_id(self) -> str:
+        if self._event_id is None:
+            self._event_id = str(uuid4())
+        return self._event_id
+    
+    @event_id.setter
+    def event_id(self, value: str):
+        self._event_id = value
+    
+    def attributes(self) -> Dict[str, Any]:
+        """Atributos propios del evento (sin ID, fecha ni agregado)"""
+        values = {}
+        for cls in type(self).__mro__:
+            for name in cls.__dict__.get("__slots__", ()):
+                if name not in DomainEvent.__slots__ and hasattr(self, name):
+                    values[name] = getattr(self, name)
+        # Subclases sin __slots__ (por ejemplo, en tests) guardan sus datos en __dict__
+        values.update(getattr(self, "__dict__", {}))
+        return values
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convertir evento a diccionario"""
         return {
@@ -30,11 +75,77 @@ class DomainEvent(ABC):
         return {}
 
 
+class Backpressure(str, Enum):
+    """Qué hacer al publicar con la cola llena (modo asíncrono)"""
+    BLOCK = "block"              # El publicador espera a que haya espacio
+    DROP_OLDEST = "drop_oldest"  # Se descarta el evento más antiguo en cola
+    SPILL = "spill"              # El evento pasa a un buffer de desborde acotado sin bloquear
+
+
+# Muestras de latencia recordadas para los percentiles
+LATENCY_SAMPLES = 1000
+
+
+class _BatchSubscription:
+    """Handler suscrito en modo lote con su buffer y su temporizador de ventana"""
+    
+    def __init__(self, handler, max_batch_size: int, max_wait_seconds: float):
+        self.handler = handler
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self.buffer: List[DomainEvent] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+        # Serializa las llamadas al handler para conservar el orden de los lotes
+        self.lock = asyncio.Lock()
+
+
 class EventBus:
-    """Bus de eventos para publicar y suscribirse a eventos"""
+    """
+    Bus de eventos para publicar y suscribirse a eventos.
+    
+    Por defecto `publish` ejecuta los handlers en orden y propaga sus errores.
+    Tras `start()`, `publish` solo encola el evento en una cola acotada y un
+    pool de workers ejecuta los handlers fuera de la petición, cada uno con
+    su timeout y sin que un fallo afecte a los demás. `drain()` vacía la cola
+    y vuelve al modo síncrono.
+    
+    Los handlers suscritos con `subscribe_batch` reciben listas de eventos,
+    agrupados hasta `max_batch_size` o hasta que pasa `max_wait_seconds`
+    desde el primero del lote. Como un lote mezcla eventos de distintos
+    publicadores, sus errores se registran y no se propagan.
+    
+    Con un transporte (`attach_transport`) los eventos publicados en este
+    proceso se reenvían a los demás workers, que los reciben con `receive`
+    y solo los entregan a sus handlers locales.
+    """
     
     def __init__(self):
         self._handlers: Dict[str, list] = {}
+        self._batch_handlers: Dict[str, List[_BatchSubscription]] = {}
+        self._flush_tasks: set = set()
+        self._transport = None
+        self._forwarded = 0
+        self._forward_errors = 0
+        self._received = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._overflow: Deque[Tuple[DomainEvent, float]] = deque()
+        self._max_overflow_size = 0
+        self._workers: List[asyncio.Task] = []
+        self._backpressure = Backpressure.BLOCK
+        self._handler_timeout: Optional[float] = None
+        self._reset_metrics()
+    
+    def _reset_metrics(self):
+        self._enqueued = 0
+        self._processed = 0
+        self._dropped = 0
+        self._spilled = 0
+        self._handler_errors: Dict[str, int] = {}
+        self._handler_timeouts: Dict[str, int] = {}
+        self._queue_wait_ms: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._handling_ms: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._batches_delivered = 0
+        self._batched_events = 0
     
     def subscribe(self, event_type: str, handler):
         """Suscribirse a un tipo de evento"""
@@ -42,18 +153,339 @@ class EventBus:
             self._handlers[event_type] = []
         self._handlers[event_type].append(handler)
     
-    async def publish(self, event: DomainEvent):
-        """Publicar un evento"""
+    def subscribe_batch(
+        self,
+        event_type: str,
+        handler,
+        max_batch_size: int = 100,
+        max_wait_seconds: float = 0.5
+    ):
+        """Suscribir un handler que recibe listas de eventos de un tipo"""
+        if max_batch_size < 1 or max_wait_seconds < 0:
+            raise ValueError("max_batch_size debe ser positivo y max_wait_seconds no negativo")
+        self._batch_handlers.setdefault(event_type, []).append(
+            _BatchSubscription(handler, max_batch_size, max_wait_seconds)
+        )
+    
+    @property
+    def is_async(self) -> bool:
+        """True si publish encola en lugar de ejecutar los handlers"""
+        return self._queue is not None
+    
+    async def dispatch(self, event: DomainEvent):
+        """Ejecutar en orden los handlers del evento, propagando el primer error"""
+        await self._dispatch_local(event)
+        await self._forward([event])
+    
+    async def _dispatch_local(self, event: DomainEvent):
         event_type = event.__class__.__name__
         if event_type in self._handlers:
             for handler in self._handlers[event_type]:
                 await handler(event)
+        await self._add_to_batches(event_type, [event])
+    
+    async def publish(self, event: DomainEvent):
+        """Publicar un evento"""
+        if self._queue is None:
+            await self.dispatch(event)
+            return
+        await self._enqueue(event)
+        await self._forward([event])
+    
+    async def publish_batch(self, events: List[DomainEvent]):
+        """Publicar varios eventos resolviendo los handlers una vez por tipo"""
+        await self._publish_batch_local(events)
+        await self._forward(events)
+    
+    async def _publish_batch_local(self, events: List[DomainEvent]):
+        if self._queue is not None:
+            for event in events:
+                await self._enqueue(event)
+            return
+        
+        handlers_by_type: Dict[str, list] = {}
+        events_by_type: Dict[str, List[DomainEvent]] = {}
+        for event in events:
+            event_type = event.__class__.__name__
+            if event_type not in handlers_by_type:
+                handlers_by_type[event_type] = list(self._handlers.get(event_type, []))
+            events_by_type.setdefault(event_type, []).append(event)
+            for handler in handlers_by_type[event_type]:
+                await handler(event)
+        
+        for event_type, typed_events in events_by_type.items():
+            await self._add_to_batches(event_type, typed_events)
+    
+    # ========== Transporte entre procesos ==========
+    
+    def attach_transport(self, transport):
+        """Reenviar los eventos publicados a otros procesos por el transporte indicado"""
+        self._transport = transport
+    
+    def detach_transport(self):
+        self._transport = None
+    
+    async def _forward(self, events: List[DomainEvent]):
+        """Reenviar al transporte; un fallo no afecta a los handlers locales"""
+        if self._transport is None or not events:
+            return
+        try:
+            await self._transport.publish(events)
+            self._forwarded += len(events)
+        except Exception as e:
+            self._forward_errors += 1
+            print(f"⚠️  Error reenviando {len(events)} eventos al transporte: {e}")
+    
+    async def receive(self, events: List[DomainEvent]):
+        """Entregar a los handlers locales eventos publicados por otro proceso, sin reenviarlos"""
+        self._received += len(events)
+        if self._queue is not None:
+            await self._publish_batch_local(events)
+            return
+        for event in events:
+            try:
+                await self._dispatch_local(event)
+            except Exception as e:
+                name = event.__class__.__name__
+                key = f"{name} (remoto)"
+                self._handler_errors[key] = self._handler_errors.get(key, 0) + 1
+                print(f"⚠️  Error en handler para {name} recibido de otro proceso: {e}")
+    
+    # ========== Handlers en lote ==========
+    
+    async def _add_to_batches(self, event_type: str, events: List[DomainEvent]):
+        """Agregar eventos a los buffers de los handlers en lote y entregar los lotes llenos"""
+        for subscription in self._batch_handlers.get(event_type, []):
+            subscription.buffer.extend(events)
+            while len(subscription.buffer) >= subscription.max_batch_size:
+                batch = subscription.buffer[:subscription.max_batch_size]
+                del subscription.buffer[:subscription.max_batch_size]
+                await self._deliver_batch(subscription, batch)
+            
+            if not subscription.buffer:
+                if subscription.timer is not None:
+                    subscription.timer.cancel()
+                    subscription.timer = None
+            elif subscription.timer is None:
+                # La ventana empieza con el primer evento del lote
+                subscription.timer = asyncio.get_running_loop().call_later(
+                    subscription.max_wait_seconds, self._schedule_flush, subscription
+                )
+    
+    def _schedule_flush(self, subscription: _BatchSubscription):
+        """Entregar el lote incompleto al cerrar la ventana de tiempo"""
+        subscription.timer = None
+        task = asyncio.get_running_loop().create_task(self._flush_subscription(subscription))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+    
+    async def _flush_subscription(self, subscription: _BatchSubscription):
+        if subscription.timer is not None:
+            subscription.timer.cancel()
+            subscription.timer = None
+        while subscription.buffer:
+            batch = subscription.buffer[:subscription.max_batch_size]
+            del subscription.buffer[:subscription.max_batch_size]
+            await self._deliver_batch(subscription, batch)
+    
+    async def _deliver_batch(self, subscription: _BatchSubscription, batch: List[DomainEvent]):
+        """Llamar al handler con un lote, aislando errores y timeouts"""
+        name = getattr(subscription.handler, "__qualname__", repr(subscription.handler))
+        async with subscription.lock:
+            try:
+                await asyncio.wait_for(subscription.handler(batch), self._handler_timeout)
+            except asyncio.TimeoutError:
+                self._handler_timeouts[name] = self._handler_timeouts.get(name, 0) + 1
+                print(f"⚠️  Timeout en handler en lote {name} ({len(batch)} eventos)")
+            except Exception as e:
+                self._handler_errors[name] = self._handler_errors.get(name, 0) + 1
+                print(f"⚠️  Error en handler en lote {name} ({len(batch)} eventos): {e}")
+            else:
+                self._batches_delivered += 1
+                self._batched_events += len(batch)
+    
+    async def flush_batches(self):
+        """Entregar ya todos los lotes incompletos"""
+        for subscriptions in self._batch_handlers.values():
+            for subscription in subscriptions:
+                await self._flush_subscription(subscription)
+        if self._flush_tasks:
+            await asyncio.gather(*list(self._flush_tasks), return_exceptions=True)
+    
+    # ========== Modo asíncrono ==========
+    
+    def start(
+        self,
+        workers: int = 4,
+        max_queue_size: int = 1000,
+        backpressure: Backpressure = Backpressure.BLOCK,
+        handler_timeout: Optional[float] = 5.0,
+        max_overflow_size: Optional[int] = None
+    ):
+        """
+        Pasar al modo asíncrono con una cola acotada y un pool de workers
+        
+        Con SPILL, el desborde admite hasta `max_overflow_size` eventos (por
+        defecto, 10 veces la cola); con el desborde lleno, los nuevos se descartan.
+        """
+        if self._queue is not None:
+            raise RuntimeError("El event bus ya está en modo asíncrono")
+        if workers < 1 or max_queue_size < 1:
+            raise ValueError("workers y max_queue_size deben ser positivos")
+        if max_overflow_size is not None and max_overflow_size < 0:
+            raise ValueError("max_overflow_size no puede ser negativo")
+        
+        self._queue = asyncio.Queue(maxsize=max_queue_size)
+        self._backpressure = Backpressure(backpressure)
+        self._handler_timeout = handler_timeout
+        self._max_overflow_size = max_queue_size * 10 if max_overflow_size is None else max_overflow_size
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"event-bus-worker-{index}")
+            for index in range(workers)
+        ]
+    
+    async def _enqueue(self, event: DomainEvent):
+        """Encolar aplicando la política de contrapresión"""
+        item = (event, time.perf_counter())
+        self._enqueued += 1
+        
+        if self._backpressure == Backpressure.BLOCK:
+            await self._queue.put(item)
+            return
+        
+        if self._overflow or self._queue.full():
+            if self._backpressure == Backpressure.SPILL:
+                if len(self._overflow) >= self._max_overflow_size:
+                    # Desborde lleno: se descarta el nuevo para no crecer sin límite
+                    self._dropped += 1
+                    return
+                # Conservar el orden: mientras haya desborde, lo nuevo va detrás
+                self._overflow.append(item)
+                self._spilled += 1
+                return
+            self._queue.get_nowait()
+            self._queue.task_done()
+            self._dropped += 1
+        self._queue.put_nowait(item)
+    
+    async def _worker(self):
+        """Tomar eventos de la cola y ejecutar sus handlers"""
+        queue = self._queue
+        while True:
+            event, enqueued_at = await queue.get()
+            try:
+                started = time.perf_counter()
+                self._queue_wait_ms.append((started - enqueued_at) * 1000)
+                await self._run_handlers(event)
+                self._handling_ms.append((time.perf_counter() - started) * 1000)
+                self._processed += 1
+            finally:
+                # Reponer desde el desborde antes de marcar el evento como terminado
+                if self._overflow and not queue.full():
+                    queue.put_nowait(self._overflow.popleft())
+                queue.task_done()
+    
+    async def _run_handlers(self, event: DomainEvent):
+        """Ejecutar los handlers concurrentemente, aislando errores y timeouts"""
+        event_type = event.__class__.__name__
+        await self._add_to_batches(event_type, [event])
+        handlers = self._handlers.get(event_type, [])
+        if not handlers:
+            return
+        results = await asyncio.gather(
+            *[asyncio.wait_for(handler(event), self._handler_timeout) for handler in handlers],
+            return_exceptions=True
+        )
+        for handler, result in zip(handlers, results):
+            if not isinstance(result, BaseException):
+                continue
+            name = getattr(handler, "__qualname__", repr(handler))
+            if isinstance(result, asyncio.TimeoutError):
+                self._handler_timeouts[name] = self._handler_timeouts.get(name, 0) + 1
+                print(f"⚠️  Timeout en handler {name} para {event.__class__.__name__}")
+            else:
+                self._handler_errors[name] = self._handler_errors.get(name, 0) + 1
+                print(f"⚠️  Error en handler {name} para {event.__class__.__name__}: {result}")
+    
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Esperar a que se procese lo encolado, detener los workers y volver al modo síncrono
+        
+        Returns:
+            bool: False si venció el timeout con eventos sin procesar
+        """
+        if self._queue is None:
+            return True
+        
+        async def _wait_empty():
+            while True:
+                await self._queue.join()
+                if not self._overflow:
+                    return
+                while self._overflow and not self._queue.full():
+                    self._queue.put_nowait(self._overflow.popleft())
+        
+        drained = True
+        try:
+            await asyncio.wait_for(_wait_empty(), timeout)
+            await self.flush_batches()
+        except asyncio.TimeoutError:
+            drained = False
+        finally:
+            for worker in self._workers:
+                worker.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            self._workers = []
+            self._queue = None
+            self._overflow.clear()
+        return drained
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Profundidad de cola, contadores y latencias del modo asíncrono"""
+        def _percentiles(samples: Deque[float]) -> Dict[str, Optional[float]]:
+            if not samples:
+                return {"p50": None, "p95": None, "max": None}
+            ordered = sorted(samples)
+            return {
+                "p50": round(ordered[len(ordered) // 2], 3),
+                "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+                "max": round(ordered[-1], 3)
+            }
+        
+        return {
+            "mode": "async" if self._queue is not None else "sync",
+            "queueDepth": self._queue.qsize() if self._queue is not None else 0,
+            "queueCapacity": self._queue.maxsize if self._queue is not None else 0,
+            "overflowDepth": len(self._overflow),
+            "overflowCapacity": self._max_overflow_size if self._queue is not None else 0,
+            "workers": len(self._workers),
+            "backpressure": self._backpressure.value,
+            "enqueued": self._enqueued,
+            "processed": self._processed,
+            "dropped": self._dropped,
+            "spilled": self._spilled,
+            "forwarded": self._forwarded,
+            "forwardErrors": self._forward_errors,
+            "received": self._received,
+            "batchesDelivered": self._batches_delivered,
+            "averageBatchSize": (
+                round(self._batched_events / self._batches_delivered, 2) if self._batches_delivered else None
+            ),
+            "handlerErrors": dict(self._handler_errors),
+            "handlerTimeouts": dict(self._handler_timeouts),
+            "queueWaitMs": _percentiles(self._queue_wait_ms),
+            "handlingMs": _percentiles(self._handling_ms)
+        }
     
     def clear(self):
         """Limpiar todos los handlers"""
         self._handlers.clear()
+        for subscriptions in self._batch_handlers.values():
+            for subscription in subscriptions:
+                if subscription.timer is not None:
+                    subscription.timer.cancel()
+        self._batch_handlers.clear()
 
 
 # Instancia global del event bus
 event_bus = EventBus()
-
@@ -0,0 +1,60 @@
+"""
+Asignación de números de negocio (órdenes, rutas, ...)
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict
+import itertools
+import threading
+import time
+
+
+class NumberAllocator(ABC):
+    """Puerto para obtener valores únicos de una secuencia con nombre"""
+    
+    @abstractmethod
+    def next_value(self, sequence: str) -> int:
+        """Siguiente valor de la secuencia (único y creciente)"""
+        pass
+
+
+class LocalNumberAllocator(NumberAllocator):
+    """
+    Contador en memoria por secuencia.
+    
+    Arranca en el timestamp en milisegundos para no repetir valores entre
+    reinicios, pero solo es único dentro del proceso: con varios workers
+    debe configurarse un asignador respaldado por la base de datos.
+    """
+    
+    def __init__(self):
+        self._counters: Dict[str, itertools.count] = {}
+        self._lock = threading.Lock()
+    
+    def next_value(self, sequence: str) -> int:
+        counter = self._counters.get(sequence)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(sequence, itertools.count(int(time.time() * 1000)))
+        # next() sobre itertools.count es atómico bajo el GIL
+        return next(counter)
+
+
+_allocator: NumberAllocator = LocalNumberAllocator()
+
+
+def set_number_allocator(allocator: NumberAllocator) -> None:
+    """Configurar el asignador usado por las entidades"""
+    global _allocator
+    _allocator = allocator
+
+
+def get_number_allocator() -> NumberAllocator:
+    """Obtener el asignador configurado"""
+    return _allocator
+
+
+def next_number(prefix: str) -> str:
+    """Generar un número de negocio único, p. ej. ORD-20240115-000042"""
+    value = _allocator.next_value(prefix)
+    return f"{prefix}-{datetime.utcnow().strftime('%Y%m%d')}-{value:06d}"
@@ -2,11 +2,55 @@
 Value Objects compartidos
 """
 from dataclasses import dataclass
-from typing import Any
+from decimal import Decimal, ROUND_HALF_UP
+from enum import Enum
+from typing import Any, Callable, Type, TypeVar
 import re
 
+E = TypeVar("E", bound=Enum)
 
-@dataclass(frozen=True)
+# Valores distintos recordados por clase; los de alta cardinalidad no se retienen
+INTERN_CACHE_SIZE = 4096
+
+
+class InternedValueObject:
+    """
+    Mixin para value objects de baja cardinalidad (categorías, bodegas, roles...)
+    
+    `Cls.of(valor)` retorna una instancia compartida por valor: la validación
+    corre una vez por valor distinto y las filas hidratadas comparten el objeto.
+    Solo para value objects inmutables. Valores iguales comparten instancia
+    aunque difiera el tipo (`Money.of(1)` puede retornar la de `Money.of(1.0)`).
+    """
+    
+    __slots__ = ()
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._interned = {}
+    
+    @classmethod
+    def of(cls, *args):
+        instance = cls._interned.get(args)
+        if instance is None:
+            instance = cls(*args)
+            if len(cls._interned) < INTERN_CACHE_SIZE:
+                cls._interned[args] = instance
+        return instance
+
+
+def enum_lookup(enum_cls: Type[E]) -> Callable[[Any], E]:
+    """Búsqueda de miembros por valor con un dict, sin pasar por EnumMeta.__call__"""
+    members = {member.value: member for member in enum_cls}
+    
+    def _lookup(value: Any) -> E:
+        member = members.get(value)
+        # Un valor desconocido levanta el mismo ValueError que el Enum
+        return member if member is not None else enum_cls(value)
+    return _lookup
+
+
+@dataclass(frozen=True, slots=True)
 class Email:
     """Value Object para email"""
     value: str
@@ -23,7 +67,7 @@ class Email:
         return self.value
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class EntityId:
     """Value Object para ID de entidad"""
     value: str
@@ -44,28 +88,115 @@ class EntityId:
         return hash(self.value)
 
 
-@dataclass(frozen=True)
-class Money:
-    """Value Object para dinero"""
-    amount: float
-    currency: str = "USD"
+DEFAULT_CURRENCY = "USD"
+
+# Decimales de la unidad menor por moneda (ISO 4217); el resto usa 2
+MINOR_UNIT_EXPONENTS = {"CLP": 0, "JPY": 0, "KRW": 0, "PYG": 0, "BHD": 3, "KWD": 3}
+
+
+def minor_unit_exponent(currency: str) -> int:
+    return MINOR_UNIT_EXPONENTS.get(currency, 2)
+
+
+def to_minor_units(amount: Any, currency: str = DEFAULT_CURRENCY) -> int:
+    """Convertir un monto decimal a unidades menores enteras (centavos), redondeando mitad hacia arriba"""
+    if isinstance(amount, int) and not isinstance(amount, bool):
+        return amount * 10 ** minor_unit_exponent(currency)
+    # str() evita arrastrar el error binario del float (1.005 -> 1.00499...)
+    value = amount if isinstance(amount, Decimal) else Decimal(str(amount))
+    return int(value.scaleb(minor_unit_exponent(currency)).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_minor_units(minor_units: int, currency: str = DEFAULT_CURRENCY) -> float:
+    """Monto decimal (float) de unas unidades menores"""
+    return minor_units / 10 ** minor_unit_exponent(currency)
+
+
+def apply_rate(minor_units: int, numerator: int, denominator: int) -> int:
+    """Multiplicar unidades menores por una tasa exacta, redondeando mitad hacia arriba"""
+    return (2 * minor_units * numerator + denominator) // (2 * denominator)
+
+
+class Money(InternedValueObject):
+    """
+    Value Object para dinero, guardado como unidades menores enteras
     
-    def __post_init__(self):
-        if self.amount < 0:
+    `Money(10.5)` sigue aceptando montos decimales; internamente se guarda
+    `minor_units=1050`, así sumas y agregados son exactos. `amount` retorna
+    el monto como float para las APIs existentes.
+    """
+    
+    __slots__ = ("minor_units", "currency")
+    
+    # Instancias compartidas por (unidades menores, moneda) al hidratar
+    _interned_minor = {}
+    
+    def __init__(self, amount: Any = 0, currency: str = DEFAULT_CURRENCY):
+        if amount < 0:
             raise ValueError("El monto no puede ser negativo")
-        if len(self.currency) != 3:
+        if len(currency) != 3:
             raise ValueError("La moneda debe tener 3 caracteres")
+        object.__setattr__(self, "currency", currency)
+        object.__setattr__(self, "minor_units", to_minor_units(amount, currency))
+    
+    @classmethod
+    def from_minor(cls, minor_units: int, currency: str = DEFAULT_CURRENCY) -> 'Money':
+        """Crear desde unidades menores (lo que se guarda en la base de datos)"""
+        key = (minor_units, currency)
+        money = cls._interned_minor.get(key)
+        if money is not None:
+            return money
+        if minor_units < 0:
+            raise ValueError("El monto no puede ser negativo")
+        if len(currency) != 3:
+            raise ValueError("La moneda debe tener 3 caracteres")
+        money = cls.__new__(cls)
+        object.__setattr__(money, "currency", currency)
+        object.__setattr__(money, "minor_units", int(minor_units))
+        if len(cls._interned_minor) < INTERN_CACHE_SIZE:
+            cls._interned_minor[key] = money
+        return money
+    
+    @property
+    def amount(self) -> float:
+        return from_minor_units(self.minor_units, self.currency)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("Money es inmutable")
+    
+    def __repr__(self) -> str:
+        return f"Money(amount={self.amount!r}, currency={self.currency!r})"
     
     def __str__(self) -> str:
-        return f"{self.amount:.2f} {self.currency}"
+        return f"{self.amount:.{minor_unit_exponent(self.currency)}f} {self.currency}"
     
-    def __add__(self, other: 'Money') -> 'Money':
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.minor_units == other.minor_units and self.currency == other.currency
+    
+    def __hash__(self) -> int:
+        return hash((self.minor_units, self.currency))
+    
+    def __lt__(self, other: 'Money') -> bool:
+        self._check_currency(other, "comparar")
+        return self.minor_units < other.minor_units
+    
+    def _check_currency(self, other: 'Money', operation: str):
         if self.currency != other.currency:
-            raise ValueError("No se pueden sumar monedas diferentes")
-        return Money(self.amount + other.amount, self.currency)
+            raise ValueError(f"No se pueden {operation} monedas diferentes")
+    
+    def __add__(self, other: 'Money') -> 'Money':
+        self._check_currency(other, "sumar")
+        return Money.from_minor(self.minor_units + other.minor_units, self.currency)
     
     def __sub__(self, other: 'Money') -> 'Money':
-        if self.currency != other.currency:
-            raise ValueError("No se pueden restar monedas diferentes")
-        return Money(self.amount - other.amount, self.currency)
+        self._check_currency(other, "restar")
+        return Money.from_minor(self.minor_units - other.minor_units, self.currency)
+    
+    def __mul__(self, quantity: int) -> 'Money':
+        """Multiplicar por una cantidad entera (subtotales)"""
+        if not isinstance(quantity, int):
+            raise TypeError("Money solo se multiplica por cantidades enteras; usar apply_rate para tasas")
+        return Money.from_minor(self.minor_units * quantity, self.currency)
 
@@ -0,0 +1,347 @@
+"""
+Transportes del event bus entre procesos (varios workers de uvicorn)
+
+Cada proceso publica en el transporte los eventos que publica localmente y un
+relay lee los de los demás procesos para entregarlos a sus handlers locales.
+"""
+from abc import ABC, abstractmethod
+from sqlalchemy import Column, String, Integer, DateTime, JSON, Index, delete, func, insert, select, text
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+import asyncio
+import os
+import select as select_module
+import socket
+import time
+
+from infrastructure.config import get_settings
+from infrastructure.database import Base, SessionLocal
+from shared.domain.events import DomainEvent, EventBus, event_bus
+from shared.infrastructure.outbox import event_payload, rebuild_event
+
+# Canal de Postgres para avisar de eventos nuevos
+NOTIFY_CHANNEL = "medisupply_events"
+
+# Espera máxima a que se confirme un ID menor antes de darlo por descartado
+GAP_TIMEOUT_SECONDS = 2.0
+
+
+def process_origin() -> str:
+    """Identificador único de este proceso"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+
+class EventTransport(ABC):
+    """
+    Contrato de un transporte de eventos entre procesos
+    
+    - `publish` agrega eventos al transporte en el orden recibido.
+    - `fetch` retorna por lotes, en orden de publicación, los eventos de otros
+      procesos aún no leídos por este; así el orden por agregado se conserva.
+    - `wait` bloquea hasta que haya eventos nuevos o venza el timeout.
+    
+    Un broker tipo Redis Streams lo implementaría con XADD, XREAD desde el
+    último ID leído y XREAD BLOCK.
+    """
+    
+    @abstractmethod
+    async def publish(self, events: List[DomainEvent]) -> None:
+        pass
+    
+    @abstractmethod
+    async def fetch(self, max_events: int) -> List[DomainEvent]:
+        pass
+    
+    async def wait(self, timeout: float) -> None:
+        """Esperar eventos nuevos; por defecto solo espera el intervalo"""
+        await asyncio.sleep(timeout)
+    
+    async def start(self) -> None:
+        """Preparar el transporte; se leen solo los eventos publicados desde ahora"""
+    
+    async def close(self) -> None:
+        """Liberar recursos del transporte"""
+
+
+class InMemoryEventHub:
+    """Registro compartido por varios transportes en memoria (tests y desarrollo)"""
+    
+    def __init__(self):
+        self.log: List[tuple] = []
+        self.changed = asyncio.Event()
+
+
+class InMemoryEventTransport(EventTransport):
+    """Transporte en memoria: simula varios procesos dentro de uno"""
+    
+    def __init__(self, hub: InMemoryEventHub, origin: Optional[str] = None):
+        self.hub = hub
+        self.origin = origin or process_origin()
+        self._cursor = 0
+    
+    async def publish(self, events: List[DomainEvent]) -> None:
+        self.hub.log.extend((self.origin, event) for event in events)
+        self.hub.changed.set()
+    
+    async def fetch(self, max_events: int) -> List[DomainEvent]:
+        events = []
+        while self._cursor < len(self.hub.log) and len(events) < max_events:
+            origin, event = self.hub.log[self._cursor]
+            self._cursor += 1
+            if origin != self.origin:
+                events.append(event)
+        return events
+    
+    async def wait(self, timeout: float) -> None:
+        if self._cursor < len(self.hub.log):
+            return
+        self.hub.changed.clear()
+        try:
+            await asyncio.wait_for(self.hub.changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+    
+    async def start(self) -> None:
+        self._cursor = len(self.hub.log)
+
+
+class EventLogModel(Base):
+    """Registro de eventos compartido entre procesos, leído en orden de ID"""
+    __tablename__ = "event_log"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    event_id = Column(String, nullable=False)
+    event_type = Column(String, nullable=False)
+    aggregate_id = Column(String, nullable=True)
+    payload = Column(JSON, nullable=True)
+    occurred_at = Column(DateTime, nullable=False)
+    origin = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    # La purga por antigüedad no recorre la tabla; en SQLite los IDs no se
+    # reutilizan aunque la purga vacíe la tabla
+    __table_args__ = (
+        Index("ix_event_log_created_at", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
+
+
+class DatabaseEventTransport(EventTransport):
+    """
+    Transporte sobre la tabla `event_log`, leída por sondeo
+    
+    Cada proceso guarda el último ID leído. Si aparece un hueco (un ID menor
+    aún sin confirmar en otra transacción) la lectura se detiene ahí hasta
+    que se confirme o pasen GAP_TIMEOUT_SECONDS (la transacción se descartó),
+    para no adelantar eventos de un mismo agregado.
+    """
+    
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        origin: Optional[str] = None,
+        poll_interval_seconds: float = 0.5,
+        retention: timedelta = timedelta(hours=1),
+        gap_timeout_seconds: float = GAP_TIMEOUT_SECONDS
+    ):
+        self.session_factory = session_factory
+        self.origin = origin or process_origin()
+        self.poll_interval_seconds = poll_interval_seconds
+        self.retention = retention
+        self.gap_timeout_seconds = gap_timeout_seconds
+        self._cursor = 0
+        # ID esperado -> momento en que se detectó el hueco
+        self._gaps: Dict[int, float] = {}
+        self._last_purge = 0.0
+    
+    async def start(self) -> None:
+        session = self.session_factory()
+        try:
+            self._cursor = session.query(func.max(EventLogModel.id)).scalar() or 0
+        finally:
+            session.close()
+    
+    def _notify(self, session) -> None:
+        """Avisar a los otros procesos dentro de la transacción (ver Postgres)"""
+    
+    async def publish(self, events: List[DomainEvent]) -> None:
+        now = datetime.utcnow()
+        rows = [
+            {
+                "event_id": event.event_id,
+                "event_type": event.__class__.__name__,
+                "aggregate_id": event.aggregate_id,
+                "payload": event_payload(event),
+                "occurred_at": event.occurred_at,
+                "origin": self.origin,
+                "created_at": now
+            }
+            for event in events
+        ]
+        if not rows:
+            return
+        session = self.session_factory()
+        try:
+            session.execute(insert(EventLogModel), rows)
+            self._notify(session)
+            session.commit()
+        finally:
+            session.close()
+    
+    async def fetch(self, max_events: int) -> List[DomainEvent]:
+        session = self.session_factory()
+        try:
+            rows = session.execute(
+                select(EventLogModel)
+                .where(EventLogModel.id > self._cursor)
+                .order_by(EventLogModel.id)
+                .limit(max_events)
+            ).scalars().all()
+        finally:
+            session.close()
+        
+        events = []
+        now = time.monotonic()
+        for row in rows:
+            expected = self._cursor + 1
+            if row.id != expected:
+                detected = self._gaps.setdefault(expected, now)
+                if now - detected < self.gap_timeout_seconds:
+                    break
+            self._gaps.pop(expected, None)
+            self._cursor = row.id
+            if row.origin != self.origin:
+                events.append(rebuild_event(
+                    row.event_type, row.payload, row.event_id, row.occurred_at, row.aggregate_id
+                ))
+        
+        if time.monotonic() - self._last_purge > 3600:
+            self._last_purge = time.monotonic()
+            self.purge()
+        return events
+    
+    def purge(self) -> int:
+        """Eliminar eventos más antiguos que la retención"""
+        session = self.session_factory()
+        try:
+            result = session.execute(
+                delete(EventLogModel).where(EventLogModel.created_at <= datetime.utcnow() - self.retention)
+            )
+            session.commit()
+            return result.rowcount
+        finally:
+            session.close()
+
+
+class PostgresNotifyEventTransport(DatabaseEventTransport):
+    """
+    Transporte sobre `event_log` que despierta a los lectores con LISTEN/NOTIFY
+    
+    El NOTIFY se envía en la misma transacción que los eventos, así que solo
+    llega si se confirman; el sondeo queda como respaldo si se pierde el aviso.
+    """
+    
+    def __init__(self, engine, session_factory=SessionLocal, **kwargs):
+        super().__init__(session_factory=session_factory, **kwargs)
+        self.engine = engine
+        self._listener = None
+    
+    async def start(self) -> None:
+        await super().start()
+        self._listener = self.engine.raw_connection()
+        self._listener.driver_connection.autocommit = True
+        with self._listener.driver_connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+    
+    def _notify(self, session) -> None:
+        session.execute(text("SELECT pg_notify(:channel, '')"), {"channel": NOTIFY_CHANNEL})
+    
+    def _wait_notify(self, timeout: float) -> None:
+        connection = self._listener.driver_connection
+        if not connection.notifies:
+            select_module.select([connection], [], [], timeout)
+            connection.poll()
+        connection.notifies.clear()
+    
+    async def wait(self, timeout: float) -> None:
+        if self._listener is None:
+            await super().wait(timeout)
+            return
+        await asyncio.to_thread(self._wait_notify, timeout)
+    
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+
+
+class EventTransportRelay:
+    """Lee del transporte los eventos de otros procesos y los entrega al bus local"""
+    
+    def __init__(
+        self,
+        transport: EventTransport,
+        bus: EventBus = event_bus,
+        batch_size: int = 500,
+        poll_interval_seconds: float = 0.5
+    ):
+        self.transport = transport
+        self.bus = bus
+        self.batch_size = batch_size
+        self.poll_interval_seconds = poll_interval_seconds
+        self._stopping = False
+        self.received_total = 0
+        self.last_batch_size = 0
+    
+    async def relay_once(self) -> int:
+        """Entregar un lote; retorna cuántos eventos se recibieron"""
+        events = await self.transport.fetch(self.batch_size)
+        if events:
+            await self.bus.receive(events)
+        self.received_total += len(events)
+        self.last_batch_size = len(events)
+        return len(events)
+    
+    async def run(self):
+        """Leer hasta que se detenga; con lotes llenos no espera"""
+        self._stopping = False
+        while not self._stopping:
+            try:
+                if await self.relay_once() >= self.batch_size:
+                    await asyncio.sleep(0)
+                    continue
+            except Exception as e:
+                print(f"⚠️  Error leyendo eventos de otros procesos: {e}")
+            await self.transport.wait(self.poll_interval_seconds)
+    
+    def stop(self) -> None:
+        self._stopping = True
+    
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "transport": type(self.transport).__name__,
+            "receivedTotal": self.received_total,
+            "lastBatchSize": self.last_batch_size
+        }
+
+
+def build_event_transport(settings=None) -> Optional[EventTransport]:
+    """Transporte configurado en EVENT_TRANSPORT; None si el bus es solo local"""
+    settings = settings or get_settings()
+    kind = settings.event_transport
+    if kind == "auto":
+        kind = "postgres" if settings.database_url.startswith("postgres") else "database"
+    
+    options = {
+        "poll_interval_seconds": settings.event_transport_poll_seconds,
+        "retention": timedelta(hours=settings.event_transport_retention_hours)
+    }
+    if kind == "local":
+        return None
+    if kind == "database":
+        return DatabaseEventTransport(**options)
+    if kind == "postgres":
+        from infrastructure.database import engine
+        return PostgresNotifyEventTransport(engine, **options)
+    raise ValueError(f"EVENT_TRANSPORT inválido: {settings.event_transport}")
@@ -131,6 +131,21 @@ class ProductServiceClient:
                 json={"quantity": quantity}
             )
             return response
+    
+    async def reserve_stock(self, lines: list, order_id: Optional[str] = None, ttl_seconds: Optional[int] = None) -> Dict[str, Any]:
+        """Reservar stock de varios SKUs (lines: [{"skuId": str, "qty": int}])"""
+        async with self.client:
+            response = await self.client.post(
+                "/api/v1/products/reservations",
+                json={"lines": lines, "orderId": order_id, "ttlSeconds": ttl_seconds}
+            )
+            return response
+    
+    async def release_reservation(self, reservation_id: str) -> Dict[str, Any]:
+        """Liberar una reserva de stock"""
+        async with self.client:
+            response = await self.client.delete(f"/api/v1/products/reservations/{reservation_id}")
+            return response
 
 
 class OrderServiceClient:
@@ -0,0 +1,268 @@
+"""
+Soporte de Idempotency-Key para endpoints de creación
+"""
+from sqlalchemy import Column, String, Integer, DateTime, JSON, delete, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import hashlib
+import json
+
+from infrastructure.config import get_settings
+from infrastructure.database import Base, SessionLocal, add_missing_columns, register_migration
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+STATUS_PENDING = "PENDING"
+STATUS_COMPLETED = "COMPLETED"
+
+# Concesión de una fila PENDING: si el worker muere, otra petición la toma al vencer
+PENDING_LEASE_SECONDS = 60
+
+# Peticiones en curso en este proceso: (scope, key) -> futuro con (hash, status_code, body)
+_inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+
+class IdempotencyKeyModel(Base):
+    """Modelo de claves de idempotencia (búsqueda por clave primaria scope + key)"""
+    __tablename__ = "idempotency_keys"
+    
+    scope = Column(String, primary_key=True)
+    key = Column(String(MAX_KEY_LENGTH), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    status = Column(String, nullable=False, default=STATUS_PENDING)
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    locked_until = Column(DateTime, nullable=True)  # Concesión de la fila PENDING
+
+
+@register_migration
+def _add_idempotency_lease_column(bind: Engine) -> None:
+    """Migración de arranque: concesión de las filas PENDING"""
+    add_missing_columns(bind, IdempotencyKeyModel.__table__, {"locked_until": None})
+
+
+def _request_hash(payload: Any) -> str:
+    """Huella del cuerpo de la petición para detectar reutilización de claves"""
+    encoded = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _consume_exception(future: asyncio.Future) -> None:
+    """Evitar avisos de excepción no recuperada cuando nadie esperaba el futuro"""
+    if not future.cancelled():
+        future.exception()
+
+
+class IdempotencyStore:
+    """
+    Ejecuta una operación una sola vez por (scope, Idempotency-Key).
+    
+    - Peticiones concurrentes con la misma clave en el mismo proceso esperan
+      el resultado de la primera.
+    - Entre workers, la fila PENDING hace que la segunda reciba 409 mientras
+      dure su concesión; si el worker murió, la clave se retoma al vencer.
+    - Las respuestas exitosas se guardan y se reproducen hasta que expiran.
+    """
+    
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        ttl: Optional[timedelta] = None,
+        lease: Optional[timedelta] = None
+    ):
+        self.session_factory = session_factory
+        self.ttl = ttl or timedelta(hours=get_settings().idempotency_ttl_hours)
+        self.lease = lease or timedelta(seconds=PENDING_LEASE_SECONDS)
+    
+    async def run(
+        self,
+        scope: str,
+        key: Optional[str],
+        payload: Any,
+        operation: Callable[[], Awaitable[Any]],
+        status_code: int = status.HTTP_200_OK
+    ):
+        """Ejecutar la operación o reproducir la respuesta guardada para la clave"""
+        if not key:
+            return await operation()
+        if len(key) > MAX_KEY_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"{IDEMPOTENCY_HEADER} no puede superar {MAX_KEY_LENGTH} caracteres"
+            )
+        
+        request_hash = _request_hash(payload)
+        inflight_key = (scope, key)
+        
+        inflight = _inflight.get(inflight_key)
+        if inflight is not None:
+            # Otra petición con la misma clave se está ejecutando: esperar su resultado
+            return self._replay(request_hash, *await asyncio.shield(inflight))
+        
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_consume_exception)
+        _inflight[inflight_key] = future
+        try:
+            stored = self._claim(scope, key, request_hash)
+            if stored is not None:
+                future.set_result(stored)
+                return self._replay(request_hash, *stored)
+            
+            try:
+                response = await operation()
+            except BaseException:
+                self._release(scope, key)
+                raise
+            
+            body = jsonable_encoder(response)
+            self._complete(scope, key, status_code, body)
+            future.set_result((request_hash, status_code, body))
+            return JSONResponse(content=body, status_code=status_code)
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+            raise
+        finally:
+            _inflight.pop(inflight_key, None)
+    
+    @staticmethod
+    def _replay(request_hash: str, stored_hash: str, status_code: int, body: Any) -> JSONResponse:
+        """Respuesta guardada, si la clave se usó con el mismo cuerpo"""
+        if stored_hash != request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"{IDEMPOTENCY_HEADER} ya fue usada con una petición diferente"
+            )
+        return JSONResponse(content=body, status_code=status_code, headers={REPLAYED_HEADER: "true"})
+    
+    def _claim(self, scope: str, key: str, request_hash: str) -> Optional[Tuple[str, int, Any]]:
+        """
+        Reservar la clave insertando una fila PENDING
+        
+        Returns:
+            None si la reserva es nuestra, o (hash, status_code, body) si ya estaba completada
+        """
+        now = datetime.utcnow()
+        session = self.session_factory()
+        try:
+            for _ in range(2):
+                session.add(IdempotencyKeyModel(
+                    scope=scope,
+                    key=key,
+                    request_hash=request_hash,
+                    status=STATUS_PENDING,
+                    created_at=now,
+                    expires_at=now + self.ttl,
+                    locked_until=now + self.lease
+                ))
+                try:
+                    session.commit()
+                    return None
+                except IntegrityError:
+                    session.rollback()
+                
+                existing = session.get(IdempotencyKeyModel, (scope, key))
+                if existing is None:
+                    continue
+                if existing.expires_at <= now:
+                    # Clave expirada: se puede reutilizar
+                    session.delete(existing)
+                    session.commit()
+                    continue
+                if existing.status == STATUS_PENDING:
+                    if self._take_over(session, scope, key, request_hash, now):
+                        return None
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail=f"Ya hay una petición en curso con este {IDEMPOTENCY_HEADER}"
+                    )
+                return existing.request_hash, existing.status_code, existing.response_body
+            
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"No se pudo reservar el {IDEMPOTENCY_HEADER}"
+            )
+        finally:
+            session.close()
+    
+    def _take_over(self, session, scope: str, key: str, request_hash: str, now: datetime) -> bool:
+        """
+        Tomar una fila PENDING cuya concesión venció (su worker murió)
+        
+        El UPDATE condicionado a la concesión vencida deja que solo una de
+        varias peticiones concurrentes la tome.
+        """
+        result = session.execute(
+            update(IdempotencyKeyModel)
+            .where(
+                IdempotencyKeyModel.scope == scope,
+                IdempotencyKeyModel.key == key,
+                IdempotencyKeyModel.status == STATUS_PENDING,
+                (IdempotencyKeyModel.locked_until.is_(None)) | (IdempotencyKeyModel.locked_until <= now)
+            )
+            .values(
+                request_hash=request_hash,
+                created_at=now,
+                expires_at=now + self.ttl,
+                locked_until=now + self.lease
+            )
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+        return result.rowcount == 1
+    
+    def _complete(self, scope: str, key: str, status_code: int, body: Any) -> None:
+        """Guardar la respuesta de una operación exitosa"""
+        session = self.session_factory()
+        try:
+            record = session.get(IdempotencyKeyModel, (scope, key))
+            if record is not None:
+                record.status = STATUS_COMPLETED
+                record.status_code = status_code
+                record.response_body = body
+                record.locked_until = None
+                session.commit()
+        finally:
+            session.close()
+    
+    def _release(self, scope: str, key: str) -> None:
+        """Liberar la clave tras un fallo para que el cliente pueda reintentar"""
+        session = self.session_factory()
+        try:
+            session.execute(
+                delete(IdempotencyKeyModel).where(
+                    IdempotencyKeyModel.scope == scope,
+                    IdempotencyKeyModel.key == key,
+                    IdempotencyKeyModel.status == STATUS_PENDING
+                )
+            )
+            session.commit()
+        finally:
+            session.close()
+    
+    def purge_expired(self) -> int:
+        """Eliminar claves expiradas (usa el índice de expires_at)"""
+        session = self.session_factory()
+        try:
+            result = session.execute(
+                delete(IdempotencyKeyModel).where(IdempotencyKeyModel.expires_at <= datetime.utcnow())
+            )
+            session.commit()
+            return result.rowcount
+        finally:
+            session.close()
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    """Dependency para obtener el almacén de claves de idempotencia"""
+    return IdempotencyStore()
@@ -0,0 +1,92 @@
+"""
+Concesiones con nombre para tareas que solo un worker debe correr a la vez
+
+Cada worker corre el mismo lifespan; las tareas que escriben estado
+compartido (por ejemplo las ETAs de las órdenes) piden la concesión en cada
+vuelta y solo trabajan mientras la tengan. Si el worker que la tiene muere,
+otro la toma cuando vence.
+"""
+from sqlalchemy import Column, String, DateTime, delete, update
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta
+from typing import Optional
+
+from infrastructure.database import Base, SessionLocal
+from .event_transport import process_origin
+
+
+class WorkerLeaseModel(Base):
+    """Modelo de concesiones (búsqueda por clave primaria name)"""
+    __tablename__ = "worker_leases"
+    
+    name = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)
+    locked_until = Column(DateTime, nullable=False)
+
+
+class WorkerLease:
+    """
+    Concesión `name` para este proceso, renovada en cada `acquire()`
+    
+    El UPDATE condicionado a que la concesión sea nuestra o esté vencida deja
+    que solo uno de varios workers concurrentes la tenga.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        ttl: timedelta,
+        session_factory=SessionLocal,
+        holder: Optional[str] = None
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.session_factory = session_factory
+        self.holder = holder or process_origin()
+    
+    def acquire(self) -> bool:
+        """Tomar o renovar la concesión; retorna si es de este proceso"""
+        now = datetime.utcnow()
+        session = self.session_factory()
+        try:
+            for _ in range(2):
+                result = session.execute(
+                    update(WorkerLeaseModel)
+                    .where(
+                        WorkerLeaseModel.name == self.name,
+                        (WorkerLeaseModel.holder == self.holder) | (WorkerLeaseModel.locked_until <= now)
+                    )
+                    .values(holder=self.holder, locked_until=now + self.ttl)
+                    .execution_options(synchronize_session=False)
+                )
+                session.commit()
+                if result.rowcount == 1:
+                    return True
+                if session.get(WorkerLeaseModel, self.name) is not None:
+                    # Otro worker la tiene y no ha vencido
+                    return False
+                
+                session.add(WorkerLeaseModel(name=self.name, holder=self.holder, locked_until=now + self.ttl))
+                try:
+                    session.commit()
+                    return True
+                except IntegrityError:
+                    # Otro worker la creó al mismo tiempo: ver si ya venció
+                    session.rollback()
+            return False
+        finally:
+            session.close()
+    
+    def release(self) -> None:
+        """Soltar la concesión (al apagar) para que otro worker la tome sin esperar"""
+        session = self.session_factory()
+        try:
+            session.execute(
+                delete(WorkerLeaseModel).where(
+                    WorkerLeaseModel.name == self.name,
+                    WorkerLeaseModel.holder == self.holder
+                )
+            )
+            session.commit()
+        finally:
+            session.close()
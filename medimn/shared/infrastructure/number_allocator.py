@@ -0,0 +1,73 @@
+"""
+Asignador hi/lo de números respaldado por la base de datos
+"""
+from sqlalchemy import Column, String, Integer, insert, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from typing import Dict, Tuple
+import threading
+
+from infrastructure.database import Base
+from shared.domain.numbering import NumberAllocator
+
+
+class NumberSequenceModel(Base):
+    """Modelo de secuencias de numeración (bloque alto reservado por nombre)"""
+    __tablename__ = "number_sequences"
+    
+    name = Column(String, primary_key=True)
+    next_hi = Column(Integer, nullable=False, default=0)
+
+
+class HiLoNumberAllocator(NumberAllocator):
+    """
+    Reserva bloques de `block_size` valores con una transacción propia y los
+    reparte en memoria. Cada worker obtiene bloques disjuntos, así que los
+    números son únicos entre procesos y solo hay un viaje a la base de datos
+    por bloque, nunca por orden.
+    """
+    
+    def __init__(self, engine: Engine, block_size: int = 1000):
+        if block_size < 1:
+            raise ValueError("El tamaño de bloque debe ser positivo")
+        self.engine = engine
+        self.block_size = block_size
+        self._blocks: Dict[str, Tuple[int, int]] = {}
+        self._lock = threading.Lock()
+    
+    def next_value(self, sequence: str) -> int:
+        with self._lock:
+            current, end = self._blocks.get(sequence, (0, 0))
+            if current >= end:
+                hi = self._reserve_block(sequence)
+                current, end = hi * self.block_size, (hi + 1) * self.block_size
+                # El valor 0 no se entrega para mantener los números positivos
+                current = max(current, 1)
+            self._blocks[sequence] = (current + 1, end)
+            return current
+    
+    def _reserve_block(self, sequence: str) -> int:
+        """Incrementar atómicamente el bloque alto de la secuencia y retornar el reservado"""
+        table = NumberSequenceModel.__table__
+        for _ in range(2):
+            with self.engine.begin() as conn:
+                # El UPDATE toma el bloqueo de la fila, serializando a los workers
+                result = conn.execute(
+                    update(table)
+                    .where(table.c.name == sequence)
+                    .values(next_hi=table.c.next_hi + 1)
+                )
+                if result.rowcount:
+                    return conn.execute(
+                        select(table.c.next_hi).where(table.c.name == sequence)
+                    ).scalar_one() - 1
+            
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(insert(table).values(name=sequence, next_hi=1))
+                return 0
+            except IntegrityError:
+                # Otro worker creó la secuencia a la vez: reintentar el UPDATE
+                continue
+        
+        raise RuntimeError(f"No se pudo reservar un bloque para la secuencia {sequence}")
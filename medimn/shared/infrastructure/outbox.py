@@ -0,0 +1,351 @@
+"""
+Outbox transaccional de eventos de dominio y su despachador en segundo plano
+"""
+from sqlalchemy import Column, String, Integer, DateTime, JSON, Text, Index, delete, func, insert, select, update
+from sqlalchemy.orm import Session, aliased
+from fastapi.encoders import jsonable_encoder
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+import asyncio
+import time
+
+from infrastructure.config import get_settings
+from infrastructure.database import Base, SessionLocal
+from shared.domain.events import DomainEvent, EventBus, event_bus
+
+# Tiempo que un worker retiene un lote antes de que otro pueda reintentarlo
+CLAIM_LEASE_SECONDS = 60
+MAX_RETRY_DELAY_SECONDS = 300
+
+# IDs de eventos entregados recordados por proceso para no repetir entregas
+DELIVERED_CACHE_SIZE = 10_000
+
+
+class OutboxEventModel(Base):
+    """Modelo del outbox: eventos pendientes de entregar, escritos junto al agregado"""
+    __tablename__ = "outbox_events"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    event_id = Column(String, nullable=False, unique=True)
+    event_type = Column(String, nullable=False)
+    aggregate_id = Column(String, nullable=True)
+    payload = Column(JSON, nullable=True)
+    occurred_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    dispatched_at = Column(DateTime, nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    
+    # Los pendientes se leen por dispatched_at IS NULL en orden de inserción
+    __table_args__ = (
+        Index("ix_outbox_events_dispatched_id", "dispatched_at", "id"),
+    )
+
+
+def event_payload(event: DomainEvent) -> Dict[str, Any]:
+    """Datos propios del evento serializables a JSON"""
+    return jsonable_encoder(event.attributes())
+
+
+def rebuild_event(
+    event_type: str,
+    payload: Optional[Dict[str, Any]],
+    event_id: str,
+    occurred_at: datetime,
+    aggregate_id: Optional[str]
+) -> DomainEvent:
+    """Reconstruir un evento de dominio guardado sin volver a ejecutar su __init__"""
+    event_class = DomainEvent.event_class(event_type)
+    if event_class is None:
+        raise ValueError(f"Tipo de evento desconocido: {event_type}")
+    
+    event = event_class.__new__(event_class)
+    for name, value in (payload or {}).items():
+        setattr(event, name, value)
+    event.event_id = event_id
+    event.occurred_at = occurred_at
+    event.aggregate_id = aggregate_id or ""
+    return event
+
+
+def stage_events(session: Session, events: Iterable[DomainEvent]) -> int:
+    """
+    Agregar eventos al outbox dentro de la transacción en curso (sin confirmar)
+    
+    El llamador confirma la sesión junto con el agregado, así que los eventos
+    se guardan si y solo si se guarda el cambio que los produjo.
+    """
+    now = datetime.utcnow()
+    rows = [
+        {
+            "event_id": event.event_id,
+            "event_type": event.__class__.__name__,
+            "aggregate_id": event.aggregate_id,
+            "payload": event_payload(event),
+            "occurred_at": event.occurred_at,
+            "created_at": now,
+            "attempts": 0
+        }
+        for event in events
+    ]
+    if rows:
+        session.execute(insert(OutboxEventModel), rows)
+    return len(rows)
+
+
+def _event_from_row(row: OutboxEventModel) -> DomainEvent:
+    """Reconstruir el evento de dominio guardado en el outbox"""
+    return rebuild_event(row.event_type, row.payload, row.event_id, row.occurred_at, row.aggregate_id)
+
+
+class OutboxDispatcher:
+    """
+    Entrega los eventos del outbox al event bus en segundo plano.
+    
+    - Toma lotes en orden de inserción con una concesión (locked_until), así
+      varios workers no entregan el mismo lote a la vez.
+    - La entrega es al menos una vez: si un worker cae tras entregar y antes
+      de marcar, el lote se reintenta al vencer la concesión. Los IDs ya
+      entregados por este proceso se omiten.
+    - Un evento fallido se reintenta con espera exponencial y no adelanta a
+      los siguientes del mismo agregado; tras max_attempts queda como
+      pendiente sin reintento (dead letter) para revisión.
+    """
+    
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        bus: EventBus = event_bus,
+        batch_size: Optional[int] = None,
+        poll_interval_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        retention: Optional[timedelta] = None
+    ):
+        settings = get_settings()
+        self.session_factory = session_factory
+        self.bus = bus
+        self.batch_size = batch_size or settings.outbox_batch_size
+        self.poll_interval_seconds = poll_interval_seconds or settings.outbox_poll_interval_seconds
+        self.max_attempts = max_attempts or settings.outbox_max_attempts
+        self.retention = retention or timedelta(hours=settings.outbox_retention_hours)
+        
+        self._delivered: "OrderedDict[str, None]" = OrderedDict()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._last_purge = 0.0
+        
+        self.delivered_total = 0
+        self.failed_total = 0
+        self.duplicates_skipped = 0
+        self.last_batch_size = 0
+        self.last_dispatch_at: Optional[datetime] = None
+        self.delivery_lag_ms: Optional[float] = None
+    
+    def _claim(self, session: Session, now: datetime) -> List[OutboxEventModel]:
+        """Tomar un lote pendiente marcando su concesión en un solo UPDATE"""
+        # Un evento anterior del mismo agregado que espera reintento (o que otro
+        # worker tiene tomado) retiene a los siguientes entre una toma y otra
+        earlier = aliased(OutboxEventModel)
+        blocked_by_earlier = select(earlier.id).where(
+            earlier.aggregate_id == OutboxEventModel.aggregate_id,
+            earlier.id < OutboxEventModel.id,
+            earlier.dispatched_at.is_(None),
+            earlier.attempts < self.max_attempts,
+            earlier.locked_until > now
+        ).exists()
+        pending = select(OutboxEventModel.id).where(
+            OutboxEventModel.dispatched_at.is_(None),
+            OutboxEventModel.attempts < self.max_attempts,
+            (OutboxEventModel.locked_until.is_(None)) | (OutboxEventModel.locked_until <= now),
+            ~blocked_by_earlier
+        ).order_by(OutboxEventModel.id).limit(self.batch_size)
+        
+        claimed_ids = [
+            row[0]
+            for row in session.execute(
+                update(OutboxEventModel)
+                .where(
+                    OutboxEventModel.id.in_(pending.scalar_subquery()),
+                    (OutboxEventModel.locked_until.is_(None)) | (OutboxEventModel.locked_until <= now)
+                )
+                .values(locked_until=now + timedelta(seconds=CLAIM_LEASE_SECONDS))
+                .returning(OutboxEventModel.id)
+                .execution_options(synchronize_session=False)
+            )
+        ]
+        session.commit()
+        if not claimed_ids:
+            return []
+        
+        return session.query(OutboxEventModel).filter(
+            OutboxEventModel.id.in_(claimed_ids)
+        ).order_by(OutboxEventModel.id).all()
+    
+    def _remember(self, event_id: str) -> None:
+        self._delivered[event_id] = None
+        if len(self._delivered) > DELIVERED_CACHE_SIZE:
+            self._delivered.popitem(last=False)
+    
+    async def dispatch_once(self) -> int:
+        """Entregar un lote; retorna cuántos eventos se tomaron"""
+        session = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            rows = self._claim(session, now)
+            
+            delivered_ids: List[int] = []
+            # Agregado -> momento de reintento de su evento fallido en este lote
+            blocked_aggregates: Dict[str, datetime] = {}
+            for row in rows:
+                if row.aggregate_id in blocked_aggregates:
+                    # Mantener el orden por agregado: reintentar junto con el evento fallido
+                    row.locked_until = blocked_aggregates[row.aggregate_id]
+                    continue
+                
+                if row.event_id in self._delivered:
+                    self.duplicates_skipped += 1
+                    delivered_ids.append(row.id)
+                    continue
+                
+                try:
+                    # Entrega directa (no por la cola del bus) para poder reintentar los fallos
+                    await self.bus.dispatch(_event_from_row(row))
+                except Exception as e:
+                    self.failed_total += 1
+                    row.attempts += 1
+                    row.last_error = str(e)[:1000]
+                    row.locked_until = now + timedelta(
+                        seconds=min(2 ** row.attempts, MAX_RETRY_DELAY_SECONDS)
+                    )
+                    if row.aggregate_id:
+                        blocked_aggregates[row.aggregate_id] = row.locked_until
+                    continue
+                
+                self._remember(row.event_id)
+                delivered_ids.append(row.id)
+                self.delivered_total += 1
+            
+            dispatched_at = datetime.utcnow()
+            if delivered_ids:
+                session.execute(
+                    update(OutboxEventModel)
+                    .where(OutboxEventModel.id.in_(delivered_ids))
+                    .values(dispatched_at=dispatched_at, locked_until=None)
+                    .execution_options(synchronize_session=False)
+                )
+                delivered_set = set(delivered_ids)
+                lag_ms = max(
+                    (dispatched_at - row.created_at).total_seconds() * 1000
+                    for row in rows if row.id in delivered_set
+                )
+                # Media móvil del retraso entre escritura y entrega
+                self.delivery_lag_ms = lag_ms if self.delivery_lag_ms is None else (
+                    0.8 * self.delivery_lag_ms + 0.2 * lag_ms
+                )
+            session.commit()
+            
+            self.last_batch_size = len(rows)
+            if rows:
+                self.last_dispatch_at = dispatched_at
+            return len(rows)
+        finally:
+            session.close()
+    
+    def purge_dispatched(self) -> int:
+        """Eliminar eventos entregados más antiguos que la retención"""
+        session = self.session_factory()
+        try:
+            result = session.execute(
+                delete(OutboxEventModel).where(
+                    OutboxEventModel.dispatched_at.is_not(None),
+                    OutboxEventModel.dispatched_at <= datetime.utcnow() - self.retention
+                )
+            )
+            session.commit()
+            return result.rowcount
+        finally:
+            session.close()
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Métricas de retraso y entrega del outbox"""
+        session = self.session_factory()
+        try:
+            pending, oldest = session.query(
+                func.count(OutboxEventModel.id),
+                func.min(OutboxEventModel.created_at)
+            ).filter(
+                OutboxEventModel.dispatched_at.is_(None),
+                OutboxEventModel.attempts < self.max_attempts
+            ).one()
+            dead_letter = session.query(func.count(OutboxEventModel.id)).filter(
+                OutboxEventModel.dispatched_at.is_(None),
+                OutboxEventModel.attempts >= self.max_attempts
+            ).scalar()
+        finally:
+            session.close()
+        
+        return {
+            "pending": pending,
+            "deadLetter": dead_letter,
+            "oldestPendingAgeSeconds": (
+                round((datetime.utcnow() - oldest).total_seconds(), 3) if oldest else 0.0
+            ),
+            "deliveredTotal": self.delivered_total,
+            "failedTotal": self.failed_total,
+            "duplicatesSkipped": self.duplicates_skipped,
+            "lastBatchSize": self.last_batch_size,
+            "lastDispatchAt": self.last_dispatch_at.isoformat() if self.last_dispatch_at else None,
+            "deliveryLagMs": round(self.delivery_lag_ms, 3) if self.delivery_lag_ms is not None else None
+        }
+    
+    def notify(self) -> None:
+        """Despertar al despachador tras confirmar eventos nuevos"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+    
+    async def run(self):
+        """Drenar el outbox hasta que se detenga; entre lotes vacíos espera el intervalo o un aviso"""
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        while True:
+            try:
+                while await self.dispatch_once() >= self.batch_size:
+                    # Ceder el loop entre lotes llenos
+                    await asyncio.sleep(0)
+                if time.monotonic() - self._last_purge > 3600:
+                    self._last_purge = time.monotonic()
+                    self.purge_dispatched()
+            except Exception as e:
+                print(f"⚠️  Error despachando eventos del outbox: {e}")
+            
+            if self._stopping:
+                return
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+    
+    def stop(self) -> None:
+        """Pedir al despachador que drene lo pendiente y termine"""
+        self._stopping = True
+        self.notify()
+
+
+_dispatcher: Optional[OutboxDispatcher] = None
+
+
+def get_outbox_dispatcher() -> OutboxDispatcher:
+    """Despachador del outbox del proceso"""
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = OutboxDispatcher()
+    return _dispatcher
+
+
+def notify_outbox() -> None:
+    """Avisar al despachador (si existe) que hay eventos nuevos"""
+    if _dispatcher is not None:
+        _dispatcher.notify()
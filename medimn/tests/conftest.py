@@ -7,6 +7,7 @@ from pathlib import Path
 from unittest.mock import Mock, AsyncMock, MagicMock
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import StaticPool
 from datetime import datetime, timedelta
 
 # Agregar el path del monolito
@@ -42,6 +43,20 @@ def db_session():
         Base.metadata.drop_all(engine)
 
 
+@pytest.fixture
+def session_factory():
+    """Fábrica de sesiones independientes sobre una misma base de datos en memoria"""
+    # StaticPool: todas las sesiones comparten la conexión y ven los mismos datos
+    engine = create_engine(
+        "sqlite:///:memory:",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.drop_all(engine)
+
+
 @pytest.fixture
 def mock_user_repository():
     """Mock del repositorio de usuarios"""
@@ -0,0 +1,112 @@
+"""
+Tests unitarios para MemmapDistanceMatrix
+"""
+import pytest
+import numpy as np
+from unittest.mock import Mock
+
+from logistics.domain.entities import Coordinates, VehicleProfile
+from logistics.infrastructure.optimization import (
+    MemmapDistanceMatrix, NumpyRouteOptimizer, haversine_distances, haversine_matrix
+)
+from logistics.infrastructure.optimization import distance_cache
+
+
+def _points(count: int, seed: int = 3):
+    """Coordenadas aleatorias; la caché las redondea a ~1 m"""
+    rng = np.random.default_rng(seed)
+    return 4.5 + rng.random(count) * 0.3, -74.2 + rng.random(count) * 0.3
+
+
+def _counting_distances():
+    """haversine_distances que registra cuántas celdas calcula"""
+    return Mock(side_effect=haversine_distances)
+
+
+def _cells(function: Mock) -> int:
+    return sum(len(call.args[0]) * len(call.args[2]) for call in function.call_args_list)
+
+
+@pytest.mark.unit
+class TestMemmapDistanceMatrix:
+    """Tests para MemmapDistanceMatrix"""
+    
+    def test_matches_haversine_and_reuses_cells(self, tmp_path):
+        """Test la segunda consulta sale completa de la caché"""
+        lat, lon = _points(40)
+        function = _counting_distances()
+        cache = MemmapDistanceMatrix(str(tmp_path), max_locations=64, distance_function=function)
+        
+        first = cache.matrix(lat, lon)
+        second = cache.matrix(lat, lon)
+        
+        np.testing.assert_allclose(second, haversine_matrix(lat, lon), atol=5e-3)
+        np.testing.assert_array_equal(first, second)
+        assert function.call_count == 1
+        assert cache.hits == cache.misses == 40 * 39
+        assert cache.hit_rate == 0.5
+    
+    def test_fills_only_missing_rows(self, tmp_path):
+        """Test una ubicación nueva solo calcula su fila"""
+        lat, lon = _points(11)
+        function = _counting_distances()
+        cache = MemmapDistanceMatrix(str(tmp_path), max_locations=64, distance_function=function)
+        cache.matrix(lat[:10], lon[:10])
+        function.reset_mock()
+        
+        cache.matrix(lat, lon)
+        
+        assert _cells(function) == 11
+    
+    def test_persists_across_instances(self, tmp_path):
+        """Test otra instancia (otro proceso o reinicio) reutiliza los archivos"""
+        lat, lon = _points(20)
+        writer = MemmapDistanceMatrix(str(tmp_path), max_locations=64)
+        expected = writer.matrix(lat, lon)
+        other = MemmapDistanceMatrix(str(tmp_path), max_locations=64)
+        other_lat, other_lon = _points(5, seed=8)
+        other.matrix(other_lat, other_lon)
+        writer.close()
+        
+        function = _counting_distances()
+        reader = MemmapDistanceMatrix(str(tmp_path), max_locations=9999, distance_function=function)
+        
+        np.testing.assert_array_equal(reader.matrix(lat, lon), expected)
+        reader.matrix(other_lat, other_lon)
+        assert function.call_count == 0
+        assert reader.max_locations == 64
+    
+    def test_locks_with_msvcrt_without_fcntl(self, tmp_path, monkeypatch):
+        """Test en Windows (sin fcntl) la asignación de posiciones se bloquea con msvcrt"""
+        msvcrt = Mock(LK_LOCK=1, LK_UNLCK=0)
+        monkeypatch.setattr(distance_cache, "fcntl", None)
+        monkeypatch.setattr(distance_cache, "msvcrt", msvcrt, raising=False)
+        lat, lon = _points(6)
+        cache = MemmapDistanceMatrix(str(tmp_path), max_locations=16)
+        
+        np.testing.assert_allclose(cache.matrix(lat, lon), haversine_matrix(lat, lon), atol=5e-3)
+        modes = [call.args[1] for call in msvcrt.locking.call_args_list]
+        assert modes == [1, 0, 1, 0]
+        assert all(call.args[2] == 1 for call in msvcrt.locking.call_args_list)
+    
+    def test_full_cache_computes_without_storing(self, tmp_path):
+        """Test con la caché llena las ubicaciones nuevas se calculan igual"""
+        lat, lon = _points(12)
+        cache = MemmapDistanceMatrix(str(tmp_path), max_locations=8)
+        
+        np.testing.assert_allclose(cache.matrix(lat, lon), haversine_matrix(lat, lon), atol=5e-3)
+        np.testing.assert_allclose(cache.matrix(lat[:8], lon[:8]), haversine_matrix(lat[:8], lon[:8]), atol=5e-3)
+    
+    def test_duration_and_optimizer_use_cache(self, tmp_path):
+        """Test minutos por perfil y el optimizador con la caché inyectada"""
+        lat, lon = _points(6)
+        cache = MemmapDistanceMatrix(str(tmp_path), max_locations=16)
+        stops = [Coordinates(point_lat, point_lon) for point_lat, point_lon in zip(lat, lon)]
+        
+        minutes = cache.duration_minutes(lat, lon, VehicleProfile(average_speed_kmh=39.0, fuel_liters_per_km=0.1))
+        cached = NumpyRouteOptimizer(distance_matrix=cache.matrix).optimize(stops, time_budget_seconds=0.1)
+        direct = NumpyRouteOptimizer().optimize(stops, time_budget_seconds=0.1)
+        
+        np.testing.assert_allclose(minutes, haversine_matrix(lat, lon) * 1.3 / 39 * 60, atol=1e-2)
+        assert cached.distance_km == pytest.approx(direct.distance_km, abs=0.02)
+        assert cache.hits > 0
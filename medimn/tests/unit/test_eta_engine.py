@@ -0,0 +1,273 @@
+"""
+Tests unitarios para el recálculo incremental de ETAs y la entrega de paradas
+"""
+import asyncio
+import pytest
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock
+from sqlalchemy.orm import Session
+
+from logistics.application.commands import CompleteStopCommand
+from logistics.application.handlers import CompleteStopCommandHandler, GetTrackingInfoQueryHandler
+from logistics.application.queries import GetTrackingInfoQuery
+from logistics.domain.entities import ETA, Coordinates, Position, Route, Stop
+from logistics.infrastructure.adapters import OrderRepositoryEtaSink
+from logistics.infrastructure.optimization import haversine_matrix
+from logistics.infrastructure.repositories import SQLAlchemyLogisticsRepository
+from logistics.infrastructure.tracking import EtaEngine, PositionRingBuffers
+
+START = datetime(2026, 3, 2, 8, 0)
+
+
+def _route(vehicle_id: str = "van-1") -> Route:
+    """Ruta en curso con tres paradas ubicadas a ~1.1 km una de otra sobre un meridiano"""
+    route = Route.create(
+        stops=[
+            Stop(f"order-{index}", ETA(START + timedelta(hours=index), 30), index + 1, Coordinates(4.60 + 0.01 * index, -74.1))
+            for index in range(3)
+        ],
+        vehicle_type="van"
+    )
+    route.start_route(vehicle_id)
+    return route
+
+
+def _engine(buffers, sink=None, **kwargs):
+    calls = []
+    
+    def counting_matrix(lat, lon):
+        calls.append(len(lat))
+        return haversine_matrix(lat, lon)
+    
+    if sink is None:
+        sink = Mock()
+        sink.update_etas = AsyncMock(side_effect=lambda etas: len(etas))
+    return EtaEngine(buffers, sink, distance_matrix=counting_matrix, **kwargs), sink, calls
+
+
+@pytest.mark.unit
+class TestCompleteStop:
+    """Tests para Route.complete_stop y CompleteStopCommandHandler"""
+    
+    def test_progress_follows_completed_stops(self):
+        """Test el progreso es la fracción entregada y no se entrega dos veces"""
+        route = _route()
+        
+        route.complete_stop("order-1", START)
+        
+        assert route.progress == pytest.approx(100 / 3)
+        assert [stop.order_id for stop in route.remaining_stops] == ["order-0", "order-2"]
+        with pytest.raises(ValueError, match="ya fue entregada"):
+            route.complete_stop("order-1")
+        with pytest.raises(ValueError, match="no encontrada"):
+            route.complete_stop("order-9")
+        with pytest.raises(ValueError, match="en progreso"):
+            Route.create(stops=[Stop("order-1")]).complete_stop("order-1")
+    
+    @pytest.mark.asyncio
+    async def test_location_and_delivery_are_persisted(self, db_session: Session):
+        """Test la ubicación y la hora de entrega de las paradas sobreviven a guardar y leer"""
+        repo = SQLAlchemyLogisticsRepository(db_session)
+        route = await repo.save(_route())
+        engine = Mock()
+        
+        await CompleteStopCommandHandler(repo, eta_engine=engine).handle(
+            CompleteStopCommand(route_id=str(route.id), order_id="order-0", completed_at=START)
+        )
+        
+        stored = await repo.find_by_id(route.id)
+        assert stored.stops[0].completed_at == START
+        assert stored.stops[2].location.lat == pytest.approx(4.62)
+        engine.track_route.assert_called_once()
+
+
+@pytest.mark.unit
+class TestEtaEngine:
+    """Tests para EtaEngine"""
+    
+    @pytest.mark.asyncio
+    async def test_recomputes_remaining_stops_from_position(self):
+        """Test la ETA de cada parada es la posición más el tramo y los minutos acumulados"""
+        buffers = PositionRingBuffers()
+        engine, sink, calls = _engine(buffers)
+        engine.track_route(_route())
+        # En la primera parada: 0 minutos hasta ella; luego 10 de atención + ~2.9 de manejo por tramo
+        buffers.append_many(["van-1"], [4.60], [-74.1], [START])
+        engine.positions_updated(["van-1"])
+        
+        written = await engine.flush_once()
+        
+        etas = sink.update_etas.await_args.args[0]
+        assert written == 3
+        assert etas["order-0"].date == START
+        leg = (etas["order-2"].date - etas["order-1"].date).total_seconds() / 60
+        assert leg == pytest.approx(10 + 1.1119 * 1.3 / 30 * 60, abs=0.01)
+        assert etas["order-1"].window_minutes == 30
+        assert engine.eta("order-2") is etas["order-2"]
+        assert calls == [3]
+    
+    @pytest.mark.asyncio
+    async def test_bursts_of_positions_are_debounced(self):
+        """Test muchas posiciones dan un recálculo por vuelta y los cambios chicos no se escriben"""
+        buffers = PositionRingBuffers()
+        engine, sink, calls = _engine(buffers, min_change_minutes=2.0)
+        engine.track_route(_route())
+        engine.track_route(_route("van-2"))
+        buffers.append_many(["van-1"], [4.59], [-74.1], [START])
+        await engine.flush_once()
+        
+        for second in range(1, 100):
+            # ~30 s más tarde en el mismo lugar: la ETA se mueve menos de 2 minutos
+            buffers.append_many(["van-1"], [4.59], [-74.1], [START + timedelta(seconds=second * 0.3)])
+            engine.positions_updated(["van-1", "van-9"])
+        skipped = await engine.flush_once()
+        buffers.append_many(["van-1"], [4.59], [-74.1], [START + timedelta(minutes=5)])
+        engine.positions_updated(["van-1"])
+        moved = await engine.flush_once()
+        
+        assert skipped == 0
+        assert moved == 3
+        assert sink.update_etas.await_count == 2
+        assert engine.metrics() == {"routes": 2, "leader": True, "recomputed": 4, "written": 6, "skipped": 3}
+        assert calls == [3, 3]
+    
+    @pytest.mark.asyncio
+    async def test_stop_completion_anchors_next_stops(self):
+        """Test sin posición posterior las siguientes salen de la entrega; la entregada se olvida"""
+        buffers = PositionRingBuffers()
+        buffers.append_many(["van-1"], [4.60], [-74.1], [START])
+        engine, sink, _ = _engine(buffers)
+        route = _route()
+        engine.track_route(route)
+        await engine.flush_once()
+        
+        delivered_at = START + timedelta(minutes=40)
+        route.complete_stop("order-0", delivered_at)
+        engine.track_route(route)
+        await engine.flush_once()
+        
+        etas = sink.update_etas.await_args.args[0]
+        assert set(etas) == {"order-1", "order-2"}
+        minutes = (etas["order-1"].date - delivered_at).total_seconds() / 60
+        assert minutes == pytest.approx(1.1119 * 1.3 / 30 * 60, abs=0.01)
+        assert engine.eta("order-0") is None
+        route.complete_route()
+        engine.track_route(route)
+        assert engine.metrics()["routes"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_failed_write_is_retried(self):
+        """Test si la escritura falla las ETAs quedan para la próxima vuelta"""
+        buffers = PositionRingBuffers()
+        buffers.append_many(["van-1"], [4.60], [-74.1], [START])
+        sink = Mock()
+        sink.update_etas = AsyncMock(side_effect=[RuntimeError("db"), 3])
+        engine, _, _ = _engine(buffers, sink=sink)
+        engine.track_route(_route())
+        
+        with pytest.raises(RuntimeError):
+            await engine.flush_once()
+        
+        assert await engine.flush_once() == 3
+    
+    @pytest.mark.asyncio
+    async def test_tracking_info_uses_live_eta(self):
+        """Test el seguimiento de la ruta muestra la ETA recalculada de la próxima parada"""
+        buffers = PositionRingBuffers()
+        buffers.append_many(["van-1"], [4.61], [-74.1], [START])
+        engine, _, _ = _engine(buffers)
+        route = _route()
+        route.complete_stop("order-0", START - timedelta(minutes=5))
+        engine.track_route(route)
+        await engine.flush_once()
+        repo = Mock()
+        repo.find_by_id = AsyncMock(return_value=route)
+        
+        tracking = await GetTrackingInfoQueryHandler(repo, buffers, eta_engine=engine).handle(
+            GetTrackingInfoQuery(route_id=str(route.id))
+        )
+        
+        assert tracking.next_stop_eta.date == START
+    
+    @pytest.mark.asyncio
+    async def test_only_lease_holder_writes(self):
+        """Test sin la concesión calcula para las consultas pero no escribe; al tomarla reescribe todo"""
+        buffers = PositionRingBuffers()
+        buffers.append_many(["van-1"], [4.60], [-74.1], [START])
+        lease = Mock()
+        lease.acquire = Mock(side_effect=[False, True, True])
+        engine, sink, _ = _engine(buffers, lease=lease)
+        engine.track_route(_route())
+        
+        assert await engine.flush_once() == 0
+        assert engine.eta("order-0").date == START
+        sink.update_etas.assert_not_awaited()
+        
+        assert await engine.flush_once() == 3
+        assert engine.metrics()["leader"] is True
+        assert await engine.flush_once() == 0
+    
+    @pytest.mark.asyncio
+    async def test_follows_routes_and_positions_saved_by_other_workers(self):
+        """Test toma la última posición guardada y suelta las rutas que otro worker terminó"""
+        buffers = PositionRingBuffers()
+        route = _route()
+        source = Mock()
+        source.load = AsyncMock(return_value=([route], {"van-1": Position(4.60, -74.1, START)}))
+        engine, sink, _ = _engine(buffers, route_source=source)
+        
+        await engine.flush_once()
+        
+        # Sin posiciones en este proceso: la ETA sale de la guardada por otro worker
+        assert sink.update_etas.await_args.args[0]["order-0"].date == START
+        
+        route.complete_stop("order-0", START + timedelta(minutes=1))
+        await engine.flush_once()
+        assert set(sink.update_etas.await_args.args[0]) == {"order-1", "order-2"}
+        assert engine.eta("order-0") is None
+        
+        source.load = AsyncMock(return_value=([], {}))
+        await engine.flush_once()
+        assert engine.metrics()["routes"] == 0
+        assert engine.eta("order-1") is None
+    
+    @pytest.mark.asyncio
+    async def test_stop_releases_lease(self):
+        """Test al detenerse suelta la concesión para que otro worker escriba sin esperar"""
+        lease = Mock()
+        lease.acquire = Mock(return_value=True)
+        engine, _, _ = _engine(PositionRingBuffers(), lease=lease)
+        
+        task = asyncio.create_task(engine.run())
+        await asyncio.sleep(0)
+        engine.stop()
+        await asyncio.wait_for(task, timeout=1)
+        
+        lease.release.assert_called_once_with()
+        assert engine.metrics()["leader"] is False
+
+
+@pytest.mark.unit
+class TestOrderRepositoryEtaSink:
+    """Tests para OrderRepositoryEtaSink"""
+    
+    @pytest.mark.asyncio
+    async def test_sets_eta_on_existing_orders(self):
+        """Test pasa todas las ETAs al repositorio en una sola escritura por lote"""
+        repository = Mock()
+        repository.update_etas = AsyncMock(return_value=1)
+        
+        @contextmanager
+        def factory():
+            yield repository
+        
+        updated = await OrderRepositoryEtaSink(factory).update_etas({
+            "order-1": ETA(START, 30), "order-missing": ETA(START, 0)
+        })
+        
+        assert updated == 1
+        etas = repository.update_etas.await_args.args[0]
+        assert {order_id: (eta.date, eta.window_minutes) for order_id, eta in etas.items()} == {
+            "order-1": (START, 30), "order-missing": (START, 0)
+        }
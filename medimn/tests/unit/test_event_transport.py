@@ -0,0 +1,117 @@
+"""
+Tests unitarios para los transportes del event bus entre procesos
+"""
+import pytest
+from sqlalchemy import insert
+from datetime import datetime
+
+from shared.domain.events import DomainEvent, EventBus
+from shared.infrastructure.event_transport import (
+    DatabaseEventTransport,
+    EventLogModel,
+    EventTransportRelay,
+    InMemoryEventHub,
+    InMemoryEventTransport
+)
+
+
+class TransportTestEvent(DomainEvent):
+    """Evento de prueba con datos propios"""
+    
+    def __init__(self, aggregate_id: str, seq: int):
+        super().__init__()
+        self.seq = seq
+        self.aggregate_id = aggregate_id
+
+
+def _worker(transport):
+    """Bus de un worker con su relay y los eventos que recibe"""
+    bus, received = EventBus(), []
+    
+    async def _handler(event):
+        received.append((event.aggregate_id, event.seq))
+    bus.subscribe("TransportTestEvent", _handler)
+    bus.attach_transport(transport)
+    return bus, EventTransportRelay(transport, bus=bus, batch_size=10), received
+
+
+@pytest.mark.unit
+class TestInMemoryEventTransport:
+    """Tests para el transporte en memoria"""
+    
+    @pytest.mark.asyncio
+    async def test_events_reach_other_workers_once(self):
+        """Test un evento publicado en un worker llega a los demás y no vuelve al origen"""
+        hub = InMemoryEventHub()
+        bus_a, relay_a, received_a = _worker(InMemoryEventTransport(hub))
+        bus_b, relay_b, received_b = _worker(InMemoryEventTransport(hub))
+        
+        await bus_a.publish(TransportTestEvent("o1", 1))
+        await relay_a.relay_once()
+        await relay_b.relay_once()
+        
+        assert received_a == [("o1", 1)]
+        assert received_b == [("o1", 1)]
+        assert bus_b.metrics()["received"] == 1
+        # Lo recibido no se reenvía
+        assert len(hub.log) == 1
+
+
+@pytest.mark.unit
+class TestDatabaseEventTransport:
+    """Tests para el transporte sobre event_log"""
+    
+    @pytest.mark.asyncio
+    async def test_fetches_in_order_and_in_batches(self, session_factory):
+        """Test los eventos de otro proceso se leen en orden, por lotes, reconstruidos"""
+        publisher = DatabaseEventTransport(session_factory, origin="A")
+        reader = DatabaseEventTransport(session_factory, origin="B")
+        await reader.start()
+        
+        await publisher.publish([TransportTestEvent("o1", seq) for seq in range(5)])
+        
+        first = await reader.fetch(3)
+        rest = await reader.fetch(3)
+        assert [event.seq for event in first + rest] == [0, 1, 2, 3, 4]
+        assert isinstance(first[0], TransportTestEvent)
+        assert first[0].aggregate_id == "o1"
+        assert await publisher.fetch(10) == []
+    
+    @pytest.mark.asyncio
+    async def test_start_skips_previous_events(self, session_factory):
+        """Test un proceso nuevo no repite el historial"""
+        await DatabaseEventTransport(session_factory, origin="A").publish([TransportTestEvent("o1", 1)])
+        reader = DatabaseEventTransport(session_factory, origin="B")
+        await reader.start()
+        
+        assert await reader.fetch(10) == []
+    
+    @pytest.mark.asyncio
+    async def test_gap_holds_later_events_until_timeout(self, session_factory):
+        """Test un ID sin confirmar detiene la lectura hasta que vence la espera"""
+        reader = DatabaseEventTransport(session_factory, origin="B", gap_timeout_seconds=60)
+        session = session_factory()
+        session.execute(insert(EventLogModel), [{
+            "id": 2, "event_id": "e2", "event_type": "TransportTestEvent", "aggregate_id": "o1",
+            "payload": {"seq": 2}, "occurred_at": datetime.utcnow(), "origin": "A"
+        }])
+        session.commit()
+        session.close()
+        
+        assert await reader.fetch(10) == []
+        
+        reader.gap_timeout_seconds = 0
+        assert [event.seq for event in await reader.fetch(10)] == [2]
+    
+    @pytest.mark.asyncio
+    async def test_relay_delivers_to_local_handlers(self, session_factory):
+        """Test el relay entrega a los handlers del otro worker"""
+        bus_a, _, received_a = _worker(DatabaseEventTransport(session_factory, origin="A"))
+        transport_b = DatabaseEventTransport(session_factory, origin="B")
+        await transport_b.start()
+        _, relay_b, received_b = _worker(transport_b)
+        
+        await bus_a.publish_batch([TransportTestEvent("o1", 1), TransportTestEvent("o2", 1)])
+        
+        assert await relay_b.relay_once() == 2
+        assert received_b == received_a == [("o1", 1), ("o2", 1)]
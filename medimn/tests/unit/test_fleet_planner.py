@@ -0,0 +1,172 @@
+"""
+Tests unitarios para el planificador de flota y PlanFleetRoutesCommandHandler
+"""
+import pytest
+import random
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock
+
+from logistics.application.commands import PlanFleetRoutesCommand
+from logistics.application.handlers import PlanFleetRoutesCommandHandler
+from logistics.domain.entities import Coordinates, DeliveryJob, DispatchOrder, FleetVehicle
+from logistics.infrastructure.adapters import OrderRepositoryDispatchSource
+from logistics.infrastructure.optimization import ProcessPoolFleetPlanner
+
+DEPOT = Coordinates(4.65, -74.05)
+
+
+def _jobs(count: int, seed: int = 5, demand: int = 5):
+    rng = random.Random(seed)
+    return [
+        DeliveryJob(Coordinates(4.55 + rng.random() * 0.2, -74.15 + rng.random() * 0.2), demand)
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.unit
+class TestProcessPoolFleetPlanner:
+    """Tests para ProcessPoolFleetPlanner"""
+    
+    def test_respects_capacity_and_assigns_every_job(self):
+        """Test ninguna ruta supera la capacidad de su vehículo"""
+        vehicles = [FleetVehicle("v1", 25), FleetVehicle("v2", 25), FleetVehicle("v3", 25)]
+        
+        plan = ProcessPoolFleetPlanner(max_workers=1).plan(DEPOT, _jobs(12), vehicles, time_budget_seconds=0.2)
+        
+        assert plan.unassigned == []
+        assert sorted(index for tour in plan.tours for index in tour.sequence) == list(range(12))
+        assert all(len(tour.sequence) * 5 <= 25 for tour in plan.tours)
+        assert plan.distance_km == pytest.approx(sum(tour.distance_km for tour in plan.tours))
+    
+    def test_respects_time_windows_and_leaves_impossible_jobs_unassigned(self):
+        """Test las entregas se atienden dentro de su ventana; las imposibles quedan sin asignar"""
+        jobs = [
+            DeliveryJob(job.location, job.demand, earliest_minutes=60 * (index % 4), latest_minutes=60 * (index % 4) + 90)
+            for index, job in enumerate(_jobs(8))
+        ]
+        # A más de 100 km del depósito: imposible llegar en 10 minutos
+        jobs.append(DeliveryJob(Coordinates(5.6, -74.05), 1, latest_minutes=10))
+        
+        plan = ProcessPoolFleetPlanner(max_workers=1).plan(
+            DEPOT, jobs, [FleetVehicle("v1", 100), FleetVehicle("v2", 100, "motorcycle")], time_budget_seconds=0.2
+        )
+        
+        assert plan.unassigned == [8]
+        for tour in plan.tours:
+            for index, start in zip(tour.sequence, tour.service_start_minutes):
+                assert jobs[index].earliest_minutes <= start <= jobs[index].latest_minutes
+            assert tour.duration_minutes <= 600
+    
+    def test_process_pool_candidates(self):
+        """Test con varios procesos el plan es válido y no peor que la construcción inicial"""
+        jobs = _jobs(40, seed=9, demand=3)
+        vehicles = [FleetVehicle(f"v{index}", 30) for index in range(5)]
+        initial = ProcessPoolFleetPlanner(max_workers=1).plan(DEPOT, jobs, vehicles, time_budget_seconds=0)
+        
+        planner = ProcessPoolFleetPlanner(max_workers=2)
+        try:
+            plan = planner.plan(DEPOT, jobs, vehicles, time_budget_seconds=0.5)
+        finally:
+            planner.shutdown()
+        
+        assert plan.unassigned == []
+        assert sorted(index for tour in plan.tours for index in tour.sequence) == list(range(40))
+        assert plan.distance_km <= initial.distance_km + 1e-6
+
+
+@pytest.mark.unit
+class TestPlanFleetRoutesCommandHandler:
+    """Tests para PlanFleetRoutesCommandHandler"""
+    
+    @pytest.mark.asyncio
+    async def test_plans_routes_for_the_shift_day(self):
+        """Test crea una ruta por vehículo usado con ETA dentro de la ventana de cada orden"""
+        shift_start = datetime(2026, 3, 2, 8, 0)
+        window_start = shift_start + timedelta(hours=1)
+        orders = [
+            DispatchOrder("order-1", 10, window_start, window_start + timedelta(minutes=120)),
+            DispatchOrder("order-2", 10),
+            DispatchOrder("order-3", 10),
+            DispatchOrder("order-no-coords", 1),
+            DispatchOrder("order-tomorrow", 1, delivery_date=shift_start + timedelta(days=1))
+        ]
+        source = Mock()
+        source.get_confirmed_orders = AsyncMock(return_value=orders)
+        source.assign_routes = AsyncMock(return_value=[])
+        repo = Mock()
+        repo.save_all = AsyncMock(side_effect=lambda routes: routes)
+        handler = PlanFleetRoutesCommandHandler(
+            repo, source, ProcessPoolFleetPlanner(max_workers=1), time_budget_seconds=0.1
+        )
+        
+        routes, unassigned = await handler.handle(PlanFleetRoutesCommand(
+            vehicles=[{"vehicleId": "van-1", "capacity": 20, "vehicleType": "van"},
+                      {"vehicleId": "van-2", "capacity": 20, "vehicleType": "van"}],
+            depot=DEPOT.to_dict(),
+            locations=[
+                {"orderId": f"order-{index}", "lat": 4.6 + 0.01 * index, "lon": -74.1}
+                for index in (1, 2, 3)
+            ] + [{"orderId": "order-tomorrow", "lat": 4.6, "lon": -74.1}],
+            shift_start=shift_start
+        ))
+        
+        assert unassigned == ["order-no-coords"]
+        assert {route.vehicle_id for route in routes} == {"van-1", "van-2"}
+        assert sorted(stop.order_id for route in routes for stop in route.stops) == ["order-1", "order-2", "order-3"]
+        stop = next(stop for route in routes for stop in route.stops if stop.order_id == "order-1")
+        assert window_start <= stop.eta.date <= window_start + timedelta(minutes=120)
+        assert stop.eta.window_minutes == 120
+        assert all(route.estimated_distance > 0 for route in routes)
+        repo.save_all.assert_awaited_once()
+        source.assign_routes.assert_awaited_once_with({
+            stop.order_id: str(route.id) for route in routes for stop in route.stops
+        })
+    
+    @pytest.mark.asyncio
+    async def test_does_not_save_plan_when_an_order_was_taken(self):
+        """Test si otra planificación tomó una orden no se guarda ninguna ruta"""
+        source = Mock()
+        source.get_confirmed_orders = AsyncMock(return_value=[DispatchOrder("order-1", 5), DispatchOrder("order-2", 5)])
+        source.assign_routes = AsyncMock(return_value=["order-2"])
+        repo = Mock()
+        repo.save_all = AsyncMock()
+        handler = PlanFleetRoutesCommandHandler(
+            repo, source, ProcessPoolFleetPlanner(max_workers=1), time_budget_seconds=0.1
+        )
+        
+        with pytest.raises(ValueError, match="order-2"):
+            await handler.handle(PlanFleetRoutesCommand(
+                vehicles=[{"vehicleId": "van-1", "capacity": 20}],
+                depot=DEPOT.to_dict(),
+                locations=[{"orderId": "order-1", "lat": 4.6, "lon": -74.1},
+                           {"orderId": "order-2", "lat": 4.61, "lon": -74.1}]
+            ))
+        
+        repo.save_all.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_rejects_vehicle_without_capacity(self):
+        """Test la capacidad debe ser positiva"""
+        handler = PlanFleetRoutesCommandHandler(Mock(), Mock(), ProcessPoolFleetPlanner(max_workers=1))
+        
+        with pytest.raises(ValueError, match="capacidad"):
+            await handler.handle(PlanFleetRoutesCommand(
+                vehicles=[{"vehicleId": "van-1", "capacity": 0}], depot=DEPOT.to_dict(), locations=[]
+            ))
+    
+    @pytest.mark.asyncio
+    async def test_dispatch_source_skips_orders_with_route(self):
+        """Test el adaptador toma las órdenes confirmadas sin ruta y suma sus unidades"""
+        eta = Mock(date=datetime(2026, 3, 2, 9, 0), window_minutes=30)
+        pending = Mock(id="order-1", items=[Mock(qty=2), Mock(qty=3)], eta=eta, delivery_date=None,
+                       delivery_address="Calle 100 # 15-20", route_id=None)
+        routed = Mock(id="order-2", items=[Mock(qty=1)], eta=None, delivery_date=None,
+                      delivery_address=None, route_id="route-1")
+        repo = Mock()
+        repo.find_by_status = AsyncMock(return_value=[pending, routed])
+        
+        orders = await OrderRepositoryDispatchSource(repo).get_confirmed_orders()
+        
+        assert orders == [
+            DispatchOrder("order-1", 5, eta.date, datetime(2026, 3, 2, 9, 30), delivery_address="Calle 100 # 15-20")
+        ]
@@ -0,0 +1,130 @@
+"""
+Tests unitarios para la geocodificación offline
+"""
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, Mock
+from sqlalchemy.orm import Session
+
+from logistics.application.commands import PlanFleetRoutesCommand
+from logistics.application.handlers import PlanFleetRoutesCommandHandler
+from logistics.domain.entities import Coordinates, DispatchOrder, GeocodedAddress
+from logistics.infrastructure.geocoding import CachedGazetteerGeocoder, Gazetteer, normalize_address
+from logistics.infrastructure.optimization import ProcessPoolFleetPlanner
+from logistics.infrastructure.repositories import GeocodeCacheModel, SQLAlchemyGeocodeCache
+
+
+@pytest.fixture
+def gazetteer_file(tmp_path):
+    """Gazetteer CSV con dos direcciones y una calle"""
+    path = tmp_path / "gazetteer.csv"
+    path.write_text(
+        "address,lat,lon\n"
+        "Calle 100 # 15-20,4.6853,-74.0512\n"
+        "Carrera 7 No. 32-16,4.6186,-74.0690\n"
+        "Avenida Boyacá,4.6700,-74.1100\n",
+        encoding="utf-8"
+    )
+    return str(path)
+
+
+@pytest.mark.unit
+class TestNormalizeAddress:
+    """Tests para normalize_address"""
+    
+    def test_equivalent_spellings_share_key(self):
+        """Test abreviaturas, tildes, # y espacios no cambian la clave"""
+        keys = {
+            normalize_address(address)
+            for address in ("Calle 100 # 15-20", "CL 100 No. 15 - 20", "cll100#15-20", "Clle. 100 N° 15-20")
+        }
+        
+        assert keys == {"calle 100 15-20"}
+        assert normalize_address("Av. Boyacá") == "avenida boyaca"
+
+
+@pytest.mark.unit
+class TestCachedGazetteerGeocoder:
+    """Tests para CachedGazetteerGeocoder"""
+    
+    @pytest.mark.asyncio
+    async def test_resolves_then_serves_from_cache(self, db_session: Session, gazetteer_file):
+        """Test la primera vez resuelve con el gazetteer y guarda; la segunda sale de la tabla"""
+        geocoder = CachedGazetteerGeocoder(SQLAlchemyGeocodeCache(db_session), Gazetteer(gazetteer_file))
+        
+        first = await geocoder.geocode_many(["CL 100 # 15-20", "Calle 100 15-20", "Calle 999 # 1-1"])
+        
+        assert first["CL 100 # 15-20"].lat == 4.6853
+        assert first["Calle 100 15-20"].lon == -74.0512
+        assert first["Calle 999 # 1-1"] is None
+        assert db_session.query(GeocodeCacheModel).count() == 1
+        
+        # Otro proceso: caché compartida en la tabla, gazetteer sin cargar
+        empty = Gazetteer(entries={})
+        second = await CachedGazetteerGeocoder(SQLAlchemyGeocodeCache(db_session), empty).geocode_many(
+            ["Calle 100 # 15-20"]
+        )
+        assert second["Calle 100 # 15-20"].lat == 4.6853
+        assert geocoder.stats.to_dict() == {
+            "lookups": 3, "cacheHits": 1, "resolved": 1, "unresolved": 1, "hitRate": 0.3333
+        }
+    
+    @pytest.mark.asyncio
+    async def test_partial_match_and_lazy_gazetteer(self, db_session: Session, gazetteer_file):
+        """Test sin la placa resuelve por la calle; con todo en caché no carga el CSV"""
+        cache = SQLAlchemyGeocodeCache(db_session)
+        geocoder = CachedGazetteerGeocoder(cache, Gazetteer(gazetteer_file))
+        
+        await geocoder.geocode_many(["Av. Boyacá # 72-15, Bogotá"])
+        
+        stored = await cache.get_many(["avenida boyaca 72-15 bogota"])
+        assert stored["avenida boyaca 72-15 bogota"].precision == "partial"
+        lazy = Gazetteer(gazetteer_file)
+        await CachedGazetteerGeocoder(cache, lazy).geocode_many(["Av Boyaca 72-15 Bogota"])
+        assert lazy._entries is None
+    
+    @pytest.mark.asyncio
+    async def test_put_many_skips_keys_stored_by_another_worker(self, db_session: Session):
+        """Test una clave ya guardada no impide guardar el resto del lote"""
+        cache = SQLAlchemyGeocodeCache(db_session)
+        await cache.put_many({"calle 1": GeocodedAddress(Coordinates(4.6, -74.1), "exact")})
+        
+        await cache.put_many({
+            "calle 1": GeocodedAddress(Coordinates(0.0, 0.0), "exact"),
+            "calle 2": GeocodedAddress(Coordinates(4.7, -74.0), "exact")
+        })
+        
+        stored = await cache.get_many(["calle 1", "calle 2"])
+        assert stored["calle 1"].coordinates.lat == 4.6
+        assert stored["calle 2"].coordinates.lat == 4.7
+    
+    @pytest.mark.asyncio
+    async def test_fleet_planning_geocodes_delivery_addresses(self):
+        """Test las órdenes sin coordenadas en el comando se ubican por su dirección"""
+        source = Mock()
+        source.get_confirmed_orders = AsyncMock(return_value=[
+            DispatchOrder("order-1", 1, delivery_address="Calle 100 # 15-20"),
+            DispatchOrder("order-2", 1, delivery_address="Calle 999 # 1-1")
+        ])
+        geocoder = Mock()
+        geocoder.geocode_many = AsyncMock(return_value={
+            "Calle 100 # 15-20": Coordinates(4.6853, -74.0512),
+            "Calle 999 # 1-1": None
+        })
+        source.assign_routes = AsyncMock(return_value=[])
+        repo = Mock()
+        repo.save_all = AsyncMock(side_effect=lambda routes: routes)
+        handler = PlanFleetRoutesCommandHandler(
+            repo, source, ProcessPoolFleetPlanner(max_workers=1), time_budget_seconds=0, geocoder=geocoder
+        )
+        
+        routes, unassigned = await handler.handle(PlanFleetRoutesCommand(
+            vehicles=[{"vehicleId": "van-1", "capacity": 10}],
+            depot={"lat": 4.65, "lon": -74.05},
+            locations=[],
+            shift_start=datetime(2026, 3, 2, 8, 0)
+        ))
+        
+        geocoder.geocode_many.assert_awaited_once_with(["Calle 100 # 15-20", "Calle 999 # 1-1"])
+        assert [stop.order_id for stop in routes[0].stops] == ["order-1"]
+        assert unassigned == ["order-2"]
@@ -0,0 +1,185 @@
+"""
+Tests unitarios para el soporte de Idempotency-Key
+"""
+import asyncio
+import json
+import pytest
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+
+from shared.infrastructure.idempotency import (
+    IdempotencyStore,
+    IdempotencyKeyModel,
+    REPLAYED_HEADER,
+    STATUS_PENDING
+)
+
+
+class CountingOperation:
+    """Operación de prueba que cuenta sus ejecuciones"""
+    
+    def __init__(self, delay: float = 0.0, error: Exception = None):
+        self.calls = 0
+        self.delay = delay
+        self.error = error
+    
+    async def __call__(self):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {"id": f"order-{self.calls}"}
+
+
+@pytest.mark.unit
+class TestIdempotencyStore:
+    """Tests para IdempotencyStore"""
+    
+    @pytest.mark.asyncio
+    async def test_without_key_always_executes(self, session_factory):
+        """Test sin clave la operación se ejecuta siempre"""
+        store = IdempotencyStore(session_factory)
+        operation = CountingOperation()
+        
+        first = await store.run("orders", None, {"a": 1}, operation)
+        second = await store.run("orders", None, {"a": 1}, operation)
+        
+        assert operation.calls == 2
+        assert first == {"id": "order-1"}
+        assert second == {"id": "order-2"}
+    
+    @pytest.mark.asyncio
+    async def test_repeated_key_replays_stored_response(self, session_factory):
+        """Test un reintento con la misma clave reproduce la respuesta"""
+        store = IdempotencyStore(session_factory)
+        operation = CountingOperation()
+        
+        first = await store.run("orders", "key-1", {"a": 1}, operation, status_code=201)
+        second = await store.run("orders", "key-1", {"a": 1}, operation, status_code=201)
+        
+        assert operation.calls == 1
+        assert first.status_code == second.status_code == 201
+        assert json.loads(second.body) == {"id": "order-1"}
+        assert second.headers[REPLAYED_HEADER] == "true"
+        assert REPLAYED_HEADER.lower() not in first.headers
+    
+    @pytest.mark.asyncio
+    async def test_keys_are_scoped(self, session_factory):
+        """Test la misma clave en otro endpoint es independiente"""
+        store = IdempotencyStore(session_factory)
+        operation = CountingOperation()
+        
+        await store.run("orders", "key-1", {"a": 1}, operation)
+        await store.run("routes", "key-1", {"a": 1}, operation)
+        
+        assert operation.calls == 2
+    
+    @pytest.mark.asyncio
+    async def test_key_reused_with_different_body(self, session_factory):
+        """Test reutilizar la clave con otro cuerpo es un error"""
+        store = IdempotencyStore(session_factory)
+        await store.run("orders", "key-1", {"a": 1}, CountingOperation())
+        
+        with pytest.raises(HTTPException) as exc_info:
+            await store.run("orders", "key-1", {"a": 2}, CountingOperation())
+        
+        assert exc_info.value.status_code == 422
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_are_coalesced(self, session_factory):
+        """Test peticiones concurrentes con la misma clave ejecutan una sola vez"""
+        store = IdempotencyStore(session_factory)
+        operation = CountingOperation(delay=0.05)
+        
+        responses = await asyncio.gather(*[
+            store.run("orders", "key-1", {"a": 1}, operation, status_code=201)
+            for _ in range(5)
+        ])
+        
+        assert operation.calls == 1
+        assert {json.loads(response.body)["id"] for response in responses} == {"order-1"}
+        assert sum(1 for response in responses if REPLAYED_HEADER.lower() in response.headers) == 4
+    
+    @pytest.mark.asyncio
+    async def test_failure_releases_key(self, session_factory):
+        """Test un fallo libera la clave para reintentar"""
+        store = IdempotencyStore(session_factory)
+        failing = CountingOperation(error=HTTPException(status_code=400, detail="inválida"))
+        
+        with pytest.raises(HTTPException):
+            await store.run("orders", "key-1", {"a": 1}, failing)
+        
+        operation = CountingOperation()
+        response = await store.run("orders", "key-1", {"a": 1}, operation)
+        assert operation.calls == 1
+        assert json.loads(response.body) == {"id": "order-1"}
+    
+    @pytest.mark.asyncio
+    async def test_pending_key_from_other_worker_conflicts(self, session_factory):
+        """Test una clave en curso en otro worker responde 409"""
+        session = session_factory()
+        now = datetime.utcnow()
+        session.add(IdempotencyKeyModel(
+            scope="orders",
+            key="key-1",
+            request_hash="x",
+            status=STATUS_PENDING,
+            created_at=now,
+            expires_at=now + timedelta(hours=1),
+            locked_until=now + timedelta(seconds=30)
+        ))
+        session.commit()
+        session.close()
+        
+        with pytest.raises(HTTPException) as exc_info:
+            await IdempotencyStore(session_factory).run("orders", "key-1", {"a": 1}, CountingOperation())
+        
+        assert exc_info.value.status_code == 409
+    
+    @pytest.mark.asyncio
+    async def test_pending_key_with_expired_lease_is_taken_over(self, session_factory):
+        """Test una clave PENDING de un worker caído se retoma al vencer su concesión"""
+        session = session_factory()
+        now = datetime.utcnow()
+        session.add(IdempotencyKeyModel(
+            scope="orders",
+            key="key-1",
+            request_hash="x",
+            status=STATUS_PENDING,
+            created_at=now - timedelta(minutes=5),
+            expires_at=now + timedelta(hours=1),
+            locked_until=now - timedelta(seconds=1)
+        ))
+        session.commit()
+        session.close()
+        store = IdempotencyStore(session_factory)
+        operation = CountingOperation()
+        
+        first = await store.run("orders", "key-1", {"a": 1}, operation)
+        second = await store.run("orders", "key-1", {"a": 1}, operation)
+        
+        assert operation.calls == 1
+        assert json.loads(first.body) == json.loads(second.body) == {"id": "order-1"}
+        assert second.headers[REPLAYED_HEADER] == "true"
+    
+    @pytest.mark.asyncio
+    async def test_expired_keys_are_reused_and_purged(self, session_factory):
+        """Test las claves expiradas se pueden reutilizar y se purgan"""
+        store = IdempotencyStore(session_factory, ttl=timedelta(seconds=-1))
+        operation = CountingOperation()
+        
+        await store.run("orders", "key-1", {"a": 1}, operation)
+        await store.run("orders", "key-1", {"a": 1}, operation)
+        await store.run("orders", "key-2", {"a": 1}, operation)
+        
+        assert operation.calls == 3
+        assert store.purge_expired() == 2
+    
+    @pytest.mark.asyncio
+    async def test_key_too_long(self, session_factory):
+        """Test clave demasiado larga"""
+        with pytest.raises(HTTPException) as exc_info:
+            await IdempotencyStore(session_factory).run("orders", "k" * 300, {}, CountingOperation())
+        
+        assert exc_info.value.status_code == 400
@@ -2,9 +2,50 @@
 Tests unitarios para Infrastructure Database
 """
 import pytest
-from sqlalchemy import create_engine, Column, String
+from datetime import datetime
+from uuid import uuid4
+from sqlalchemy import create_engine, inspect, text, Column, String
 from sqlalchemy.orm import sessionmaker
-from infrastructure.database import Base, get_db, create_tables, SessionLocal
+from sqlalchemy.pool import NullPool
+from infrastructure.database import Base, get_db, create_tables, SessionLocal, engine, streaming_engine
+
+from shared.domain.value_objects import EntityId, Money
+from product.domain.entities import Product
+from product.domain.value_objects import ProductName, Stock
+from product.infrastructure.repositories import SQLAlchemyProductRepository
+from order.infrastructure.repositories import SQLAlchemyOrderRepository
+from logistics.infrastructure.repositories import SQLAlchemyLogisticsRepository
+
+# Esquema con el que se crearon las tablas antes de las migraciones de arranque
+BASELINE_SCHEMA = [
+    """
+    CREATE TABLE products (
+        id VARCHAR NOT NULL PRIMARY KEY, name VARCHAR NOT NULL, description TEXT,
+        price FLOAT NOT NULL, stock INTEGER, expiry DATETIME, lot VARCHAR, warehouse VARCHAR,
+        supplier VARCHAR, category VARCHAR, batches JSON, vendor_id VARCHAR, is_active BOOLEAN,
+        created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE orders (
+        id VARCHAR NOT NULL PRIMARY KEY, order_number VARCHAR, items JSON, status VARCHAR,
+        total FLOAT, reservations JSON, eta JSON, client_id VARCHAR, vendor_id VARCHAR,
+        delivery_address VARCHAR, delivery_date DATETIME, contact_name VARCHAR, contact_phone VARCHAR,
+        notes VARCHAR, route_id VARCHAR, return_requested VARCHAR, return_reason VARCHAR,
+        return_status VARCHAR, created_at DATETIME, updated_at DATETIME
+    )
+    """,
+    "CREATE UNIQUE INDEX ix_orders_order_number ON orders (order_number)",
+    """
+    CREATE TABLE routes (
+        id VARCHAR NOT NULL PRIMARY KEY, route_number VARCHAR, vendor_id VARCHAR, vehicle_id VARCHAR,
+        vehicle_type VARCHAR, driver_name VARCHAR, driver_phone VARCHAR, status VARCHAR(11) NOT NULL,
+        stops_json TEXT NOT NULL, start_time DATETIME, end_time DATETIME, estimated_distance FLOAT,
+        estimated_duration INTEGER, estimated_fuel FLOAT, actual_distance FLOAT, actual_duration INTEGER,
+        actual_fuel FLOAT, progress FLOAT, created_at DATETIME NOT NULL, updated_at DATETIME NOT NULL
+    )
+    """,
+]
 
 
 @pytest.mark.unit
@@ -44,3 +85,83 @@ class TestDatabase:
         result = db_session.execute(text("SELECT 1"))
         assert result.scalar() == 1
 
+    
+    def test_streaming_engine_has_its_own_connections(self):
+        """Test las exportaciones no comparten la conexión única de StaticPool"""
+        assert streaming_engine is not engine
+        assert isinstance(streaming_engine.pool, NullPool)
+
+
+@pytest.mark.unit
+class TestStartupMigrations:
+    """Tests de arranque sobre una base de datos creada con el esquema original"""
+    
+    @pytest.fixture
+    def baseline_engine(self, tmp_path):
+        """Base de datos en archivo con el esquema original y datos previos"""
+        engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+        now = datetime.utcnow()
+        with engine.begin() as conn:
+            for ddl in BASELINE_SCHEMA:
+                conn.execute(text(ddl))
+            conn.execute(
+                text(
+                    "INSERT INTO products (id, name, price, stock, is_active, created_at, updated_at) "
+                    "VALUES ('P1', 'Gasas', 12.34, 5, 1, :now, :now)"
+                ),
+                {"now": now}
+            )
+            conn.execute(
+                text(
+                    "INSERT INTO orders (id, order_number, items, status, total, created_at, updated_at) "
+                    "VALUES ('O1', 'ORD-1', :items, 'PLACED', 24.68, :now, :now)"
+                ),
+                {"items": '[{"skuId": "P1", "qty": 2, "price": 12.34}]', "now": now}
+            )
+            conn.execute(
+                text(
+                    "INSERT INTO routes (id, route_number, status, stops_json, created_at, updated_at) "
+                    "VALUES ('R1', 'RT-1', 'PLANNED', :stops, :now, :now)"
+                ),
+                {"stops": '[{"orderId": "O1", "priority": 1}]', "now": now}
+            )
+        yield engine
+        engine.dispose()
+    
+    @pytest.mark.asyncio
+    async def test_app_boots_on_baseline_schema(self, baseline_engine):
+        """Test create_tables migra las tablas existentes y es idempotente"""
+        create_tables(baseline_engine)
+        create_tables(baseline_engine)
+        
+        product_columns = {column["name"] for column in inspect(baseline_engine).get_columns("products")}
+        order_columns = {column["name"] for column in inspect(baseline_engine).get_columns("orders")}
+        assert {"price_minor", "currency", "reserved"} <= product_columns
+        assert "price" not in product_columns
+        assert {"total_minor", "currency", "change_seq"} <= order_columns
+        assert "total" not in order_columns
+        
+        session = sessionmaker(bind=baseline_engine)()
+        try:
+            products = SQLAlchemyProductRepository(session)
+            assert [(str(product.id), product.price.amount) for product in await products.find_all()] == [("P1", 12.34)]
+            await products.save(Product.create(
+                product_id=EntityId(str(uuid4())),
+                name=ProductName("Jeringas"),
+                price=Money(3.5),
+                stock=Stock(10)
+            ))
+            assert len(await products.find_all()) == 2
+            
+            orders = SQLAlchemyOrderRepository(session)
+            (order,) = await orders.find_all()
+            assert session.execute(text("SELECT total_minor FROM orders")).scalar() == 2468
+            assert [(item.sku_id, item.qty, item.price_minor) for item in order.items] == [("P1", 2, 1234)]
+            changes, _, _ = await orders.get_changes(since=0)
+            assert [change["order_id"] for change in changes] == ["O1"]
+            
+            assert session.execute(text("SELECT stops_json FROM routes")).scalar() == "[]"
+            routes = SQLAlchemyLogisticsRepository(session)
+            assert [str(route.id) for route in await routes.find_by_order_id("O1")] == ["R1"]
+        finally:
+            session.close()
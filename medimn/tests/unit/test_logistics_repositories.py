@@ -0,0 +1,142 @@
+"""
+Tests unitarios para el repositorio de rutas
+"""
+import pytest
+from datetime import datetime, timedelta
+from json import dumps
+from uuid import uuid4
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from logistics.application.handlers import GetRoutesByOrderQueryHandler
+from logistics.application.queries import GetRoutesByOrderQuery
+from logistics.domain.entities import ETA, Coordinates, Route, RouteStatus, Stop
+from logistics.infrastructure.repositories import RouteModel, RouteStopModel, SQLAlchemyLogisticsRepository
+from shared.domain.value_objects import EntityId
+
+START = datetime(2026, 3, 2, 8, 0)
+
+
+def _route(*order_ids, **kwargs) -> Route:
+    return Route.create(
+        stops=[
+            Stop(order_id, ETA(START + timedelta(hours=index), 30), index + 1, Coordinates(4.6 + 0.01 * index, -74.1))
+            for index, order_id in enumerate(order_ids)
+        ],
+        **kwargs
+    )
+
+
+@pytest.mark.unit
+class TestSQLAlchemyLogisticsRepository:
+    """Tests para SQLAlchemyLogisticsRepository"""
+    
+    @pytest.mark.asyncio
+    async def test_save_persists_stops_in_child_table(self, db_session: Session):
+        """Test guardar ruta escribe una fila por parada y al actualizar las reemplaza"""
+        repo = SQLAlchemyLogisticsRepository(db_session)
+        route = await repo.save(_route("order-1", "order-2", "order-3"))
+        route.stops.pop(0)
+        route.start_route("van-1")
+        route.complete_stop("order-2", START)
+        
+        await repo.save(route)
+        
+        rows = db_session.query(RouteStopModel).order_by(RouteStopModel.sequence).all()
+        stored = await repo.find_by_id(route.id)
+        assert [(row.sequence, row.order_id) for row in rows] == [(0, "order-2"), (1, "order-3")]
+        assert [stop.order_id for stop in stored.stops] == ["order-2", "order-3"]
+        assert stored.stops[0].completed_at == START
+        assert stored.stops[1].eta.date == START + timedelta(hours=2)
+        assert stored.stops[1].location.lat == pytest.approx(4.62)
+    
+    @pytest.mark.asyncio
+    async def test_find_all_loads_stops_in_one_query(self, db_session: Session):
+        """Test listar rutas carga las paradas con una sola consulta"""
+        repo = SQLAlchemyLogisticsRepository(db_session)
+        for index in range(5):
+            await repo.save(_route(f"order-{index}", "order-x"))
+        
+        statements = []
+        
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            routes = await repo.find_all()
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+        
+        assert len(routes) == 5
+        assert all(len(route.stops) == 2 for route in routes)
+        assert len([s for s in statements if "FROM route_stops" in s]) == 1
+    
+    @pytest.mark.asyncio
+    async def test_find_by_order_id_uses_stops_table(self, db_session: Session):
+        """Test buscar las rutas de una orden, la más reciente primero"""
+        repo = SQLAlchemyLogisticsRepository(db_session)
+        first = _route("order-1", "order-2")
+        await repo.save(first)
+        second = await repo.save(_route("order-3", "order-1"))
+        await repo.save(_route("order-4"))
+        db_session.query(RouteModel).filter(RouteModel.id == str(second.id)).update(
+            {"created_at": first.created_at + timedelta(minutes=1)}
+        )
+        db_session.commit()
+        
+        routes = await GetRoutesByOrderQueryHandler(repo).handle(GetRoutesByOrderQuery(order_id="order-1"))
+        
+        assert [route.id for route in routes] == [second.id, first.id]
+        assert await repo.find_by_order_id("order-9") == []
+        assert await repo.delete(first.id) is True
+        assert db_session.query(RouteStopModel).filter(RouteStopModel.route_id == str(first.id)).count() == 0
+    
+    @pytest.mark.asyncio
+    async def test_backfill_moves_legacy_json_stops_to_child_table(self, db_session: Session):
+        """Test la migración de arranque pasa las paradas JSON a route_stops por bloques"""
+        repo = SQLAlchemyLogisticsRepository(db_session)
+        for number in range(3):
+            db_session.add(RouteModel(
+                id=f"legacy-{number}",
+                route_number=f"RT-LEGACY-{number}",
+                status=RouteStatus.PLANNED,
+                stops_json=dumps([{"orderId": f"order-{number}", "priority": 1, "location": {"lat": 4.6, "lon": -74.1}}]),
+                created_at=START,
+                updated_at=START
+            ))
+        db_session.add(RouteModel(
+            id="legacy-broken", route_number="RT-LEGACY-X", status=RouteStatus.PLANNED,
+            stops_json="{no json", created_at=START, updated_at=START
+        ))
+        db_session.commit()
+        
+        assert repo.backfill_legacy_stops(batch_size=2) == 3
+        assert repo.backfill_legacy_stops(batch_size=2) == 0
+        
+        assert db_session.query(RouteStopModel).count() == 3
+        assert db_session.query(RouteModel).filter(RouteModel.stops_json == "[]").count() == 3
+        (route,) = await repo.find_by_order_id("order-1")
+        assert (str(route.id), route.stops[0].location.lat) == ("legacy-1", 4.6)
+    
+    @pytest.mark.asyncio
+    async def test_reads_legacy_json_stops(self, db_session: Session):
+        """Test leer rutas antiguas con las paradas en la columna JSON y moverlas al guardar"""
+        repo = SQLAlchemyLogisticsRepository(db_session)
+        route_id = str(uuid4())
+        db_session.add(RouteModel(
+            id=route_id,
+            route_number="RT-LEGACY-1",
+            status=RouteStatus.PLANNED,
+            stops_json=dumps([{"orderId": "order-old", "priority": 2, "eta": {"date": START.isoformat(), "windowMinutes": 15}}]),
+            created_at=START,
+            updated_at=START
+        ))
+        db_session.commit()
+        
+        route = await repo.find_by_id(EntityId(route_id))
+        await repo.save(route)
+        
+        assert [(stop.order_id, stop.priority, stop.eta.window_minutes) for stop in route.stops] == [("order-old", 2, 15)]
+        assert [found.id for found in await repo.find_by_order_id("order-old")] == [route.id]
@@ -0,0 +1,148 @@
+"""
+Tests unitarios para la asignación de números de orden y ruta
+"""
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import create_engine, event, insert
+
+from infrastructure.database import Base
+from shared.domain.numbering import (
+    LocalNumberAllocator,
+    get_number_allocator,
+    set_number_allocator,
+    next_number
+)
+from shared.infrastructure.number_allocator import HiLoNumberAllocator
+from order.domain.entities import Order, OrderItem
+from order.infrastructure.repositories import OrderModel
+from logistics.domain.entities import Route, Stop
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    """Base de datos SQLite en archivo compartida por varios 'workers'"""
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'numbers.db'}",
+        connect_args={"check_same_thread": False, "timeout": 30}
+    )
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def allocator():
+    """Restaurar el asignador global al terminar el test"""
+    previous = get_number_allocator()
+    yield
+    set_number_allocator(previous)
+
+
+@pytest.mark.unit
+class TestLocalNumberAllocator:
+    """Tests para LocalNumberAllocator"""
+    
+    def test_values_are_increasing_per_sequence(self):
+        """Test valores crecientes e independientes por secuencia"""
+        local = LocalNumberAllocator()
+        
+        first, second = local.next_value("ORD"), local.next_value("ORD")
+        
+        assert second == first + 1
+        assert local.next_value("R") > 0
+    
+    def test_next_number_format(self, allocator):
+        """Test formato PREFIJO-fecha-secuencia"""
+        set_number_allocator(LocalNumberAllocator())
+        
+        number = next_number("ORD")
+        
+        prefix, date, value = number.split("-")
+        assert prefix == "ORD"
+        assert len(date) == 8
+        assert value.isdigit()
+
+
+@pytest.mark.unit
+class TestHiLoNumberAllocator:
+    """Tests para HiLoNumberAllocator"""
+    
+    def test_reserves_one_block_per_block_size(self, db_engine):
+        """Test solo consulta la base de datos al agotar un bloque"""
+        hilo = HiLoNumberAllocator(db_engine, block_size=100)
+        statements = []
+        
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("UPDATE"):
+                statements.append(statement)
+        
+        event.listen(db_engine, "before_cursor_execute", _count)
+        try:
+            values = [hilo.next_value("ORD") for _ in range(250)]
+        finally:
+            event.remove(db_engine, "before_cursor_execute", _count)
+        
+        assert values == list(range(1, 251))
+        assert len(statements) == 3
+    
+    def test_workers_get_disjoint_blocks(self, db_engine):
+        """Test dos workers sobre la misma base de datos no repiten valores"""
+        worker_a = HiLoNumberAllocator(db_engine, block_size=10)
+        worker_b = HiLoNumberAllocator(db_engine, block_size=10)
+        
+        values_a = [worker_a.next_value("ORD") for _ in range(25)]
+        values_b = [worker_b.next_value("ORD") for _ in range(25)]
+        
+        assert not set(values_a) & set(values_b)
+        assert worker_a.next_value("R") != worker_b.next_value("R")
+    
+    def test_invalid_block_size(self, db_engine):
+        """Test tamaño de bloque inválido"""
+        with pytest.raises(ValueError):
+            HiLoNumberAllocator(db_engine, block_size=0)
+    
+    def test_entities_use_configured_allocator(self, db_engine, allocator):
+        """Test órdenes y rutas toman su número del asignador configurado"""
+        set_number_allocator(HiLoNumberAllocator(db_engine))
+        
+        order = Order.create(items=[OrderItem(sku_id="SKU-1", qty=1, price=1.0)])
+        route = Route.create(stops=[Stop(order_id="o1")])
+        
+        assert order.order_number.startswith("ORD-")
+        assert order.order_number.endswith("-000001")
+        assert route.route_number.endswith("-000001")
+    
+    @pytest.mark.slow
+    def test_100k_concurrent_orders_have_unique_numbers(self, db_engine, allocator):
+        """Test 100k órdenes creadas en 8 hilos mientras otros workers reservan bloques"""
+        set_number_allocator(HiLoNumberAllocator(db_engine, block_size=200))
+        other_workers = [HiLoNumberAllocator(db_engine, block_size=200) for _ in range(3)]
+        
+        def _create_orders(count: int):
+            return [
+                Order.create(items=[OrderItem(sku_id="SKU-1", qty=1, price=1.0)]).order_number
+                for _ in range(count)
+            ]
+        
+        def _other_worker(worker: HiLoNumberAllocator):
+            return [worker.next_value("ORD") for _ in range(10_000)]
+        
+        with ThreadPoolExecutor(max_workers=11) as pool:
+            order_futures = [pool.submit(_create_orders, 12_500) for _ in range(8)]
+            other_futures = [pool.submit(_other_worker, worker) for worker in other_workers]
+            numbers = [number for future in order_futures for number in future.result()]
+            other_values = {value for future in other_futures for value in future.result()}
+        
+        assert len(numbers) == 100_000
+        assert len(set(numbers)) == 100_000
+        order_values = {int(number.rsplit("-", 1)[1]) for number in numbers}
+        assert len(other_values) == 30_000
+        assert not order_values & other_values
+        
+        # El índice único de order_number acepta todas las órdenes
+        with db_engine.begin() as conn:
+            conn.execute(
+                insert(OrderModel.__table__),
+                [{"id": str(index), "order_number": number, "status": "PLACED", "total_minor": 100}
+                 for index, number in enumerate(numbers)]
+            )
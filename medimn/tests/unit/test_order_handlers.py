@@ -4,10 +4,33 @@ Tests unitarios para Order Handlers
 import pytest
 from unittest.mock import AsyncMock, Mock
 from uuid import uuid4
+from sqlalchemy.orm import Session
 
-from order.application.handlers import CreateOrderCommandHandler
-from order.application.commands import CreateOrderCommand
+from order.application.handlers import (
+    CreateOrderCommandHandler,
+    BulkCreateOrdersCommandHandler,
+    BulkOrderTransitionCommandHandler,
+    MarkOrderPickedCommandHandler,
+    GetOrdersBySkuQueryHandler,
+    GetSkuSalesQueryHandler,
+    GetOrderChangesQueryHandler,
+    ExportOrdersQueryHandler
+)
+from order.application.commands import (
+    CreateOrderCommand,
+    BulkCreateOrdersCommand,
+    BulkMarkOrdersPickedCommand,
+    BulkMarkOrdersShippedCommand,
+    BulkCancelOrdersCommand,
+    MarkOrderPickedCommand
+)
+from order.application.queries import (
+    GetOrdersBySkuQuery, GetSkuSalesQuery, GetOrderChangesQuery, ExportOrdersQuery
+)
+from order.domain.entities import Order, OrderItem, OrderStatus, OPEN_ORDER_STATUSES
+from order.infrastructure.repositories import SQLAlchemyOrderRepository
 from shared.domain.value_objects import EntityId, Money
+from shared.infrastructure.outbox import OutboxEventModel
 
 
 @pytest.mark.unit
@@ -69,3 +92,278 @@ class TestCreateOrderCommandHandler:
             # Es válido que falle si Order.create valida items vacíos
             pass
 
+
+@pytest.mark.unit
+class TestBulkCreateOrdersCommandHandler:
+    """Tests para BulkCreateOrdersCommandHandler"""
+    
+    @staticmethod
+    def _command(*sku_ids):
+        return CreateOrderCommand(
+            items=[{"skuId": sku_id, "qty": 1, "price": 10.0} for sku_id in sku_ids]
+        )
+    
+    @pytest.mark.asyncio
+    async def test_bulk_create_validates_once_and_saves_once(self):
+        """Test una consulta al catálogo, un guardado y resultado por orden"""
+        mock_repo = Mock()
+        mock_repo.save_all = AsyncMock(side_effect=lambda orders: orders)
+        adapter = Mock()
+        adapter.get_available_skus = AsyncMock(return_value={"SKU-1": "USD", "SKU-2": "USD"})
+        handler = BulkCreateOrdersCommandHandler(mock_repo, adapter)
+        
+        results = await handler.handle(BulkCreateOrdersCommand(orders=[
+            self._command("SKU-1", "SKU-2"),
+            self._command("SKU-1", "SKU-9"),
+            self._command(),
+            self._command("SKU-2")
+        ]))
+        
+        adapter.get_available_skus.assert_awaited_once_with(["SKU-1", "SKU-2", "SKU-9"])
+        mock_repo.save_all.assert_awaited_once()
+        assert len(mock_repo.save_all.await_args.args[0]) == 2
+        assert [result.success for result in results] == [True, False, False, True]
+        assert "SKU-9" in results[1].error
+        assert results[2].error
+        # Cada orden llega al repositorio con su evento de creación para el outbox
+        saved = mock_repo.save_all.await_args.args[0]
+        assert [[type(event).__name__ for event in order.get_domain_events()] for order in saved] == [
+            ["OrderCreatedEvent"], ["OrderCreatedEvent"]
+        ]
+    
+    @pytest.mark.asyncio
+    async def test_bulk_create_takes_currency_from_products(self):
+        """Test cada artículo toma la moneda de su producto y no se mezclan monedas en una orden"""
+        mock_repo = Mock()
+        mock_repo.save_all = AsyncMock(side_effect=lambda orders: orders)
+        adapter = Mock()
+        adapter.get_available_skus = AsyncMock(return_value={"SKU-1": "USD", "SKU-CL": "CLP"})
+        handler = BulkCreateOrdersCommandHandler(mock_repo, adapter)
+        
+        results = await handler.handle(BulkCreateOrdersCommand(orders=[
+            CreateOrderCommand(items=[{"skuId": "SKU-CL", "qty": 2, "price": 1500}]),
+            self._command("SKU-1", "SKU-CL")
+        ]))
+        
+        assert results[0].order.currency == "CLP"
+        assert results[0].order.items[0].price_minor == 1500
+        assert "misma moneda" in results[1].error
+    
+    @pytest.mark.asyncio
+    async def test_bulk_create_without_valid_orders_does_not_save(self):
+        """Test lote sin órdenes válidas no abre transacción"""
+        mock_repo = Mock()
+        mock_repo.save_all = AsyncMock()
+        adapter = Mock()
+        adapter.get_available_skus = AsyncMock(return_value={})
+        handler = BulkCreateOrdersCommandHandler(mock_repo, adapter)
+        
+        results = await handler.handle(BulkCreateOrdersCommand(orders=[self._command("SKU-1")]))
+        
+        assert not results[0].success
+        mock_repo.save_all.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_bulk_create_catalog_error(self):
+        """Test error al consultar el catálogo rechaza el lote"""
+        adapter = Mock()
+        adapter.get_available_skus = AsyncMock(side_effect=ValueError("sin conexión"))
+        handler = BulkCreateOrdersCommandHandler(Mock(), adapter)
+        
+        with pytest.raises(ValueError, match="Error al validar productos"):
+            await handler.handle(BulkCreateOrdersCommand(orders=[self._command("SKU-1")]))
+
+
+@pytest.mark.unit
+class TestBulkOrderTransitionCommandHandler:
+    """Tests para BulkOrderTransitionCommandHandler"""
+    
+    @pytest.mark.asyncio
+    async def test_ship_wave_reports_rejections_and_emits_events(self):
+        """Test enviar ola: resultado por orden y un evento por orden enviada"""
+        from order.domain.events import OrderShippedEvent
+        
+        mock_repo = Mock()
+        mock_repo.bulk_transition = AsyncMock(return_value=(
+            ["o1", "o3"],
+            {"o2": OrderStatus.CONFIRMED, "o4": None}
+        ))
+        handler = BulkOrderTransitionCommandHandler(mock_repo)
+        
+        results = await handler.handle(BulkMarkOrdersShippedCommand(order_ids=["o1", "o2", "o3", "o4"]))
+        
+        args = mock_repo.bulk_transition.await_args.args
+        assert args[1] == OrderStatus.SHIPPED
+        assert args[2] == frozenset({OrderStatus.PICKED})
+        assert [result.success for result in results] == [True, False, True, False]
+        assert results[1].error == "No se puede pasar de CONFIRMED a SHIPPED"
+        assert "no encontrada" in results[3].error
+        event = mock_repo.bulk_transition.await_args.kwargs["event_factory"]("o1")
+        assert isinstance(event, OrderShippedEvent)
+        assert event.aggregate_id == "o1"
+    
+    @pytest.mark.asyncio
+    async def test_cancel_allowed_from_matches_entity(self):
+        """Test cancelar en lote usa los mismos estados que Order.cancel"""
+        mock_repo = Mock()
+        mock_repo.bulk_transition = AsyncMock(return_value=([], {}))
+        handler = BulkOrderTransitionCommandHandler(mock_repo)
+        
+        await handler.handle(BulkCancelOrdersCommand(order_ids=[]))
+        
+        allowed_from = mock_repo.bulk_transition.await_args.args[2]
+        assert OrderStatus.SHIPPED not in allowed_from
+        assert OrderStatus.DELIVERED not in allowed_from
+        assert OrderStatus.PICKED in allowed_from
+    
+    @pytest.mark.asyncio
+    async def test_single_and_bulk_pick_emit_same_events(self, db_session: Session):
+        """Test recoger una orden o un lote deja el mismo evento por orden en el outbox"""
+        repo = SQLAlchemyOrderRepository(db_session)
+        orders = []
+        for _ in range(2):
+            order = Order.create(items=[OrderItem(sku_id="SKU-1", qty=1, price=1.0)])
+            order.confirm()
+            order.clear_domain_events()
+            orders.append(await repo.save(order))
+        db_session.query(OutboxEventModel).delete()
+        db_session.commit()
+        
+        await MarkOrderPickedCommandHandler(repo).handle(MarkOrderPickedCommand(order_id=str(orders[0].id)))
+        await BulkOrderTransitionCommandHandler(repo).handle(
+            BulkMarkOrdersPickedCommand(order_ids=[str(orders[1].id)])
+        )
+        
+        events = {
+            row.aggregate_id: (row.event_type, row.payload.get("order_id"))
+            for row in db_session.query(OutboxEventModel)
+        }
+        assert events == {
+            str(order.id): ("OrderPickedEvent", str(order.id)) for order in orders
+        }
+    
+    @pytest.mark.asyncio
+    async def test_unsupported_command(self):
+        """Test comando no soportado"""
+        handler = BulkOrderTransitionCommandHandler(Mock())
+        
+        with pytest.raises(ValueError):
+            await handler.handle(BulkCreateOrdersCommand(orders=[]))
+
+
+@pytest.mark.unit
+class TestSkuQueryHandlers:
+    """Tests para las queries por SKU"""
+    
+    @pytest.mark.asyncio
+    async def test_orders_by_sku_defaults_to_open_statuses(self):
+        """Test órdenes por SKU usa estados abiertos por defecto"""
+        mock_repo = Mock()
+        mock_repo.find_by_sku = AsyncMock(return_value=[])
+        
+        handler = GetOrdersBySkuQueryHandler(mock_repo)
+        await handler.handle(GetOrdersBySkuQuery(sku_id="SKU-1"))
+        
+        mock_repo.find_by_sku.assert_called_once_with(
+            "SKU-1", statuses=list(OPEN_ORDER_STATUSES), skip=0, limit=100
+        )
+    
+    @pytest.mark.asyncio
+    async def test_orders_by_sku_with_explicit_statuses(self):
+        """Test órdenes por SKU con estados explícitos"""
+        mock_repo = Mock()
+        mock_repo.find_by_sku = AsyncMock(return_value=[])
+        
+        handler = GetOrdersBySkuQueryHandler(mock_repo)
+        await handler.handle(GetOrdersBySkuQuery(sku_id="SKU-1", statuses=["DELIVERED"]))
+        
+        assert mock_repo.find_by_sku.call_args.kwargs["statuses"] == [OrderStatus.DELIVERED]
+    
+    @pytest.mark.asyncio
+    async def test_sku_sales_rejects_inverted_range(self):
+        """Test ventas por SKU rechaza rangos invertidos"""
+        from datetime import datetime
+        
+        mock_repo = Mock()
+        mock_repo.get_sku_sales = AsyncMock(return_value=[])
+        handler = GetSkuSalesQueryHandler(mock_repo)
+        
+        with pytest.raises(ValueError):
+            await handler.handle(GetSkuSalesQuery(
+                date_from=datetime(2025, 2, 1),
+                date_to=datetime(2025, 1, 1)
+            ))
+        
+        await handler.handle(GetSkuSalesQuery(date_from=datetime(2025, 1, 1)))
+        mock_repo.get_sku_sales.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_order_changes_parses_token(self):
+        """Test feed de cambios valida el token y retorna el siguiente"""
+        mock_repo = Mock()
+        mock_repo.get_changes = AsyncMock(return_value=([], 42, False))
+        handler = GetOrderChangesQueryHandler(mock_repo)
+        
+        with pytest.raises(ValueError, match="Token"):
+            await handler.handle(GetOrderChangesQuery(since="abc"))
+        
+        page = await handler.handle(GetOrderChangesQuery(since="40", client_id="c1"))
+        assert page == {"changes": [], "next_token": "42", "has_more": False}
+        assert mock_repo.get_changes.call_args.kwargs["since"] == 40
+
+
+@pytest.mark.unit
+class TestExportOrdersQueryHandler:
+    """Tests para ExportOrdersQueryHandler"""
+    
+    @staticmethod
+    def _handler(rows):
+        from contextlib import contextmanager
+        from types import SimpleNamespace
+        
+        repo = Mock()
+        repo.iter_export_rows = Mock(return_value=iter([SimpleNamespace(**row) for row in rows]))
+        
+        @contextmanager
+        def _factory():
+            yield repo
+        return ExportOrdersQueryHandler(_factory), repo
+    
+    @staticmethod
+    def _row(order_id, total_minor):
+        from datetime import datetime
+        return {
+            "id": order_id, "order_number": f"ORD-{order_id}", "status": "PLACED", "client_id": "c1",
+            "vendor_id": None, "total_minor": total_minor, "currency": "USD", "route_id": None,
+            "delivery_date": None, "created_at": datetime(2025, 1, 2), "updated_at": datetime(2025, 1, 2)
+        }
+    
+    def test_export_csv_in_chunks(self, monkeypatch):
+        """Test CSV con encabezado, montos exactos y envío por partes"""
+        import order.application.handlers as handlers
+        monkeypatch.setattr(handlers, "EXPORT_CHUNK_ROWS", 2)
+        handler, _ = self._handler([self._row(str(index), 1005) for index in range(3)])
+        
+        chunks = list(handler.handle(ExportOrdersQuery(format="csv")))
+        
+        lines = "".join(chunks).splitlines()
+        assert len(chunks) == 2
+        assert lines[0].startswith("id,orderNumber,status")
+        assert lines[1] == "0,ORD-0,PLACED,c1,,10.05,1005,USD,,,2025-01-02T00:00:00,2025-01-02T00:00:00"
+        assert len(lines) == 4
+    
+    def test_export_ndjson_and_validation(self):
+        """Test NDJSON una línea por orden; formato y estado se validan antes de leer"""
+        import json
+        handler, repo = self._handler([self._row("1", 250)])
+        
+        with pytest.raises(ValueError, match="Formato"):
+            handler.handle(ExportOrdersQuery(format="xml"))
+        with pytest.raises(ValueError):
+            handler.handle(ExportOrdersQuery(statuses=["UNKNOWN"]))
+        repo.iter_export_rows.assert_not_called()
+        
+        lines = "".join(handler.handle(ExportOrdersQuery(format="ndjson", statuses=["PLACED"]))).splitlines()
+        assert [json.loads(line)["total"] for line in lines] == [2.5]
+        assert repo.iter_export_rows.call_args.kwargs["statuses"] == [OrderStatus.PLACED]
+
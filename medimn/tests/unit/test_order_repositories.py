@@ -0,0 +1,456 @@
+"""
+Tests unitarios para Order Repositories
+"""
+import pytest
+from datetime import datetime, timedelta
+from uuid import uuid4
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from order.infrastructure.repositories import (
+    SQLAlchemyOrderRepository,
+    OrderModel,
+    OrderItemModel
+)
+from order.domain.entities import ETA, Order, OrderItem, OrderStatus
+from shared.domain.value_objects import EntityId
+
+
+def _make_order(*items, **kwargs) -> Order:
+    """Crear una orden con artículos (sku, qty, price)"""
+    return Order.create(
+        items=[OrderItem(sku_id=sku, qty=qty, price=price) for sku, qty, price in items],
+        **kwargs
+    )
+
+
+@pytest.mark.unit
+class TestSQLAlchemyOrderRepository:
+    """Tests para SQLAlchemyOrderRepository"""
+    
+    @pytest.mark.asyncio
+    async def test_save_persists_items_in_child_table(self, db_session: Session):
+        """Test guardar orden escribe una fila por artículo"""
+        repo = SQLAlchemyOrderRepository(db_session)
+        order = _make_order(("SKU-1", 2, 10.0), ("SKU-2", 1, 5.5), client_id="client-1")
+        
+        saved = await repo.save(order)
+        
+        rows = db_session.query(OrderItemModel).filter(
+            OrderItemModel.order_id == str(order.id)
+        ).order_by(OrderItemModel.position).all()
+        assert [(row.sku_id, row.qty, row.subtotal_minor) for row in rows] == [
+            ("SKU-1", 2, 2000),
+            ("SKU-2", 1, 550)
+        ]
+        assert [item.sku_id for item in saved.items] == ["SKU-1", "SKU-2"]
+        assert saved.totals["subtotal"] == 25.5
+    
+    @pytest.mark.asyncio
+    async def test_update_replaces_items(self, db_session: Session):
+        """Test actualizar orden reemplaza los artículos"""
+        repo = SQLAlchemyOrderRepository(db_session)
+        order = await repo.save(_make_order(("SKU-1", 2, 10.0)))
+        
+        order.add_item(OrderItem(sku_id="SKU-3", qty=4, price=1.0))
+        order.remove_item("SKU-1")
+        updated = await repo.save(order)
+        
+        assert [(item.sku_id, item.qty) for item in updated.items] == [("SKU-3", 4)]
+        assert db_session.query(OrderItemModel).count() == 1
+    
+    @pytest.mark.asyncio
+    async def test_save_all_inserts_in_one_transaction(self, db_session: Session):
+        """Test guardar en lote hace un solo commit y un solo INSERT de artículos"""
+        repo = SQLAlchemyOrderRepository(db_session)
+        existing = await repo.save(_make_order(("SKU-1", 1, 1.0)))
+        existing.add_item(OrderItem(sku_id="SKU-2", qty=2, price=1.0))
+        orders = [existing] + [_make_order((f"SKU-{index}", index, 1.0)) for index in range(3, 6)]
+        
+        statements = []
+        commits = []
+        
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        def _commit(session):
+            commits.append(session)
+        
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", _count)
+        event.listen(db_session, "after_commit", _commit)
+        try:
+            saved = await repo.save_all(orders)
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+            event.remove(db_session, "after_commit", _commit)
+        
+        assert [str(order.id) for order in saved] == [str(order.id) for order in orders]
+        assert [item.sku_id for item in saved[0].items] == ["SKU-1", "SKU-2"]
+        assert len(commits) == 1
+        assert len([s for s in statements if s.startswith("INSERT INTO order_items")]) == 1
+        assert db_session.query(OrderItemModel).count() == 5
+    
+    @pytest.mark.asyncio
+    async def test_find_all_loads_items_in_one_query(self, db_session: Session):
+        """Test listar órdenes carga los artículos con una sola consulta"""
+        repo = SQLAlchemyOrderRepository(db_session)
+        for index in range(5):
+            await repo.save(_make_order((f"SKU-{index}", 1, 1.0), ("SKU-X", 1, 2.0)))
+        
+        statements = []
+        
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            orders = await repo.find_all()
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+        
+        assert len(orders) == 5
+        assert all(len(order.items) == 2 for order in orders)
+        item_queries = [s for s in statements if "FROM order_items" in s]
+        assert len(item_queries) == 1
+    
+    @pytest.mark.asyncio
+    async def test_find_by_sku_filters_by_status(self, db_session: Session):
+        """Test buscar órdenes abiertas que contienen un SKU"""
+        repo = SQLAlchemyOrderRepository(db_session)
+        open_order = await repo.save(_make_order(("SKU-A", 1, 1.0), ("SKU-B", 3, 1.0)))
+        cancelled = _make_order(("SKU-A", 1, 1.0))
+        cancelled.cancel()
+        await repo.save(cancelled)
+        await repo.save(_make_order(("SKU-B", 1, 1.0)))
+        
+        found = await repo.find_by_sku("SKU-A", statuses=[OrderStatus.PLACED])
+        
+        assert [str(order.id) for order in found] == [str(open_order.id)]
+        assert len(await repo.find_by_sku("SKU-A")) == 2
+    
+    @pytest.mark.asyncio
+    async def test_get_sku_sales_aggregates_in_database(self, db_session: Session):
+        """Test ventas por SKU excluye canceladas y filtra por fecha"""
+        repo = SQLAlchemyOrderRepository(db_session)
+        await repo.save(_make_order(("SKU-A", 2, 10.0), ("SKU-B", 1, 3.0)))
+        await repo.save(_make_order(("SKU-A", 5, 10.0)))
+        cancelled = _make_order(("SKU-A", 100, 10.0))
+        cancelled.cancel()
+        await repo.save(cancelled)
+        
+        old = await repo.save(_make_order(("SKU-B", 7, 3.0)))
+        db_session.query(OrderModel).filter(OrderModel.id == str(old.id)).update(
+            {OrderModel.created_at: datetime.utcnow() - timedelta(days=60)}
+        )
+        db_session.commit()
+        
+        sales = await repo.get_sku_sales(date_from=datetime.utcnow() - timedelta(days=30))
+        
+        assert sales == [
+            {"sku_id": "SKU-A", "currency": "USD", "units": 7, "revenue": 70.0, "revenue_minor": 7000, "orders": 2},
+            {"sku_id": "SKU-B", "currency": "USD", "units": 1, "revenue": 3.0, "revenue_minor": 300, "orders": 1}
+        ]
+        only_b = await repo.get_sku_sales(sku_id="SKU-B")
+        assert only_b[0]["units"] == 8
+    
+    @pytest.mark.asyncio
+    async def test_monthly_revenue_sums_exact_minor_units(self, db_session: Session):
+        """Test ingresos por mes: SUM entero sin error de redondeo de floats"""
+        repo = SQLAlchemyOrderRepository(db_session)
+        for _ in range(10):
+            await repo.save(_make_order(("SKU-A", 1, 0.1)))
+        cancelled = _make_order(("SKU-A", 1, 99.0))
+        cancelled.cancel()
+        await repo.save(cancelled)
+        old = await repo.save(_make_order(("SKU-B", 1, 5.0)))
+        db_session.query(OrderModel).filter(OrderModel.id == str(old.id)).update(
+            {OrderModel.created_at: datetime(2025, 1, 15)}
+        )
+        db_session.commit()
+        
+        report = await repo.get_monthly_revenue()
+        
+        assert report[0] == {"month": "2025-01", "currency": "USD", "orders": 1, "revenue": 5.8, "revenue_minor": 580}
+        # 10 x (0.10 + IVA 0.016 -> 0.02) = 1.20 exacto
+        assert report[1]["month"] == datetime.utcnow().strftime("%Y-%m")
+        assert report[1]["orders"] == 10
+        assert report[1]["revenue_minor"] == 120
+        assert report[1]["revenue"] == 1.2
+    
+    @pytest.mark.asyncio
+    async def test_reports_group_amounts_by_currency(self, db_session: Session):
+        """Test montos de otra moneda se guardan con su escala y no se suman con USD"""
+        repo = SQLAlchemyOrderRepository(db_session)
+        await repo.save(_make_order(("SKU-A", 1, 10.0)))
+        pesos = await repo.save(Order.create(items=[OrderItem("SKU-A", 2, 1500, currency="CLP")]))
+        
+        reloaded = await repo.find_by_id(pesos.id)
+        assert (reloaded.currency, reloaded.items[0].price_minor, reloaded.items[0].price) == ("CLP", 1500, 1500)
+        
+        sales = await repo.get_sku_sales()
+        assert sorted((row["currency"], row["revenue_minor"], row["revenue"]) for row in sales) == [
+            ("CLP", 3000, 3000), ("USD", 1000, 10.0)
+        ]
+        report = await repo.get_monthly_revenue()
+        assert [(row["currency"], row["orders"]) for row in report] == [("CLP", 1), ("USD", 1)]
+        assert report[0]["revenue"] == report[0]["revenue_minor"]
+        changes, _, _ = await repo.get_changes(since=0)
+        assert [change["currency"] for change in changes] == ["USD", "CLP"]
+    
+    @pytest.mark.asyncio
+    async def test_bulk_transition_updates_only_allowed_states(self, db_session: Session):
+        """Test transición en lote valida el estado de origen y reporta rechazos"""
+        repo = SQLAlchemyOrderRepository(db_session)
+        placed = await repo.save(_make_order(("SKU-1", 1, 1.0)))
+        confirmed = _make_order(("SKU-1", 1, 1.0))
+        confirmed.confirm()
+        await repo.save(confirmed)
+        other_placed = await repo.save(_make_order(("SKU-2", 1, 1.0)))
+        missing_id = str(uuid4())
+        
+        updated, rejected = await repo.bulk_transition(
+            [str(placed.id), str(confirmed.id), missing_id, str(other_placed.id), str(placed.id)],
+            OrderStatus.CONFIRMED,
+            frozenset({OrderStatus.PLACED})
+        )
+        
+        assert updated == [str(placed.id), str(other_placed.id)]
+        assert rejected == {str(confirmed.id): OrderStatus.CONFIRMED, missing_id: None}
+        reloaded = await repo.find_by_id(placed.id)
+        assert reloaded.status == OrderStatus.CONFIRMED
+    
+    @pytest.mark.asyncio
+    async def test_assign_routes_is_all_or_nothing(self, db_session: Session):
+        """Test asignar rutas solo toma órdenes CONFIRMED sin ruta y no deja asignaciones a medias"""
+        repo = SQLAlchemyOrderRepository(db_session)
+        free = _make_order(("SKU-1", 1, 1.0))
+        free.confirm()
+        await repo.save(free)
+        placed = await repo.save(_make_order(("SKU-1", 1, 1.0)))
+        
+        conflicts = await repo.assign_routes({str(free.id): "route-1", str(placed.id): "route-1"})
+        
+        assert conflicts == [str(placed.id)]
+        assert (await repo.find_by_id(free.id)).route_id is None
+        
+        _, token, _ = await repo.get_changes(since=0)
+        assert await repo.assign_routes({str(free.id): "route-1"}) == []
+        assert (await repo.find_by_id(free.id)).route_id == "route-1"
+        changes, _, _ = await repo.get_changes(since=token)
+        assert [change["order_id"] for change in changes] == [str(free.id)]
+        assert await repo.assign_routes({str(free.id): "route-2"}) == [str(free.id)]
+    
+    @pytest.mark.asyncio
+    async def test_update_etas_writes_in_one_batch(self, db_session: Session):
+        """Test las ETAs se guardan con un UPDATE por lote y entran al feed de cambios"""
+        repo = SQLAlchemyOrderRepository(db_session)
+        first = await repo.save(_make_order(("SKU-1", 1, 1.0)))
+        second = await repo.save(_make_order(("SKU-1", 1, 1.0)))
+        _, token, _ = await repo.get_changes(since=0)
+        eta_date = datetime(2026, 3, 2, 9, 30)
+        
+        statements = []
+        
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            updated = await repo.update_etas({
+                str(first.id): ETA(eta_date, 30),
+                str(second.id): ETA(eta_date, 0),
+                str(uuid4()): ETA(eta_date, 0)
+            })
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+        
+        assert updated == 2
+        assert len([statement for statement in statements if statement.startswith("UPDATE orders")]) == 1
+        reloaded = await repo.find_by_id(first.id)
+        assert (reloaded.eta.date, reloaded.eta.window_minutes) == (eta_date, 30)
+        assert len(reloaded.items) == 1
+        changes, _, _ = await repo.get_changes(since=token)
+        assert {change["order_id"] for change in changes} == {str(first.id), str(second.id)}
+    
+    @pytest.mark.asyncio
+    async def test_take_reservations_enters_change_feed(self, db_session: Session):
+        """Test quitar las reservas deja cada orden tocada en el feed de cambios"""
+        repo = SQLAlchemyOrderRepository(db_session)
+        held = []
+        for reservation_id in ("res-1", "res-2"):
+            order = _make_order(("SKU-1", 1, 1.0))
+            order.add_reservation(reservation_id)
+            held.append(await repo.save(order))
+        untouched = await repo.save(_make_order(("SKU-1", 1, 1.0)))
+        _, token, _ = await repo.get_changes(since=0)
+        
+        taken = await repo.take_reservations([str(order.id) for order in held] + [str(untouched.id)])
+        
+        assert taken == {str(held[0].id): ["res-1"], str(held[1].id): ["res-2"]}
+        assert (await repo.find_by_id(held[0].id)).reservations == []
+        changes, _, _ = await repo.get_changes(since=token)
+        assert sorted(change["order_id"] for change in changes) == sorted(str(order.id) for order in held)
+        assert len({change["change_seq"] for change in changes}) == 2
+    
+    @pytest.mark.asyncio
+    async def test_update_etas_skips_closed_orders(self, db_session: Session):
+        """Test no se escriben ETAs a órdenes entregadas o canceladas"""
+        repo = SQLAlchemyOrderRepository(db_session)
+        delivered = await repo.save(_make_order(("SKU-1", 1, 1.0)))
+        cancelled = await repo.save(_make_order(("SKU-1", 1, 1.0)))
+        open_order = await repo.save(_make_order(("SKU-1", 1, 1.0)))
+        for order, status in ((delivered, OrderStatus.DELIVERED), (cancelled, OrderStatus.CANCELLED)):
+            db_session.query(OrderModel).filter(OrderModel.id == str(order.id)).update({"status": status.value})
+        db_session.commit()
+        eta_date = datetime(2026, 3, 2, 9, 30)
+        
+        updated = await repo.update_etas({
+            str(order.id): ETA(eta_date, 30) for order in (delivered, cancelled, open_order)
+        })
+        
+        assert updated == 1
+        assert (await repo.find_by_id(delivered.id)).eta is None
+        assert (await repo.find_by_id(cancelled.id)).eta is None
+        assert (await repo.find_by_id(open_order.id)).eta.date == eta_date
+    
+    @pytest.mark.asyncio
+    async def test_reads_legacy_json_items(self, db_session: Session):
+        """Test leer órdenes antiguas con los artículos en la columna JSON"""
+        repo = SQLAlchemyOrderRepository(db_session)
+        order_id = str(uuid4())
+        db_session.add(OrderModel(
+            id=order_id,
+            order_number="ORD-LEGACY-1",
+            items=[{"skuId": "SKU-OLD", "qty": 3, "price": 2.0}],
+            status=OrderStatus.PLACED.value,
+            total_minor=696
+        ))
+        db_session.commit()
+        
+        order = await repo.find_by_id(EntityId(order_id))
+        
+        assert [(item.sku_id, item.qty) for item in order.items] == [("SKU-OLD", 3)]
+    
+    @pytest.mark.asyncio
+    async def test_backfill_moves_legacy_json_items_to_child_table(self, db_session: Session):
+        """Test la migración pasa los artículos JSON a order_items y vacía la columna"""
+        repo = SQLAlchemyOrderRepository(db_session)
+        for number, sku in enumerate(["SKU-OLD", "SKU-OLD", "SKU-OTHER"]):
+            db_session.add(OrderModel(
+                id=str(uuid4()),
+                order_number=f"ORD-LEGACY-{number}",
+                items=[{"skuId": sku, "qty": 2, "price": 1.25}, {"sku_id": "SKU-X", "qty": 1, "price": 3.0}],
+                status=OrderStatus.PLACED.value,
+                total_minor=550
+            ))
+        db_session.add(OrderModel(
+            id=str(uuid4()),
+            order_number="ORD-LEGACY-BAD",
+            items=[{"skuId": "SKU-OLD", "qty": 0, "price": 1.0}],
+            status=OrderStatus.PLACED.value
+        ))
+        db_session.commit()
+        
+        assert repo.backfill_legacy_items(batch_size=2) == 3
+        assert repo.backfill_legacy_items(batch_size=2) == 0
+        
+        assert db_session.query(OrderItemModel).count() == 6
+        assert db_session.query(OrderModel).filter(OrderModel.items.isnot(None)).count() == 1
+        assert len(await repo.find_by_sku("SKU-OLD")) == 2
+        sales = {row["sku_id"]: row["units"] for row in await repo.get_sku_sales()}
+        assert sales == {"SKU-OLD": 4, "SKU-OTHER": 2, "SKU-X": 3}
+    
+    @pytest.mark.asyncio
+    async def test_backfill_numbers_orders_created_before_the_feed(self, db_session: Session):
+        """Test la migración da change_seq a las órdenes antiguas y el feed las entrega"""
+        repo = SQLAlchemyOrderRepository(db_session)
+        now = datetime.utcnow()
+        for number in range(3):
+            db_session.add(OrderModel(
+                id=f"legacy-{number}",
+                order_number=f"ORD-OLD-{number}",
+                status=OrderStatus.PLACED.value,
+                created_at=now - timedelta(days=3 - number)
+            ))
+        db_session.commit()
+        newer = await repo.save(_make_order(("SKU-1", 1, 1.0)))
+        
+        assert repo.backfill_change_seqs(batch_size=2) == 3
+        assert repo.backfill_change_seqs(batch_size=2) == 0
+        
+        changes, _, _ = await repo.get_changes(since=0)
+        assert [change["order_id"] for change in changes] == [str(newer.id), "legacy-0", "legacy-1", "legacy-2"]
+    
+    @pytest.mark.asyncio
+    async def test_delete_removes_items(self, db_session: Session):
+        """Test eliminar orden elimina sus artículos"""
+        repo = SQLAlchemyOrderRepository(db_session)
+        order = await repo.save(_make_order(("SKU-1", 1, 1.0)))
+        
+        assert await repo.delete(order.id) is True
+        assert await repo.delete(order.id) is False
+        assert db_session.query(OrderItemModel).count() == 0
+        assert await repo.exists_by_id(order.id) is False
+
+
+
+    @pytest.mark.asyncio
+    async def test_changes_feed_pages_and_reports_deletions(self, db_session: Session):
+        """Test el feed retorna cada orden con su último cambio, eliminaciones y token"""
+        repo = SQLAlchemyOrderRepository(db_session)
+        first = await repo.save(_make_order(("SKU-1", 1, 1.0), client_id="c1"))
+        second = await repo.save(_make_order(("SKU-1", 1, 1.0), client_id="c1"))
+        await repo.save(_make_order(("SKU-1", 1, 1.0), client_id="c2"))
+        
+        changes, token, has_more = await repo.get_changes(client_id="c1", limit=1)
+        assert [change["order_id"] for change in changes] == [str(first.id)]
+        assert has_more is True
+        
+        first.confirm()
+        await repo.save(first)
+        await repo.delete(second.id)
+        
+        changes, token, has_more = await repo.get_changes(since=token, client_id="c1")
+        assert [(change["op"], change["order_id"]) for change in changes] == [
+            ("upsert", str(first.id)),
+            ("delete", str(second.id))
+        ]
+        assert changes[0]["status"] == OrderStatus.CONFIRMED.value
+        assert has_more is False
+        
+        assert await repo.get_changes(since=token, client_id="c1") == ([], token, False)
+    
+    @pytest.mark.asyncio
+    async def test_bulk_transition_bumps_change_seq(self, db_session: Session):
+        """Test la transición en lote asigna un número de cambio a cada orden"""
+        repo = SQLAlchemyOrderRepository(db_session)
+        orders = [await repo.save(_make_order(("SKU-1", 1, 1.0))) for _ in range(3)]
+        _, token, _ = await repo.get_changes()
+        
+        await repo.bulk_transition(
+            [str(order.id) for order in orders], OrderStatus.CONFIRMED, frozenset({OrderStatus.PLACED})
+        )
+        
+        changes, _, _ = await repo.get_changes(since=token)
+        assert len({change["change_seq"] for change in changes}) == 3
+        assert {change["status"] for change in changes} == {OrderStatus.CONFIRMED.value}
+
+
+
+    @pytest.mark.asyncio
+    async def test_iter_export_rows_streams_filtered_rows(self, db_session: Session):
+        """Test la exportación lee por lotes, filtra por estado y ordena por creación"""
+        repo = SQLAlchemyOrderRepository(db_session)
+        saved = [await repo.save(_make_order(("SKU-1", 1, 2.5))) for _ in range(5)]
+        cancelled = _make_order(("SKU-1", 1, 1.0))
+        cancelled.cancel()
+        await repo.save(cancelled)
+        
+        rows = list(repo.iter_export_rows(statuses=[OrderStatus.PLACED], batch_size=2))
+        
+        assert [row.id for row in rows] == [str(order.id) for order in saved]
+        assert rows[0].total_minor == 290
+        assert rows[0].currency == "USD"
@@ -0,0 +1,238 @@
+"""
+Tests unitarios para el outbox transaccional de eventos
+"""
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import update
+
+from shared.domain.events import DomainEvent, EventBus
+from shared.infrastructure.outbox import OutboxDispatcher, OutboxEventModel, stage_events
+from order.domain.entities import Order, OrderItem
+from order.domain.events import OrderConfirmedEvent
+from order.infrastructure.repositories import SQLAlchemyOrderRepository
+
+
+class OutboxTestEvent(DomainEvent):
+    """Evento de prueba con datos propios"""
+    
+    def __init__(self, order_id: str, qty: int):
+        super().__init__()
+        self.order_id = order_id
+        self.qty = qty
+        self.aggregate_id = order_id
+
+
+def _stage(session_factory, *events):
+    session = session_factory()
+    stage_events(session, events)
+    session.commit()
+    session.close()
+
+
+def _dispatcher(session_factory, bus, **kwargs):
+    return OutboxDispatcher(session_factory, bus=bus, batch_size=kwargs.pop("batch_size", 10), **kwargs)
+
+
+@pytest.mark.unit
+class TestOutboxDispatcher:
+    """Tests para OutboxDispatcher"""
+    
+    @pytest.mark.asyncio
+    async def test_delivers_rebuilt_events_in_order(self, session_factory):
+        """Test los eventos se reconstruyen con sus datos y se entregan en orden"""
+        bus, received = EventBus(), []
+        
+        async def _handler(event):
+            received.append(event)
+        bus.subscribe("OutboxTestEvent", _handler)
+        
+        first, second = OutboxTestEvent("o1", 3), OutboxTestEvent("o2", 5)
+        _stage(session_factory, first, second)
+        
+        dispatcher = _dispatcher(session_factory, bus)
+        assert await dispatcher.dispatch_once() == 2
+        assert await dispatcher.dispatch_once() == 0
+        
+        assert [(event.order_id, event.qty) for event in received] == [("o1", 3), ("o2", 5)]
+        assert received[0].event_id == first.event_id
+        assert received[0].occurred_at == first.occurred_at
+        assert dispatcher.metrics()["pending"] == 0
+        assert dispatcher.metrics()["deliveredTotal"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_drains_in_batches(self, session_factory):
+        """Test el outbox se drena por lotes"""
+        _stage(session_factory, *[OutboxTestEvent(f"o{index}", index) for index in range(25)])
+        dispatcher = _dispatcher(session_factory, EventBus())
+        
+        sizes = [await dispatcher.dispatch_once() for _ in range(4)]
+        
+        assert sizes == [10, 10, 5, 0]
+    
+    @pytest.mark.asyncio
+    async def test_failed_event_is_retried_and_blocks_its_aggregate(self, session_factory):
+        """Test un fallo se reintenta y no adelanta eventos del mismo agregado"""
+        bus, received = EventBus(), []
+        failures = {"o1": 1}
+        
+        async def _handler(event):
+            if failures.get(event.order_id):
+                failures[event.order_id] -= 1
+                raise RuntimeError("suscriptor caído")
+            received.append((event.order_id, event.qty))
+        bus.subscribe("OutboxTestEvent", _handler)
+        
+        _stage(session_factory, OutboxTestEvent("o1", 1), OutboxTestEvent("o1", 2), OutboxTestEvent("o2", 1))
+        dispatcher = _dispatcher(session_factory, bus)
+        
+        await dispatcher.dispatch_once()
+        assert received == [("o2", 1)]
+        metrics = dispatcher.metrics()
+        assert metrics["pending"] == 2
+        assert metrics["failedTotal"] == 1
+        assert metrics["oldestPendingAgeSeconds"] >= 0
+        
+        # Vencer la espera del reintento
+        session = session_factory()
+        session.execute(update(OutboxEventModel).values(locked_until=None))
+        session.commit()
+        session.close()
+        
+        await dispatcher.dispatch_once()
+        assert received == [("o2", 1), ("o1", 1), ("o1", 2)]
+    
+    @pytest.mark.asyncio
+    async def test_later_event_waits_for_retry_across_polls(self, session_factory):
+        """Test un evento del agregado tomado en otra pasada espera el reintento del fallido"""
+        bus, received = EventBus(), []
+        failures = {"o1": 1}
+        
+        async def _handler(event):
+            if failures.get(event.order_id):
+                failures[event.order_id] -= 1
+                raise RuntimeError("suscriptor caído")
+            received.append((event.order_id, event.qty))
+        bus.subscribe("OutboxTestEvent", _handler)
+        dispatcher = _dispatcher(session_factory, bus)
+        
+        _stage(session_factory, OutboxTestEvent("o1", 1))
+        assert await dispatcher.dispatch_once() == 1
+        _stage(session_factory, OutboxTestEvent("o1", 2), OutboxTestEvent("o2", 1))
+        
+        assert await dispatcher.dispatch_once() == 1
+        assert received == [("o2", 1)]
+        
+        # Vencer la espera del reintento
+        session = session_factory()
+        session.execute(update(OutboxEventModel).values(locked_until=None))
+        session.commit()
+        session.close()
+        
+        await dispatcher.dispatch_once()
+        assert received == [("o2", 1), ("o1", 1), ("o1", 2)]
+    
+    @pytest.mark.asyncio
+    async def test_exhausted_events_become_dead_letters(self, session_factory):
+        """Test tras agotar los intentos el evento deja de reintentarse"""
+        bus = EventBus()
+        
+        async def _failing(event):
+            raise RuntimeError("siempre falla")
+        bus.subscribe("OutboxTestEvent", _failing)
+        _stage(session_factory, OutboxTestEvent("o1", 1))
+        dispatcher = _dispatcher(session_factory, bus, max_attempts=1)
+        
+        await dispatcher.dispatch_once()
+        
+        metrics = dispatcher.metrics()
+        assert metrics["pending"] == 0
+        assert metrics["deadLetter"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_redelivery_after_lost_ack_is_deduplicated(self, session_factory):
+        """Test un evento entregado pero no marcado no se entrega dos veces"""
+        bus, received = EventBus(), []
+        
+        async def _handler(event):
+            received.append(event.event_id)
+        bus.subscribe("OutboxTestEvent", _handler)
+        _stage(session_factory, OutboxTestEvent("o1", 1))
+        dispatcher = _dispatcher(session_factory, bus)
+        await dispatcher.dispatch_once()
+        
+        # Simular que la marca de entregado se perdió
+        session = session_factory()
+        session.execute(update(OutboxEventModel).values(dispatched_at=None, locked_until=None))
+        session.commit()
+        session.close()
+        
+        await dispatcher.dispatch_once()
+        
+        assert len(received) == 1
+        assert dispatcher.metrics()["duplicatesSkipped"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_claimed_batch_is_not_taken_by_other_worker(self, session_factory):
+        """Test un lote tomado por un worker no lo toma otro mientras dura la concesión"""
+        _stage(session_factory, OutboxTestEvent("o1", 1))
+        session = session_factory()
+        session.execute(update(OutboxEventModel).values(
+            locked_until=datetime.utcnow() + timedelta(minutes=1)
+        ))
+        session.commit()
+        session.close()
+        
+        assert await _dispatcher(session_factory, EventBus()).dispatch_once() == 0
+    
+    def test_purge_dispatched(self, session_factory):
+        """Test se purgan los eventos entregados más antiguos que la retención"""
+        _stage(session_factory, OutboxTestEvent("o1", 1), OutboxTestEvent("o2", 1))
+        session = session_factory()
+        session.execute(
+            update(OutboxEventModel)
+            .where(OutboxEventModel.aggregate_id == "o1")
+            .values(dispatched_at=datetime.utcnow() - timedelta(days=2))
+        )
+        session.commit()
+        session.close()
+        
+        assert _dispatcher(session_factory, EventBus(), retention=timedelta(hours=1)).purge_dispatched() == 1
+
+
+@pytest.mark.unit
+class TestOrderRepositoryOutbox:
+    """Tests para la escritura de eventos junto con la orden"""
+    
+    @pytest.mark.asyncio
+    async def test_save_writes_pending_events_in_same_transaction(self, session_factory):
+        """Test guardar la orden escribe sus eventos en el outbox"""
+        session = session_factory()
+        order = Order.create(items=[OrderItem(sku_id="A", qty=1, price=1.0)])
+        order._record_event(OrderConfirmedEvent(order_id=str(order.id)))
+        
+        await SQLAlchemyOrderRepository(session).save(order)
+        
+        rows = session.query(OutboxEventModel).all()
+        assert [(row.event_type, row.aggregate_id) for row in rows] == [("OrderConfirmedEvent", str(order.id))]
+        assert rows[0].payload == {"order_id": str(order.id)}
+        assert order.get_domain_events() == []
+        session.close()
+    
+    @pytest.mark.asyncio
+    async def test_failed_save_does_not_write_events(self, session_factory):
+        """Test si falla el guardado no queda ningún evento"""
+        session = session_factory()
+        repo = SQLAlchemyOrderRepository(session)
+        order = Order.create(items=[OrderItem(sku_id="A", qty=1, price=1.0)])
+        await repo.save(order)
+        
+        duplicate = Order.create(items=[OrderItem(sku_id="A", qty=1, price=1.0)])
+        duplicate._order_number = order.order_number
+        duplicate._record_event(OrderConfirmedEvent(order_id=str(duplicate.id)))
+        with pytest.raises(Exception):
+            await repo.save(duplicate)
+        session.rollback()
+        
+        assert session.query(OutboxEventModel).count() == 0
+        assert len(duplicate.get_domain_events()) == 1
+        session.close()
@@ -0,0 +1,166 @@
+"""
+Tests unitarios para la ingesta de posiciones GPS y el seguimiento de rutas
+"""
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, Mock
+from sqlalchemy.orm import Session
+
+from logistics.application.commands import IngestPositionsCommand
+from logistics.application.handlers import GetTrackingInfoQueryHandler, IngestPositionsCommandHandler
+from logistics.application.queries import GetTrackingInfoQuery
+from logistics.domain.entities import ETA, Route, Stop
+from logistics.infrastructure.repositories import (
+    SQLAlchemyLogisticsRepository, SQLAlchemyPositionRepository, VehiclePositionModel
+)
+from logistics.infrastructure.tracking import PositionFlusher, PositionRingBuffers, RepositoryActiveRouteSource
+
+START = datetime(2026, 3, 2, 8, 0)
+
+
+def _batch(vehicle_id: str, seconds, lat: float = 4.6):
+    """Columnas de un lote de un vehículo, una posición por segundo indicado"""
+    return (
+        [vehicle_id] * len(seconds),
+        [lat + second * 1e-4 for second in seconds],
+        [-74.1] * len(seconds),
+        [START + timedelta(seconds=second) for second in seconds]
+    )
+
+
+@pytest.mark.unit
+class TestPositionRingBuffers:
+    """Tests para PositionRingBuffers"""
+    
+    def test_ring_keeps_latest_positions_in_time_order(self):
+        """Test el anillo da la vuelta y conserva las últimas en orden aunque lleguen desordenadas"""
+        buffers = PositionRingBuffers(capacity=4)
+        vehicle_ids, lat, lon, timestamps = _batch("v1", [2, 0, 1])
+        other = _batch("v2", [0])
+        
+        buffers.append_many(vehicle_ids + other[0], lat + other[1], lon + other[2], timestamps + other[3])
+        buffers.append_many(*_batch("v1", [4, 3, 5]))
+        
+        ts, _, _ = buffers.recent("v1", 10)
+        assert (ts - ts[0]).tolist() == [0, 1_000_000, 2_000_000, 3_000_000]
+        assert buffers.latest("v1").ts == START + timedelta(seconds=5)
+        assert buffers.latest("v1").lat == pytest.approx(4.6005)
+        assert buffers.latest("v2").ts == START
+        assert buffers.latest("v3") is None
+    
+    def test_stale_positions_only_go_to_history(self):
+        """Test una posición anterior a la última no entra al anillo pero queda pendiente de guardar"""
+        buffers = PositionRingBuffers(capacity=8)
+        buffers.append_many(*_batch("v1", [10]))
+        
+        buffers.append_many(*_batch("v1", [5]))
+        
+        assert buffers.latest("v1").ts == START + timedelta(seconds=10)
+        assert buffers.metrics() == {"vehicles": 1, "ingested": 2, "pending": 2, "stale": 1, "dropped": 0}
+    
+    def test_rejects_out_of_range_batch(self):
+        """Test una coordenada inválida rechaza el lote completo"""
+        buffers = PositionRingBuffers()
+        vehicle_ids, lat, lon, timestamps = _batch("v1", [0, 1])
+        lat[1] = 95.0
+        
+        with pytest.raises(ValueError, match="posición 1"):
+            buffers.append_many(vehicle_ids, lat, lon, timestamps)
+        assert buffers.latest("v1") is None
+        assert buffers.pending == 0
+
+
+@pytest.mark.unit
+class TestPositionFlusher:
+    """Tests para PositionFlusher"""
+    
+    @pytest.mark.asyncio
+    async def test_flushes_pending_in_batches(self, db_session: Session):
+        """Test guarda todo lo pendiente en lotes y descarta lo más viejo si se excede el máximo"""
+        buffers = PositionRingBuffers(max_pending=6)
+        buffers.append_many(*_batch("v1", [0, 1]))
+        buffers.append_many(*_batch("v1", [2, 3, 4]))
+        buffers.append_many(*_batch("v2", [0, 1, 2]))
+        flusher = PositionFlusher(buffers, session_factory=lambda: db_session, batch_size=2)
+        
+        flushed = await flusher.flush_once()
+        
+        assert flushed == 6
+        assert buffers.pending == 0
+        assert buffers.dropped == 2
+        assert db_session.query(VehiclePositionModel).count() == 6
+        latest = await SQLAlchemyPositionRepository(db_session).find_latest("v1")
+        assert latest.ts == START + timedelta(seconds=4)
+
+
+@pytest.mark.unit
+class TestRepositoryActiveRouteSource:
+    """Tests para RepositoryActiveRouteSource"""
+    
+    @pytest.mark.asyncio
+    async def test_loads_in_progress_routes_with_latest_positions(self, db_session: Session):
+        """Test trae solo las rutas en curso y la última posición de sus vehículos en una consulta"""
+        repository = SQLAlchemyLogisticsRepository(db_session)
+        started = Route.create(stops=[Stop("order-1")])
+        started.start_route("v1")
+        await repository.save(started)
+        await repository.save(Route.create(stops=[Stop("order-2")], vehicle_id="v2"))
+        positions = SQLAlchemyPositionRepository(db_session)
+        await positions.save_many(*_batch("v1", [0, 5, 3]))
+        await positions.save_many(*_batch("v2", [9]))
+        
+        routes, positions = await RepositoryActiveRouteSource(lambda: db_session).load()
+        
+        assert [str(route.id) for route in routes] == [str(started.id)]
+        assert list(positions) == ["v1"]
+        assert positions["v1"].ts == START + timedelta(seconds=5)
+
+
+@pytest.mark.unit
+class TestTrackingHandlers:
+    """Tests para IngestPositionsCommandHandler y GetTrackingInfoQueryHandler"""
+    
+    @pytest.mark.asyncio
+    async def test_ingest_then_track_route(self):
+        """Test la posición ingresada (en UTC) y la ETA de la próxima parada según el progreso"""
+        buffers = PositionRingBuffers()
+        accepted = await IngestPositionsCommandHandler(buffers).handle(IngestPositionsCommand(positions=[
+            {"vehicleId": "van-1", "lat": 4.65, "lon": -74.05,
+             "ts": datetime(2026, 3, 2, 3, 0, tzinfo=timezone(timedelta(hours=-5)))}
+        ]))
+        route = Route.create(
+            stops=[Stop("order-1", ETA(START, 30)), Stop("order-2", ETA(START + timedelta(hours=1), 30))],
+            vehicle_id="van-1"
+        )
+        route.update_progress(progress=50.0)
+        repo = Mock()
+        repo.find_by_id = AsyncMock(return_value=route)
+        positions = Mock()
+        positions.find_latest = AsyncMock()
+        
+        tracking = await GetTrackingInfoQueryHandler(repo, buffers, positions).handle(
+            GetTrackingInfoQuery(route_id=str(route.id))
+        )
+        
+        assert accepted == 1
+        assert tracking.position.ts == START
+        assert tracking.next_stop_eta.date == START + timedelta(hours=1)
+        positions.find_latest.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_falls_back_to_stored_position(self):
+        """Test sin posiciones en memoria (reinicio u otro worker) lee la última guardada"""
+        route = Route.create(stops=[Stop("order-1")], vehicle_id="van-1")
+        repo = Mock()
+        repo.find_by_id = AsyncMock(return_value=route)
+        positions = Mock()
+        positions.find_latest = AsyncMock(return_value=None)
+        handler = GetTrackingInfoQueryHandler(repo, PositionRingBuffers(), positions)
+        
+        tracking = await handler.handle(GetTrackingInfoQuery(route_id=str(route.id)))
+        
+        positions.find_latest.assert_awaited_once_with("van-1")
+        assert tracking.to_dict() == {"vehicleId": "van-1"}
+        repo.find_by_id = AsyncMock(return_value=None)
+        with pytest.raises(ValueError, match="no encontrada"):
+            await handler.handle(GetTrackingInfoQuery(route_id="missing"))
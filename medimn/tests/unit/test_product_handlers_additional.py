@@ -15,6 +15,8 @@ from product.application.commands import (
     RemoveStockCommand,
     DeactivateProductCommand
 )
+from product.application.services import ProductEventHandler
+from product.domain.events import StockUpdatedEvent
 
 
 @pytest.mark.unit
@@ -111,3 +113,19 @@ class TestDeactivateProductCommandHandler:
         mock_product.deactivate.assert_called_once()
         mock_repo.save.assert_called_once()
 
+
+@pytest.mark.unit
+class TestProductEventHandlerBatches:
+    """Tests para los handlers de eventos de producto en lote"""
+    
+    @pytest.mark.asyncio
+    async def test_stock_updated_batch_keeps_last_stock_per_product(self):
+        """Test un lote de cambios de stock se colapsa al último valor por producto"""
+        events = [
+            StockUpdatedEvent("A", 10, 8),
+            StockUpdatedEvent("B", 5, 6),
+            StockUpdatedEvent("A", 8, 3)
+        ]
+        
+        assert await ProductEventHandler().on_stock_updated_batch(events) == {"A": 3, "B": 6}
+
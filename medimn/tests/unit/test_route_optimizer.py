@@ -0,0 +1,108 @@
+"""
+Tests unitarios para el optimizador de rutas y GenerateOptimalRouteCommandHandler
+"""
+import pytest
+import random
+from unittest.mock import AsyncMock, Mock
+
+from logistics.application.commands import GenerateOptimalRouteCommand
+from logistics.application.handlers import GenerateOptimalRouteCommandHandler
+from logistics.domain.entities import Coordinates, ROAD_DETOUR_FACTOR
+from logistics.infrastructure.optimization import NumpyRouteOptimizer, haversine_matrix
+
+
+def _line(count: int):
+    """Paradas sobre un paralelo, separadas 0.01° de longitud, en orden aleatorio"""
+    points = [(f"order-{index}", Coordinates(4.6, -74.0 + 0.01 * index)) for index in range(count)]
+    random.Random(3).shuffle(points)
+    return points
+
+
+@pytest.mark.unit
+class TestNumpyRouteOptimizer:
+    """Tests para NumpyRouteOptimizer"""
+    
+    def test_haversine_matrix(self):
+        """Test distancia Bogotá - Medellín y matriz simétrica con diagonal cero"""
+        matrix = haversine_matrix([4.711, 6.2442], [-74.0721, -75.5812])
+        
+        assert matrix[0, 1] == pytest.approx(238.7, abs=0.5)
+        assert matrix[1, 0] == matrix[0, 1]
+        assert matrix[0, 0] == 0
+    
+    def test_open_route_visits_points_in_line_order(self):
+        """Test sin depósito la ruta abierta recorre la línea de un extremo al otro"""
+        points = _line(30)
+        
+        tour = NumpyRouteOptimizer().optimize([point for _, point in points])
+        
+        longitudes = [points[index][1].lon for index in tour.sequence]
+        assert longitudes in (sorted(longitudes), sorted(longitudes, reverse=True))
+        assert tour.distance_km == pytest.approx(
+            haversine_matrix([4.6, 4.6], [-74.0, -73.71])[0, 1], rel=1e-6
+        )
+    
+    def test_improves_nearest_neighbour_and_returns_to_depot(self):
+        """Test 2-opt/Or-opt no empeora el recorrido inicial y visita todas las paradas"""
+        rng = random.Random(7)
+        stops = [Coordinates(4.5 + rng.random() * 0.3, -74.2 + rng.random() * 0.3) for _ in range(80)]
+        depot = Coordinates(4.65, -74.05)
+        optimizer = NumpyRouteOptimizer()
+        
+        initial = optimizer.optimize(stops, depot, time_budget_seconds=0)
+        improved = optimizer.optimize(stops, depot, time_budget_seconds=2)
+        open_route = optimizer.optimize(stops, depot, return_to_depot=False, time_budget_seconds=2)
+        
+        assert sorted(improved.sequence) == list(range(80))
+        assert improved.distance_km < initial.distance_km
+        assert open_route.distance_km < improved.distance_km
+
+
+@pytest.mark.unit
+class TestGenerateOptimalRouteCommandHandler:
+    """Tests para GenerateOptimalRouteCommandHandler"""
+    
+    @staticmethod
+    def _handler():
+        repo = Mock()
+        repo.save = AsyncMock(side_effect=lambda route: route)
+        return GenerateOptimalRouteCommandHandler(repo, route_optimizer=NumpyRouteOptimizer())
+    
+    @pytest.mark.asyncio
+    async def test_orders_stops_and_estimates_from_tour(self):
+        """Test con coordenadas las paradas siguen el recorrido y las estimaciones salen de él"""
+        points = _line(10)
+        command = GenerateOptimalRouteCommand(
+            order_ids=[order_id for order_id, _ in points],
+            vehicle_type="van",
+            locations=[{"orderId": order_id, "lat": point.lat, "lon": point.lon} for order_id, point in points]
+        )
+        
+        route = await self._handler().handle(command)
+        
+        sequence = [stop.order_id for stop in route.stops]
+        assert sequence in ([f"order-{index}" for index in range(10)], [f"order-{index}" for index in range(9, -1, -1)])
+        assert [stop.priority for stop in route.stops] == list(range(1, 11))
+        line_km = haversine_matrix([4.6, 4.6], [-74.0, -73.91])[0, 1]
+        assert route.estimated_distance == pytest.approx(line_km * ROAD_DETOUR_FACTOR, abs=0.01)
+        assert route.estimated_fuel == pytest.approx(route.estimated_distance * 0.1, abs=0.01)
+        assert route.estimated_duration == round(route.estimated_distance / 30 * 60 + 10 * 10)
+    
+    @pytest.mark.asyncio
+    async def test_without_coordinates_keeps_given_order(self):
+        """Test sin coordenadas conserva el orden y las estimaciones por parada"""
+        route = await self._handler().handle(GenerateOptimalRouteCommand(order_ids=["b", "a"]))
+        
+        assert [stop.order_id for stop in route.stops] == ["b", "a"]
+        assert route.estimated_distance == 10.0
+    
+    @pytest.mark.asyncio
+    async def test_missing_coordinates_is_rejected(self):
+        """Test coordenadas parciales se rechazan"""
+        command = GenerateOptimalRouteCommand(
+            order_ids=["a", "b"],
+            locations=[{"orderId": "a", "lat": 4.6, "lon": -74.0}]
+        )
+        
+        with pytest.raises(ValueError, match="Faltan coordenadas"):
+            await self._handler().handle(command)
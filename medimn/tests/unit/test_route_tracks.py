@@ -0,0 +1,144 @@
+"""
+Tests unitarios para el historial comprimido de recorridos de rutas
+"""
+import pytest
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from logistics.application.handlers import GetRouteTrackQueryHandler
+from logistics.application.queries import GetRouteTrackQuery
+from logistics.domain.entities import Route, Stop
+import logistics.infrastructure.repositories as repositories
+from logistics.infrastructure.repositories import (
+    RouteModel, RouteTrackChunkModel, RouteTrackModel, SQLAlchemyLogisticsRepository,
+    SQLAlchemyPositionRepository, VehiclePositionModel
+)
+from logistics.infrastructure.repositories.track_codec import decode_track, encode_track
+from logistics.infrastructure.tracking import TrackArchiver
+
+START = datetime(2026, 3, 2, 8, 0)
+
+
+async def _completed_route(db_session: Session, minutes: int = 50, vehicle_id: str = "van-1") -> Route:
+    """Ruta completada con un punto cada 30 s del vehículo entre su inicio y su fin"""
+    logistics = SQLAlchemyLogisticsRepository(db_session)
+    route = Route.create(stops=[Stop("order-1")])
+    route.start_route(vehicle_id)
+    route.complete_route()
+    route.update_progress(end_time=START + timedelta(minutes=minutes))
+    await logistics.save(route)
+    db_session.query(RouteModel).filter(RouteModel.id == str(route.id)).update({"start_time": START})
+    db_session.commit()
+    
+    points = 2 * minutes + 1
+    await SQLAlchemyPositionRepository(db_session).save_many(
+        [vehicle_id] * points,
+        [4.6 + 0.0001 * index for index in range(points)],
+        [-74.1 - 0.0001 * index for index in range(points)],
+        [START + timedelta(seconds=30 * index) for index in range(points)]
+    )
+    return route
+
+
+@pytest.mark.unit
+class TestTrackCodec:
+    """Tests para encode_track y decode_track"""
+    
+    def test_round_trip_keeps_millisecond_and_microdegree_precision(self):
+        """Test decodificar devuelve los mismos puntos, con diferencias negativas y saltos grandes"""
+        rng = np.random.default_rng(3)
+        ts = 1_772_438_400_000 + np.cumsum(rng.integers(0, 10_000, 1000))
+        ts[500] = ts[499]  # Posición repetida
+        lat = 4.6 + np.cumsum(rng.normal(0, 3e-4, 1000))
+        lon = -74.1 + np.cumsum(rng.normal(0, 3e-4, 1000))
+        lon[700:] += 100  # Salto grande
+        
+        data = encode_track(ts, lat, lon)
+        decoded_ts, decoded_lat, decoded_lon = decode_track(data, 1000)
+        
+        assert len(data) < 8 * 1000
+        assert np.array_equal(decoded_ts, ts)
+        assert np.abs(decoded_lat - lat).max() <= 5e-7
+        assert np.abs(decoded_lon - lon).max() <= 5e-7
+    
+    def test_empty_and_corrupt_blocks(self):
+        """Test un bloque vacío no tiene puntos y uno truncado o de otro tamaño falla"""
+        data = encode_track([1000, 2000], [4.6, 4.7], [-74.1, -74.0])
+        
+        assert len(decode_track(b"", 0)[0]) == 0
+        with pytest.raises(ValueError):
+            decode_track(data, 3)
+        with pytest.raises(ValueError):
+            decode_track(data + b"\x80", 2)
+
+
+@pytest.mark.unit
+class TestRouteTrackArchive:
+    """Tests para el archivado y la reproducción de recorridos"""
+    
+    @pytest.mark.asyncio
+    async def test_archive_compresses_by_window_and_keeps_last_row(self, db_session: Session):
+        """Test un bloque por ventana, se borran las filas salvo la última y no se archiva dos veces"""
+        route = await _completed_route(db_session)
+        repository = SQLAlchemyPositionRepository(db_session)
+        
+        pending = await repository.archive_route_tracks(START + timedelta(minutes=10), 30, limit=10)
+        archived = await repository.archive_route_tracks(START + timedelta(hours=1), 30, limit=10)
+        again = await repository.archive_route_tracks(START + timedelta(hours=1), 30, limit=10)
+        
+        chunks = db_session.query(RouteTrackChunkModel).order_by(RouteTrackChunkModel.chunk_start).all()
+        header = db_session.query(RouteTrackModel).one()
+        assert (pending, archived, again) == (0, 1, 0)
+        assert [(chunk.chunk_start, chunk.point_count) for chunk in chunks] == [
+            (START, 60), (START + timedelta(minutes=30), 41)
+        ]
+        assert header.point_count == 101 and header.byte_count == sum(len(chunk.data) for chunk in chunks)
+        assert db_session.query(VehiclePositionModel).count() == 1
+        latest = await repository.find_latest("van-1")
+        assert latest.ts == START + timedelta(minutes=50)
+        assert (await repository.find_route_track(str(route.id)))[-1].lat == pytest.approx(4.61)
+    
+    @pytest.mark.asyncio
+    async def test_replay_decodes_only_requested_range(self, db_session: Session, monkeypatch):
+        """Test el rango filtra los puntos y solo se decodifican los bloques que lo tocan"""
+        route = await _completed_route(db_session)
+        archiver = TrackArchiver(session_factory=lambda: db_session, chunk_minutes=15, grace_seconds=0)
+        assert await archiver.archive_once() == 1
+        decoded = []
+        monkeypatch.setattr(
+            repositories, "decode_track", lambda data, count: decoded.append(count) or decode_track(data, count)
+        )
+        handler = GetRouteTrackQueryHandler(SQLAlchemyLogisticsRepository(db_session), SQLAlchemyPositionRepository(db_session))
+        
+        track = await handler.handle(GetRouteTrackQuery(
+            route_id=str(route.id), start=START + timedelta(minutes=20), end=START + timedelta(minutes=25)
+        ))
+        
+        assert track.archived is True
+        assert [position.ts for position in track.positions] == [
+            START + timedelta(minutes=20, seconds=30 * index) for index in range(11)
+        ]
+        assert decoded == [30]
+        assert track.to_dict()["count"] == 11
+    
+    @pytest.mark.asyncio
+    async def test_route_not_archived_reads_raw_positions(self, db_session: Session):
+        """Test sin archivar se leen las posiciones guardadas dentro de la ruta; errores de consulta"""
+        logistics = SQLAlchemyLogisticsRepository(db_session)
+        positions = SQLAlchemyPositionRepository(db_session)
+        route = await _completed_route(db_session, minutes=5)
+        await positions.save_many(["van-1"], [4.7], [-74.0], [START + timedelta(hours=2)])
+        planned = await logistics.save(Route.create(stops=[Stop("order-2")]))
+        handler = GetRouteTrackQueryHandler(logistics, positions)
+        
+        track = await handler.handle(GetRouteTrackQuery(route_id=str(route.id), start=START + timedelta(minutes=4)))
+        empty = await handler.handle(GetRouteTrackQuery(route_id=str(planned.id)))
+        
+        assert track.archived is False and len(track.positions) == 3
+        assert empty.positions == [] and empty.vehicle_id is None
+        with pytest.raises(ValueError, match="no encontrada"):
+            await handler.handle(GetRouteTrackQuery(route_id="missing"))
+        with pytest.raises(ValueError, match="posterior"):
+            await handler.handle(GetRouteTrackQuery(route_id=str(route.id), start=START, end=START - timedelta(minutes=1)))
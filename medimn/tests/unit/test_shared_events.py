@@ -0,0 +1,260 @@
+"""
+Tests unitarios para el bus de eventos compartido
+"""
+import asyncio
+import pytest
+
+from shared.domain.events import Backpressure, DomainEvent, EventBus
+
+
+class SampleEvent(DomainEvent):
+    """Evento de prueba"""
+    
+    def __init__(self, value: int):
+        super().__init__()
+        self.value = value
+
+
+class OtherEvent(DomainEvent):
+    """Otro evento de prueba"""
+    pass
+
+
+@pytest.mark.unit
+class TestEventBus:
+    """Tests para EventBus"""
+    
+    @pytest.mark.asyncio
+    async def test_publish_dispatches_by_event_type(self):
+        """Test publicar un evento llama solo a los handlers de su tipo"""
+        bus = EventBus()
+        received = []
+        
+        async def handler(event):
+            received.append(event.value)
+        
+        bus.subscribe("SampleEvent", handler)
+        await bus.publish(SampleEvent(1))
+        await bus.publish(OtherEvent())
+        
+        assert received == [1]
+    
+    @pytest.mark.asyncio
+    async def test_publish_batch_keeps_order(self):
+        """Test publicar en lote entrega los eventos en orden"""
+        bus = EventBus()
+        received = []
+        
+        async def handler(event):
+            received.append(event.value)
+        
+        async def other_handler(event):
+            received.append("other")
+        
+        bus.subscribe("SampleEvent", handler)
+        bus.subscribe("OtherEvent", other_handler)
+        await bus.publish_batch([SampleEvent(1), OtherEvent(), SampleEvent(2)])
+        
+        assert received == [1, "other", 2]
+    
+    @pytest.mark.asyncio
+    async def test_publish_batch_without_handlers(self):
+        """Test publicar en lote sin suscriptores no falla"""
+        bus = EventBus()
+        
+        await bus.publish_batch([SampleEvent(1)])
+        await bus.publish_batch([])
+
+
+@pytest.mark.unit
+class TestEventBusAsyncMode:
+    """Tests para el modo asíncrono con cola acotada"""
+    
+    @pytest.mark.asyncio
+    async def test_publish_enqueues_and_workers_run_handlers(self):
+        """Test publicar no espera a los handlers y drain los completa"""
+        bus = EventBus()
+        release = asyncio.Event()
+        received = []
+        
+        async def slow_handler(event):
+            await release.wait()
+            received.append(event.value)
+        
+        bus.subscribe("SampleEvent", slow_handler)
+        bus.start(workers=2, max_queue_size=10)
+        
+        await asyncio.wait_for(bus.publish(SampleEvent(1)), timeout=1)
+        assert received == []
+        
+        release.set()
+        assert await bus.drain(timeout=1) is True
+        assert received == [1]
+        assert not bus.is_async
+        assert bus.metrics()["processed"] == 1
+    
+    @pytest.mark.asyncio
+    async def test_failing_and_slow_handlers_are_isolated(self):
+        """Test un handler que falla o se demora no afecta a los demás"""
+        bus = EventBus()
+        received = []
+        
+        async def failing(event):
+            raise RuntimeError("falla")
+        
+        async def hanging(event):
+            await asyncio.sleep(10)
+        
+        async def healthy(event):
+            received.append(event.value)
+        
+        for handler in (failing, hanging, healthy):
+            bus.subscribe("SampleEvent", handler)
+        bus.start(workers=1, handler_timeout=0.05)
+        
+        await bus.publish(SampleEvent(1))
+        await bus.drain(timeout=1)
+        
+        metrics = bus.metrics()
+        assert received == [1]
+        assert sum(metrics["handlerErrors"].values()) == 1
+        assert sum(metrics["handlerTimeouts"].values()) == 1
+    
+    @pytest.mark.asyncio
+    async def test_drop_oldest_when_full(self):
+        """Test con la cola llena se descartan los eventos más antiguos"""
+        bus = EventBus()
+        received = []
+        
+        async def handler(event):
+            received.append(event.value)
+        
+        bus.subscribe("SampleEvent", handler)
+        bus.start(workers=1, max_queue_size=2, backpressure=Backpressure.DROP_OLDEST)
+        
+        # Sin ceder el loop los workers no consumen: la cola se llena
+        for value in range(5):
+            await bus.publish(SampleEvent(value))
+        await bus.drain(timeout=1)
+        
+        assert received == [3, 4]
+        assert bus.metrics()["dropped"] == 3
+    
+    @pytest.mark.asyncio
+    async def test_spill_keeps_every_event_in_order(self):
+        """Test el desborde no bloquea ni pierde eventos y conserva el orden"""
+        bus = EventBus()
+        received = []
+        
+        async def handler(event):
+            received.append(event.value)
+        
+        bus.subscribe("SampleEvent", handler)
+        bus.start(workers=1, max_queue_size=2, backpressure=Backpressure.SPILL)
+        
+        for value in range(6):
+            await bus.publish(SampleEvent(value))
+        assert bus.metrics()["overflowDepth"] == 4
+        await bus.drain(timeout=1)
+        
+        assert received == list(range(6))
+        assert bus.metrics()["spilled"] == 4
+    
+    @pytest.mark.asyncio
+    async def test_spill_overflow_is_bounded(self):
+        """Test con el desborde lleno los eventos nuevos se descartan y se cuentan"""
+        bus = EventBus()
+        received = []
+        
+        async def handler(event):
+            received.append(event.value)
+        
+        bus.subscribe("SampleEvent", handler)
+        bus.start(workers=1, max_queue_size=2, backpressure=Backpressure.SPILL, max_overflow_size=2)
+        
+        for value in range(6):
+            await bus.publish(SampleEvent(value))
+        metrics = bus.metrics()
+        assert metrics["overflowDepth"] == 2
+        assert metrics["spilled"] == 2
+        assert metrics["dropped"] == 2
+        await bus.drain(timeout=1)
+        
+        assert received == [0, 1, 2, 3]
+    
+    @pytest.mark.asyncio
+    async def test_dispatch_bypasses_queue_and_propagates_errors(self):
+        """Test dispatch ejecuta en línea y propaga el error aun en modo asíncrono"""
+        bus = EventBus()
+        
+        async def failing(event):
+            raise RuntimeError("falla")
+        
+        bus.subscribe("SampleEvent", failing)
+        bus.start(workers=1)
+        try:
+            with pytest.raises(RuntimeError):
+                await bus.dispatch(SampleEvent(1))
+        finally:
+            await bus.drain(timeout=1)
+
+
+@pytest.mark.unit
+class TestEventBusBatchHandlers:
+    """Tests para los handlers suscritos en lote"""
+    
+    @pytest.mark.asyncio
+    async def test_full_batches_are_delivered_immediately(self):
+        """Test al llegar a max_batch_size el lote se entrega sin esperar la ventana"""
+        bus = EventBus()
+        batches = []
+        
+        async def handler(events):
+            batches.append([event.value for event in events])
+        
+        bus.subscribe_batch("SampleEvent", handler, max_batch_size=3, max_wait_seconds=60)
+        await bus.publish_batch([SampleEvent(value) for value in range(7)])
+        
+        assert batches == [[0, 1, 2], [3, 4, 5]]
+        await bus.flush_batches()
+        assert batches[-1] == [6]
+        assert bus.metrics()["batchesDelivered"] == 3
+    
+    @pytest.mark.asyncio
+    async def test_partial_batch_is_delivered_after_window(self):
+        """Test un lote incompleto se entrega al vencer max_wait_seconds"""
+        bus = EventBus()
+        batches = []
+        
+        async def handler(events):
+            batches.append([event.value for event in events])
+        
+        bus.subscribe_batch("SampleEvent", handler, max_batch_size=100, max_wait_seconds=0.01)
+        await bus.publish(SampleEvent(1))
+        await bus.publish(SampleEvent(2))
+        assert batches == []
+        
+        await asyncio.sleep(0.05)
+        assert batches == [[1, 2]]
+    
+    @pytest.mark.asyncio
+    async def test_async_mode_batches_and_isolates_errors(self):
+        """Test en modo asíncrono los lotes se vacían al drenar y un fallo no se propaga"""
+        bus = EventBus()
+        received = []
+        
+        async def failing(events):
+            raise RuntimeError("falla")
+        
+        async def handler(events):
+            received.extend(event.value for event in events)
+        
+        bus.subscribe_batch("SampleEvent", failing, max_batch_size=2, max_wait_seconds=60)
+        bus.subscribe_batch("SampleEvent", handler, max_batch_size=2, max_wait_seconds=60)
+        bus.start(workers=1)
+        for value in range(5):
+            await bus.publish(SampleEvent(value))
+        assert await bus.drain(timeout=1)
+        
+        assert received == list(range(5))
+        assert sum(bus.metrics()["handlerErrors"].values()) == 3
@@ -0,0 +1,138 @@
+"""
+Tests unitarios para el índice espacial de vehículos y paradas
+"""
+import pytest
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from logistics.application.commands import IngestPositionsCommand
+from logistics.application.handlers import (
+    FindNearestVehiclesQueryHandler, FindStopsInAreaQueryHandler, IngestPositionsCommandHandler
+)
+from logistics.application.queries import FindNearestVehiclesQuery, FindStopsInAreaQuery
+from logistics.domain.entities import Coordinates, Route, Stop
+from logistics.infrastructure.optimization import haversine_distances
+from logistics.infrastructure.tracking import GeoGrid, PositionRingBuffers, SpatialIndex
+
+START = datetime(2026, 3, 2, 8, 0)
+
+
+def _positions(*vehicles, at=START):
+    return [
+        {"vehicleId": vehicle_id, "lat": lat, "lon": lon, "ts": at + timedelta(seconds=index)}
+        for index, (vehicle_id, lat, lon) in enumerate(vehicles)
+    ]
+
+
+@pytest.mark.unit
+class TestGeoGrid:
+    """Tests para GeoGrid"""
+    
+    def test_nearest_and_within_match_full_scan(self):
+        """Test los k más cercanos y el rectángulo coinciden con revisar todos los puntos"""
+        rng = random.Random(4)
+        grid = GeoGrid(cell_degrees=0.01)
+        points = {f"p{index}": (4.5 + rng.random() * 0.3, -74.2 + rng.random() * 0.3) for index in range(500)}
+        for key, (lat, lon) in points.items():
+            grid.put(key, lat, lon)
+        # Mover algunos: solo cuenta el último lugar
+        for key in list(points)[:50]:
+            points[key] = (4.5 + rng.random() * 0.3, -74.2 + rng.random() * 0.3)
+            grid.put(key, *points[key])
+        keys = list(points)
+        lat = np.array([points[key][0] for key in keys])
+        lon = np.array([points[key][1] for key in keys])
+        
+        for query_lat, query_lon, k in [(4.65, -74.05, 5), (4.5, -74.2, 1), (5.5, -73.0, 3), (4.7, -74.1, 600)]:
+            expected = np.argsort(haversine_distances([query_lat], [query_lon], lat, lon)[0], kind="stable")[:k]
+            found = grid.nearest(query_lat, query_lon, k)
+            assert [key for key, _ in found] == [keys[index] for index in expected]
+        
+        inside = grid.within(4.6, -74.1, 4.65, -74.0)
+        assert sorted(inside) == sorted(
+            key for key, (point_lat, point_lon) in points.items()
+            if 4.6 <= point_lat <= 4.65 and -74.1 <= point_lon <= -74.0
+        )
+    
+    def test_filter_remove_and_empty(self):
+        """Test respeta el filtro, olvida lo removido y con el índice vacío no falla"""
+        grid = GeoGrid()
+        assert grid.nearest(4.6, -74.1, 3) == []
+        grid.put("a", 4.600, -74.1)
+        grid.put("b", 4.601, -74.1)
+        grid.put("c", 4.650, -74.1)
+        grid.remove("b")
+        
+        found = grid.nearest(4.6, -74.1, 2, accept=lambda key: key != "a")
+        
+        assert [key for key, _ in found] == ["c"]
+        assert found[0][1] == pytest.approx(5.56, abs=0.01)
+        assert "b" not in grid and len(grid) == 2
+        with pytest.raises(ValueError):
+            GeoGrid(cell_degrees=0)
+
+
+@pytest.mark.unit
+class TestSpatialIndex:
+    """Tests para SpatialIndex y sus handlers"""
+    
+    @pytest.mark.asyncio
+    async def test_ingestion_moves_vehicles_and_busy_ones_are_skipped(self):
+        """Test la ingesta actualiza el índice y los vehículos con ruta en curso no están disponibles"""
+        buffers = PositionRingBuffers()
+        index = SpatialIndex(buffers)
+        ingest = IngestPositionsCommandHandler(buffers, spatial_index=index)
+        await ingest.handle(IngestPositionsCommand(positions=_positions(
+            ("van-1", 4.60, -74.10), ("van-2", 4.61, -74.10), ("van-3", 4.70, -74.10)
+        )))
+        route = Route.create(stops=[Stop("order-1", location=Coordinates(4.6, -74.1))])
+        route.start_route("van-1")
+        index.track_route(route)
+        handler = FindNearestVehiclesQueryHandler(index)
+        
+        available = await handler.handle(FindNearestVehiclesQuery(lat=4.60, lon=-74.10, k=2))
+        everyone = await handler.handle(FindNearestVehiclesQuery(lat=4.60, lon=-74.10, k=2, available_only=False))
+        await ingest.handle(IngestPositionsCommand(positions=_positions(("van-3", 4.6001, -74.10), at=START + timedelta(minutes=1))))
+        moved = await handler.handle(FindNearestVehiclesQuery(lat=4.60, lon=-74.10, k=1))
+        
+        assert [vehicle.vehicle_id for vehicle in available] == ["van-2", "van-3"]
+        assert [vehicle.vehicle_id for vehicle in everyone] == ["van-1", "van-2"]
+        assert everyone[0].route_id == str(route.id) and everyone[0].distance_km == pytest.approx(0)
+        assert moved[0].vehicle_id == "van-3" and moved[0].position.lat == pytest.approx(4.6001)
+        with pytest.raises(ValueError, match="al menos"):
+            await handler.handle(FindNearestVehiclesQuery(lat=4.6, lon=-74.1, k=0))
+    
+    @pytest.mark.asyncio
+    async def test_stops_follow_route_lifecycle(self):
+        """Test solo las paradas pendientes de rutas activas están en el área"""
+        index = SpatialIndex(PositionRingBuffers())
+        route = Route.create(
+            stops=[
+                Stop("order-1", priority=1, location=Coordinates(4.60, -74.10)),
+                Stop("order-2", priority=2, location=Coordinates(4.62, -74.08)),
+                Stop("order-3", priority=3)
+            ],
+            vehicle_id="van-1"
+        )
+        far = Route.create(stops=[Stop("order-9", location=Coordinates(6.25, -75.56))])
+        index.track_route(route)
+        index.track_route(far)
+        handler = FindStopsInAreaQueryHandler(index)
+        area = FindStopsInAreaQuery(min_lat=4.5, min_lon=-74.2, max_lat=4.7, max_lon=-74.0)
+        
+        planned = await handler.handle(area)
+        route.start_route("van-1")
+        route.complete_stop("order-1")
+        index.track_route(route)
+        in_progress = await handler.handle(area)
+        route.complete_route()
+        index.track_route(route)
+        index.forget_route(str(far.id))
+        
+        assert [stop.order_id for stop in planned] == ["order-1", "order-2"]
+        assert [stop.order_id for stop in in_progress] == ["order-2"]
+        assert index.metrics()["stops"] == 0 and index.metrics()["busy"] == 0
+        with pytest.raises(ValueError, match="mínimo"):
+            await handler.handle(FindStopsInAreaQuery(min_lat=4.7, min_lon=-74.2, max_lat=4.5, max_lon=-74.0))
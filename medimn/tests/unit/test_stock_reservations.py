@@ -0,0 +1,277 @@
+"""
+Tests unitarios para las reservas de stock
+"""
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from product.infrastructure.repositories import (
+    ProductModel,
+    SQLAlchemyStockReservationRepository,
+    StockReservationModel,
+    upgrade_products_table
+)
+from product.infrastructure.reservation_sweeper import StockReservationSweeper
+from product.domain.entities import ReservationStatus
+from product.application.commands import ReserveStockCommand, ReleaseReservationCommand
+from product.application.queries import GetAvailableToPromiseQuery
+from product.application.handlers import (
+    ReserveStockCommandHandler,
+    ReleaseReservationCommandHandler,
+    GetAvailableToPromiseQueryHandler
+)
+from order.application.commands import ReserveOrderStockCommand, CancelOrderCommand, BulkCancelOrdersCommand
+from order.application.handlers import (
+    ReserveOrderStockCommandHandler,
+    CancelOrderCommandHandler,
+    BulkOrderTransitionCommandHandler
+)
+from order.domain.entities import Order, OrderItem, OrderStatus
+from order.infrastructure.repositories import SQLAlchemyOrderRepository
+
+
+def _add_products(db_session: Session, **stock_by_sku):
+    """Crear productos activos con el stock indicado"""
+    now = datetime.utcnow()
+    for sku_id, stock in stock_by_sku.items():
+        db_session.add(ProductModel(
+            id=sku_id, name=sku_id, price_minor=100, stock=stock, reserved=0,
+            is_active=True, created_at=now, updated_at=now
+        ))
+    db_session.commit()
+
+
+def _product(db_session: Session, sku_id: str) -> ProductModel:
+    """Leer el producto sin caché de la sesión"""
+    db_session.expire_all()
+    return db_session.get(ProductModel, sku_id)
+
+
+def _expires(minutes: int = 15) -> datetime:
+    return datetime.utcnow() + timedelta(minutes=minutes)
+
+
+@pytest.mark.unit
+class TestSQLAlchemyStockReservationRepository:
+    """Tests para SQLAlchemyStockReservationRepository"""
+    
+    @pytest.mark.asyncio
+    async def test_reserve_holds_stock_for_all_skus(self, db_session: Session):
+        """Test reservar retiene la cantidad de cada SKU"""
+        _add_products(db_session, A=10, B=5)
+        repo = SQLAlchemyStockReservationRepository(db_session)
+        
+        reservation = await repo.reserve({"A": 3, "B": 5}, _expires(), order_id="order-1")
+        
+        assert _product(db_session, "A").reserved == 3
+        assert _product(db_session, "B").reserved == 5
+        assert await repo.available_to_promise(["A", "B"]) == {"A": 7, "B": 0}
+        stored = await repo.find_by_id(reservation.reservation_id)
+        assert stored.lines == {"A": 3, "B": 5}
+        assert stored.order_id == "order-1"
+        assert stored.status == ReservationStatus.ACTIVE
+    
+    @pytest.mark.asyncio
+    async def test_reserve_is_all_or_nothing(self, db_session: Session):
+        """Test si un SKU no alcanza no se retiene ninguno"""
+        _add_products(db_session, A=10, B=1)
+        repo = SQLAlchemyStockReservationRepository(db_session)
+        
+        with pytest.raises(ValueError, match="B"):
+            await repo.reserve({"A": 3, "B": 2}, _expires())
+        
+        assert _product(db_session, "A").reserved == 0
+        assert db_session.query(StockReservationModel).count() == 0
+    
+    @pytest.mark.asyncio
+    async def test_release_and_commit(self, db_session: Session):
+        """Test liberar devuelve lo retenido y consumir descuenta el stock"""
+        _add_products(db_session, A=10)
+        repo = SQLAlchemyStockReservationRepository(db_session)
+        released = await repo.reserve({"A": 4}, _expires())
+        committed = await repo.reserve({"A": 6}, _expires())
+        
+        assert await repo.release(released.reservation_id) is True
+        assert await repo.release(released.reservation_id) is False
+        assert await repo.commit(committed.reservation_id) is True
+        
+        product = _product(db_session, "A")
+        assert (product.stock, product.reserved) == (4, 0)
+        assert (await repo.find_by_id(committed.reservation_id)).status == ReservationStatus.COMMITTED
+    
+    @pytest.mark.asyncio
+    async def test_sweeper_releases_expired_holds_in_batches(self, db_session: Session):
+        """Test el barrido libera solo las reservas vencidas"""
+        _add_products(db_session, A=100)
+        repo = SQLAlchemyStockReservationRepository(db_session)
+        for _ in range(5):
+            await repo.reserve({"A": 2}, _expires(-1))
+        active = await repo.reserve({"A": 7}, _expires())
+        
+        sweeper = StockReservationSweeper(
+            session_factory=sessionmaker(bind=db_session.get_bind()),
+            batch_size=2
+        )
+        
+        assert await sweeper.sweep_once() == 5
+        assert _product(db_session, "A").reserved == 7
+        assert (await repo.find_by_id(active.reservation_id)).status == ReservationStatus.ACTIVE
+        assert await sweeper.sweep_once() == 0
+    
+    @pytest.mark.asyncio
+    async def test_release_expired_counts_only_lines_it_closed(self, db_session: Session):
+        """Test una línea liberada por otro proceso entre la lectura y el UPDATE no se cuenta"""
+        _add_products(db_session, A=100)
+        repo = SQLAlchemyStockReservationRepository(db_session)
+        raced = await repo.reserve({"A": 2}, _expires(-1))
+        await repo.reserve({"A": 3}, _expires(-1))
+        engine = db_session.get_bind()
+        raced_lines = []
+        
+        def _release_first(conn, cursor, statement, parameters, context, executemany):
+            # Justo antes del UPDATE del barrido, otro proceso libera la primera reserva
+            if statement.startswith("UPDATE stock_reservations") and not raced_lines:
+                raced_lines.append(raced.reservation_id)
+                cursor.execute(
+                    "UPDATE stock_reservations SET status = ? WHERE reservation_id = ?",
+                    (ReservationStatus.RELEASED.value, raced.reservation_id)
+                )
+        
+        event.listen(engine, "before_cursor_execute", _release_first)
+        try:
+            expired = await repo.release_expired(datetime.utcnow())
+        finally:
+            event.remove(engine, "before_cursor_execute", _release_first)
+        
+        assert expired == 1
+        assert (await repo.find_by_id(raced.reservation_id)).status == ReservationStatus.RELEASED
+    
+    @pytest.mark.asyncio
+    async def test_migration_adds_reserved_to_existing_products_table(self, db_session: Session):
+        """Test la migración agrega reserved a una tabla products creada antes de las reservas"""
+        bind = db_session.get_bind()
+        db_session.execute(text("ALTER TABLE products DROP COLUMN reserved"))
+        db_session.commit()
+        
+        upgrade_products_table(bind)
+        upgrade_products_table(bind)
+        
+        assert "reserved" in {column["name"] for column in inspect(bind).get_columns("products")}
+        _add_products(db_session, A=10)
+        await SQLAlchemyStockReservationRepository(db_session).reserve({"A": 4}, _expires())
+        assert _product(db_session, "A").reserved == 4
+
+
+@pytest.mark.unit
+class TestStockReservationHandlers:
+    """Tests para los handlers de reservas de stock"""
+    
+    @pytest.mark.asyncio
+    async def test_reserve_merges_lines_and_applies_ttl(self):
+        """Test las líneas del mismo SKU se agrupan y se aplica la vigencia"""
+        repo = Mock()
+        repo.reserve = AsyncMock()
+        handler = ReserveStockCommandHandler(repo, default_ttl=timedelta(minutes=5))
+        
+        await handler.handle(ReserveStockCommand(lines=[
+            {"skuId": "A", "qty": 1},
+            {"skuId": "A", "qty": 2},
+            {"skuId": "B", "qty": 1}
+        ]))
+        
+        lines = repo.reserve.call_args.args[0]
+        expires_at = repo.reserve.call_args.kwargs["expires_at"]
+        assert lines == {"A": 3, "B": 1}
+        assert timedelta(minutes=4) < expires_at - datetime.utcnow() <= timedelta(minutes=5)
+    
+    @pytest.mark.asyncio
+    async def test_reserve_invalid_qty(self):
+        """Test cantidad inválida"""
+        handler = ReserveStockCommandHandler(Mock())
+        
+        with pytest.raises(ValueError):
+            await handler.handle(ReserveStockCommand(lines=[{"skuId": "A", "qty": 0}]))
+    
+    @pytest.mark.asyncio
+    async def test_release_unknown_reservation(self):
+        """Test liberar una reserva inexistente"""
+        repo = Mock()
+        repo.release = AsyncMock(return_value=False)
+        
+        with pytest.raises(ValueError, match="no encontrada"):
+            await ReleaseReservationCommandHandler(repo).handle(ReleaseReservationCommand(reservation_id="x"))
+    
+    @pytest.mark.asyncio
+    async def test_available_to_promise_defaults_to_zero(self):
+        """Test SKUs inexistentes reportan 0 disponible"""
+        repo = Mock()
+        repo.available_to_promise = AsyncMock(return_value={"A": 4})
+        
+        result = await GetAvailableToPromiseQueryHandler(repo).handle(
+            GetAvailableToPromiseQuery(sku_ids=["A", "missing"])
+        )
+        
+        assert result == {"A": 4, "missing": 0}
+
+
+@pytest.mark.unit
+class TestOrderStockReservation:
+    """Tests para la reserva de stock desde órdenes"""
+    
+    @pytest.mark.asyncio
+    async def test_reserve_order_stock_records_reservation(self):
+        """Test reservar el stock de una orden guarda el ID de la reserva"""
+        order = Order.create(items=[OrderItem(sku_id="A", qty=2, price=1.0)])
+        repo = Mock()
+        repo.find_by_id = AsyncMock(return_value=order)
+        repo.save = AsyncMock(side_effect=lambda saved: saved)
+        adapter = Mock()
+        adapter.reserve_stock = AsyncMock(return_value="res-1")
+        
+        result = await ReserveOrderStockCommandHandler(repo, adapter).handle(
+            ReserveOrderStockCommand(order_id=str(order.id))
+        )
+        
+        assert result.reservations == ["res-1"]
+        adapter.reserve_stock.assert_awaited_once_with([{"skuId": "A", "qty": 2}], order_id=str(order.id))
+    
+    @pytest.mark.asyncio
+    async def test_cancel_order_releases_reservations(self):
+        """Test cancelar una orden libera su stock retenido"""
+        order = Order.create(items=[OrderItem(sku_id="A", qty=2, price=1.0)], reservations=["res-1"])
+        repo = Mock()
+        repo.find_by_id = AsyncMock(return_value=order)
+        repo.save = AsyncMock(side_effect=lambda saved: saved)
+        adapter = Mock()
+        adapter.release_reservation = AsyncMock(return_value=True)
+        
+        result = await CancelOrderCommandHandler(repo, adapter).handle(
+            CancelOrderCommand(order_id=str(order.id))
+        )
+        
+        assert result.status == OrderStatus.CANCELLED
+        assert result.reservations == []
+        adapter.release_reservation.assert_awaited_once_with("res-1")
+    
+    @pytest.mark.asyncio
+    async def test_bulk_cancel_releases_reservations(self, db_session: Session):
+        """Test cancelar en lote libera el stock retenido de las órdenes canceladas"""
+        repo = SQLAlchemyOrderRepository(db_session)
+        held = await repo.save(Order.create(items=[OrderItem(sku_id="A", qty=1, price=1.0)], reservations=["res-1", "res-2"]))
+        free = await repo.save(Order.create(items=[OrderItem(sku_id="A", qty=1, price=1.0)]))
+        shipped = await repo.save(Order.create(
+            items=[OrderItem(sku_id="A", qty=1, price=1.0)], reservations=["res-3"], status=OrderStatus.SHIPPED
+        ))
+        adapter = Mock()
+        adapter.release_reservation = AsyncMock(return_value=True)
+        
+        results = await BulkOrderTransitionCommandHandler(repo, adapter).handle(
+            BulkCancelOrdersCommand(order_ids=[str(held.id), str(free.id), str(shipped.id)])
+        )
+        
+        assert [result.success for result in results] == [True, True, False]
+        assert sorted(call.args[0] for call in adapter.release_reservation.await_args_list) == ["res-1", "res-2"]
+        assert (await repo.find_by_id(held.id)).reservations == []
+        assert (await repo.find_by_id(shipped.id)).reservations == ["res-3"]
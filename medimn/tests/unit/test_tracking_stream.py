@@ -0,0 +1,129 @@
+"""
+Tests unitarios para el seguimiento en vivo (reparto a suscriptores SSE/WebSocket)
+"""
+import pytest
+import json
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock
+
+from logistics.application.commands import IngestPositionsCommand, StartRouteCommand
+from logistics.application.handlers import (
+    IngestPositionsCommandHandler, OpenTrackingStreamQueryHandler, StartRouteCommandHandler
+)
+from logistics.application.queries import OpenTrackingStreamQuery
+from logistics.domain.entities import Route, RouteStatus, Stop, TrackingUpdate
+from logistics.infrastructure.tracking import PositionRingBuffers, TrackingBroadcaster, TrackingSubscription
+
+START = datetime(2026, 3, 2, 8, 0)
+
+
+def _positions(vehicle_id: str, *seconds):
+    return [
+        {"vehicleId": vehicle_id, "lat": 4.6 + second * 1e-4, "lon": -74.1, "ts": START + timedelta(seconds=second)}
+        for second in seconds
+    ]
+
+
+@pytest.mark.unit
+class TestTrackingSubscription:
+    """Tests para TrackingSubscription"""
+    
+    @pytest.mark.asyncio
+    async def test_coalesces_by_key_and_bounds_queue(self):
+        """Test un cambio reemplaza al pendiente de su clave y se descarta la clave más vieja al llenarse"""
+        subscription = TrackingSubscription(["v1"], [], [], max_pending=2)
+        subscription.offer(TrackingUpdate("position", "position:v1", "1"))
+        subscription.offer(TrackingUpdate("position", "position:v1", "2"))
+        subscription.offer(TrackingUpdate("position", "position:v2", "3"))
+        subscription.offer(TrackingUpdate("position", "position:v3", "4"))
+        
+        updates = await subscription.next_updates(timeout=0.1)
+        
+        assert [update.data for update in updates] == ["3", "4"]
+        assert (subscription.coalesced, subscription.dropped, subscription.delivered) == (1, 1, 2)
+        assert await subscription.next_updates(timeout=0.01) == []
+
+
+@pytest.mark.unit
+class TestTrackingBroadcaster:
+    """Tests para TrackingBroadcaster"""
+    
+    @pytest.mark.asyncio
+    async def test_routes_positions_to_vehicle_route_and_vendor_subscribers(self):
+        """Test la posición llega a quien sigue el vehículo, su ruta o su vendedor, y a nadie más"""
+        buffers = PositionRingBuffers()
+        feed = TrackingBroadcaster(buffers)
+        route = Route.create(stops=[Stop("order-1")], vehicle_id="van-1", vendor_id="vendor-1")
+        feed.track_route(route)
+        by_vehicle = feed.subscribe(vehicle_ids=["van-1"])
+        by_route = feed.subscribe(route_ids=[str(route.id)])
+        by_vendor = feed.subscribe(vendor_ids=["vendor-1"])
+        other = feed.subscribe(vehicle_ids=["van-2"])
+        for subscription in (by_route, by_vendor):
+            # Al suscribirse reciben el estado actual de la ruta
+            assert [update.kind for update in await subscription.next_updates(0.01)] == ["route"]
+        
+        await IngestPositionsCommandHandler(buffers, feed).handle(IngestPositionsCommand(
+            positions=_positions("van-1", 0, 1) + _positions("van-3", 0)
+        ))
+        
+        for subscription in (by_vehicle, by_route, by_vendor):
+            updates = await subscription.next_updates(0.01)
+            assert len(updates) == 1
+            data = json.loads(updates[0].data)
+            assert data["vehicleId"] == "van-1" and data["routeId"] == str(route.id)
+        assert other.pending == 0
+        assert feed.metrics()["published"] == 1
+        assert feed.metrics()["offered"] == 3
+    
+    @pytest.mark.asyncio
+    async def test_snapshot_route_updates_and_unsubscribe(self):
+        """Test el suscriptor recibe la última posición al entrar, los cambios de la ruta y nada tras salir"""
+        buffers = PositionRingBuffers()
+        buffers.append_many(["van-1"], [4.6], [-74.1], [START])
+        feed = TrackingBroadcaster(buffers)
+        route = Route.create(stops=[Stop("order-1")], vehicle_id="van-1")
+        repo = Mock()
+        repo.find_by_id = AsyncMock(return_value=route)
+        repo.save = AsyncMock(side_effect=lambda saved: saved)
+        feed.track_route(route)
+        subscription = feed.subscribe(vehicle_ids=["van-1"])
+        
+        snapshot = await subscription.next_updates(0.01)
+        await StartRouteCommandHandler(repo, feed).handle(StartRouteCommand(route_id=str(route.id), vehicle_id="van-1"))
+        started = await subscription.next_updates(0.01)
+        feed.unsubscribe(subscription)
+        feed.positions_updated(["van-1"])
+        
+        assert [update.kind for update in snapshot] == ["position"]
+        assert json.loads(started[0].data)["status"] == RouteStatus.IN_PROGRESS.value
+        assert subscription.pending == 0
+        assert feed.metrics()["subscribers"] == 0
+
+
+@pytest.mark.unit
+class TestOpenTrackingStreamQueryHandler:
+    """Tests para OpenTrackingStreamQueryHandler"""
+    
+    @pytest.mark.asyncio
+    async def test_tracks_vendor_routes_and_validates(self):
+        """Test asocia las rutas activas del vendedor; sin filtros o con ruta inexistente falla"""
+        route = Route.create(stops=[Stop("order-1")], vehicle_id="van-1", vendor_id="vendor-1")
+        foreign = Route.create(stops=[Stop("order-2")], vehicle_id="van-2", vendor_id="vendor-2")
+        repo = Mock()
+        repo.find_by_status = AsyncMock(side_effect=lambda status: [route, foreign] if status == RouteStatus.PLANNED else [])
+        repo.find_by_id = AsyncMock(return_value=None)
+        factory = Mock()
+        factory.return_value.__enter__ = Mock(return_value=repo)
+        factory.return_value.__exit__ = Mock(return_value=False)
+        feed = TrackingBroadcaster(PositionRingBuffers())
+        handler = OpenTrackingStreamQueryHandler(factory, feed)
+        
+        subscription = await handler.handle(OpenTrackingStreamQuery(vendor_ids=["vendor-1"]))
+        
+        assert [update.kind for update in await subscription.next_updates(0.01)] == ["route"]
+        assert feed._vehicle_routes == {"van-1": str(route.id)}
+        with pytest.raises(ValueError, match="al menos"):
+            await handler.handle(OpenTrackingStreamQuery())
+        with pytest.raises(ValueError, match="no encontrada"):
+            await handler.handle(OpenTrackingStreamQuery(route_ids=["missing"]))
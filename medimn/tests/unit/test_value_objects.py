@@ -2,7 +2,8 @@
 Tests unitarios para Value Objects
 """
 import pytest
-from shared.domain.value_objects import EntityId, Email, Money
+from shared.domain.value_objects import EntityId, Email, Money, enum_lookup
+from order.domain.entities import Order, OrderItem, OrderStatus
 from auth.domain.value_objects import Username, HashedPassword, FullName, PhoneNumber, UserRole, Address, InstitutionName
 from product.domain.value_objects import ProductName, ProductDescription, Stock, Lot, Warehouse, Supplier, Category, VendorId
 
@@ -74,6 +75,34 @@ class TestMoney:
         
         with pytest.raises(ValueError, match="monedas diferentes"):
             money1 + money2
+    
+    def test_money_minor_units_are_exact(self):
+        """Test Money guarda centavos enteros con redondeo half-up"""
+        assert Money(1.005).minor_units == 101
+        assert Money(0.1) + Money(0.2) == Money(0.3)
+        assert Money.from_minor(12345).amount == 123.45
+        assert str(Money(7, "JPY")) == "7 JPY"
+        assert Money(7, "JPY").minor_units == 7
+    
+    def test_order_totals_use_integer_tax(self):
+        """Test totales de la orden en centavos con IVA redondeado"""
+        order = Order.create(items=[OrderItem(sku_id="A", qty=3, price=0.1)])
+        
+        assert order.items[0].subtotal_minor == 30
+        assert order.total_minor == 35
+        assert order.totals == {"subtotal": 0.3, "tax": 0.05, "shipping": 0.0, "grandTotal": 0.35}
+    
+    def test_order_uses_currency_of_its_items(self):
+        """Test la orden toma la moneda de sus artículos y rechaza mezclar monedas"""
+        order = Order.create(items=[OrderItem(sku_id="A", qty=2, price=1500, currency="CLP")])
+        
+        assert order.currency == "CLP"
+        assert order.items[0].price_minor == 1500
+        assert order.totals["subtotal"] == 3000
+        with pytest.raises(ValueError, match="misma moneda"):
+            Order.create(items=[OrderItem("A", 1, 1.0), OrderItem("B", 1, 1500, currency="CLP")])
+        with pytest.raises(ValueError, match="moneda del pedido"):
+            order.add_item(OrderItem("B", 1, 1.0))
 
 
 @pytest.mark.unit
@@ -120,3 +149,35 @@ class TestStock:
         with pytest.raises(ValueError):
             Stock(-1)
 
+
+@pytest.mark.unit
+class TestInternedValueObjects:
+    """Tests para los value objects compartidos por valor"""
+    
+    def test_of_returns_shared_instance(self):
+        """Test el mismo valor retorna la misma instancia, por clase"""
+        assert Category.of("Analgésicos") is Category.of("Analgésicos")
+        assert Category.of("Analgésicos") == Category("Analgésicos")
+        assert Warehouse.of("Analgésicos") is not Category.of("Analgésicos")
+        assert UserRole.of("vendor") is UserRole.of("vendor")
+    
+    def test_of_with_several_arguments(self):
+        """Test la clave incluye todos los argumentos"""
+        assert Money.of(10.0, "USD") is Money.of(10.0, "USD")
+        assert Money.of(10.0, "COP").currency == "COP"
+    
+    def test_of_validates_and_does_not_cache_invalid_values(self):
+        """Test un valor inválido falla siempre"""
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                UserRole.of("admin")
+        assert ("admin",) not in UserRole._interned
+    
+    def test_enum_lookup(self):
+        """Test búsqueda de estados por valor"""
+        lookup = enum_lookup(OrderStatus)
+        
+        assert lookup("SHIPPED") is OrderStatus.SHIPPED
+        with pytest.raises(ValueError):
+            lookup("LOST")
+
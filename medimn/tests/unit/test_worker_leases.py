@@ -0,0 +1,47 @@
+"""
+Tests unitarios para las concesiones entre workers
+"""
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import update
+
+from shared.infrastructure.leases import WorkerLease, WorkerLeaseModel
+
+
+@pytest.mark.unit
+class TestWorkerLease:
+    """Tests para WorkerLease"""
+    
+    def test_one_holder_at_a_time(self, session_factory):
+        """Test solo un worker tiene la concesión y la renueva en cada vuelta"""
+        first = WorkerLease("eta_engine", timedelta(seconds=60), session_factory, holder="worker-1")
+        second = WorkerLease("eta_engine", timedelta(seconds=60), session_factory, holder="worker-2")
+        
+        assert first.acquire() is True
+        assert second.acquire() is False
+        assert first.acquire() is True
+        assert WorkerLease("otra", timedelta(seconds=60), session_factory, holder="worker-2").acquire() is True
+    
+    def test_expired_lease_is_taken_over(self, session_factory):
+        """Test si el worker que la tenía deja de renovarla otro la toma al vencer"""
+        first = WorkerLease("eta_engine", timedelta(seconds=60), session_factory, holder="worker-1")
+        second = WorkerLease("eta_engine", timedelta(seconds=60), session_factory, holder="worker-2")
+        first.acquire()
+        session = session_factory()
+        session.execute(update(WorkerLeaseModel).values(locked_until=datetime.utcnow() - timedelta(seconds=1)))
+        session.commit()
+        session.close()
+        
+        assert second.acquire() is True
+        assert first.acquire() is False
+    
+    def test_release_lets_another_worker_take_it(self, session_factory):
+        """Test al soltarla otro worker la toma sin esperar a que venza"""
+        first = WorkerLease("eta_engine", timedelta(seconds=60), session_factory, holder="worker-1")
+        second = WorkerLease("eta_engine", timedelta(seconds=60), session_factory, holder="worker-2")
+        first.acquire()
+        
+        second.release()
+        assert second.acquire() is False
+        first.release()
+        assert second.acquire() is True